@@ -1,10 +1,25 @@
 import os
+from sqlalchemy import inspect, text
 from modules.utils.db import DBConnect
 from modules.summarizer.models import SummarizerConfig, SummaryLog
 import logging
 
 logger = logging.getLogger(__name__)
 
+def add_missing_columns(engine, table):
+    """Add columns defined on the model but missing from an existing table (create_all doesn't)"""
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    with engine.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
 def run_migration():
     """Create the summarizer tables if they don't exist"""
     # Make sure data directory exists
@@ -18,6 +33,7 @@ def run_migration():
         # Create the tables
         SummarizerConfig.__table__.create(db_connect.engine, checkfirst=True)
         SummaryLog.__table__.create(db_connect.engine, checkfirst=True)
+        add_missing_columns(db_connect.engine, SummaryLog.__table__)
         
         # Check if we need to create a default config
         config = db.query(SummarizerConfig).first()
@@ -126,9 +126,10 @@ def sync_organization_calendar(org_prefix):
                 logger.warning(f"Organization with prefix '{org_prefix}' not found or inactive")
                 return jsonify({"status": "error", "message": "Organization not found"}), 404
 
-            # Sync using multi-org service
+            # Sync using multi-org service; ?full=true skips the incremental Notion fetch
+            full_sync = request.args.get("full", "false").lower() == "true"
             sync_result = current_app.multi_org_calendar_service.sync_organization_notion_to_google(
-                org.id, transaction
+                org.id, transaction, full_sync=full_sync
             )
 
             if sync_result.get("status") == "error":
@@ -1,5 +1,6 @@
 # modules/calendar/clients.py
 import logging
+from datetime import datetime
 from typing import List, Dict, Optional, Any, Tuple
 
 from google.oauth2 import service_account
@@ -15,7 +16,7 @@ from shared import config, notion as notion_shared_client, logger
 
 # Import custom modules
 from .errors import APIErrorHandler
-from .utils import batch_operation, operation_span
+from .utils import ApiLimiter, BatchRequest, batch_operation, execute_batch, operation_span
 
 # If logger is not in shared, initialize it here:
 # logger = logging.getLogger(__name__)
@@ -25,10 +26,17 @@ class GoogleCalendarClient:
 
     SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/calendar.events']
 
-    def __init__(self, logger_instance=None):
+    def __init__(self, logger_instance=None, limiter: Optional[ApiLimiter] = None):
         self.logger = logger_instance or logger # Use shared logger by default
         self._service: Optional[Resource] = None # Type hint for service
         self.error_handler = APIErrorHandler(self.logger, "GoogleCalendarClient")
+        # Shared by every client of a concurrent sync; the default only counts calls
+        self.limiter = limiter or ApiLimiter("google")
+
+    def _execute(self, request) -> Any:
+        """Execute a Google API request within the client's concurrency and rate limits."""
+        with self.limiter.limit():
+            return request.execute()
 
     def get_service(self, parent_transaction=None) -> Optional[Resource]: # Accept parent transaction
         """Get authenticated Google Calendar service with error handling."""
@@ -79,8 +87,12 @@ class GoogleCalendarClient:
                 self.error_handler.transaction = None # Clear transaction from handler if it was set
 
 
-    def create_event(self, calendar_id: str, event_data: Dict, notion_page_id: str, parent_transaction=None) -> Optional[Tuple[str, str]]: # Accept parent transaction
-       """Create calendar event with error handling. Returns (jump_url, gcal_event_id) or None."""
+    def create_event(self, calendar_id: str, event_data: Dict, notion_page_id: str, parent_transaction=None) -> Optional[Tuple[Optional[str], str]]: # Accept parent transaction
+       """Create calendar event with error handling.
+
+       Returns (jump_url, gcal_event_id), in that order, or None on error. jump_url is the
+       event's htmlLink and may be None.
+       """
        op_name = "create_event"
        self.error_handler.operation_name = op_name
 
@@ -93,12 +105,8 @@ class GoogleCalendarClient:
                 self.logger.error(f"{op_name}: Failed to get Google Calendar service.")
                 return None # Service initialization failed
 
-            # Add extended properties to store Notion ID
-            event_data['extendedProperties'] = {
-                'private': {
-                    'notionPageId': notion_page_id
-                }
-            }
+            # Add extended properties to store Notion ID (keeping any others, like the content hash)
+            self._with_notion_page_id(event_data, notion_page_id)
 
             context_data = {
                 "calendar_id": calendar_id,
@@ -110,10 +118,10 @@ class GoogleCalendarClient:
             try:
                 with operation_span(transaction, op="api_call", description="events.insert", logger=self.logger) as span:
                     self.logger.debug(f"Attempting to create Google Calendar event for Notion ID {notion_page_id} with data: {event_data}")
-                    created_event = service.events().insert(
+                    created_event = self._execute(service.events().insert(
                         calendarId=calendar_id,
                         body=event_data
-                    ).execute()
+                    ))
 
                     gcal_event_id = created_event['id']
                     jump_url = created_event.get('htmlLink')
@@ -124,7 +132,7 @@ class GoogleCalendarClient:
                     })
 
                     self.logger.info(f"Created Google Calendar event: {gcal_event_id} for Notion page: {notion_page_id}")
-                    return jump_url, gcal_event_id # Return both URL and ID
+                    return jump_url, gcal_event_id # URL first, then ID
 
             except HttpError as e:
                 return self.error_handler.handle_http_error(e, context_data)
@@ -166,11 +174,11 @@ class GoogleCalendarClient:
             try:
                 with operation_span(transaction, op="api_call", description="events.update", logger=self.logger) as span:
                     self.logger.debug(f"Attempting to update Google Calendar event {event_id} for Notion ID {notion_page_id} with data: {event_data}")
-                    updated_event = service.events().update(
+                    updated_event = self._execute(service.events().update(
                         calendarId=calendar_id,
                         eventId=event_id,
                         body=event_data
-                    ).execute()
+                    ))
 
                     jump_url = updated_event.get('htmlLink')
                     span.set_data("event_details", {
@@ -213,14 +221,14 @@ class GoogleCalendarClient:
             try:
                 while True:
                     with operation_span(transaction, op="list_page", description="events.list page", logger=self.logger) as span:
-                        events_result = service.events().list(
+                        events_result = self._execute(service.events().list(
                             calendarId=calendar_id,
                             singleEvents=True, # Expand recurring events
                             showDeleted=False, # Don't include deleted events
                             pageToken=page_token,
                             timeMin=time_min,
                             maxResults=250 # Fetch in batches
-                        ).execute()
+                        ))
 
                         items = events_result.get('items', [])
                         all_events.extend(items)
@@ -244,6 +252,74 @@ class GoogleCalendarClient:
                 self.error_handler.transaction = None # Clear transaction from handler if it was set
 
 
+    def sync_events(self, calendar_id: str, sync_token: Optional[str] = None, parent_transaction=None) -> Optional[Tuple[List[Dict], Optional[str], bool]]:
+        """List events changed since sync_token, or every event without one.
+
+        Incremental listings include deleted events (status "cancelled"). An expired
+        token (410 Gone) falls back to a full listing. Returns (events, next_sync_token,
+        full) or None on error; full is True when every event was listed.
+        """
+        op_name = "sync_events"
+        self.error_handler.operation_name = op_name
+
+        current_transaction = parent_transaction or start_transaction(op="google", name=f"{op_name}_independent")
+
+        with operation_span(current_transaction, op="google_api", description=op_name, logger=self.logger) as transaction:
+            self.error_handler.transaction = transaction
+            service = self.get_service(parent_transaction=transaction)
+            if not service:
+                self.logger.error(f"{op_name}: Failed to get Google Calendar service.")
+                return None
+
+            events = []
+            page_token = None
+            context_data = {"calendar_id": calendar_id, "incremental": bool(sync_token)}
+            set_context("gcal_event_sync", context_data)
+            self.logger.info(f"Listing {'changed' if sync_token else 'all'} events from calendar {calendar_id}.")
+
+            try:
+                while True:
+                    with operation_span(transaction, op="list_page", description="events.list page", logger=self.logger) as span:
+                        # syncToken can't be combined with timeMin, and must keep the singleEvents setting it was issued with
+                        list_params = {"calendarId": calendar_id, "singleEvents": True, "pageToken": page_token, "maxResults": 250}
+                        if sync_token:
+                            list_params["syncToken"] = sync_token
+                        try:
+                            events_result = self._execute(service.events().list(**list_params))
+                        except HttpError as e:
+                            if e.resp.status != 410 or not sync_token:
+                                raise
+                            self.logger.warning(f"Sync token for calendar {calendar_id} expired (410 Gone); listing all events.")
+                            span.set_data("sync_token_expired", True)
+                            sync_token = None
+                            events = []
+                            page_token = None
+                            context_data["incremental"] = False
+                            continue
+
+                        items = events_result.get('items', [])
+                        events.extend(items)
+                        page_token = events_result.get('nextPageToken')
+
+                        span.set_data("page_event_count", len(items))
+                        span.set_data("has_next_page", bool(page_token))
+
+                        if not page_token:
+                            break
+
+                self.logger.info(f"Listed {len(events)} {'changed ' if sync_token else ''}events from Google Calendar {calendar_id}.")
+                transaction.set_data("listed_events", len(events))
+                transaction.set_data("incremental", bool(sync_token))
+                return events, events_result.get('nextSyncToken'), not sync_token
+
+            except HttpError as e:
+                return self.error_handler.handle_http_error(e, context_data)
+            except Exception as e:
+                return self.error_handler.handle_generic_error(e, context_data)
+            finally:
+                self.error_handler.transaction = None
+
+
     def batch_delete_events(self, calendar_id: str, event_ids: List[str], description: str = "batch_delete", parent_transaction=None) -> Tuple[int, int]: # Accept parent transaction
         """Delete events in batches using the utility function."""
         op_name = f"batch_delete_{description}"
@@ -274,7 +350,8 @@ class GoogleCalendarClient:
                 items=event_ids,
                 calendar_id=calendar_id,
                 description=description,
-                parent_transaction=transaction # Pass transaction to batch_operation
+                parent_transaction=transaction, # Pass transaction to batch_operation
+                limiter=self.limiter
             )
             transaction.set_data("successful_deletions", successful)
             transaction.set_data("failed_deletions", failed)
@@ -283,6 +360,54 @@ class GoogleCalendarClient:
             return successful, failed
 
 
+    @staticmethod
+    def _with_notion_page_id(event_data: Dict, notion_page_id: str) -> Dict:
+        """Set the Notion page ID in the event's private extended properties, keeping any others."""
+        event_data.setdefault('extendedProperties', {}).setdefault('private', {})['notionPageId'] = notion_page_id
+        return event_data
+
+    def insert_event_request(self, request_id: str, calendar_id: str, event_data: Dict, notion_page_id: str, callback=None) -> BatchRequest:
+        """Batch request creating an event; the callback's response is the created event."""
+        body = self._with_notion_page_id(event_data, notion_page_id)
+        return BatchRequest(request_id, lambda s: s.events().insert(calendarId=calendar_id, body=body), callback)
+
+    def update_event_request(self, request_id: str, calendar_id: str, event_id: str, event_data: Dict, notion_page_id: str, callback=None) -> BatchRequest:
+        """Batch request replacing an event (events.update, so removed fields are cleared)."""
+        body = self._with_notion_page_id(event_data, notion_page_id)
+        return BatchRequest(request_id, lambda s: s.events().update(calendarId=calendar_id, eventId=event_id, body=body), callback)
+
+    def patch_event_request(self, request_id: str, calendar_id: str, event_id: str, fields: Dict, callback=None) -> BatchRequest:
+        """Batch request changing only the given fields of an event."""
+        return BatchRequest(request_id, lambda s: s.events().patch(calendarId=calendar_id, eventId=event_id, body=fields), callback)
+
+    def delete_event_request(self, request_id: str, calendar_id: str, event_id: str, callback=None) -> BatchRequest:
+        """Batch request deleting an event."""
+        return BatchRequest(request_id, lambda s: s.events().delete(calendarId=calendar_id, eventId=event_id), callback)
+
+    def execute_batch(self, requests: List[BatchRequest], description: str = "batch_write", parent_transaction=None) -> Tuple[int, int]:
+        """Execute insert/update/patch/delete requests through the HTTP batch API, retrying failed sub-requests."""
+        op_name = f"batch_{description}"
+        self.error_handler.operation_name = op_name
+
+        current_transaction = parent_transaction or start_transaction(op="google", name=f"{op_name}_independent")
+
+        service = self.get_service(parent_transaction=current_transaction)
+        if not service:
+            self.logger.error(f"{op_name}: Failed to get Google Calendar service.")
+            error = RuntimeError("Google Calendar service unavailable")
+            for request in requests:
+                if request.callback:
+                    request.callback(request.request_id, None, error)
+            return 0, len(requests)
+
+        with operation_span(current_transaction, op="google_batch", description=op_name, logger=self.logger) as transaction:
+            successful, failed = execute_batch(service, requests, description=description, limiter=self.limiter)
+            transaction.set_data("successful_requests", successful)
+            transaction.set_data("failed_requests", failed)
+            transaction.set_data("total_attempted", len(requests))
+            return successful, failed
+
+
     def create_calendar(self, calendar_name: str, description: str = None, timezone: str = "America/Phoenix", parent_transaction=None) -> Optional[Dict]:
         """Create a new Google Calendar with error handling."""
         op_name = "create_calendar"
@@ -307,7 +432,7 @@ class GoogleCalendarClient:
                 
             try:
                 with operation_span(transaction, op="api_call", description="calendars.insert", logger=self.logger) as span:
-                    created_calendar = service.calendars().insert(body=calendar_body).execute()
+                    created_calendar = self._execute(service.calendars().insert(body=calendar_body))
                     
                     calendar_id = created_calendar['id']
                     span.set_data("calendar_details", {
@@ -340,7 +465,7 @@ class GoogleCalendarClient:
                 
             try:
                 with operation_span(transaction, op="api_call", description="calendars.get", logger=self.logger) as span:
-                    calendar = service.calendars().get(calendarId=calendar_id).execute()
+                    calendar = self._execute(service.calendars().get(calendarId=calendar_id))
                     span.set_data("calendar_id", calendar_id)
                     return calendar
                     
@@ -365,7 +490,7 @@ class GoogleCalendarClient:
                 
             try:
                 with operation_span(transaction, op="api_call", description="calendarList.list", logger=self.logger) as span:
-                    calendar_list = service.calendarList().list().execute()
+                    calendar_list = self._execute(service.calendarList().list())
                     calendars = calendar_list.get('items', [])
                     span.set_data("calendar_count", len(calendars))
                     return calendars
@@ -391,7 +516,7 @@ class GoogleCalendarClient:
                 
             try:
                 with operation_span(transaction, op="api_call", description="calendars.delete", logger=self.logger) as span:
-                    service.calendars().delete(calendarId=calendar_id).execute()
+                    self._execute(service.calendars().delete(calendarId=calendar_id))
                     span.set_data("calendar_id", calendar_id)
                     self.logger.warning(f"Successfully deleted calendar: {calendar_id}")
                     return True
@@ -405,13 +530,24 @@ class GoogleCalendarClient:
 class NotionCalendarClient:
     """Client for Notion calendar-related operations."""
 
-    def __init__(self, logger_instance=None):
+    def __init__(self, logger_instance=None, limiter: Optional[ApiLimiter] = None):
         self.logger = logger_instance or logger # Use shared logger by default
         self.notion: NotionClient = notion_shared_client # Use shared Notion client instance
         self.error_handler = APIErrorHandler(self.logger, "NotionCalendarClient")
+        # Shared by every client of a concurrent sync; the default only counts calls
+        self.limiter = limiter or ApiLimiter("notion")
+
+    def _query_database(self, **kwargs) -> Dict:
+        """One page of databases.query within the client's concurrency and rate limits."""
+        with self.limiter.limit():
+            return self.notion.databases.query(**kwargs)
 
-    def fetch_events(self, database_id: str, parent_transaction=None) -> Optional[List[Dict]]: # Accept parent transaction
-        """Fetch published events from Notion with pagination and error handling."""
+    def fetch_events(self, database_id: str, parent_transaction=None, edited_after: Optional[datetime] = None) -> Optional[List[Dict]]: # Accept parent transaction
+        """Fetch published events from Notion with pagination and error handling.
+
+        With edited_after (naive UTC), fetch every page edited on or after it instead,
+        published or not, so unpublished pages can be dropped from the snapshot.
+        """
         op_name = "fetch_notion_events"
         self.error_handler.operation_name = op_name
 
@@ -419,23 +555,34 @@ class NotionCalendarClient:
 
         with operation_span(current_transaction, op="notion_api", description=op_name, logger=self.logger) as transaction: # Use operation_span
             self.error_handler.transaction = transaction
-            context_data = {"database_id": database_id}
+            context_data = {"database_id": database_id, "edited_after": edited_after.isoformat() if edited_after else None}
             set_context("notion_query", context_data)
-            self.logger.info(f"Fetching all published Notion events from database {database_id} using pagination.")
 
             try:
-                # Define the filter - Fetch ALL published events
-                query_filter = {
-                    "property": "Published", # Make sure this property name is correct
-                    "checkbox": {
-                        "equals": True
+                if edited_after:
+                    # Notion rounds last_edited_time to the minute, so on_or_after may return
+                    # a few pages again; merging them into the snapshot is a no-op
+                    self.logger.info(f"Fetching Notion events edited since {edited_after.isoformat()}Z from database {database_id}.")
+                    query_filter = {
+                        "timestamp": "last_edited_time",
+                        "last_edited_time": {
+                            "on_or_after": edited_after.isoformat() + "Z"
+                        }
+                    }
+                else:
+                    self.logger.info(f"Fetching all published Notion events from database {database_id} using pagination.")
+                    # Define the filter - Fetch ALL published events
+                    query_filter = {
+                        "property": "Published", # Make sure this property name is correct
+                        "checkbox": {
+                            "equals": True
+                        }
                     }
-                }
 
                 # Use collect_paginated_api to handle pagination automatically
                 with operation_span(transaction, op="api_call", description="notion.databases.query", logger=self.logger) as span:
                     all_events = collect_paginated_api(
-                        self.notion.databases.query,
+                        self._query_database,
                         database_id=database_id,
                         filter=query_filter
                     )
@@ -493,10 +640,11 @@ class NotionCalendarClient:
 
             try:
                 with operation_span(transaction, op="api_call", description="notion.pages.update", logger=self.logger) as span:
-                    self.notion.pages.update(
-                        page_id=page_id,
-                        properties=properties_to_update
-                    )
+                    with self.limiter.limit():
+                        self.notion.pages.update(
+                            page_id=page_id,
+                            properties=properties_to_update
+                        )
                     span.set_data("update_success", True)
                     self.logger.info(f"Successfully updated Notion page {page_id} with GCAL ID {gcal_id}" + (f" and link {gcal_link}" if gcal_link else ""))
                     return True
@@ -0,0 +1,122 @@
+# modules/calendar/mirror.py
+"""
+Local mirror of the Google Calendar events managed by the Notion sync.
+
+Rather than listing a calendar's entire history on every sync, the sync lists
+only the events changed since the calendar's last ``nextSyncToken`` and
+applies them to the mirror:
+
+- A changed event with a ``notionPageId`` private extended property replaces
+  its stored copy.
+- A cancelled (deleted) event, or one without a ``notionPageId``, is dropped.
+
+The lookup of existing events is then built from the mirror. The first
+listing of a calendar, and any listing after Google answers 410 Gone for an
+expired token, lists every event and replaces the mirror.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from shared import logger
+from .models import GoogleCalendarSyncState, GoogleEventMirror
+
+
+def managed_notion_page_id(event: Dict) -> Optional[str]:
+    """Notion page ID of an event created by the sync, or None for other events"""
+    return event.get('extendedProperties', {}).get('private', {}).get('notionPageId')
+
+
+class GoogleEventMirrorStore:
+    """Sync tokens and mirrored managed events, one set per Google Calendar"""
+
+    def __init__(self, db_connect, logger_instance=None):
+        self.db_connect = db_connect
+        self.logger = logger_instance or logger
+
+    def sync_token(self, calendar_id: str) -> Optional[str]:
+        """Token to list the calendar's changes with, or None if it needs a full listing"""
+        db = next(self.db_connect.get_db())
+        try:
+            state = db.get(GoogleCalendarSyncState, calendar_id)
+            return state.sync_token if state else None
+        finally:
+            db.close()
+
+    def apply(self, calendar_id: str, events: List[Dict], next_sync_token: Optional[str], full: bool,
+              now: Optional[datetime] = None) -> List[Dict]:
+        """Apply a listing to the mirror and store its sync token
+
+        Returns:
+            Every mirrored managed event of the calendar after the update
+        """
+        now = now or datetime.utcnow()
+        db = next(self.db_connect.get_db())
+        try:
+            stored = {
+                row.gcal_event_id: row
+                for row in db.query(GoogleEventMirror).filter(GoogleEventMirror.google_calendar_id == calendar_id)
+            }
+            listed = set()
+            added = updated = removed = 0
+
+            for event in events:
+                gcal_id = event.get('id')
+                if not gcal_id:
+                    continue
+                listed.add(gcal_id)
+                notion_page_id = managed_notion_page_id(event)
+                row = stored.get(gcal_id)
+                if event.get('status') == 'cancelled' or not notion_page_id:
+                    if row is not None:
+                        # A listing can hold an event's creation and its deletion
+                        if row in db.new:
+                            db.expunge(row)
+                        else:
+                            db.delete(row)
+                        del stored[gcal_id]
+                        removed += 1
+                    continue
+                if row is None:
+                    row = GoogleEventMirror(google_calendar_id=calendar_id, gcal_event_id=gcal_id)
+                    db.add(row)
+                    stored[gcal_id] = row
+                    added += 1
+                else:
+                    updated += 1
+                row.notion_page_id = notion_page_id
+                row.event = event
+
+            if full:
+                for gcal_id in list(stored):
+                    if gcal_id not in listed:
+                        db.delete(stored.pop(gcal_id))
+                        removed += 1
+
+            state = db.get(GoogleCalendarSyncState, calendar_id)
+            if state is None:
+                state = GoogleCalendarSyncState(google_calendar_id=calendar_id)
+                db.add(state)
+            state.sync_token = next_sync_token
+            if full:
+                state.last_full_listing_at = now
+            db.commit()
+
+            self.logger.info(f"Google Calendar mirror for {calendar_id} ({'full' if full else 'incremental'} listing): "
+                             f"{added} added, {updated} updated, {removed} removed, {len(stored)} managed events.")
+            return [row.event for row in stored.values()]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def reset(self, calendar_id: str) -> None:
+        """Drop the calendar's sync token so the next sync lists every event"""
+        db = next(self.db_connect.get_db())
+        try:
+            state = db.get(GoogleCalendarSyncState, calendar_id)
+            if state is not None:
+                state.sync_token = None
+                db.commit()
+        finally:
+            db.close()
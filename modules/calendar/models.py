@@ -1,4 +1,6 @@
 # modules/calendar/models.py
+import json
+import hashlib
 import logging
 from datetime import datetime
 from dataclasses import dataclass, field # Added field
@@ -100,6 +102,11 @@ class CalendarEventDTO:
         # Remove keys with None values before returning
         return {k: v for k, v in gcal_event.items() if v is not None}
 
+    def content_hash(self) -> str:
+        """Deterministic hash of the Google Calendar payload, stored on the event to skip no-op updates."""
+        payload = json.dumps(self.to_gcal_format(), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
     def to_frontend_format(self) -> Dict[str, Any]:
         """Convert to a format suitable for frontend display."""
         start_val = self.start.get('dateTime', self.start.get('date'))
@@ -158,4 +165,67 @@ class CalendarEventLink(Base):
             "event_metadata": self.event_metadata,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+
+class CalendarSyncState(Base):
+    """Per-organization state of the incremental Notion fetch."""
+    __tablename__ = 'calendar_sync_state'
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True, autoincrement=False)
+    notion_database_id = Column(String(255), nullable=False)  # Database the snapshot was taken from
+    notion_edited_watermark = Column(DateTime, nullable=True)  # Highest Notion last_edited_time seen (UTC)
+    last_full_sync_at = Column(DateTime, nullable=True)  # Last full fetch that reconciled the snapshot (UTC)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CalendarSyncState(org_id={self.organization_id}, watermark={self.notion_edited_watermark})>"
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return {
+            "organization_id": self.organization_id,
+            "notion_database_id": self.notion_database_id,
+            "notion_edited_watermark": self.notion_edited_watermark.isoformat() if self.notion_edited_watermark else None,
+            "last_full_sync_at": self.last_full_sync_at.isoformat() if self.last_full_sync_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class NotionEventSnapshot(Base):
+    """Local copy of a published Notion event page, kept current by incremental fetches."""
+    __tablename__ = 'calendar_notion_snapshots'
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True, autoincrement=False)
+    notion_page_id = Column(String(255), primary_key=True)
+    last_edited_time = Column(DateTime, nullable=False)  # Notion last_edited_time of the stored copy (UTC)
+    page = Column(JSON, nullable=False)  # Raw Notion page object, as returned by databases.query
+
+    def __repr__(self):
+        return f"<NotionEventSnapshot(org_id={self.organization_id}, notion_id={self.notion_page_id})>"
+
+
+class GoogleCalendarSyncState(Base):
+    """Per-calendar sync token for incremental Google Calendar listings."""
+    __tablename__ = 'calendar_gcal_sync_state'
+
+    google_calendar_id = Column(String(255), primary_key=True)
+    sync_token = Column(Text, nullable=True)  # nextSyncToken of the last listing
+    last_full_listing_at = Column(DateTime, nullable=True)  # Last listing of every event (UTC)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GoogleCalendarSyncState(calendar_id={self.google_calendar_id}, has_token={bool(self.sync_token)})>"
+
+
+class GoogleEventMirror(Base):
+    """Local copy of a Google Calendar event created by the Notion sync."""
+    __tablename__ = 'calendar_gcal_events'
+
+    google_calendar_id = Column(String(255), primary_key=True)
+    gcal_event_id = Column(String(255), primary_key=True)
+    notion_page_id = Column(String(255), nullable=False, index=True)  # extendedProperties.private.notionPageId
+    event = Column(JSON, nullable=False)  # Raw event resource, as returned by events.list
+
+    def __repr__(self):
+        return f"<GoogleEventMirror(calendar_id={self.google_calendar_id}, gcal_id={self.gcal_event_id})>"
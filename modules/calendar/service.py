@@ -1,5 +1,9 @@
 # modules/calendar/service.py
+import os
+import copy
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime, timezone
 
@@ -11,14 +15,32 @@ from shared import config, logger, db_connect
 
 # Import custom modules
 from .clients import GoogleCalendarClient, NotionCalendarClient
-from .models import CalendarEventDTO
-from .utils import operation_span
+from .models import CalendarEventDTO, CalendarEventLink
+from .snapshot import NotionSnapshotStore
+from .mirror import GoogleEventMirrorStore
+from .utils import ApiLimiter, BatchRequest, operation_span
 from .errors import APIErrorHandler
 from googleapiclient.errors import HttpError
 
 # Import organization models
 from modules.organizations.models import Organization
 
+# Private extended property holding CalendarEventDTO.content_hash() of the last write
+CONTENT_HASH_PROPERTY = 'notionSyncHash'
+
+# Write created Google event IDs and links back to the Notion pages (one Notion call per created event)
+NOTION_WRITEBACK = os.environ.get("CALENDAR_NOTION_WRITEBACK", "false").lower() == "true"
+
+# Organizations synced at once by sync_all_organizations, and the limits their API calls share
+SYNC_WORKERS = int(os.environ.get("CALENDAR_SYNC_WORKERS", 4))
+GOOGLE_MAX_CONCURRENT = int(os.environ.get("CALENDAR_GOOGLE_MAX_CONCURRENT", 4))
+GOOGLE_REQUESTS_PER_SECOND = float(os.environ.get("CALENDAR_GOOGLE_REQUESTS_PER_SECOND", 10))
+NOTION_MAX_CONCURRENT = int(os.environ.get("CALENDAR_NOTION_MAX_CONCURRENT", 2))
+NOTION_REQUESTS_PER_SECOND = float(os.environ.get("CALENDAR_NOTION_REQUESTS_PER_SECOND", 3))
+
+# Per-run event counts reported by update_organization_google_calendar
+EVENT_COUNT_KEYS = ("created", "updated", "unchanged", "failed", "deleted", "delete_failed")
+
 # Create a global cache for the frontend events with a 5-minute TTL
 _FRONTEND_CACHE = TTLCache(maxsize=100, ttl=300)  # Increased maxsize for multiple orgs
 
@@ -27,9 +49,13 @@ class MultiOrgCalendarService:
 
     def __init__(self, logger_instance=None):
         self.logger = logger_instance or logger
-        self.gcal_client = GoogleCalendarClient(self.logger)
-        self.notion_client = NotionCalendarClient(self.logger)
+        self.google_limiter = ApiLimiter("google", GOOGLE_MAX_CONCURRENT, GOOGLE_REQUESTS_PER_SECOND)
+        self.notion_limiter = ApiLimiter("notion", NOTION_MAX_CONCURRENT, NOTION_REQUESTS_PER_SECOND)
+        self.gcal_client = GoogleCalendarClient(self.logger, self.google_limiter)
+        self.notion_client = NotionCalendarClient(self.logger, self.notion_limiter)
         self.db_connect = db_connect
+        self.snapshot_store = NotionSnapshotStore(self.db_connect, self.logger)
+        self.gcal_mirror = GoogleEventMirrorStore(self.db_connect, self.logger)
         
     def ensure_organization_calendar(self, organization_id: int, organization_name: str, parent_transaction=None) -> Optional[str]:
         """Ensure a Google Calendar exists for the organization, create if needed."""
@@ -83,13 +109,19 @@ class MultiOrgCalendarService:
                 if transaction:
                     transaction.finish()
     
-    def sync_organization_notion_to_google(self, organization_id: int, parent_transaction=None) -> Dict[str, Any]:
-        """Sync Notion events to Google Calendar for a specific organization."""
+    def sync_organization_notion_to_google(self, organization_id: int, parent_transaction=None, full_sync: bool = False) -> Dict[str, Any]:
+        """Sync Notion events to Google Calendar for a specific organization.
+
+        Only pages edited since the last sync are fetched from Notion and merged into the
+        organization's snapshot (see snapshot.py); full_sync forces a full fetch.
+        """
         op_name = "sync_organization_notion_to_google"
         
         current_transaction = parent_transaction or start_transaction(op="calendar", name=op_name)
         
         with operation_span(current_transaction, op="org_sync", description=op_name, logger=self.logger) as transaction:
+            started = time.monotonic()
+            transaction.set_data("organization_id", organization_id)
             try:
                 # Get organization
                 db = next(self.db_connect.get_db())
@@ -107,16 +139,45 @@ class MultiOrgCalendarService:
                         return {"status": "error", "message": f"Failed to create calendar for organization {organization_id}"}
                     org.google_calendar_id = calendar_id
                 
-                # Fetch events from Notion
-                notion_events = self.notion_client.fetch_events(org.notion_database_id, transaction)
+                # Fetch events from Notion: only pages edited since the watermark, unless a full fetch is due
+                edited_after, full_reason = self.snapshot_store.plan(organization_id, org.notion_database_id, force_full=full_sync)
+                if full_reason:
+                    self.logger.info(f"Full Notion fetch for organization {organization_id}: {full_reason}")
+                notion_events = self.notion_client.fetch_events(org.notion_database_id, transaction, edited_after=edited_after)
                 if notion_events is None:
                     return {"status": "error", "message": "Failed to fetch events from Notion"}
                 
-                # Parse events
-                parsed_events = self.parse_notion_events(notion_events)
+                snapshot = self.snapshot_store.apply(organization_id, org.notion_database_id, notion_events, full=edited_after is None)
+                transaction.set_data("notion_fetch", snapshot.stats())
+                transaction.set_data("notion_seconds", round(time.monotonic() - started, 3))
                 
-                # Update Google Calendar
-                results = self.update_organization_google_calendar(parsed_events, org.google_calendar_id, org.notion_database_id, transaction)
+                results = []
+                event_counts = dict.fromkeys(EVENT_COUNT_KEYS, 0)
+                if snapshot.full or snapshot.has_changes:
+                    # Parse events
+                    parsed_events = self.parse_notion_events(snapshot.pages)
+                    
+                    # Update Google Calendar; an incremental sync only writes the changed events
+                    changed_page_ids = None if snapshot.full else snapshot.changed_page_ids
+                    processed = self.update_organization_google_calendar(
+                        parsed_events, org.google_calendar_id, org.notion_database_id, transaction,
+                        changed_page_ids=changed_page_ids, organization_id=organization_id
+                    )
+                    if processed is None:
+                        self.snapshot_store.require_full_sync(organization_id)
+                        return {"status": "error", "message": "Failed to update Google Calendar"}
+                    processed_events, event_counts = processed
+                    results = [result for result in processed_events if result["status"] in ("created", "updated")]
+                    if event_counts["failed"]:
+                        # The watermark has moved past the failed pages, and the mirror may be stale, so retry with full listings
+                        self.snapshot_store.require_full_sync(organization_id)
+                        self.gcal_mirror.reset(org.google_calendar_id)
+                else:
+                    self.logger.info(f"No Notion changes for organization {organization_id}; skipping Google Calendar update.")
+                
+                self.logger.info(f"Calendar sync for organization {organization_id}: " + ", ".join(f"{count} {key}" for key, count in event_counts.items()))
+                transaction.set_data("event_counts", event_counts)
+                transaction.set_data("duration_seconds", round(time.monotonic() - started, 3))
                 
                 # Update organization sync timestamp
                 org.last_sync_at = datetime.now()
@@ -126,7 +187,10 @@ class MultiOrgCalendarService:
                     "status": "success",
                     "message": f"Synced {len(results)} events for organization {organization_id}",
                     "organization_id": organization_id,
-                    "events_processed": results
+                    "events_processed": results,
+                    "events_failed": event_counts["failed"],
+                    "event_counts": event_counts,
+                    **snapshot.stats()
                 }
                 
             except Exception as e:
@@ -136,27 +200,38 @@ class MultiOrgCalendarService:
                 if transaction:
                     transaction.finish()
     
-    def update_organization_google_calendar(self, parsed_events: List[CalendarEventDTO], calendar_id: str, notion_database_id: str, parent_transaction=None) -> List[Dict]:
-        """Update Google Calendar for a specific organization."""
+    def update_organization_google_calendar(self, parsed_events: List[CalendarEventDTO], calendar_id: str, notion_database_id: str, parent_transaction=None,
+                                            changed_page_ids: Optional[set] = None, organization_id: Optional[int] = None) -> Optional[Tuple[List[Dict], Dict[str, int]]]:
+        """Update Google Calendar for a specific organization.
+
+        parsed_events is every published event. With changed_page_ids, only those events
+        (and events missing from Google Calendar) are considered, and events whose content
+        hash matches the one stored on their Google event are left alone. Creates, updates and
+        deletes go out together through the batch API. With organization_id, created and
+        updated events are recorded in CalendarEventLink. Returns a tuple of
+        (one result per considered event, counts per EVENT_COUNT_KEYS), or None if the
+        existing Google Calendar events couldn't be fetched.
+        """
         results = []
+        event_counts = dict.fromkeys(EVENT_COUNT_KEYS, 0)
         op_name = "update_organization_google_calendar"
         self.logger.info(f"Starting {op_name} with {len(parsed_events)} parsed Notion events for calendar {calendar_id}.")
 
-        # Fetch existing Google Calendar events
+        # Fetch changes to Google Calendar events since the last sync token and apply them to the local mirror
         with operation_span(parent_transaction, op="fetch_gcal", description="fetch_existing_gcal_events", logger=self.logger) as span:
-            all_gcal_events_raw = self.gcal_client.get_all_events(calendar_id, time_min=None, parent_transaction=parent_transaction)
-            if all_gcal_events_raw is None:
+            sync_token = self.gcal_mirror.sync_token(calendar_id)
+            listing = self.gcal_client.sync_events(calendar_id, sync_token, parent_transaction=parent_transaction)
+            if listing is None:
                 self.logger.error(f"{op_name}: Failed to fetch existing Google Calendar events. Aborting update.")
-                return []
+                return None
+            changed_gcal_events, next_sync_token, full_listing = listing
 
-            # Filter for events managed by this sync
-            managed_gcal_events = [
-                ev for ev in all_gcal_events_raw
-                if ev.get('extendedProperties', {}).get('private', {}).get('notionPageId')
-            ]
-            span.set_data("fetched_total_gcal_event_count", len(all_gcal_events_raw))
-            span.set_data("fetched_managed_gcal_event_count", len(managed_gcal_events))
-            self.logger.info(f"Fetched {len(managed_gcal_events)} managed GCal events (out of {len(all_gcal_events_raw)} total).")
+            # The mirror only holds events managed by this sync
+            managed_gcal_events = self.gcal_mirror.apply(calendar_id, changed_gcal_events, next_sync_token, full_listing)
+            span.set_data("gcal_listing", "full" if full_listing else "incremental")
+            span.set_data("fetched_gcal_event_count", len(changed_gcal_events))
+            span.set_data("mirrored_managed_gcal_event_count", len(managed_gcal_events))
+            self.logger.info(f"Listed {len(changed_gcal_events)} {'' if full_listing else 'changed '}GCal events; {len(managed_gcal_events)} managed events mirrored.")
 
         # Build lookup dictionaries for GCal events & handle duplicates
         gcal_events_by_gcal_id: Dict[str, Dict] = {}
@@ -191,67 +266,135 @@ class MultiOrgCalendarService:
 
             span.set_data("duplicates_found", len(duplicates_to_delete))
 
-        # Process each Notion event
+        # Queue a create or update for each new or changed Notion event
+        write_requests = []
         for event_dto in parsed_events:
-            result = self._process_single_event(event_dto, gcal_events_by_notion_id, calendar_id, parent_transaction)
-            if result:
-                results.append(result)
-
-        # Clean up duplicates
-        if duplicates_to_delete:
-            with operation_span(parent_transaction, op="cleanup", description="delete_duplicate_events", logger=self.logger) as span:
-                deleted_count, failed_count = self.gcal_client.batch_delete_events(
-                    calendar_id, list(duplicates_to_delete), "delete_duplicates", parent_transaction
-                )
-                span.set_data("duplicates_deleted", deleted_count)
-                span.set_data("duplicates_failed", failed_count)
-                self.logger.info(f"Cleaned up {deleted_count} duplicate events, {failed_count} failed.")
-
-        # Clean up orphaned events (events in GCal but not in Notion)
-        orphaned_events = set(gcal_events_by_gcal_id.keys()) - set(gcal_events_by_notion_id.keys())
-        if orphaned_events:
-            with operation_span(parent_transaction, op="cleanup", description="delete_orphaned_events", logger=self.logger) as span:
-                deleted_count, failed_count = self.gcal_client.batch_delete_events(
-                    calendar_id, list(orphaned_events), "delete_orphaned", parent_transaction
-                )
-                span.set_data("orphaned_deleted", deleted_count)
-                span.set_data("orphaned_failed", failed_count)
-                self.logger.info(f"Cleaned up {deleted_count} orphaned events, {failed_count} failed.")
+            if (changed_page_ids is not None and event_dto.notion_page_id not in changed_page_ids
+                    and event_dto.notion_page_id in gcal_events_by_notion_id):
+                event_counts["unchanged"] += 1
+                continue
+            request = self._event_write_request(event_dto, gcal_events_by_notion_id, calendar_id, results, event_counts)
+            if request:
+                write_requests.append(request)
+
+        # Queue deletes for duplicates and orphaned events (events in GCal but not in Notion)
+        notion_page_ids = {event_dto.notion_page_id for event_dto in parsed_events}
+        orphaned_events = {
+            event['id'] for notion_id, event in gcal_events_by_notion_id.items()
+            if notion_id not in notion_page_ids
+        }
+        deleted_gcal_ids: List[str] = []
+        delete_requests = [
+            self.gcal_client.delete_event_request(f"delete:{gcal_id}", calendar_id, gcal_id,
+                                                  self._delete_callback(gcal_id, deleted_gcal_ids, event_counts))
+            for gcal_id in sorted(duplicates_to_delete | orphaned_events)
+        ]
+        if duplicates_to_delete or orphaned_events:
+            self.logger.info(f"Deleting {len(duplicates_to_delete)} duplicate and {len(orphaned_events)} orphaned events.")
+
+        # Send every write through the batch API
+        if write_requests or delete_requests:
+            with operation_span(parent_transaction, op="gcal_write", description="batch_write_events", logger=self.logger) as span:
+                successful, failed = self.gcal_client.execute_batch(write_requests + delete_requests, "write_events", parent_transaction)
+                span.set_data("writes", len(write_requests))
+                span.set_data("deletes", len(delete_requests))
+                span.set_data("successful", successful)
+                span.set_data("failed", failed)
+
+        if organization_id is not None:
+            self._record_event_links(organization_id, notion_database_id, calendar_id, results, deleted_gcal_ids)
+        if NOTION_WRITEBACK:
+            for result in results:
+                if result["status"] == "created":
+                    self.notion_client.update_page_with_gcal_id(result["notion_page_id"], result["gcal_event_id"],
+                                                                result.get("jump_url"), parent_transaction)
 
-        return results
+        return results, event_counts
 
-    def _process_single_event(self, event_dto: CalendarEventDTO, gcal_events_by_notion_id: Dict[str, Dict], calendar_id: str, parent_transaction=None) -> Optional[Dict]:
-        """Process a single event DTO."""
+    def _event_write_request(self, event_dto: CalendarEventDTO, gcal_events_by_notion_id: Dict[str, Dict], calendar_id: str,
+                             results: List[Dict], event_counts: Dict[str, int]) -> Optional[BatchRequest]:
+        """Batch request creating or updating an event, or None if its content hash is unchanged.
+
+        The request's callback appends the event's result to results and counts it.
+        """
         notion_page_id = event_dto.notion_page_id
         existing_gcal_event = gcal_events_by_notion_id.get(notion_page_id)
 
         event_data = event_dto.to_gcal_format()
-        
+        content_hash = event_dto.content_hash()
+        event_data['extendedProperties'] = {'private': {CONTENT_HASH_PROPERTY: content_hash}}
+        result = {"notion_page_id": notion_page_id, "summary": event_dto.summary}
+
         if existing_gcal_event:
-            # Update existing event
             gcal_event_id = existing_gcal_event['id']
-            result = self.gcal_client.update_event(calendar_id, gcal_event_id, event_data, notion_page_id, parent_transaction)
-            if result:
-                return {
-                    "notion_page_id": notion_page_id,
-                    "gcal_event_id": gcal_event_id,
-                    "status": "updated",
-                    "summary": event_dto.summary
-                }
-        else:
-            # Create new event
-            result = self.gcal_client.create_event(calendar_id, event_data, notion_page_id, parent_transaction)
-            if result:
-                gcal_event_id, jump_url = result
-                return {
-                    "notion_page_id": notion_page_id,
-                    "gcal_event_id": gcal_event_id,
-                    "status": "created",
-                    "summary": event_dto.summary,
-                    "jump_url": jump_url
-                }
-        
-        return None
+            result["gcal_event_id"] = gcal_event_id
+            stored_hash = existing_gcal_event.get('extendedProperties', {}).get('private', {}).get(CONTENT_HASH_PROPERTY)
+            if stored_hash == content_hash:
+                # Nothing Google Calendar shows has changed since the last write
+                results.append({**result, "status": "unchanged"})
+                event_counts["unchanged"] += 1
+                return None
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                results.append({**result, "status": "failed"})
+                event_counts["failed"] += 1
+                return
+            if existing_gcal_event:
+                results.append({**result, "status": "updated"})
+                event_counts["updated"] += 1
+            else:
+                results.append({**result, "status": "created", "gcal_event_id": response['id'], "jump_url": response.get('htmlLink')})
+                event_counts["created"] += 1
+
+        if existing_gcal_event:
+            return self.gcal_client.update_event_request(f"update:{notion_page_id}", calendar_id, existing_gcal_event['id'],
+                                                         event_data, notion_page_id, callback)
+        return self.gcal_client.insert_event_request(f"create:{notion_page_id}", calendar_id, event_data, notion_page_id, callback)
+
+    @staticmethod
+    def _delete_callback(gcal_id: str, deleted_gcal_ids: List[str], event_counts: Dict[str, int]):
+        """Batch callback counting a delete; an event that is already gone counts as deleted."""
+        def callback(request_id, response, exception):
+            if exception is None or (isinstance(exception, HttpError) and exception.resp.status in (404, 410)):
+                deleted_gcal_ids.append(gcal_id)
+                event_counts["deleted"] += 1
+            else:
+                event_counts["delete_failed"] += 1
+        return callback
+
+    def _record_event_links(self, organization_id: int, notion_database_id: str, calendar_id: str, results: List[Dict], deleted_gcal_ids: List[str]) -> None:
+        """Keep CalendarEventLink rows in step with the events written and deleted."""
+        written = {
+            result["notion_page_id"]: result["gcal_event_id"]
+            for result in results if result["status"] in ("created", "updated")
+        }
+        if not written and not deleted_gcal_ids:
+            return
+        db = next(self.db_connect.get_db())
+        try:
+            links = {
+                link.notion_page_id: link
+                for link in db.query(CalendarEventLink).filter(CalendarEventLink.organization_id == organization_id)
+            }
+            for notion_page_id, gcal_event_id in written.items():
+                link = links.get(notion_page_id)
+                if link is None:
+                    link = CalendarEventLink(organization_id=organization_id, notion_page_id=notion_page_id)
+                    db.add(link)
+                link.google_calendar_event_id = gcal_event_id
+                link.notion_database_id = notion_database_id
+                link.google_calendar_id = calendar_id
+            deleted = set(deleted_gcal_ids)
+            for link in links.values():
+                if link.google_calendar_event_id in deleted and link.notion_page_id not in written:
+                    db.delete(link)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.logger.error(f"Error recording calendar event links for organization {organization_id}: {e}")
+        finally:
+            db.close()
 
     @cached(cache=_FRONTEND_CACHE, key=lambda self, org_id, transaction=None: keys.hashkey(org_id))
     def get_organization_events_for_frontend(self, organization_id: int, parent_transaction=None) -> Dict[str, Any]:
@@ -316,17 +459,28 @@ class MultiOrgCalendarService:
         return parsed_events
 
     def sync_all_organizations(self, parent_transaction=None) -> Dict[str, Any]:
-        """Sync all organizations that have calendar sync enabled and a valid Notion database ID."""
+        """Sync all organizations that have calendar sync enabled and a valid Notion database ID.
+
+        Up to CALENDAR_SYNC_WORKERS organizations are synced at once, each in its own thread
+        with its own API clients and DB sessions; Notion and Google calls of all threads share
+        the service's concurrency and rate limits.
+        """
         op_name = "sync_all_organizations"
         current_transaction = parent_transaction or start_transaction(op="calendar", name=op_name)
         with operation_span(current_transaction, op="multi_org_sync", description=op_name, logger=self.logger) as transaction:
             try:
                 # Get all active organizations with calendar sync enabled
                 db = next(self.db_connect.get_db())
-                organizations = db.query(Organization).filter(
-                    Organization.is_active == True,
-                    Organization.calendar_sync_enabled == True
-                ).all()
+                try:
+                    organizations = [
+                        (org.id, org.name, org.notion_database_id, org.google_calendar_id)
+                        for org in db.query(Organization).filter(
+                            Organization.is_active == True,
+                            Organization.calendar_sync_enabled == True
+                        ).all()
+                    ]
+                finally:
+                    db.close()
                 self.logger.info(f"Found {len(organizations)} organizations with calendar sync enabled")
                 results = {
                     "status": "success",
@@ -334,63 +488,38 @@ class MultiOrgCalendarService:
                     "organizations_processed": 0,
                     "organizations_failed": 0,
                     "organizations_skipped": 0,
+                    "event_counts": dict.fromkeys(EVENT_COUNT_KEYS, 0),
                     "organization_results": []
                 }
-                for org in organizations:
-                    try:
-                        self.logger.info(f"Processing organization: {org.name} (ID: {org.id})")
-                        if not org.notion_database_id:
-                            self.logger.warning(f"Skipping organization {org.name} (ID: {org.id}) - No Notion database ID configured.")
+                started = time.monotonic()
+                workers = max(1, min(SYNC_WORKERS, len(organizations)))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calendar-sync") as pool:
+                    futures = [
+                        pool.submit(self._for_worker()._sync_organization_job, org_id, org_name, notion_database_id, google_calendar_id, transaction)
+                        for org_id, org_name, notion_database_id, google_calendar_id in organizations
+                    ]
+                    for future in futures:
+                        org_result = future.result()
+                        if org_result["status"] == "skipped":
                             results["organizations_skipped"] += 1
-                            results["organization_results"].append({
-                                "organization_id": org.id,
-                                "organization_name": org.name,
-                                "status": "skipped",
-                                "message": "No Notion database ID configured"
-                            })
-                            continue
-                        # Ensure calendar exists
-                        if not org.google_calendar_id:
-                            calendar_id = self.ensure_organization_calendar(org.id, org.name, transaction)
-                            if not calendar_id:
-                                self.logger.error(f"Failed to create calendar for organization {org.id}")
-                                results["organizations_failed"] += 1
-                                results["organization_results"].append({
-                                    "organization_id": org.id,
-                                    "organization_name": org.name,
-                                    "status": "failed",
-                                    "message": "Failed to create calendar"
-                                })
-                                continue
-                        # Sync organization
-                        self.logger.info(f"Starting sync for organization {org.name} (ID: {org.id})")
-                        sync_result = self.sync_organization_notion_to_google(org.id, transaction)
-                        if sync_result.get("status") == "success":
+                        elif org_result["status"] == "success":
                             results["organizations_processed"] += 1
-                            self.logger.info(f"Successfully synced organization {org.name} (ID: {org.id})")
                         else:
                             results["organizations_failed"] += 1
-                            self.logger.error(f"Failed to sync organization {org.name} (ID: {org.id}): {sync_result.get('message')}")
-                        results["organization_results"].append({
-                            "organization_id": org.id,
-                            "organization_name": org.name,
-                            "status": sync_result.get("status"),
-                            "message": sync_result.get("message"),
-                            "events_processed": len(sync_result.get("events_processed", []))
-                        })
-                    except Exception as e:
-                        self.logger.error(f"Error processing organization {org.id}: {e}")
-                        results["organizations_failed"] += 1
-                        results["organization_results"].append({
-                            "organization_id": org.id,
-                            "organization_name": org.name,
-                            "status": "error",
-                            "message": str(e)
-                        })
+                        for key, count in org_result.get("event_counts", {}).items():
+                            results["event_counts"][key] += count
+                        results["organization_results"].append(org_result)
+                results["duration_seconds"] = round(time.monotonic() - started, 3)
+                results["workers"] = workers
+                results["api_limits"] = {"google": self.google_limiter.stats(), "notion": self.notion_limiter.stats()}
+                transaction.set_data("duration_seconds", results["duration_seconds"])
+                transaction.set_data("workers", workers)
+                transaction.set_data("api_limits", results["api_limits"])
                 # Update overall status
                 if results["organizations_failed"] > 0:
                     results["status"] = "partial_success" if results["organizations_processed"] > 0 else "failed"
-                self.logger.info(f"Multi-org sync completed: {results['organizations_processed']} successful, {results['organizations_failed']} failed, {results['organizations_skipped']} skipped.")
+                self.logger.info(f"Multi-org sync completed in {results['duration_seconds']}s with {workers} workers: {results['organizations_processed']} successful, {results['organizations_failed']} failed, {results['organizations_skipped']} skipped.")
+                self.logger.info("Multi-org sync events: " + ", ".join(f"{count} {key}" for key, count in results["event_counts"].items()))
                 return results
             except Exception as e:
                 self.logger.error(f"Error in multi-org sync: {e}")
@@ -399,6 +528,56 @@ class MultiOrgCalendarService:
                 if transaction:
                     transaction.finish()
 
+    def _for_worker(self) -> "MultiOrgCalendarService":
+        """Copy of the service with its own API clients for one sync thread.
+
+        The Google service handle (httplib2) and the clients' error handler state can't be
+        shared between threads; the rate limiters, stores and DB connection are.
+        """
+        worker = copy.copy(self)
+        worker.gcal_client = GoogleCalendarClient(self.logger, self.google_limiter)
+        worker.notion_client = NotionCalendarClient(self.logger, self.notion_limiter)
+        return worker
+
+    def _sync_organization_job(self, org_id: int, org_name: str, notion_database_id: Optional[str], google_calendar_id: Optional[str],
+                               parent_transaction=None) -> Dict[str, Any]:
+        """Sync one organization for sync_all_organizations; never raises, so one failure can't affect the others."""
+        started = time.monotonic()
+        org_result = {"organization_id": org_id, "organization_name": org_name}
+        try:
+            self.logger.info(f"Processing organization: {org_name} (ID: {org_id})")
+            if not notion_database_id:
+                self.logger.warning(f"Skipping organization {org_name} (ID: {org_id}) - No Notion database ID configured.")
+                org_result.update(status="skipped", message="No Notion database ID configured")
+                return org_result
+            # Ensure calendar exists
+            if not google_calendar_id:
+                calendar_id = self.ensure_organization_calendar(org_id, org_name, parent_transaction)
+                if not calendar_id:
+                    self.logger.error(f"Failed to create calendar for organization {org_id}")
+                    org_result.update(status="failed", message="Failed to create calendar")
+                    return org_result
+            # Sync organization
+            self.logger.info(f"Starting sync for organization {org_name} (ID: {org_id})")
+            sync_result = self.sync_organization_notion_to_google(org_id, parent_transaction)
+            if sync_result.get("status") == "success":
+                self.logger.info(f"Successfully synced organization {org_name} (ID: {org_id})")
+            else:
+                self.logger.error(f"Failed to sync organization {org_name} (ID: {org_id}): {sync_result.get('message')}")
+            org_result.update(
+                status=sync_result.get("status"),
+                message=sync_result.get("message"),
+                events_processed=len(sync_result.get("events_processed", [])),
+                event_counts=sync_result.get("event_counts", {})
+            )
+            return org_result
+        except Exception as e:
+            self.logger.error(f"Error processing organization {org_id}: {e}")
+            org_result.update(status="error", message=str(e))
+            return org_result
+        finally:
+            org_result["duration_seconds"] = round(time.monotonic() - started, 3)
+
 # Legacy CalendarService for backward compatibility (deprecated)
 class CalendarService:
     """Legacy single-organization calendar service (deprecated)."""
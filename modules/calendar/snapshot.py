@@ -0,0 +1,198 @@
+# modules/calendar/snapshot.py
+"""
+Locally persisted snapshot of each organization's published Notion events.
+
+Instead of pulling every published page on every sync, the calendar sync asks
+Notion only for pages edited since the organization's watermark (the highest
+``last_edited_time`` seen so far) and merges them into the snapshot:
+
+- A changed page that is published replaces its stored copy.
+- A changed page that was unpublished or archived is dropped.
+
+Pages deleted from the database don't show up in an incremental query, so a
+full fetch of the published pages replaces the snapshot when there is no
+state yet, when the organization's database changed, when forced, and every
+``CALENDAR_FULL_SYNC_HOURS`` (default 24).
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from shared import logger
+from .models import CalendarSyncState, NotionEventSnapshot
+from .utils import extract_property
+
+FULL_SYNC_INTERVAL = timedelta(hours=float(os.environ.get("CALENDAR_FULL_SYNC_HOURS", 24)))
+
+
+def parse_notion_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Notion timestamp (e.g. "2024-05-01T12:34:00.000Z") as a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def is_published(page: Dict) -> bool:
+    """Whether a Notion page belongs in the calendar (published and not archived or trashed)"""
+    if page.get("archived") or page.get("in_trash"):
+        return False
+    return extract_property(page.get("properties", {}), "Published", "checkbox") is True
+
+
+@dataclass
+class SnapshotUpdate:
+    """Result of merging a Notion fetch into an organization's snapshot"""
+    pages: List[Dict]  # Every published page in the snapshot after the merge
+    full: bool
+    changed_page_ids: Set[str] = field(default_factory=set)  # Pages added or updated by this fetch
+    removed_page_ids: Set[str] = field(default_factory=set)  # Pages dropped (unpublished, archived or gone)
+    watermark: Optional[datetime] = None
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.changed_page_ids or self.removed_page_ids)
+
+    def stats(self) -> Dict:
+        return {
+            "fetch_mode": "full" if self.full else "incremental",
+            "snapshot_events": len(self.pages),
+            "changed_pages": len(self.changed_page_ids),
+            "removed_pages": len(self.removed_page_ids),
+            "notion_watermark": self.watermark.isoformat() if self.watermark else None
+        }
+
+
+class NotionSnapshotStore:
+    """Watermarks and stored pages for incremental Notion fetches, one set per organization"""
+
+    def __init__(self, db_connect, logger_instance=None, full_sync_interval: timedelta = FULL_SYNC_INTERVAL):
+        self.db_connect = db_connect
+        self.logger = logger_instance or logger
+        self.full_sync_interval = full_sync_interval
+
+    def plan(self, organization_id: int, database_id: str, force_full: bool = False,
+             now: Optional[datetime] = None) -> Tuple[Optional[datetime], Optional[str]]:
+        """Decide how to fetch an organization's events
+
+        Returns:
+            Tuple of (watermark to fetch pages edited on or after, None) for an incremental
+            fetch, or (None, reason) for a full fetch
+        """
+        if force_full:
+            return None, "forced"
+        now = now or datetime.utcnow()
+        db = next(self.db_connect.get_db())
+        try:
+            state = db.get(CalendarSyncState, organization_id)
+        finally:
+            db.close()
+        if state is None or state.notion_edited_watermark is None:
+            return None, "no snapshot yet"
+        if state.notion_database_id != database_id:
+            return None, "Notion database changed"
+        if state.last_full_sync_at is None or now - state.last_full_sync_at >= self.full_sync_interval:
+            return None, "periodic reconciliation"
+        return state.notion_edited_watermark, None
+
+    def apply(self, organization_id: int, database_id: str, fetched_pages: List[Dict], full: bool,
+              now: Optional[datetime] = None) -> SnapshotUpdate:
+        """Merge fetched pages into the snapshot and advance the watermark
+
+        A full fetch holds only published pages and replaces the snapshot; stored pages
+        missing from it are removed. An incremental fetch holds every page edited since
+        the watermark, published or not.
+        """
+        now = now or datetime.utcnow()
+        db = next(self.db_connect.get_db())
+        try:
+            stored = {
+                row.notion_page_id: row
+                for row in db.query(NotionEventSnapshot).filter(NotionEventSnapshot.organization_id == organization_id)
+            }
+            update = SnapshotUpdate(pages=[], full=full)
+            seen: Set[str] = set()
+
+            for page in fetched_pages:
+                page_id = page.get("id")
+                if not page_id:
+                    continue
+                seen.add(page_id)
+                edited = parse_notion_timestamp(page.get("last_edited_time")) or now
+                row = stored.get(page_id)
+                if not is_published(page):
+                    if row is not None:
+                        # The same page can appear twice in a paginated fetch
+                        if row in db.new:
+                            db.expunge(row)
+                        else:
+                            db.delete(row)
+                        del stored[page_id]
+                        update.removed_page_ids.add(page_id)
+                    continue
+                if row is None:
+                    row = NotionEventSnapshot(organization_id=organization_id, notion_page_id=page_id)
+                    db.add(row)
+                    stored[page_id] = row
+                    update.changed_page_ids.add(page_id)
+                elif row.last_edited_time != edited or row.page != page:
+                    update.changed_page_ids.add(page_id)
+                row.last_edited_time = edited
+                row.page = page
+
+            if full:
+                for page_id in list(stored):
+                    if page_id not in seen:
+                        db.delete(stored.pop(page_id))
+                        update.removed_page_ids.add(page_id)
+
+            state = db.get(CalendarSyncState, organization_id)
+            if state is None:
+                state = CalendarSyncState(organization_id=organization_id, notion_database_id=database_id)
+                db.add(state)
+            edit_times = [parse_notion_timestamp(page.get("last_edited_time")) for page in fetched_pages]
+            edit_times = [edited for edited in edit_times if edited is not None]
+            if full or state.notion_database_id != database_id:
+                state.notion_edited_watermark = max(edit_times, default=now)
+                state.last_full_sync_at = now
+            elif edit_times:
+                if state.notion_edited_watermark is not None:
+                    edit_times.append(state.notion_edited_watermark)
+                state.notion_edited_watermark = max(edit_times)
+            state.notion_database_id = database_id
+            db.commit()
+
+            update.watermark = state.notion_edited_watermark
+            update.pages = [row.page for row in stored.values()]
+            return update
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def require_full_sync(self, organization_id: int) -> None:
+        """Make the next sync fetch everything, e.g. after Google Calendar writes failed"""
+        db = next(self.db_connect.get_db())
+        try:
+            state = db.get(CalendarSyncState, organization_id)
+            if state is not None:
+                state.last_full_sync_at = None
+                db.commit()
+                self.logger.info(f"Next calendar sync for organization {organization_id} will be a full fetch.")
+        finally:
+            db.close()
+
+    def pages(self, organization_id: int) -> List[Dict]:
+        """Stored published pages of an organization"""
+        db = next(self.db_connect.get_db())
+        try:
+            return [row.page for row in db.query(NotionEventSnapshot).filter(NotionEventSnapshot.organization_id == organization_id)]
+        finally:
+            db.close()
@@ -1,10 +1,15 @@
 # modules/calendar/utils.py
+import time
+import random
 import logging
+import threading
 from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, List, Any, Tuple
+from typing import Callable, Dict, Optional, List, Any, Tuple
 import pytz
 
+from googleapiclient.errors import HttpError
 from sentry_sdk import capture_exception, set_context
 from shared import config, logger # Assuming logger and config are available in shared
 
@@ -37,83 +42,200 @@ def operation_span(transaction, op, description, logger=None):
             span.finish()
         except Exception as finish_err:
             current_logger.error(f"Failed to finish span {description}: {finish_err}")
-def batch_operation(service: Any, operation_fn: Any, items: List[Any], calendar_id: str, batch_size: int = 900, description: str = "batch_operation", parent_transaction=None) -> Tuple[int, int]: # Added parent_transaction
-    """Generic batch operation handler for Google API calls.
+class ApiLimiter:
+    """Caps the concurrent calls to one API, and their rate, across threads.
+
+    max_concurrent=None and per_second=None (the defaults) leave calls unlimited. Rate
+    limiting lets up to one second's worth of calls through in a burst; a call can weigh
+    more than one (a batch counts each of its sub-requests).
+    """
+
+    def __init__(self, name: str, max_concurrent: Optional[int] = None, per_second: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.per_second = per_second
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._next_free = 0.0
+        self.calls = 0
+        self.waited_seconds = 0.0
+
+    @contextmanager
+    def limit(self, weight: int = 1):
+        """Hold a concurrency slot, after waiting for the rate limit, for the duration of a call."""
+        started = self._clock()
+        if self._slots:
+            self._slots.acquire()
+        try:
+            if self.per_second:
+                with self._lock:
+                    now = self._clock()
+                    self._next_free = max(self._next_free, now - 1.0)
+                    wait = self._next_free - now
+                    self._next_free += weight / self.per_second
+                if wait > 0:
+                    self._sleep(wait)
+            with self._lock:
+                self.calls += weight
+                self.waited_seconds += self._clock() - started
+            yield
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "per_second": self.per_second,
+                "calls": self.calls,
+                "waited_seconds": round(self.waited_seconds, 3)
+            }
+
+
+# Google Calendar accepts at most 50 calls per batch request
+GOOGLE_BATCH_LIMIT = 50
+BATCH_MAX_ATTEMPTS = 5
+BATCH_BASE_DELAY = 1.0  # Seconds before the first retry; doubles per attempt, with jitter
+BATCH_MAX_DELAY = 32.0
+RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class BatchRequest:
+    """One sub-request of a Google API batch.
+
+    build turns the service into an unexecuted request, e.g.
+    lambda s: s.events().insert(calendarId=..., body=...), so it can be rebuilt for retries.
+    callback(request_id, response, exception) is called once with the final outcome.
+    """
+    request_id: str
+    build: Callable[[Any], Any]
+    callback: Optional[Callable[[str, Optional[Dict], Optional[Exception]], None]] = None
+
+
+def is_retryable_error(exception: Exception) -> bool:
+    """Whether a failed Google API call is worth retrying (rate limits, server errors, network errors)."""
+    if isinstance(exception, HttpError):
+        status = exception.resp.status
+        if status in RETRYABLE_HTTP_STATUSES:
+            return True
+        # Calendar reports rate limits as 403 rateLimitExceeded / userRateLimitExceeded
+        content = exception.content.decode('utf-8', errors='ignore') if isinstance(exception.content, bytes) else str(exception.content or '')
+        return status == 403 and 'ratelimitexceeded' in content.lower()
+    return isinstance(exception, (OSError, TimeoutError))
+
+
+def execute_batch(service: Any, requests: List[BatchRequest], batch_size: int = GOOGLE_BATCH_LIMIT, description: str = "batch",
+                  max_attempts: int = BATCH_MAX_ATTEMPTS, base_delay: float = BATCH_BASE_DELAY, sleep: Callable[[float], None] = time.sleep,
+                  limiter: Optional[ApiLimiter] = None) -> Tuple[int, int]:
+    """Execute heterogeneous Google API requests through the HTTP batch endpoint.
+
+    Requests go out in chunks of batch_size. Sub-requests that fail with a retryable
+    error (see is_retryable_error) are sent again in a later batch after an exponential
+    backoff, up to max_attempts in total. Each request's callback gets its final outcome.
 
     Args:
         service: Google API service object.
-        operation_fn: Function that takes the service and returns the operation method
-                      (e.g., lambda s: s.events().delete).
-        items: List of items (e.g., event IDs) to process.
-        calendar_id: The ID of the calendar for the operation.
-        batch_size: Maximum batch size (stay under API limits).
-        description: Description for logging and Sentry context.
-        parent_transaction: Optional parent Sentry transaction (used for context).
+        requests: BatchRequests with unique request IDs.
+        batch_size: Maximum sub-requests per batch (stay under API limits).
         description: Description for logging and Sentry context.
+        limiter: Optional ApiLimiter each batch goes through, weighted by its size.
 
     Returns:
         Tuple of (successful_count, failed_count).
     """
-    if not items:
+    limiter = limiter or ApiLimiter("google")
+    if not requests:
         logger.info(f"No items to process in batch {description}.")
         return 0, 0
+    if len({request.request_id for request in requests}) != len(requests):
+        raise ValueError(f"Batch {description} has duplicate request IDs")
 
     successful = 0
     failed = 0
+    pending = list(requests)
+    attempt = 1
 
-    # Define the callback function locally
-    def callback(request_id, response, exception):
-        nonlocal successful, failed
-        if exception:
-            failed += 1
-            capture_exception(exception)
-            logger.error(f"Batch request {request_id} ({description}) failed: {exception}")
-            set_context(f"batch_{description}_error", {
-                "request_id": request_id,
-                "error": str(exception)
-            })
-        else:
-            successful += 1
-            logger.debug(f"Batch request {request_id} ({description}) successful.")
+    while pending:
+        outcomes: Dict[str, Tuple[Optional[Dict], Optional[Exception]]] = {}
 
-    # Get the specific API operation method (e.g., service.events().delete)
-    api_method = operation_fn(service)
+        def callback(request_id, response, exception, outcomes=outcomes):
+            outcomes[request_id] = (response, exception)
 
-    # Process in chunks to stay under API limits
-    for i in range(0, len(items), batch_size):
-        chunk = items[i:i + batch_size]
-        if not chunk:
-            continue
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            batch = service.new_batch_http_request(callback=callback)
+            for request in chunk:
+                batch.add(request.build(service), request_id=request.request_id)
+            try:
+                logger.info(f"Executing batch {description} chunk {i // batch_size + 1} ({len(chunk)} items, attempt {attempt}).")
+                with limiter.limit(weight=len(chunk)):
+                    batch.execute()
+            except Exception as e:
+                # If the whole batch execution fails, every item in the chunk failed with the same error
+                logger.error(f"Error executing batch {description} chunk {i // batch_size + 1}: {str(e)}")
+                for request in chunk:
+                    outcomes.setdefault(request.request_id, (None, e))
+
+        retry = []
+        for request in pending:
+            response, exception = outcomes.get(request.request_id, (None, RuntimeError("No response in batch")))
+            if exception is not None and attempt < max_attempts and is_retryable_error(exception):
+                retry.append(request)
+                continue
+            if exception is not None:
+                failed += 1
+                capture_exception(exception)
+                logger.error(f"Batch request {request.request_id} ({description}) failed: {exception}")
+                set_context(f"batch_{description}_error", {
+                    "request_id": request.request_id,
+                    "attempts": attempt,
+                    "error": str(exception)
+                })
+            else:
+                successful += 1
+                logger.debug(f"Batch request {request.request_id} ({description}) successful.")
+            if request.callback:
+                request.callback(request.request_id, response, exception)
+
+        if retry:
+            delay = min(BATCH_MAX_DELAY, base_delay * 2 ** (attempt - 1)) * (1 + random.random())
+            logger.warning(f"Retrying {len(retry)} failed requests of batch {description} in {delay:.1f}s (attempt {attempt + 1}/{max_attempts}).")
+            sleep(delay)
+        pending = retry
+        attempt += 1
 
-        batch = service.new_batch_http_request(callback=callback)
-        logger.info(f"Preparing batch {description} for {len(chunk)} items (chunk {i // batch_size + 1})...")
+    logger.info(f"Batch {description} complete: {successful} successful, {failed} failed")
+    return successful, failed
 
-        # Add requests to the batch based on the operation type
-        # This assumes the operation needs calendarId and an item identifier (e.g., eventId)
-        for item_id in chunk:
-             # Example for delete: api_method(calendarId=calendar_id, eventId=item_id)
-             # Adjust arguments based on the actual operation_fn provided
-             request = api_method(calendarId=calendar_id, eventId=item_id)
-             batch.add(request)
 
+def batch_operation(service: Any, operation_fn: Any, items: List[Any], calendar_id: str, batch_size: int = GOOGLE_BATCH_LIMIT, description: str = "batch_operation", parent_transaction=None,
+                    limiter: Optional[ApiLimiter] = None) -> Tuple[int, int]: # Added parent_transaction
+    """Batch handler for Google API calls shaped as (calendarId, eventId), e.g. deletes.
 
-        try:
-            logger.info(f"Executing batch {description} for chunk {i // batch_size + 1} ({len(chunk)} items).")
-            batch.execute()
-            logger.info(f"Batch chunk {i // batch_size + 1} executed for {description}.")
-        except Exception as e:
-            capture_exception(e)
-            logger.error(f"Error executing batch {description} chunk {i // batch_size + 1}: {str(e)}")
-            # If the whole batch execution fails, assume all items in the chunk failed
-            failed += len(chunk)
-            set_context(f"batch_{description}_execution_error", {
-                "chunk_index": i // batch_size + 1,
-                "chunk_size": len(chunk),
-                "error": str(e)
-            })
+    Args:
+        service: Google API service object.
+        operation_fn: Function that takes the service and returns the operation method
+                      (e.g., lambda s: s.events().delete).
+        items: List of items (e.g., event IDs) to process.
+        calendar_id: The ID of the calendar for the operation.
+        batch_size: Maximum batch size (stay under API limits).
+        description: Description for logging and Sentry context.
+        parent_transaction: Optional parent Sentry transaction (used for context).
+        limiter: Optional ApiLimiter each batch goes through.
 
-    logger.info(f"Batch {description} complete: {successful} successful, {failed} failed")
-    return successful, failed
+    Returns:
+        Tuple of (successful_count, failed_count).
+    """
+    requests = [
+        BatchRequest(str(item_id), lambda s, item_id=item_id: operation_fn(s)(calendarId=calendar_id, eventId=item_id))
+        for item_id in items
+    ]
+    return execute_batch(service, requests, batch_size=batch_size, description=description, limiter=limiter)
 
 
 class DateParser:
@@ -1,11 +1,11 @@
 from flask import Blueprint, request, jsonify
 from shared import logger
 from modules.auth.decoraters import auth_required
-from modules.summarizer.service import SummarizerService
+from modules.summarizer.service import get_summarizer_service
 
 # Create a Flask Blueprint for summarizer endpoints
 summarizer_blueprint = Blueprint('summarizer', __name__)
-summarizer_service = SummarizerService()
+summarizer_service = get_summarizer_service()
 
 @summarizer_blueprint.route('/status', methods=['GET'])
 @auth_required
@@ -50,4 +50,34 @@ def test_gemini_connection():
         return jsonify({"status": "success", "result": result}), 200
     except Exception as e:
         logger.error(f"Error testing Gemini connection: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
\ No newline at end of file
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@summarizer_blueprint.route('/cache/stats', methods=['GET'])
+@auth_required
+def get_cache_stats():
+    """Get hit/miss counters for the summary result cache"""
+    try:
+        return jsonify(summarizer_service.get_cache_stats()), 200
+    except Exception as e:
+        logger.error(f"Error getting summarizer cache stats: {e}")
+        return jsonify({"error": "Failed to retrieve summarizer cache stats"}), 500
+
+@summarizer_blueprint.route('/scheduler/stats', methods=['GET'])
+@auth_required
+def get_scheduler_stats():
+    """Get queue depth, wait time and rate budget metrics for Gemini requests"""
+    try:
+        return jsonify(summarizer_service.get_scheduler_stats()), 200
+    except Exception as e:
+        logger.error(f"Error getting summarizer scheduler stats: {e}")
+        return jsonify({"error": "Failed to retrieve summarizer scheduler stats"}), 500
+
+@summarizer_blueprint.route('/models/stats', methods=['GET'])
+@auth_required
+def get_model_stats():
+    """Get per-tier request, escalation, token and latency metrics for Gemini models"""
+    try:
+        return jsonify(summarizer_service.get_model_stats()), 200
+    except Exception as e:
+        logger.error(f"Error getting summarizer model stats: {e}")
+        return jsonify({"error": "Failed to retrieve summarizer model stats"}), 500
@@ -0,0 +1,223 @@
+"""
+Tokenizer-based citation rewriter for model output.
+
+The model cites messages as ``[cX]`` (plus ranges, groups and the occasional
+nested bracket). ``rewrite_citations`` turns those into Markdown links to the
+original Discord messages. Instead of running a chain of regex passes with
+placeholder protection and one ``str.replace`` per cited message, the text is
+rewritten by two linear tokenizer scans whose tokens are resolved with
+dictionary lookups:
+
+1. ``[cX]``-style tokens are expanded: standard [c1], ranges [c1-c5], groups
+   [c1, c2] and mixed [c723-c741, c765]. Nested brackets collapse the way they
+   always have: [[c1]] -> [c1], and [[[c1]]] loses one bracket pair.
+2. Numeric tokens are linked: [1], [1-5] and [1, 2, 3]. A citation that is
+   already followed by a link target, like ``[1](url)``, is left untouched
+   together with its target.
+
+The output matches the multi-pass regex pipeline this replaced (kept in
+``scripts/benchmark_citations.py`` as the benchmark baseline). The one known
+difference is a reversed range such as [c5-c3], which expands to nothing:
+the old pipeline re-scanned the text around it, this rewriter does not.
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+# [cX]-style citations, with the runs of brackets around them
+_C_TOKEN_RE = re.compile(r"""
+    (?P<open>\[+)
+    (?:
+        (?P<simple>\s*c(?P<simple_num>\d+)\s*)
+      | (?P<group>(?:c\d+(?:-c\d+)?(?:,\s*)?)+)
+    )
+    (?P<close>\]+)
+""", re.VERBOSE)
+
+# Numeric citations; an existing link target after [N] is captured so it can be skipped
+_NUMERIC_TOKEN_RE = re.compile(r"""
+    \[(?P<num>\d+)\](?P<target>\([^)]+\))?
+  | \[(?P<range_start>\d+)-(?P<range_end>\d+)\]
+  | \[(?P<num_group>\d+(?:,\s*\d+)+)\]
+""", re.VERBOSE)
+
+class CitationMap(Mapping):
+    """
+    Citation IDs (``c1``, ``c2``, ...) mapped to Discord message URLs.
+
+    Prompt building registers the message behind every citation ID, but a
+    response cites only a few of them, so a message's jump URL is built (and
+    kept) the first time a citation is looked up. Sources can also be
+    ready-made URLs, like the citations of a stored rolling summary.
+    """
+
+    def __init__(self, *sources: Mapping):
+        self._sources: Dict[str, Any] = {}
+        for source in sources:
+            self._sources.update(source._sources if isinstance(source, CitationMap) else source)
+        self._urls: Dict[str, str] = {}
+
+    def add(self, citation_id: str, message: Mapping) -> None:
+        """Register the message (or URL) behind a citation ID"""
+        self._sources[citation_id] = message
+
+    def __getitem__(self, citation_id: str) -> str:
+        url = self._urls.get(citation_id)
+        if url is None:
+            source = self._sources[citation_id]
+            url = source if isinstance(source, str) else source["jump_url"]
+            self._urls[citation_id] = url
+        return url
+
+    def __contains__(self, citation_id: object) -> bool:
+        return citation_id in self._sources
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def resolved(self) -> Dict[str, str]:
+        """URLs of the citations looked up so far, i.e. the ones rewritten text has cited"""
+        return dict(self._urls)
+
+
+class _NumericCitations:
+    """Numeric citation IDs (without the 'c' prefix) looked up in a citation map"""
+
+    def __init__(self, citation_map: Mapping):
+        self.citation_map = citation_map
+
+    def __contains__(self, numeric_id: str) -> bool:
+        return f"c{numeric_id}" in self.citation_map
+
+    def __getitem__(self, numeric_id: str) -> str:
+        return self.citation_map[f"c{numeric_id}"]
+
+
+def rewrite_citations(text: str, citation_map: Mapping) -> str:
+    """Rewrite citation references in text into clickable Discord message links.
+
+    Only the citations that occur in text are looked up, so a ``CitationMap``
+    builds jump URLs for the cited messages alone.
+
+    Args:
+        text: The summary or answer text containing citation references
+        citation_map: Mapping of citation IDs (``c1``, ``c2``, ...) to Discord message URLs
+
+    Returns:
+        Formatted text with clickable Discord citation links
+    """
+    return _link_numeric_citations(_expand_c_citations(text, citation_map), _NumericCitations(citation_map))
+
+
+def _expand_c_citations(text: str, citation_map: Mapping) -> str:
+    """Scan 1: turn [cX]-style tokens into [X], expanding ranges and groups into links"""
+    out: List[str] = []
+    pos = 0
+    for match in _C_TOKEN_RE.finditer(text):
+        out.append(text[pos:match.start()])
+        out.append(_rewrite_c_token(match, citation_map))
+        pos = match.end()
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def _rewrite_c_token(match, citation_map: Mapping) -> str:
+    """Rewrite a single [cX]-style token, including the brackets around it"""
+    opening = len(match.group('open'))
+    closing = len(match.group('close'))
+
+    if match.group('simple') is not None:
+        simple = match.group('simple')
+        if opening >= 2 and closing >= 2:
+            # [[c1]] collapses to [c1], then [[[c1]]] to [c1] once more
+            opening -= 1
+            closing -= 1
+            if opening >= 3 and closing >= 3:
+                opening -= 2
+                closing -= 2
+        elif simple != simple.strip():
+            # Whitespace is only tolerated inside double brackets
+            return match.group(0)
+        replacement = f"[{match.group('simple_num')}]"
+    else:
+        content = match.group('group')
+        if ',' not in content and '-' not in content:
+            # Something like [c1c2] isn't a citation
+            return match.group(0)
+        replacement = _expand_group(content, citation_map)
+
+    return "[" * (opening - 1) + replacement + "]" * (closing - 1)
+
+
+def _link_numeric_citations(text: str, numeric_map: _NumericCitations) -> str:
+    """Scan 2: link [1], [1-5] and [1, 2, 3], skipping citations that already have a link target"""
+    out: List[str] = []
+    pos = 0
+    for match in _NUMERIC_TOKEN_RE.finditer(text):
+        out.append(text[pos:match.start()])
+        pos = match.end()
+
+        numeric_id = match.group('num')
+        if numeric_id is not None:
+            if match.group('target') is None and numeric_id in numeric_map:
+                out.append(f"[{numeric_id}]({numeric_map[numeric_id]})")
+            else:
+                out.append(match.group(0))
+        elif match.group('range_start') is not None:
+            out.append(_rewrite_numeric_range(match, numeric_map))
+        else:
+            out.append(_rewrite_numeric_group(match, numeric_map))
+
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def _expand_group(content: str, citation_map: Mapping) -> str:
+    """Expand the inside of a grouped/ranged citation like 'c1-c3, c5' into links"""
+    # First remove the 'c' prefix from all numbers
+    simplified_content = re.sub(r'c(\d+)', r'\1', content)
+
+    replacement_parts = []
+    for part in (part.strip() for part in simplified_content.split(',')):
+        if '-' in part:
+            # This is a range citation like '1-5'
+            start_num, end_num = map(int, part.split('-'))
+            numeric_ids = [str(i) for i in range(start_num, end_num + 1)]
+        else:
+            numeric_ids = [part]
+
+        for numeric_id in numeric_ids:
+            c_id = f'c{numeric_id}'
+            if c_id in citation_map:
+                replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
+            else:
+                replacement_parts.append(f"[{numeric_id}]")
+
+    return ", ".join(replacement_parts)
+
+
+def _rewrite_numeric_range(match, numeric_map: _NumericCitations) -> str:
+    """Rewrite [1-5]; only linked IDs are kept and unknown ranges are left alone"""
+    start_num = int(match.group('range_start'))
+    end_num = int(match.group('range_end'))
+    replacement = ", ".join(
+        f"[{i}]({numeric_map[str(i)]})"
+        for i in range(start_num, end_num + 1)
+        if str(i) in numeric_map
+    )
+    return replacement or match.group(0)
+
+
+def _rewrite_numeric_group(match, numeric_map: _NumericCitations) -> str:
+    """Rewrite [1, 2, 3]; only linked IDs are kept and unknown groups are left alone"""
+    citation_ids = [c.strip() for c in match.group('num_group').split(',')]
+    replacement = ", ".join(
+        f"[{numeric_id}]({numeric_map[numeric_id]})"
+        for numeric_id in citation_ids
+        if numeric_id in numeric_map
+    )
+    return replacement or match.group(0)
@@ -0,0 +1,254 @@
+"""
+Precomputed channel digests.
+
+Most summary traffic asks for the same few timeframes ("24h", "last week") on
+a handful of busy channels. Organizations can opt channels in through the
+``summarizer_digests`` section of ``Organization.config``; the summarizer cog
+then refreshes those summaries in the background and ``/summarize`` answers
+straight from a digest whose window covers the request.
+
+This module holds the parts that don't need Discord:
+
+- ``DigestSettings``: per-organization controls (channels, timeframes, refresh
+  interval, how stale a digest may be when served, daily token budget and
+  off-peak hours)
+- ``DigestStore``: the stored digests, in the message store's SQLite database
+- ``DigestBudget``: tokens spent per organization per UTC day
+- ``digest_covers`` / ``digest_is_due``: when a digest is served and refreshed
+"""
+
+import os
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from modules.summarizer.models import ChannelDigest
+from modules.summarizer.message_store import DEFAULT_MESSAGE_STORE_URL
+from modules.summarizer.utils import create_store_engine
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Key of the digest settings in Organization.config
+DIGEST_CONFIG_KEY = "summarizer_digests"
+
+DEFAULT_DIGEST_TIMEFRAMES = ["24h", "last week"]
+DEFAULT_REFRESH_MINUTES = 120
+DEFAULT_SERVE_WITHIN_MINUTES = 120
+DEFAULT_DAILY_TOKEN_BUDGET = 500_000
+
+
+@dataclass
+class DigestSettings:
+    """
+    Digest controls for one organization, read from ``Organization.config``:
+
+        "summarizer_digests": {
+            "enabled": true,
+            "channel_ids": ["123", "456"],
+            "timeframes": ["24h", "last week"],
+            "refresh_minutes": 120,
+            "serve_within_minutes": 120,
+            "daily_token_budget": 500000,
+            "off_peak_hours_utc": [8, 9, 10, 11, 12]
+        }
+
+    An empty ``off_peak_hours_utc`` lets digests refresh at any hour.
+    """
+    enabled: bool = False
+    channel_ids: List[str] = field(default_factory=list)
+    timeframes: List[str] = field(default_factory=lambda: list(DEFAULT_DIGEST_TIMEFRAMES))
+    refresh_minutes: int = DEFAULT_REFRESH_MINUTES
+    serve_within_minutes: int = DEFAULT_SERVE_WITHIN_MINUTES
+    daily_token_budget: int = DEFAULT_DAILY_TOKEN_BUDGET
+    off_peak_hours_utc: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'DigestSettings':
+        """Read the digest section of an organization's config, ignoring invalid values"""
+        section = (config or {}).get(DIGEST_CONFIG_KEY) or {}
+        defaults = cls()
+
+        def positive_int(key: str, default: int) -> int:
+            try:
+                value = int(section.get(key, default))
+            except (TypeError, ValueError):
+                return default
+            return value if value > 0 else default
+
+        def hours(key: str) -> List[int]:
+            values = section.get(key) or []
+            if not isinstance(values, (list, tuple)):
+                return []
+            parsed = []
+            for value in values:
+                try:
+                    hour = int(value)
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= hour <= 23:
+                    parsed.append(hour)
+            return parsed
+
+        return cls(
+            enabled=bool(section.get("enabled", False)),
+            channel_ids=[str(channel_id) for channel_id in section.get("channel_ids") or []],
+            timeframes=[str(timeframe) for timeframe in section.get("timeframes") or defaults.timeframes],
+            refresh_minutes=positive_int("refresh_minutes", defaults.refresh_minutes),
+            serve_within_minutes=positive_int("serve_within_minutes", defaults.serve_within_minutes),
+            daily_token_budget=positive_int("daily_token_budget", defaults.daily_token_budget),
+            off_peak_hours_utc=hours("off_peak_hours_utc")
+        )
+
+    def is_off_peak(self, now: datetime) -> bool:
+        return not self.off_peak_hours_utc or now.astimezone(timezone.utc).hour in self.off_peak_hours_utc
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Datetimes are stored as naive UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _effective_end(window_end: Optional[datetime], as_of: datetime) -> datetime:
+    """Last moment a window actually contains messages for, as of a given time"""
+    return as_of if window_end is None else min(window_end, as_of)
+
+
+def digest_covers(digest: ChannelDigest, window_start: datetime, window_end: Optional[datetime], now: datetime) -> bool:
+    """
+    Whether a digest can answer a request for the window.
+
+    Both ends of the digest's window may differ from the request's by at most
+    the digest's ``serve_within_seconds``; for open-ended windows the end is
+    the time the digest was generated, so this also bounds its age.
+    """
+    tolerance = timedelta(seconds=digest.serve_within_seconds)
+    now = _utc_naive(now)
+    requested_end = _effective_end(_utc_naive(window_end), now)
+    digest_end = _effective_end(digest.window_end, digest.generated_at)
+    return (abs(digest.window_start - _utc_naive(window_start)) <= tolerance
+            and abs(requested_end - digest_end) <= tolerance)
+
+
+def digest_is_due(digest: Optional[ChannelDigest], settings: DigestSettings,
+                  window_start: datetime, window_end: Optional[datetime], now: datetime) -> bool:
+    """Whether a digest should be regenerated: missing, older than the refresh interval, or for another window"""
+    if digest is None:
+        return True
+    if _utc_naive(now) - digest.generated_at >= timedelta(minutes=settings.refresh_minutes):
+        return True
+    # Calendar windows ("last week") move on as a whole
+    return window_end is not None and (digest.window_start, digest.window_end) != (_utc_naive(window_start), _utc_naive(window_end))
+
+
+class DigestBudget:
+    """Estimated tokens spent on digests per organization and UTC day"""
+
+    def __init__(self):
+        self._spent: Dict[Tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _day(now: datetime) -> str:
+        return now.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+    def remaining(self, organization_id: int, budget: int, now: datetime) -> int:
+        with self._lock:
+            return budget - self._spent.get((organization_id, self._day(now)), 0)
+
+    def spend(self, organization_id: int, tokens: int, now: datetime) -> None:
+        day = self._day(now)
+        with self._lock:
+            # Only today's totals matter
+            self._spent = {key: value for key, value in self._spent.items() if key[1] == day}
+            self._spent[(organization_id, day)] = self._spent.get((organization_id, day), 0) + tokens
+
+
+class DigestStore:
+    """
+    Latest digest per (channel, timeframe).
+
+    Lives in the message store's database unless ``SUMMARIZER_DIGEST_DB_URL``
+    is set; pass the message store's ``engine`` to share its connections. All
+    methods are synchronous; callers on the event loop should run them through
+    ``asyncio.to_thread``.
+    """
+
+    def __init__(self, db_url: Optional[str] = None, engine: Optional[Engine] = None):
+        db_url = db_url or os.environ.get("SUMMARIZER_DIGEST_DB_URL")
+        if db_url or engine is None:
+            engine = create_store_engine(db_url or os.environ.get("SUMMARIZER_MESSAGE_STORE_URL", DEFAULT_MESSAGE_STORE_URL))
+        self.engine = engine
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine, expire_on_commit=False)
+        ChannelDigest.__table__.create(self.engine, checkfirst=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+
+    def get(self, channel_id: str, timeframe: str) -> Optional[ChannelDigest]:
+        with self.SessionLocal() as db:
+            return db.get(ChannelDigest, (str(channel_id), timeframe))
+
+    def save(self,
+             organization_id: int,
+             guild_id: str,
+             channel_id: str,
+             timeframe: str,
+             window_start: datetime,
+             window_end: Optional[datetime],
+             result: Dict[str, Any],
+             serve_within_minutes: int,
+             generated_at: Optional[datetime] = None) -> None:
+        """Store the result of a digest run, replacing the previous one for the channel and timeframe"""
+        with self.SessionLocal() as db:
+            db.merge(ChannelDigest(
+                channel_id=str(channel_id),
+                timeframe=timeframe,
+                guild_id=str(guild_id),
+                organization_id=organization_id,
+                window_start=_utc_naive(window_start),
+                window_end=_utc_naive(window_end),
+                generated_at=_utc_naive(generated_at or datetime.now(timezone.utc)),
+                serve_within_seconds=serve_within_minutes * 60,
+                input_tokens=result.get("input_tokens", 0),
+                payload=json.dumps(result)
+            ))
+            db.commit()
+        self.generated += 1
+
+    def find(self, channel_id: str, window_start: datetime, window_end: Optional[datetime],
+             now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        The stored result of a digest covering the window, if any.
+
+        Returns:
+            The summary result, with ``digest_generated_at`` (ISO, UTC) added
+        """
+        now = now or datetime.now(timezone.utc)
+        with self.SessionLocal() as db:
+            digests = db.execute(
+                select(ChannelDigest).where(ChannelDigest.channel_id == str(channel_id))
+            ).scalars().all()
+
+        for digest in sorted(digests, key=lambda digest: digest.generated_at, reverse=True):
+            if digest_covers(digest, window_start, window_end, now):
+                self.hits += 1
+                result = json.loads(digest.payload)
+                result["digest_generated_at"] = digest.generated_at.replace(tzinfo=timezone.utc).isoformat()
+                return result
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {"hits": self.hits, "misses": self.misses, "generated": self.generated}
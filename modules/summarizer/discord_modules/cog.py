@@ -1,23 +1,64 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import SlashCommandGroup, Option, OptionChoice, ApplicationContext
+import os
 import asyncio
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Optional
-from modules.summarizer.service import SummarizerService
+from typing import List, Dict, Any, Optional, Tuple
+from modules.summarizer.service import get_summarizer_service
+from modules.summarizer.scheduler import GeminiBusyError
+from modules.summarizer.message_store import MessageStore
+from modules.summarizer.ring_buffer import RecentMessageBuffer
+from modules.summarizer.message_record import MessageRecord
+from modules.summarizer.models import SummaryLog
+from modules.summarizer.singleflight import SingleFlight
+from modules.summarizer.utils import datetime_to_snowflake, split_snowflake_range
+from modules.summarizer.prompt_builder import build_conversation
+from modules.summarizer.digests import DigestStore, DigestBudget, DigestSettings, digest_is_due
+from modules.summarizer.discord_modules.streaming import StreamingEmbedWriter
 from modules.utils.logging_config import logger, get_logger
 
 # Get module logger
 logger = get_logger("summarizer.discord_modules.cog")
 
+# Mention the Gemini queue in the loading message once the expected wait is this long
+QUEUE_WAIT_NOTICE_SECONDS = 5
+
+# How often the digest job looks for digests that are due
+DIGEST_CHECK_MINUTES = 10
+
+# Long history walks are split into sub-windows of at least this length, fetched concurrently
+HISTORY_PARTITION_MIN_HOURS = 6
+
 class SummarizerCog(commands.Cog, name="Summarizer"):
     """Discord cog for the channel summarizer functionality"""
 
     def __init__(self, bot):
         self.bot = bot
-        self.summarizer_service = SummarizerService()
+        self.summarizer_service = get_summarizer_service()
+        self.message_store = MessageStore()
+        # Snowflake from which gateway events have been received without interruption
+        self._live_since_id: Optional[int] = None
+        # Messages seen live this session, so short windows need neither the store nor Discord
+        self.recent_messages = RecentMessageBuffer()
+        # Edit responses progressively while Gemini streams them
+        self.stream_responses = os.environ.get("SUMMARIZER_STREAM_RESPONSES", "true").lower() != "false"
+        # Identical concurrent /summarize and /ask requests share one fetch-and-generate run
+        self.request_flights = SingleFlight()
+        # Sub-windows a history walk is split into, and how many run at once across all requests
+        self.history_partitions = max(1, int(os.environ.get("SUMMARIZER_HISTORY_PARTITIONS", "8")))
+        self.history_concurrency = max(1, int(os.environ.get("SUMMARIZER_HISTORY_CONCURRENCY", "4")))
+        self._history_slots: Optional[asyncio.Semaphore] = None
+        # Summaries precomputed for the channels organizations opted in
+        self.digest_store = DigestStore(engine=self.message_store.engine)
+        self.digest_budget = DigestBudget()
+        if os.environ.get("SUMMARIZER_DIGESTS", "true").lower() != "false":
+            self.refresh_digests.start()
         logger.info("SummarizerCog initialized - registering /summarize command")
 
+    def cog_unload(self):
+        self.refresh_digests.cancel()
+
     
     # Create a slash command for summarization
     @discord.slash_command(
@@ -83,85 +124,93 @@ class SummarizerCog(commands.Cog, name="Summarizer"):
                 await thinking_message.edit(content=f"⚠️ Error: I couldn't understand the timeframe '{timeframe}'. Try something like '24h', 'last week', or 'January 1 to January 15'.")
                 return
 
-            # Show message about fetching messages
-            await thinking_message.edit(content=f"🔍 Searching for messages from {look_back_time.strftime('%Y-%m-%d %H:%M:%S')} UTC...")
+            # Show the summary as it streams in, opening continuation embeds as needed
+            stream_writer = StreamingEmbedWriter(
+                ctx,
+                thinking_message,
+                title_for_part=lambda index: f"Channel Summary ({display_range})" if index == 0 else f"Channel Summary ({display_range}) - Part {index + 1}",
+                color=discord.Color.blue(),
+                split_text=self.summarizer_service.split_response
+            )
 
-            # Fetch messages from the channel - pass end_time if in timeline mode (specific date range)
-            if end_datetime:
-                messages = await self._fetch_messages_in_range(ctx.channel, look_back_time, end_datetime)
-            else:
-                messages = await self._fetch_messages(ctx.channel, look_back_time)
+            # Requests for the same channel, window and command that arrive while one is
+            # still running share its history walk and Gemini call, and its progress
+            request_key = self.summarizer_service.request_key("summarize", str(ctx.channel.id), look_back_time, end_datetime)
 
-            # Use a simple spinner animation for loading
-            spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-            loading_base = "Generating summary... "
+            async def show_progress(kind: str, text: str):
+                """Show the shared request's status lines and streamed text in this user's response"""
+                if kind == "status":
+                    await thinking_message.edit(content=text)
+                else:
+                    await stream_writer.update(text)
 
-            # Set an initial static message
-            try:
-                await thinking_message.edit(content=f"{loading_base} Please wait, this may take a minute.")
-                logger.info("Set static loading message")
-            except Exception as e:
-                logger.error(f"Failed to set static loading message: {e}")
+            async def fetch_and_summarize():
+                """Fetch the window and run Gemini; shared by identical concurrent requests
 
-            # Define a stub task that does nothing (we're avoiding animation due to Discord rate limits)
-            async def dummy_task():
-                try:
-                    await asyncio.sleep(60)  # Just wait until cancelled
-                except asyncio.CancelledError:
-                    logger.info("Dummy task cancelled")
-                    return
+                Returns (None, digest) instead when a precomputed digest covers the window.
+                """
+                digest = await self._find_digest(ctx.channel, look_back_time, end_datetime)
+                if digest is not None:
+                    logger.info(f"Serving summary for channel {ctx.channel.id} from the digest generated at {digest['digest_generated_at']}")
+                    return None, digest
 
-            # Create a task that doesn't actually edit messages
-            loop = asyncio.get_event_loop()
-            loading_task = loop.create_task(dummy_task())
+                # Show message about fetching messages
+                await self.request_flights.publish(request_key, "status", f"🔍 Searching for messages from {look_back_time.strftime('%Y-%m-%d %H:%M:%S')} UTC...")
 
-            # Generate summary
-            try:
-                summary_result = self.summarizer_service.generate_summary(
-                    messages=messages,
-                    duration_str=display_range,
-                    user_id=str(ctx.author.id),
-                    channel_id=str(ctx.channel.id),
-                    guild_id=str(ctx.guild.id)
-                )
+                # Fetch messages from the channel - pass end_time if in timeline mode (specific date range)
+                if end_datetime:
+                    messages = await self._fetch_messages_in_range(ctx.channel, look_back_time, end_datetime)
+                else:
+                    messages = await self._fetch_messages(ctx.channel, look_back_time)
 
-                # Cancel the loading task when done
-                if loading_task.cancel():
-                    logger.info("Loading task was successfully cancelled")
+                loading_base = "Generating summary... "
 
+                # Set a static loading message (no animation, to stay within Discord rate limits)
                 try:
-                    # Wait for the task to cancel with timeout
-                    await asyncio.wait_for(loading_task, timeout=1.0)
-                except (asyncio.TimeoutError, asyncio.CancelledError, Exception):
-                    pass
-            except Exception as gen_error:
-                # Handle summary generation error
-                if loading_task.cancel():
-                    logger.info("Loading task was cancelled due to generation error")
+                    queue_note = self._queue_wait_note("summarize")
+                    await self.request_flights.publish(request_key, "status", f"{loading_base} Please wait, this may take a minute.{queue_note}")
+                    logger.info("Set static loading message")
+                except Exception as e:
+                    logger.error(f"Failed to set static loading message: {e}")
+
+                # Generate summary
                 try:
-                    await asyncio.wait_for(loading_task, timeout=1.0)
-                except Exception:
-                    pass
-                logger.error(f"Error generating summary: {gen_error}")
-                raise  # Re-raise to be caught by the outer try/except
+                    summary_result = await self.summarizer_service.generate_summary(
+                        messages=messages,
+                        duration_str=display_range,
+                        user_id=str(ctx.author.id),
+                        channel_id=str(ctx.channel.id),
+                        guild_id=str(ctx.guild.id),
+                        window_start=look_back_time,
+                        window_end=end_datetime,
+                        on_progress=(lambda text: self.request_flights.publish(request_key, "text", text)) if self.stream_responses else None
+                    )
+                except Exception as gen_error:
+                    # Handle summary generation error
+                    logger.error(f"Error generating summary: {gen_error}")
+                    raise  # Re-raise to be caught by the outer try/except
+
+                return messages, summary_result
+
+            if self.request_flights.in_flight(request_key):
+                await thinking_message.edit(content="⏳ Someone just asked for a summary of the same period, sharing it with you...")
+            try:
+                (messages, summary_result), shared = await self.request_flights.do(request_key, fetch_and_summarize, show_progress)
+            except Exception as pipeline_error:
+                await self._record_summary_log(ctx, timeframe_to_parse, "summarize", error_message=str(pipeline_error))
+                raise
+            if shared:
+                logger.info(f"Summary for channel {ctx.channel.id} shared with an identical in-flight request")
+            await self._record_summary_log(ctx, timeframe_to_parse, "summarize", summary_result)
             
             # Get stats
             message_count = summary_result['message_count']
 
-            # Get unique participants
-            participants = set()
-            for msg in messages:
-                participants.add(msg["author"]["name"])
-            participant_count = len(participants)
-
-            # Calculate time span
-            time_span = "0 minutes"
-            if messages and len(messages) > 1:
-                first_msg_time = datetime.strptime(messages[0]["timestamp"], "%Y-%m-%d %H:%M:%S")
-                last_msg_time = datetime.strptime(messages[-1]["timestamp"], "%Y-%m-%d %H:%M:%S")
-                delta = last_msg_time - first_msg_time
-                minutes = delta.total_seconds() / 60
-                time_span = f"{int(minutes)} minutes"
+            # Get unique participants and the time span (digests carry their own)
+            if messages is None:
+                participant_count, time_span = summary_result["participant_count"], summary_result["time_span"]
+            else:
+                participant_count, time_span = self._window_stats(messages)
 
             # Create embed for response
             embed = discord.Embed(
@@ -173,7 +222,10 @@ class SummarizerCog(commands.Cog, name="Summarizer"):
             # Stats now in footer instead of field
             # Include timespan information in the footer
             timespan_info = f"{start_time.strftime('%Y-%m-%d')} to {datetime.now().strftime('%Y-%m-%d')}" if not end_time else f"{start_time.strftime('%Y-%m-%d')} to {end_time.strftime('%Y-%m-%d')}"
-            embed.set_footer(text=f"📊 {message_count} msgs • 👥 {participant_count} participants • ⏱️ {time_span} • 📅 {timespan_info} • Requested by {ctx.author.display_name}")
+            digest_info = ""
+            if summary_result.get("digest_generated_at"):
+                digest_info = f" • 🗂️ Digest from {datetime.fromisoformat(summary_result['digest_generated_at']).strftime('%H:%M')} UTC"
+            embed.set_footer(text=f"📊 {message_count} msgs • 👥 {participant_count} participants • ⏱️ {time_span} • 📅 {timespan_info}{digest_info} • Requested by {ctx.author.display_name}")
             
             # Create a view with the make public button
             view = discord.ui.View()
@@ -219,6 +271,7 @@ class SummarizerCog(commands.Cog, name="Summarizer"):
                     await thinking_message.delete()
                 except Exception as e:
                     logger.error(f"Failed to delete main ephemeral message: {e}")
+                await stream_writer.delete_continuations()
             
             make_public_button.callback = make_public_callback
             view.add_item(make_public_button)
@@ -229,7 +282,9 @@ class SummarizerCog(commands.Cog, name="Summarizer"):
                 await thinking_message.edit(content=None, embed=embed, view=view)
                 logger.info("Slash command: Successfully updated message with summary embed")
                 
-                # If the summary was split into multiple parts, send continuation messages
+                # If the summary was split into multiple parts, show continuation messages
+                # (reusing the ones opened while streaming)
+                continuation_embeds = []
                 if summary_result.get("is_split", False) and "continuation_parts" in summary_result:
                     logger.info(f"Sending {len(summary_result['continuation_parts'])} continuation parts")
                     
@@ -243,10 +298,10 @@ class SummarizerCog(commands.Cog, name="Summarizer"):
                         
                         # Add the same footer to all continuation parts
                         cont_embed.set_footer(text=embed.footer.text)
-                        
-                        # Send as a separate message with the same view containing the button
-                        await ctx.followup.send(embed=cont_embed, ephemeral=True, view=view)
-                        logger.info(f"Sent continuation part {i+2}")
+                        continuation_embeds.append(cont_embed)
+                
+                # Sent as separate messages with the same view containing the button
+                await stream_writer.send_continuations(continuation_embeds, view=view)
 
             except Exception as e:
                 logger.error(f"Slash command: Error updating message with summary: {e}")
@@ -257,16 +312,10 @@ class SummarizerCog(commands.Cog, name="Summarizer"):
                 except Exception as send_error:
                     logger.error(f"Slash command: Error sending fallback message: {send_error}")
             
+        except GeminiBusyError as e:
+            logger.warning(f"Summarize command rejected, Gemini queue wait is ~{e.estimated_wait:.0f}s")
+            await thinking_message.edit(content=self._busy_message(e))
         except Exception as e:
-            # Make sure to cancel the loading task if it exists
-            if 'loading_task' in locals():
-                try:
-                    if loading_task.cancel():
-                        logger.info("Slash command error handler: Loading task was successfully cancelled")
-                    await asyncio.wait_for(loading_task, timeout=1.0)
-                except (asyncio.TimeoutError, asyncio.CancelledError, Exception) as task_error:
-                    logger.error(f"Slash command error handler: Issue cancelling loading task: {task_error}")
-
             logger.error(f"Error in summarize command: {e}")
 
             # Create an error embed with Markdown formatting
@@ -302,7 +351,182 @@ An error occurred during the summarization process.
                     ephemeral=True
                 )
     
-    async def _fetch_messages(self, channel: discord.TextChannel, after_time: datetime) -> List[Dict[str, Any]]:
+    def _queue_wait_note(self, kind: str) -> str:
+        """Loading message suffix with the expected Gemini queue wait, if it is noticeable"""
+        queue_wait = self.summarizer_service.estimate_queue_wait(kind)
+        if queue_wait < QUEUE_WAIT_NOTICE_SECONDS:
+            return ""
+        return f" ⏳ Gemini is busy, expect about {queue_wait:.0f}s in the queue."
+
+    @staticmethod
+    def _busy_message(error: GeminiBusyError) -> str:
+        """Response for a request the Gemini scheduler turned away"""
+        return (f"⏳ Gemini is handling a lot of requests right now. "
+                f"Please try again in about {max(1, round(error.estimated_wait))} seconds.")
+
+    @staticmethod
+    def _window_stats(messages: List[MessageRecord]) -> Tuple[int, str]:
+        """Number of participants and the time span covered, for the response footer"""
+        participants = set()
+        for msg in messages:
+            participants.add(msg.author_name)
+
+        time_span = "0 minutes"
+        if messages and len(messages) > 1:
+            delta = messages[-1].created_at - messages[0].created_at
+            minutes = delta.total_seconds() / 60
+            time_span = f"{int(minutes)} minutes"
+        return len(participants), time_span
+
+    async def _find_digest(self, channel, window_start: datetime, window_end: Optional[datetime]) -> Optional[Dict[str, Any]]:
+        """Stored digest result covering the window, or None (also when the lookup fails)"""
+        if getattr(channel, "guild", None) is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.digest_store.find, channel.id, window_start, window_end)
+        except Exception as e:
+            logger.error(f"Failed to look up digest for channel {channel.id}: {e}")
+            return None
+
+    # Background digest job
+    @tasks.loop(minutes=DIGEST_CHECK_MINUTES)
+    async def refresh_digests(self):
+        """Regenerate the digests that are due for every organization that opted channels in"""
+        try:
+            organizations = await asyncio.to_thread(self._load_digest_organizations)
+        except Exception as e:
+            logger.error(f"Failed to load organization digest settings: {e}")
+            return
+
+        for organization_id, guild_id, settings in organizations:
+            if not settings.is_off_peak(datetime.now(timezone.utc)):
+                continue
+            for channel_id in settings.channel_ids:
+                channel = self.bot.get_channel(int(channel_id))
+                if channel is None or str(getattr(getattr(channel, "guild", None), "id", "")) != str(guild_id):
+                    logger.warning(f"Digest channel {channel_id} is not a channel of organization {organization_id}'s guild, skipping")
+                    continue
+                for timeframe in settings.timeframes:
+                    # Users come first: digests only use Gemini while nobody is queued for it
+                    if self.summarizer_service.get_scheduler_stats()["queue_depth"] > 0:
+                        logger.info("Gemini requests are queued, postponing the digest refresh")
+                        return
+                    try:
+                        await self._refresh_digest(organization_id, channel, timeframe, settings)
+                    except GeminiBusyError:
+                        logger.info("Gemini is busy, postponing the digest refresh")
+                        return
+                    except Exception as e:
+                        logger.error(f"Failed to refresh the '{timeframe}' digest for channel {channel_id}: {e}")
+
+    @refresh_digests.before_loop
+    async def before_refresh_digests(self):
+        await self.bot.wait_until_ready()
+
+    @staticmethod
+    def _load_digest_organizations() -> List[Tuple[int, str, DigestSettings]]:
+        """(organization ID, guild ID, digest settings) of active organizations with digests enabled"""
+        from shared import db_connect
+        from modules.organizations.models import Organization
+        db = next(db_connect.get_db())
+        try:
+            organizations = []
+            for org in db.query(Organization).filter_by(is_active=True).all():
+                try:
+                    settings = DigestSettings.from_config(org.config)
+                except Exception as e:
+                    # One organization's bad config must not stop digests for the others
+                    logger.error(f"Invalid digest settings for organization {org.id}: {e}")
+                    continue
+                if settings.enabled and settings.channel_ids:
+                    organizations.append((org.id, org.guild_id, settings))
+            return organizations
+        finally:
+            db.close()
+
+    async def _refresh_digest(self, organization_id: int, channel: discord.TextChannel, timeframe: str, settings: DigestSettings):
+        """Regenerate one channel's digest for a timeframe if it is due and fits the daily token budget"""
+        start_time, end_time, display_range = self.summarizer_service.parse_date_range(timeframe)
+        now = datetime.now(timezone.utc)
+        digest = await asyncio.to_thread(self.digest_store.get, channel.id, timeframe)
+        if not digest_is_due(digest, settings, start_time, end_time, now):
+            return
+
+        messages = await self._fetch_window(channel, start_time, end_time)
+        # Upper bound: incremental and cached summaries cost less
+        estimated_tokens = build_conversation(messages).tokens
+        remaining = self.digest_budget.remaining(organization_id, settings.daily_token_budget, now)
+        if estimated_tokens > remaining:
+            logger.info(f"Skipping the '{timeframe}' digest for channel {channel.id}: ~{estimated_tokens} tokens, {remaining} left in today's budget")
+            return
+
+        result = await self.summarizer_service.generate_summary(
+            messages=messages,
+            duration_str=display_range,
+            user_id="digest",
+            channel_id=str(channel.id),
+            guild_id=str(channel.guild.id),
+            window_start=start_time,
+            window_end=end_time
+        )
+        if not result.get("cached"):
+            self.digest_budget.spend(organization_id, result.get("input_tokens", 0), now)
+        if result.get("api_error"):
+            logger.warning(f"Not storing the '{timeframe}' digest for channel {channel.id}: the Gemini request failed")
+            return
+
+        participant_count, time_span = self._window_stats(messages)
+        result.update(participant_count=participant_count, time_span=time_span)
+        await asyncio.to_thread(
+            self.digest_store.save, organization_id, str(channel.guild.id), str(channel.id), timeframe,
+            start_time, end_time, result, settings.serve_within_minutes, now
+        )
+        logger.info(f"Refreshed the '{timeframe}' digest for channel {channel.id} ({result['message_count']} messages)")
+
+    async def _record_summary_log(self,
+                                  ctx: discord.ApplicationContext,
+                                  duration: str,
+                                  command: str,
+                                  result: Optional[Dict[str, Any]] = None,
+                                  error_message: Optional[str] = None):
+        """Write a SummaryLog row for one user's request
+
+        The row carries the result's message count, completion time, model tiers and
+        token counts. Coalesced requests each get their own row. Failures are logged
+        and never surface to the user.
+        """
+        result = result or {}
+        def write():
+            from shared import db_connect
+            db = next(db_connect.get_db())
+            try:
+                db.add(SummaryLog(
+                    user_id=str(ctx.author.id),
+                    channel_id=str(ctx.channel.id),
+                    guild_id=str(ctx.guild.id) if ctx.guild else "",
+                    duration=(duration or "")[:SummaryLog.duration.type.length],
+                    message_count=result.get("message_count", 0),
+                    completion_time=result.get("completion_time"),
+                    error=error_message is not None,
+                    error_message=error_message,
+                    command=command,
+                    model_tier=result.get("model_tier"),
+                    final_model_tier=result.get("final_model_tier"),
+                    model_name=result.get("model_name"),
+                    model_escalations=result.get("model_escalations", 0),
+                    input_tokens=result.get("input_tokens"),
+                    output_tokens=result.get("output_tokens")
+                ))
+                db.commit()
+            finally:
+                db.close()
+
+        try:
+            await asyncio.to_thread(write)
+        except Exception as e:
+            logger.error(f"Failed to write summary log: {e}")
+
+    async def _fetch_messages(self, channel: discord.TextChannel, after_time: datetime) -> List[MessageRecord]:
         """Fetch messages from a channel after a specific time
         
         Args:
@@ -310,44 +534,11 @@ An error occurred during the summarization process.
             after_time: Only fetch messages after this time
             
         Returns:
-            List of message dictionaries with author, content, and timestamp
+            List of message records, oldest first
         """
-        messages = []
-        
-        try:
-            async for message in channel.history(after=after_time, limit=None):
-                # Skip bot messages
-                if message.author.bot:
-                    continue
-                    
-                # Skip system messages
-                if message.type != discord.MessageType.default:
-                    continue
-                
-                # Format the message
-                message_data = {
-                    "id": str(message.id),
-                    "content": message.content,
-                    "author": {
-                        "id": str(message.author.id),
-                        "name": message.author.display_name
-                    },
-                    "timestamp": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    "jump_url": message.jump_url
-                }
-                
-                messages.append(message_data)
-                
-            # Sort messages by timestamp (oldest first)
-            messages.sort(key=lambda msg: msg["timestamp"])
-            
-            return messages
-            
-        except Exception as e:
-            logger.error(f"Error fetching messages: {e}")
-            return []
+        return await self._fetch_window(channel, after_time)
 
-    async def _fetch_messages_in_range(self, channel: discord.TextChannel, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+    async def _fetch_messages_in_range(self, channel: discord.TextChannel, start_time: datetime, end_time: datetime) -> List[MessageRecord]:
         """Fetch messages from a channel between two specific times
         
         Args:
@@ -356,42 +547,207 @@ An error occurred during the summarization process.
             end_time: Only fetch messages before this time
             
         Returns:
-            List of message dictionaries with author, content, and timestamp
+            List of message records, oldest first
         """
-        messages = []
+        return await self._fetch_window(channel, start_time, end_time)
+
+    async def _fetch_window(self, channel: discord.TextChannel, start_time: datetime, end_time: Optional[datetime] = None) -> List[MessageRecord]:
+        """Fetch a window of messages, serving whatever is already buffered or stored
         
-        try:
-            async for message in channel.history(after=start_time, before=end_time, limit=None):
-                # Skip bot messages
-                if message.author.bot:
-                    continue
-                    
-                # Skip system messages
-                if message.type != discord.MessageType.default:
-                    continue
-                
-                # Format the message
-                message_data = {
-                    "id": str(message.id),
-                    "content": message.content,
-                    "author": {
-                        "id": str(message.author.id),
-                        "name": message.author.display_name
-                    },
-                    "timestamp": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    "jump_url": message.jump_url
-                }
-                
-                messages.append(message_data)
-                
-            # Sort messages by timestamp (oldest first)
-            messages.sort(key=lambda msg: msg["timestamp"])
-            
-            return messages
+        The part of the window seen live this gateway session comes from the
+        in-memory buffer. Of the rest, only what the message store doesn't cover
+        yet is requested from Discord; it is saved before being read back.
+        
+        Args:
+            channel: Discord channel to fetch messages from
+            start_time: Only fetch messages after this time
+            end_time: Only fetch messages before this time (defaults to now)
             
+        Returns:
+            List of message records sorted oldest first
+        """
+        now = datetime.now(timezone.utc)
+        after_id = datetime_to_snowflake(start_time, high=True)
+        # Never checkpoint into the future - messages sent later must still be fetched
+        before_id = datetime_to_snowflake(min(end_time, now) if end_time else now)
+        guild = getattr(channel, "guild", None)
+
+        try:
+            if guild is None:
+                # DMs aren't stored; fetch them directly every time
+                return await self._fetch_from_discord(channel, after_id, before_id)
+
+            buffered_after_id, buffered = self.recent_messages.read(channel.id, after_id, before_id)
+            if buffered_after_id is None:
+                return await self._fetch_stored_window(channel, after_id, before_id)
+            if buffered_after_id <= after_id:
+                logger.info(f"Serving window for channel {channel.id} entirely from the recent message buffer")
+                return buffered
+
+            # Only the part older than the buffer goes through the store
+            older = await self._fetch_stored_window(channel, after_id, buffered_after_id + 1)
+            return older + buffered
+
+        except Exception as e:
+            logger.error(f"Error fetching messages through the message store: {e}")
+            try:
+                return await self._fetch_from_discord(channel, after_id, before_id)
+            except Exception as fetch_error:
+                logger.error(f"Error fetching messages: {fetch_error}")
+                return []
+
+    async def _fetch_stored_window(self, channel: discord.TextChannel, after_id: int, before_id: int) -> List[MessageRecord]:
+        """Read a window from the message store, fetching the spans it doesn't cover from Discord first"""
+        guild = channel.guild
+        store = self.message_store
+        # Live messages posted while the fetch runs are saved too, so the new checkpoint can extend over them
+        with store.fetching(guild.id, channel.id):
+            spans = await asyncio.to_thread(store.missing_spans, guild.id, channel.id, after_id, before_id)
+            for span_after, span_before in spans:
+                fetched = await self._fetch_from_discord(channel, span_after, span_before)
+                await asyncio.to_thread(store.save_messages, guild.id, channel.id, fetched)
+            if spans:
+                await asyncio.to_thread(store.mark_covered, guild.id, channel.id, after_id, before_id)
+            else:
+                logger.info(f"Serving window for channel {channel.id} entirely from the message store")
+
+        return await asyncio.to_thread(store.read_window, guild.id, channel.id, after_id, before_id)
+
+    async def _fetch_from_discord(self, channel: discord.TextChannel, after_id: int, before_id: int) -> List[MessageRecord]:
+        """Fetch channel history between two snowflakes (both exclusive), oldest first
+        
+        Long ranges are split into consecutive sub-windows that are walked
+        concurrently; concatenating them keeps the messages in order. At most
+        ``history_concurrency`` walks run at once across all requests, and py-cord
+        waits out Discord's rate limits within each of them.
+        
+        Raises on API errors so callers never checkpoint a span that wasn't fetched.
+        """
+        ranges = split_snowflake_range(after_id, before_id, self.history_partitions,
+                                       min_span_ms=HISTORY_PARTITION_MIN_HOURS * 3600 * 1000)
+        if self._history_slots is None:
+            self._history_slots = asyncio.Semaphore(self.history_concurrency)
+
+        async def walk(span: Tuple[int, int]) -> List[MessageRecord]:
+            async with self._history_slots:
+                return await self._walk_history(channel, *span)
+
+        parts = await asyncio.gather(*(walk(span) for span in ranges))
+        messages = [message for part in parts for message in part]
+        logger.info(f"Fetched {len(messages)} messages from Discord for channel {channel.id} in {len(ranges)} sub-windows")
+        return messages
+
+    async def _walk_history(self, channel: discord.TextChannel, after_id: int, before_id: int) -> List[MessageRecord]:
+        """Walk one range of channel history page by page, keeping only summarizable messages"""
+        messages = []
+        async for message in channel.history(
+            after=discord.Object(id=after_id),
+            before=discord.Object(id=before_id),
+            limit=None,
+            oldest_first=True
+        ):
+            if self._is_summarizable(message):
+                messages.append(self._message_to_record(message))
+        return messages
+
+    @staticmethod
+    def _is_summarizable(message: discord.Message) -> bool:
+        """Bot and system messages are excluded from summaries"""
+        return not message.author.bot and message.type == discord.MessageType.default
+
+    @staticmethod
+    def _message_to_record(message: discord.Message) -> MessageRecord:
+        """Keep the parts of a Discord message that SummarizerService uses"""
+        guild = getattr(message, "guild", None)
+        return MessageRecord(
+            message.id,
+            guild.id if guild else None,
+            message.channel.id,
+            message.author.id,
+            message.author.display_name,
+            message.content
+        )
+
+    # Gateway listeners keep the message store and recent message buffer in sync without refetching history
+    def _start_live_session(self):
+        """Messages from now on are seen live"""
+        self._live_since_id = datetime_to_snowflake(datetime.now(timezone.utc))
+        self.recent_messages.start_session(self._live_since_id)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Start of a gateway session"""
+        self._start_live_session()
+        logger.info("Summarizer gateway session ready; live message capture enabled")
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        """After a gateway RESUME py-cord fires on_resumed, not on_ready; the buffer starts over"""
+        self._start_live_session()
+        logger.info("Summarizer gateway session resumed; live message capture enabled")
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        """Events may be missed until the next session, so stop extending stored spans"""
+        self._live_since_id = None
+        self.recent_messages.stop_session()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Record new messages in channels the store is already tracking"""
+        if message.guild is None or not self._is_summarizable(message):
+            return
+        record = self._message_to_record(message)
+        self.recent_messages.add(record)
+        try:
+            await asyncio.to_thread(
+                self.message_store.record_live_message,
+                message.guild.id,
+                message.channel.id,
+                record,
+                self._live_since_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to record live message {message.id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Apply content edits to stored messages"""
+        if payload.guild_id is None or "content" not in payload.data:
+            return
+        self.recent_messages.update_content(payload.channel_id, payload.message_id, payload.data["content"])
+        try:
+            await asyncio.to_thread(
+                self.message_store.update_message_content,
+                payload.guild_id,
+                payload.channel_id,
+                payload.message_id,
+                payload.data["content"]
+            )
         except Exception as e:
-            logger.error(f"Error fetching messages: {e}")
-            return []
+            logger.error(f"Failed to apply edit for message {payload.message_id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Drop deleted messages from the store"""
+        if payload.guild_id is None:
+            return
+        self.recent_messages.remove(payload.channel_id, [payload.message_id])
+        try:
+            await asyncio.to_thread(self.message_store.delete_messages, payload.guild_id, payload.channel_id, [payload.message_id])
+        except Exception as e:
+            logger.error(f"Failed to remove deleted message {payload.message_id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Drop bulk-deleted messages from the store"""
+        if payload.guild_id is None:
+            return
+        self.recent_messages.remove(payload.channel_id, payload.message_ids)
+        try:
+            await asyncio.to_thread(self.message_store.delete_messages, payload.guild_id, payload.channel_id, payload.message_ids)
+        except Exception as e:
+            logger.error(f"Failed to remove {len(payload.message_ids)} bulk-deleted messages: {e}")
 
     # Create a slash command for asking questions about chat
     @discord.slash_command(
@@ -457,86 +813,81 @@ An error occurred during the summarization process.
                 await thinking_message.edit(content=f"⚠️ Error: I couldn't understand the timeframe '{timeframe}'. Try something like '24h', 'last week', or 'January 1 to January 15'.")
                 return
 
-            # Show message about fetching messages
-            await thinking_message.edit(content=f"🔍 Searching for messages from {look_back_time.strftime('%Y-%m-%d %H:%M:%S')} UTC...")
-
-            # Fetch messages from the channel - pass end_time if in timeline mode (specific date range)
-            if end_datetime:
-                messages = await self._fetch_messages_in_range(ctx.channel, look_back_time, end_datetime)
-            else:
-                messages = await self._fetch_messages(ctx.channel, look_back_time)
+            # Show the answer as it streams in, opening continuation embeds as needed
+            stream_writer = StreamingEmbedWriter(
+                ctx,
+                thinking_message,
+                title_for_part=lambda index: f"Question: {question}" if index == 0 else f"Answer (continued part {index + 1})",
+                color=discord.Color.green(),
+                split_text=self.summarizer_service.split_response
+            )
 
-            # Use a simple spinner animation for loading
-            spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-            loading_base = "Analyzing messages... "
+            # Requests for the same channel, window and command that arrive while one is
+            # still running share its history walk and Gemini call, and its progress
+            request_key = self.summarizer_service.request_key("ask", str(ctx.channel.id), look_back_time, end_datetime, question)
 
-            # Set an initial static message
-            try:
-                await thinking_message.edit(content=f"{loading_base} Please wait, this may take a minute.")
-                logger.info("Ask command: Set static loading message")
-            except Exception as e:
-                logger.error(f"Ask command: Failed to set static loading message: {e}")
-
-            # Define a stub task that does nothing (we're avoiding animation due to Discord rate limits)
-            async def dummy_task():
-                try:
-                    await asyncio.sleep(60)  # Just wait until cancelled
-                except asyncio.CancelledError:
-                    logger.info("Ask command: Dummy task cancelled")
-                    return
+            async def show_progress(kind: str, text: str):
+                """Show the shared request's status lines and streamed text in this user's response"""
+                if kind == "status":
+                    await thinking_message.edit(content=text)
+                else:
+                    await stream_writer.update(text)
 
-            # Create a task that doesn't actually edit messages
-            loop = asyncio.get_event_loop()
-            loading_task = loop.create_task(dummy_task())
+            async def fetch_and_answer():
+                """Fetch the window and run Gemini; shared by identical concurrent requests"""
+                # Show message about fetching messages
+                await self.request_flights.publish(request_key, "status", f"🔍 Searching for messages from {look_back_time.strftime('%Y-%m-%d %H:%M:%S')} UTC...")
 
-            # Generate answer
-            try:
-                answer_result = self.summarizer_service.answer_question(
-                    messages=messages,
-                    question=question,
-                    duration_str=display_range,
-                    user_id=str(ctx.author.id),
-                    channel_id=str(ctx.channel.id),
-                    guild_id=str(ctx.guild.id)
-                )
+                # Fetch messages from the channel - pass end_time if in timeline mode (specific date range)
+                if end_datetime:
+                    messages = await self._fetch_messages_in_range(ctx.channel, look_back_time, end_datetime)
+                else:
+                    messages = await self._fetch_messages(ctx.channel, look_back_time)
 
-                # Cancel the loading task when done
-                if loading_task.cancel():
-                    logger.info("Ask command: Loading task was successfully cancelled")
+                loading_base = "Analyzing messages... "
 
+                # Set a static loading message (no animation, to stay within Discord rate limits)
                 try:
-                    # Wait for the task to cancel with timeout
-                    await asyncio.wait_for(loading_task, timeout=1.0)
-                except (asyncio.TimeoutError, asyncio.CancelledError, Exception):
-                    pass
-            except Exception as gen_error:
-                # Handle answer generation error
-                if loading_task.cancel():
-                    logger.info("Ask command: Loading task was cancelled due to generation error")
+                    queue_note = self._queue_wait_note("ask")
+                    await self.request_flights.publish(request_key, "status", f"{loading_base} Please wait, this may take a minute.{queue_note}")
+                    logger.info("Ask command: Set static loading message")
+                except Exception as e:
+                    logger.error(f"Ask command: Failed to set static loading message: {e}")
+
+                # Generate answer
                 try:
-                    await asyncio.wait_for(loading_task, timeout=1.0)
-                except Exception:
-                    pass
-                logger.error(f"Ask command: Error generating answer: {gen_error}")
-                raise  # Re-raise to be caught by the outer try/except
+                    answer_result = await self.summarizer_service.answer_question(
+                        messages=messages,
+                        question=question,
+                        duration_str=display_range,
+                        user_id=str(ctx.author.id),
+                        channel_id=str(ctx.channel.id),
+                        guild_id=str(ctx.guild.id),
+                        on_progress=(lambda text: self.request_flights.publish(request_key, "text", text)) if self.stream_responses else None
+                    )
+                except Exception as gen_error:
+                    # Handle answer generation error
+                    logger.error(f"Ask command: Error generating answer: {gen_error}")
+                    raise  # Re-raise to be caught by the outer try/except
+
+                return messages, answer_result
+
+            if self.request_flights.in_flight(request_key):
+                await thinking_message.edit(content="⏳ Someone just asked the same question, sharing the answer with you...")
+            try:
+                (messages, answer_result), shared = await self.request_flights.do(request_key, fetch_and_answer, show_progress)
+            except Exception as pipeline_error:
+                await self._record_summary_log(ctx, timeframe, "ask", error_message=str(pipeline_error))
+                raise
+            if shared:
+                logger.info(f"Answer for channel {ctx.channel.id} shared with an identical in-flight request")
+            await self._record_summary_log(ctx, timeframe, "ask", answer_result)
             
             # Get stats
             message_count = answer_result['message_count']
 
-            # Get unique participants
-            participants = set()
-            for msg in messages:
-                participants.add(msg["author"]["name"])
-            participant_count = len(participants)
-
-            # Calculate time span
-            time_span = "0 minutes"
-            if messages and len(messages) > 1:
-                first_msg_time = datetime.strptime(messages[0]["timestamp"], "%Y-%m-%d %H:%M:%S")
-                last_msg_time = datetime.strptime(messages[-1]["timestamp"], "%Y-%m-%d %H:%M:%S")
-                delta = last_msg_time - first_msg_time
-                minutes = delta.total_seconds() / 60
-                time_span = f"{int(minutes)} minutes"
+            # Get unique participants and the time span
+            participant_count, time_span = self._window_stats(messages)
 
             # Create embed for response
             embed = discord.Embed(
@@ -589,11 +940,12 @@ An error occurred during the summarization process.
                         # Send publicly
                         await ctx.channel.send(embed=cont_embed)
                 
-                # Delete the ephemeral message
+                # Delete the ephemeral messages
                 try:
                     await thinking_message.delete()
                 except Exception as e:
                     logger.error(f"Failed to delete ephemeral message: {e}")
+                await stream_writer.delete_continuations()
             
             make_public_button.callback = make_public_callback
             view.add_item(make_public_button)
@@ -604,7 +956,9 @@ An error occurred during the summarization process.
                 await thinking_message.edit(content=None, embed=embed, view=view)
                 logger.info("Ask command: Successfully updated message with answer embed")
                 
-                # If the answer was split into multiple parts, send continuation messages
+                # If the answer was split into multiple parts, show continuation messages
+                # (reusing the ones opened while streaming)
+                continuation_embeds = []
                 if answer_result.get("is_split", False) and "continuation_parts" in answer_result:
                     logger.info(f"Sending {len(answer_result['continuation_parts'])} continuation parts")
                     
@@ -618,10 +972,10 @@ An error occurred during the summarization process.
                         
                         # Add the same footer to all continuation parts
                         cont_embed.set_footer(text=embed.footer.text)
-                        
-                        # Send as a separate message with the same view containing the button
-                        await ctx.followup.send(embed=cont_embed, ephemeral=True, view=view)
-                        logger.info(f"Ask command: Sent continuation part {i+2}")
+                        continuation_embeds.append(cont_embed)
+                
+                # Sent as separate messages with the same view containing the button
+                await stream_writer.send_continuations(continuation_embeds, view=view)
             except Exception as e:
                 logger.error(f"Ask command: Error updating message with answer: {e}")
                 # Fallback - try sending a new message
@@ -631,16 +985,10 @@ An error occurred during the summarization process.
                 except Exception as send_error:
                     logger.error(f"Ask command: Error sending fallback message: {send_error}")
             
+        except GeminiBusyError as e:
+            logger.warning(f"Ask command rejected, Gemini queue wait is ~{e.estimated_wait:.0f}s")
+            await thinking_message.edit(content=self._busy_message(e))
         except Exception as e:
-            # Make sure to cancel the loading task if it exists
-            if 'loading_task' in locals():
-                try:
-                    if loading_task.cancel():
-                        logger.info("Ask command error handler: Loading task was successfully cancelled")
-                    await asyncio.wait_for(loading_task, timeout=1.0)
-                except (asyncio.TimeoutError, asyncio.CancelledError, Exception) as task_error:
-                    logger.error(f"Ask command error handler: Issue cancelling loading task: {task_error}")
-
             logger.error(f"Error in ask command: {e}")
 
             # Create an error embed with Markdown formatting
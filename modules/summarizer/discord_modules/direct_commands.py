@@ -6,7 +6,7 @@ This provides an alternative method to register the /summarize command
 import discord
 from discord.ext import commands
 from modules.summarizer.service import SummarizerService
-from datetime import datetime, timezone, timedelta
+from modules.summarizer.message_record import MessageRecord
 import logging
 import asyncio
 import random
@@ -83,16 +83,14 @@ async def summarize_command(
                         continue
 
                     # Format the message
-                    message_data = {
-                        "id": str(message.id),
-                        "content": message.content,
-                        "author": {
-                            "id": str(message.author.id),
-                            "name": message.author.display_name
-                        },
-                        "timestamp": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                        "jump_url": message.jump_url
-                    }
+                    message_data = MessageRecord(
+                        message.id,
+                        ctx.guild.id if ctx.guild else None,
+                        ctx.channel.id,
+                        message.author.id,
+                        message.author.display_name,
+                        message.content
+                    )
 
                     messages.append(message_data)
 
@@ -111,16 +109,14 @@ async def summarize_command(
                         continue
 
                     # Format the message
-                    message_data = {
-                        "id": str(message.id),
-                        "content": message.content,
-                        "author": {
-                            "id": str(message.author.id),
-                            "name": message.author.display_name
-                        },
-                        "timestamp": message.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                        "jump_url": message.jump_url
-                    }
+                    message_data = MessageRecord(
+                        message.id,
+                        ctx.guild.id if ctx.guild else None,
+                        ctx.channel.id,
+                        message.author.id,
+                        message.author.display_name,
+                        message.content
+                    )
 
                     messages.append(message_data)
 
@@ -132,7 +128,7 @@ async def summarize_command(
             logger.info(f"Discord history search for timeframe '{display_range}': Found {len(messages)} relevant messages out of {message_count} total")
 
             # Sort messages by timestamp (oldest first)
-            messages.sort(key=lambda msg: msg["timestamp"])
+            messages.sort(key=lambda msg: msg.message_id)
 
         except discord.Forbidden:
             logger.error("Bot doesn't have permission to fetch message history")
@@ -175,7 +171,7 @@ async def summarize_command(
         loading_task = loop.create_task(dummy_task())
 
         # Generate summary
-        summary_result = service.generate_summary(
+        summary_result = await service.generate_summary(
             messages=messages,
             duration_str=display_range,
             user_id=str(ctx.author.id),
@@ -195,9 +191,7 @@ async def summarize_command(
         # Calculate time span
         time_span = "0 minutes"
         if messages and len(messages) > 1:
-            first_msg_time = datetime.strptime(messages[0]["timestamp"], "%Y-%m-%d %H:%M:%S")
-            last_msg_time = datetime.strptime(messages[-1]["timestamp"], "%Y-%m-%d %H:%M:%S")
-            delta = last_msg_time - first_msg_time
+            delta = messages[-1].created_at - messages[0].created_at
             minutes = delta.total_seconds() / 60
             time_span = f"{int(minutes)} minutes"
 
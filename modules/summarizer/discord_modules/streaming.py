@@ -0,0 +1,125 @@
+"""
+Progressive rendering of streamed Gemini output into ephemeral Discord embeds.
+
+``StreamingEmbedWriter`` receives the growing response text from the service's
+``on_progress`` callback and edits the response message at most once every
+``STREAM_EDIT_INTERVAL_SECONDS``, so a long response never runs into Discord's
+per-webhook edit rate limit. Once the text no longer fits in one embed, the
+overflow is sent as continuation embeds right away, split the same way the
+final response is.
+"""
+
+import time
+from typing import Callable, List, Optional
+
+import discord
+
+from modules.utils.logging_config import get_logger
+
+# Get module logger
+logger = get_logger("summarizer.discord_modules.streaming")
+
+# Interaction followups share one webhook rate limit bucket (5 requests per ~2 seconds)
+STREAM_EDIT_INTERVAL_SECONDS = 1.5
+
+# Shown at the end of the text while the response is still being written
+STREAM_CURSOR = " ▌"
+
+
+class StreamingEmbedWriter:
+    """Edits an ephemeral response (plus continuation messages) while text streams in"""
+
+    def __init__(self,
+                 ctx: discord.ApplicationContext,
+                 message: discord.WebhookMessage,
+                 title_for_part: Callable[[int], str],
+                 color: discord.Color,
+                 split_text: Callable[[str], List[str]],
+                 min_interval: float = STREAM_EDIT_INTERVAL_SECONDS):
+        """
+        Args:
+            ctx: Context of the slash command, used to send continuation messages
+            message: The ephemeral message that shows the first part
+            title_for_part: Embed title for a part index (0 is the main part)
+            color: Embed color
+            split_text: Splits the full text into embed-sized parts
+            min_interval: Minimum number of seconds between two rounds of edits
+        """
+        self.ctx = ctx
+        self.messages: List[discord.WebhookMessage] = [message]
+        self.title_for_part = title_for_part
+        self.color = color
+        self.split_text = split_text
+        self.min_interval = min_interval
+
+        self._rendered: List[Optional[str]] = [None]
+        self._pending: Optional[str] = None
+        self._last_flush = 0.0
+        self.edit_count = 0
+
+    async def update(self, text: str) -> None:
+        """Record the latest text and render it if the last edit was long enough ago"""
+        self._pending = text
+        if time.monotonic() - self._last_flush >= self.min_interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Render the pending text, editing only the parts that changed"""
+        text, self._pending = self._pending, None
+        if not text:
+            return
+        self._last_flush = time.monotonic()
+
+        parts = self.split_text(text)
+        for index, part in enumerate(parts):
+            if index < len(self._rendered) and self._rendered[index] == part:
+                continue
+            # Only the last part is still growing
+            description = part + STREAM_CURSOR if index == len(parts) - 1 else part
+            embed = discord.Embed(title=self.title_for_part(index), description=description, color=self.color)
+            try:
+                if index < len(self.messages):
+                    await self.messages[index].edit(content=None, embed=embed)
+                    self._rendered[index] = part
+                else:
+                    self.messages.append(await self.ctx.followup.send(embed=embed, ephemeral=True))
+                    self._rendered.append(part)
+                self.edit_count += 1
+            except discord.HTTPException as e:
+                # A skipped frame is fine; the final response replaces it anyway
+                logger.warning(f"Failed to render streamed part {index + 1}: {e}")
+                return
+
+    @property
+    def continuation_messages(self) -> List[discord.WebhookMessage]:
+        """Continuation messages opened while streaming"""
+        return self.messages[1:]
+
+    async def send_continuations(self, embeds: List[discord.Embed], view: Optional[discord.ui.View] = None) -> None:
+        """Show the final continuation embeds, reusing messages opened while streaming
+
+        Continuation messages left over from streaming (when the final text splits
+        into fewer parts) are deleted.
+        """
+        existing = self.continuation_messages
+        for index, embed in enumerate(embeds):
+            if index < len(existing):
+                await existing[index].edit(content=None, embed=embed, view=view)
+            else:
+                self.messages.append(await self.ctx.followup.send(embed=embed, ephemeral=True, view=view))
+            logger.info(f"Sent continuation part {index + 2}")
+
+        for message in existing[len(embeds):]:
+            try:
+                await message.delete()
+            except discord.HTTPException as e:
+                logger.error(f"Failed to delete leftover streamed message: {e}")
+        del self.messages[len(embeds) + 1:]
+
+    async def delete_continuations(self) -> None:
+        """Delete every continuation message, e.g. once the response was made public"""
+        for message in self.continuation_messages:
+            try:
+                await message.delete()
+            except discord.HTTPException as e:
+                logger.error(f"Failed to delete continuation message: {e}")
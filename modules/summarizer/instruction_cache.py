@@ -0,0 +1,202 @@
+"""
+Server-side caching of the summarizer's static instruction blocks.
+
+The formatting and citation rules for summaries and answers are the same on
+every request. ``InstructionCache`` turns each distinct instruction block into
+a Gemini cached-content handle (one per model and block), refreshes its TTL
+shortly before it expires, and hands out a ``GenerateContentConfig`` that
+points at it, so each request only carries the time range, question and
+messages.
+
+If a handle can't be created (for example because the block is below the
+model's minimum cacheable size, or the API key has no caching access) the block
+is sent as a ``system_instruction`` instead, and creation is retried later.
+
+Each request's usage metadata is recorded: whether the cached prefix was used
+and how many input tokens were served from cache. ``tracks_prefix_usage``
+collects those numbers per summary/answer so the service can return them.
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+import functools
+import contextvars
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from google.genai import types
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+INSTRUCTION_CACHE_TTL_SECONDS = 3600
+# Extend the handle's TTL when a request comes in this close to expiry
+INSTRUCTION_CACHE_REFRESH_MARGIN_SECONDS = 300
+# Wait this long before trying to create a handle again after a failure
+INSTRUCTION_CACHE_RETRY_SECONDS = 3600
+
+
+@dataclass
+class PrefixUsage:
+    """Cached-prefix numbers for the Gemini requests behind one summary or answer"""
+    requests: int = 0
+    cached_requests: int = 0
+    cached_tokens: int = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_prefix": self.cached_requests > 0,
+            "cached_prefix_tokens": self.cached_tokens
+        }
+
+
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("prefix_usage", default=None)
+
+
+def tracks_prefix_usage(func):
+    """Collect the cached-prefix usage of the Gemini requests an async service method makes"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _current_usage.set(PrefixUsage())
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _current_usage.reset(token)
+    return wrapper
+
+
+def current_prefix_usage() -> PrefixUsage:
+    """Usage collected so far in the current tracked call (a throwaway one outside of it)"""
+    return _current_usage.get() or PrefixUsage()
+
+
+@dataclass
+class _CachedInstruction:
+    """A live cached-content handle"""
+    name: str
+    expires_at: float
+
+
+class InstructionCache:
+    """One Gemini cached-content handle per (model, instruction block)"""
+
+    def __init__(self,
+                 ttl_seconds: int = INSTRUCTION_CACHE_TTL_SECONDS,
+                 refresh_margin: int = INSTRUCTION_CACHE_REFRESH_MARGIN_SECONDS,
+                 retry_seconds: int = INSTRUCTION_CACHE_RETRY_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.retry_seconds = retry_seconds
+
+        self._entries: Dict[Tuple[str, str], _CachedInstruction] = {}
+        self._unavailable_until: Dict[Tuple[str, str], float] = {}
+        # Creations/refreshes in progress, shared by concurrent requests
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        self.created = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.requests = 0
+        self.cached_requests = 0
+        self.cached_tokens = 0
+
+    @staticmethod
+    def _key(model: str, instruction: str) -> Tuple[str, str]:
+        return model, hashlib.sha256(instruction.encode()).hexdigest()
+
+    async def config_for(self, client, model: str, instruction: str) -> types.GenerateContentConfig:
+        """
+        Config for a request that uses instruction as its static prefix.
+
+        Returns:
+            A config with ``cached_content`` set if a handle is available, otherwise
+            one with ``system_instruction`` set
+        """
+        key = self._key(model, instruction)
+        now = time.monotonic()
+        if now < self._unavailable_until.get(key, 0):
+            return types.GenerateContentConfig(system_instruction=instruction)
+
+        entry = self._entries.get(key)
+        if entry is None or now >= entry.expires_at - self.refresh_margin:
+            task = self._pending.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._create_or_refresh(client, model, instruction, key, entry))
+                self._pending[key] = task
+                task.add_done_callback(lambda _: self._pending.pop(key, None))
+            entry = await asyncio.shield(task)
+
+        if entry is None:
+            return types.GenerateContentConfig(system_instruction=instruction)
+        return types.GenerateContentConfig(cached_content=entry.name)
+
+    async def _create_or_refresh(self, client, model: str, instruction: str, key: Tuple[str, str],
+                                 entry: Optional[_CachedInstruction]) -> Optional[_CachedInstruction]:
+        """Extend a handle that is about to expire, or create a new one"""
+        ttl = f"{self.ttl_seconds}s"
+        if entry is not None and time.monotonic() < entry.expires_at:
+            try:
+                await client.aio.caches.update(name=entry.name, config=types.UpdateCachedContentConfig(ttl=ttl))
+                entry = _CachedInstruction(entry.name, time.monotonic() + self.ttl_seconds)
+                self._entries[key] = entry
+                self.refreshed += 1
+                logger.info(f"Refreshed cached instructions {entry.name}")
+                return entry
+            except Exception as e:
+                logger.warning(f"Failed to refresh cached instructions {entry.name}, creating a new handle: {e}")
+
+        try:
+            cached = await client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=instruction,
+                    display_name=f"summarizer-instructions-{key[1][:12]}",
+                    ttl=ttl
+                )
+            )
+        except Exception as e:
+            self.failures += 1
+            self._entries.pop(key, None)
+            self._unavailable_until[key] = time.monotonic() + self.retry_seconds
+            logger.warning(f"Gemini context caching unavailable for {model}, sending instructions inline: {e}")
+            return None
+
+        entry = _CachedInstruction(cached.name, time.monotonic() + self.ttl_seconds)
+        self._entries[key] = entry
+        self.created += 1
+        logger.info(f"Created cached instructions {cached.name} for {model}")
+        return entry
+
+    def invalidate(self, model: str, instruction: str) -> None:
+        """Forget a handle the API no longer accepts (e.g. it expired or was deleted)"""
+        self._entries.pop(self._key(model, instruction), None)
+
+    def record_usage(self, response: Any, config: Optional[types.GenerateContentConfig]) -> None:
+        """Count a response's cached input tokens for the service and the current tracked call"""
+        used_cache = bool(config is not None and config.cached_content)
+        usage_metadata = getattr(response, "usage_metadata", None)
+        cached_tokens = getattr(usage_metadata, "cached_content_token_count", None) or 0
+
+        self.requests += 1
+        self.cached_requests += int(used_cache)
+        self.cached_tokens += cached_tokens
+
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.requests += 1
+            usage.cached_requests += int(used_cache)
+            usage.cached_tokens += cached_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "handles": len(self._entries),
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+            "requests": self.requests,
+            "cached_prefix_requests": self.cached_requests,
+            "cached_prefix_tokens": self.cached_tokens
+        }
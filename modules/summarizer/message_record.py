@@ -0,0 +1,79 @@
+"""
+Compact representation of chat messages in summarization windows.
+
+Windows can hold tens of thousands of messages. As dictionaries (string IDs,
+an author dict, a formatted timestamp and a full jump URL) every message costs
+several hundred bytes on top of its content. ``MessageRecord`` keeps integer
+snowflakes in slots and derives the rest when it is read:
+
+- the creation time comes from the message snowflake
+- the jump URL is built from the guild, channel and message IDs, so only
+  cited messages ever build one
+
+Records are read-only mappings with the same keys as the dictionary format
+(``id``, ``content``, ``author``, ``timestamp``, ``jump_url``), so prompt
+building, retrieval, citation mapping and the stores accept either.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from modules.summarizer.utils import snowflake_to_datetime, build_jump_url
+
+# Format of the "timestamp" key, shared with the dictionary format
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+MESSAGE_KEYS = ("id", "content", "author", "timestamp", "jump_url")
+
+
+class MessageRecord(Mapping):
+    """A chat message, readable as a summarizer message dictionary"""
+    __slots__ = ("message_id", "guild_id", "channel_id", "author_id", "author_name", "content")
+
+    def __init__(self, message_id: int, guild_id: Optional[int], channel_id: int,
+                 author_id: int, author_name: str, content: str):
+        self.message_id = message_id
+        # None for DMs
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+
+    @property
+    def created_at(self) -> datetime:
+        return snowflake_to_datetime(self.message_id)
+
+    @property
+    def jump_url(self) -> str:
+        return build_jump_url(self.guild_id if self.guild_id is not None else "@me", self.channel_id, self.message_id)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "id":
+            return str(self.message_id)
+        if key == "content":
+            return self.content
+        if key == "author":
+            return {"id": str(self.author_id), "name": self.author_name}
+        if key == "timestamp":
+            return self.created_at.strftime(TIMESTAMP_FORMAT)
+        if key == "jump_url":
+            return self.jump_url
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in MESSAGE_KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MESSAGE_KEYS)
+
+    def __len__(self) -> int:
+        return len(MESSAGE_KEYS)
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(id={self.message_id}, author={self.author_name!r}, content={self.content!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The equivalent message dictionary, e.g. for JSON"""
+        return dict(self)
@@ -0,0 +1,311 @@
+"""
+SQLite-backed message store for the summarizer.
+
+Messages are stored per (guild, channel, message snowflake). Each channel has a
+checkpoint (SummarizerChannelState) recording the contiguous snowflake span that
+is fully present on disk, so a request only has to fetch the parts of its window
+that fall outside that span from Discord. Gateway listeners keep stored rows in
+sync with edits and deletes, and save new messages for channels that have a
+checkpoint or a fetch in progress.
+"""
+
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Mapping
+
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
+
+from modules.summarizer.models import SummarizerMessage, SummarizerChannelState
+from modules.summarizer.message_record import MessageRecord, TIMESTAMP_FORMAT
+from modules.summarizer.utils import create_store_engine
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Kept out of user.db so bulk message writes never contend with the main database
+DEFAULT_MESSAGE_STORE_URL = "sqlite:///./data/summarizer_messages.db"
+
+# Rows per INSERT statement; SQLite limits the number of bound parameters per statement
+INSERT_BATCH_SIZE = 500
+
+
+class MessageStore:
+    """
+    Persistent per-channel message store with snowflake checkpoints.
+
+    All methods are synchronous; callers on the Discord event loop should run
+    them through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, db_url: Optional[str] = None):
+        self.db_url = db_url or os.environ.get("SUMMARIZER_MESSAGE_STORE_URL", DEFAULT_MESSAGE_STORE_URL)
+        self.engine = create_store_engine(self.db_url)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        # Only create the summarizer's own tables in this database
+        SummarizerMessage.__table__.create(self.engine, checkfirst=True)
+        SummarizerChannelState.__table__.create(self.engine, checkfirst=True)
+
+        # Serialise checkpoint read-modify-write cycles coming from different threads
+        self._state_lock = threading.Lock()
+        # Fetches in progress per (guild_id, channel_id), see fetching()
+        self._fetches: Dict[Tuple[int, int], int] = {}
+        logger.info(f"Message store ready at {self.db_url}")
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    def get_covered_span(self, guild_id: int, channel_id: int) -> Optional[Tuple[int, int]]:
+        """Return the (exclusive) snowflake span stored for a channel, or None"""
+        with self.SessionLocal() as db:
+            state = db.get(SummarizerChannelState, (int(guild_id), int(channel_id)))
+            if not state:
+                return None
+            return state.covered_after_id, state.covered_before_id
+
+    def missing_spans(self, guild_id: int, channel_id: int, after_id: int, before_id: int) -> List[Tuple[int, int]]:
+        """Work out which parts of a window still have to be fetched from Discord.
+
+        Args:
+            guild_id: Discord guild ID
+            channel_id: Discord channel ID
+            after_id: Exclusive lower snowflake bound of the requested window
+            before_id: Exclusive upper snowflake bound of the requested window
+
+        Returns:
+            List of exclusive (after_id, before_id) spans, oldest first. Empty when the
+            whole window can be served from the store.
+        """
+        covered = self.get_covered_span(guild_id, channel_id)
+        if not covered or not self._spans_touch((after_id, before_id), covered):
+            return [(after_id, before_id)]
+
+        covered_after, covered_before = covered
+        spans = []
+        if after_id < covered_after:
+            # Messages with IDs in (after_id, covered_after] are not on disk yet
+            spans.append((after_id, min(before_id, covered_after + 1)))
+        if before_id > covered_before:
+            # Messages with IDs in [covered_before, before_id) are not on disk yet
+            spans.append((max(after_id, covered_before - 1), before_id))
+        return spans
+
+    def mark_covered(self, guild_id: int, channel_id: int, after_id: int, before_id: int) -> None:
+        """Record that every summarizable message in (after_id, before_id) is now stored.
+
+        Spans that touch the existing checkpoint are merged into it. A disjoint span
+        only replaces the checkpoint when it is more recent, since recent history is
+        what most requests ask for.
+        """
+        with self._state_lock, self.SessionLocal() as db:
+            state = db.get(SummarizerChannelState, (int(guild_id), int(channel_id)))
+            if not state:
+                db.add(SummarizerChannelState(
+                    guild_id=int(guild_id),
+                    channel_id=int(channel_id),
+                    covered_after_id=after_id,
+                    covered_before_id=before_id
+                ))
+            elif self._spans_touch((after_id, before_id), (state.covered_after_id, state.covered_before_id)):
+                state.covered_after_id = min(state.covered_after_id, after_id)
+                state.covered_before_id = max(state.covered_before_id, before_id)
+            elif before_id >= state.covered_before_id:
+                logger.info(f"Replacing stored span for channel {channel_id} with a newer, disjoint span")
+                state.covered_after_id = after_id
+                state.covered_before_id = before_id
+            db.flush()
+            self._bump_highest_message_id(db, guild_id, channel_id, db.execute(
+                select(func.max(SummarizerMessage.message_id)).where(
+                    SummarizerMessage.guild_id == int(guild_id),
+                    SummarizerMessage.channel_id == int(channel_id)
+                )
+            ).scalar())
+            db.commit()
+
+    @contextmanager
+    def fetching(self, guild_id: int, channel_id: int):
+        """Mark a channel as being fetched from Discord for the duration of the block.
+
+        Wrap everything from ``missing_spans`` to ``mark_covered``: live messages
+        posted meanwhile are newer than the fetched span, and must be on disk when
+        the next live message extends the new checkpoint over them.
+        """
+        key = (int(guild_id), int(channel_id))
+        with self._state_lock:
+            self._fetches[key] = self._fetches.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._fetches[key] -= 1
+                if not self._fetches[key]:
+                    del self._fetches[key]
+
+    @staticmethod
+    def _spans_touch(span: Tuple[int, int], other: Tuple[int, int]) -> bool:
+        """Whether two exclusive spans overlap or leave no snowflake between them"""
+        return span[0] < other[1] and other[0] < span[1]
+
+    # ------------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------------
+
+    def read_window(self, guild_id: int, channel_id: int, after_id: int, before_id: int) -> List[MessageRecord]:
+        """Read stored messages with after_id < message_id < before_id, oldest first"""
+        guild_id, channel_id = int(guild_id), int(channel_id)
+        with self.SessionLocal() as db:
+            # Plain column rows rather than ORM objects; large windows hold tens of thousands
+            rows = db.execute(
+                select(
+                    SummarizerMessage.message_id,
+                    SummarizerMessage.author_id,
+                    SummarizerMessage.author_name,
+                    SummarizerMessage.content
+                )
+                .where(
+                    SummarizerMessage.guild_id == int(guild_id),
+                    SummarizerMessage.channel_id == int(channel_id),
+                    SummarizerMessage.message_id > after_id,
+                    SummarizerMessage.message_id < before_id
+                )
+                .order_by(SummarizerMessage.message_id)
+            ).all()
+        return [
+            MessageRecord(message_id, guild_id, channel_id, author_id, author_name, content)
+            for message_id, author_id, author_name, content in rows
+        ]
+
+    def save_messages(self, guild_id: int, channel_id: int, messages: Iterable[Mapping[str, Any]]) -> int:
+        """Insert or refresh message records (or messages in the summarizer dictionary format).
+
+        Returns:
+            Number of messages written
+        """
+        rows = [self._row_from_message(guild_id, channel_id, msg) for msg in messages]
+        if not rows:
+            return 0
+
+        with self.SessionLocal() as db:
+            for i in range(0, len(rows), INSERT_BATCH_SIZE):
+                stmt = sqlite_insert(SummarizerMessage).values(rows[i:i + INSERT_BATCH_SIZE])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["guild_id", "channel_id", "message_id"],
+                    set_={
+                        "author_name": stmt.excluded.author_name,
+                        "content": stmt.excluded.content
+                    }
+                )
+                db.execute(stmt)
+            self._bump_highest_message_id(db, guild_id, channel_id, max(row["message_id"] for row in rows))
+            db.commit()
+        return len(rows)
+
+    def record_live_message(self, guild_id: int, channel_id: int, message: Mapping[str, Any], live_since_id: Optional[int] = None) -> None:
+        """Store a message delivered through the gateway.
+
+        If the stored span already reaches into the current gateway session (its upper
+        bound is at or after ``live_since_id``), every message since then has been seen
+        live, so the span is extended to include this message.
+
+        Channels that have never been summarized have no checkpoint and are ignored
+        (unless their first fetch is in progress), so the store only grows for
+        channels people actually ask about.
+        """
+        with self._state_lock:
+            being_fetched = (int(guild_id), int(channel_id)) in self._fetches
+        if not being_fetched and self.get_covered_span(guild_id, channel_id) is None:
+            return
+        self.save_messages(guild_id, channel_id, [message])
+        if live_since_id is None:
+            return
+
+        message_id = int(message["id"])
+        with self._state_lock, self.SessionLocal() as db:
+            state = db.get(SummarizerChannelState, (int(guild_id), int(channel_id)))
+            if state and state.covered_before_id >= live_since_id and message_id >= state.covered_before_id:
+                state.covered_before_id = message_id + 1
+                db.commit()
+
+    def update_message_content(self, guild_id: int, channel_id: int, message_id: int, content: str, edited_at: Optional[datetime] = None) -> bool:
+        """Apply an edit seen through the gateway. Returns True if a stored row changed."""
+        with self.SessionLocal() as db:
+            result = db.execute(
+                update(SummarizerMessage)
+                .where(
+                    SummarizerMessage.guild_id == int(guild_id),
+                    SummarizerMessage.channel_id == int(channel_id),
+                    SummarizerMessage.message_id == int(message_id)
+                )
+                .values(content=content, edited_at=self._naive_utc(edited_at or datetime.now(timezone.utc)))
+            )
+            db.commit()
+            return result.rowcount > 0
+
+    def delete_messages(self, guild_id: int, channel_id: int, message_ids: Iterable[int]) -> int:
+        """Remove deleted messages so they no longer show up in summaries"""
+        ids = [int(message_id) for message_id in message_ids]
+        if not ids:
+            return 0
+        with self.SessionLocal() as db:
+            result = db.execute(
+                delete(SummarizerMessage).where(
+                    SummarizerMessage.guild_id == int(guild_id),
+                    SummarizerMessage.channel_id == int(channel_id),
+                    SummarizerMessage.message_id.in_(ids)
+                )
+            )
+            db.commit()
+            return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _bump_highest_message_id(self, db, guild_id: int, channel_id: int, message_id: int) -> None:
+        """Advance the highest-seen message ID for a channel if a checkpoint exists"""
+        if message_id is None:
+            return
+        db.execute(
+            update(SummarizerChannelState)
+            .where(
+                SummarizerChannelState.guild_id == int(guild_id),
+                SummarizerChannelState.channel_id == int(channel_id),
+                (SummarizerChannelState.highest_message_id == None) | (SummarizerChannelState.highest_message_id < message_id)  # noqa: E711
+            )
+            .values(highest_message_id=message_id)
+        )
+
+    @staticmethod
+    def _naive_utc(dt: datetime) -> datetime:
+        """SQLite DateTime columns are naive; store everything as naive UTC"""
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+
+    def _row_from_message(self, guild_id: int, channel_id: int, msg: Mapping[str, Any]) -> Dict[str, Any]:
+        """Convert a message record or summarizer message dictionary into a summarizer_messages row"""
+        if isinstance(msg, MessageRecord):
+            return {
+                "guild_id": int(guild_id),
+                "channel_id": int(channel_id),
+                "message_id": msg.message_id,
+                "author_id": msg.author_id,
+                "author_name": msg.author_name,
+                "content": msg.content or "",
+                "created_at": msg.created_at.replace(tzinfo=None)
+            }
+        return {
+            "guild_id": int(guild_id),
+            "channel_id": int(channel_id),
+            "message_id": int(msg["id"]),
+            "author_id": int(msg["author"]["id"]),
+            "author_name": msg["author"]["name"],
+            "content": msg.get("content") or "",
+            "created_at": datetime.strptime(msg["timestamp"], TIMESTAMP_FORMAT)
+        }
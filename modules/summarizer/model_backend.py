@@ -0,0 +1,219 @@
+"""
+Model backends for the summarizer.
+
+``SummarizerService`` talks to its model through a *model client*: any object
+with the async surface of ``google.genai.Client`` that the service uses:
+
+- ``aio.models.generate_content(model=..., contents=..., config=None)``, returning
+  a response with ``text`` and ``usage_metadata``
+- ``aio.models.generate_content_stream(...)``, returning an async iterator of
+  chunks with ``text`` (the last one carrying ``usage_metadata``)
+- ``aio.caches.create(model=..., config=...)`` / ``aio.caches.update(name=..., config=...)``
+  for cached instructions; if these fail, the instructions are sent inline
+- ``models.generate_content(...)``, used synchronously by the connection test
+
+Errors carry an HTTP ``code``; 429s are recognized by ``is_rate_limit_error``.
+
+``SUMMARIZER_MODEL_BACKEND`` picks the client ``create_model_client`` builds:
+
+- ``gemini`` (default): the Gemini SDK client, using ``GEMINI_API_KEY``
+- ``standin``: ``StandInClient``, which sends Gemini-style REST requests to
+  the local stand-in model server (``scripts/standin_model_server.py``) at
+  ``SUMMARIZER_STANDIN_URL``, for offline runs and load tests
+"""
+
+import os
+import json
+import asyncio
+import logging
+import weakref
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+import requests
+from google import genai
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+BACKEND_GEMINI = "gemini"
+BACKEND_STANDIN = "standin"
+MODEL_BACKENDS = (BACKEND_GEMINI, BACKEND_STANDIN)
+
+DEFAULT_STANDIN_URL = "http://127.0.0.1:8765"
+DEFAULT_STANDIN_TIMEOUT_SECONDS = 120
+
+
+def create_model_client(api_key: Optional[str], backend: Optional[str] = None):
+    """
+    Build the model client selected by ``SUMMARIZER_MODEL_BACKEND``.
+
+    Returns:
+        The client, or None if the Gemini backend has no API key
+    """
+    backend = (backend or os.environ.get("SUMMARIZER_MODEL_BACKEND", BACKEND_GEMINI)).lower()
+    if backend not in MODEL_BACKENDS:
+        logger.warning(f"Unknown SUMMARIZER_MODEL_BACKEND '{backend}', using {BACKEND_GEMINI}")
+        backend = BACKEND_GEMINI
+
+    if backend == BACKEND_STANDIN:
+        client = StandInClient()
+        logger.warning(f"Using the stand-in model server at {client.base_url} instead of Gemini")
+        return client
+
+    if not api_key:
+        logger.warning("Gemini API key not configured")
+        return None
+    return genai.Client(api_key=api_key)
+
+
+class StandInAPIError(Exception):
+    """Error response from the stand-in model server, shaped like a Gemini API error"""
+
+    def __init__(self, code: int, status: str, message: str):
+        self.code = code
+        self.status = status
+        super().__init__(f"{code} {status}. {message}")
+
+
+def _model_path(model: str) -> str:
+    return model if model.startswith("models/") else f"models/{model}"
+
+
+def _request_body(contents: Any, config: Any) -> Dict[str, Any]:
+    """Gemini REST request body for a prompt and a GenerateContentConfig"""
+    body: Dict[str, Any] = {"contents": [{"role": "user", "parts": [{"text": str(contents)}]}]}
+    system_instruction = getattr(config, "system_instruction", None)
+    if system_instruction:
+        body["systemInstruction"] = {"parts": [{"text": str(system_instruction)}]}
+    cached_content = getattr(config, "cached_content", None)
+    if cached_content:
+        body["cachedContent"] = cached_content
+    return body
+
+
+def _parse_response(payload: Dict[str, Any]) -> SimpleNamespace:
+    """Response object with the attributes the service reads from SDK responses"""
+    candidates = payload.get("candidates") or [{}]
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    usage = payload.get("usageMetadata") or {}
+    return SimpleNamespace(
+        text="".join(part.get("text", "") for part in parts),
+        candidates=[SimpleNamespace(finish_reason=candidates[0].get("finishReason"))],
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=usage.get("promptTokenCount"),
+            candidates_token_count=usage.get("candidatesTokenCount"),
+            cached_content_token_count=usage.get("cachedContentTokenCount")
+        )
+    )
+
+
+def _api_error(status: int, payload: Any) -> StandInAPIError:
+    error = payload.get("error", {}) if isinstance(payload, dict) else {}
+    return StandInAPIError(error.get("code", status), error.get("status", "UNKNOWN"), error.get("message", str(payload)))
+
+
+class StandInClient:
+    """Model client for the stand-in model server, with the SDK client's surface"""
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = DEFAULT_STANDIN_TIMEOUT_SECONDS):
+        self.base_url = (base_url or os.environ.get("SUMMARIZER_STANDIN_URL", DEFAULT_STANDIN_URL)).rstrip("/")
+        self.timeout = timeout
+        self.aio = SimpleNamespace(models=_StandInModels(self), caches=_StandInCaches(self))
+        self.models = _StandInSyncModels(self)
+        # One connection pool per event loop
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._sessions[loop] = session
+        return session
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the running event loop"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    async def _request(self, method: str, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._session().request(method, f"{self.base_url}/v1beta/{path}", json=body) as response:
+            payload = await response.json(content_type=None)
+            if response.status >= 400:
+                raise _api_error(response.status, payload)
+            return payload
+
+
+class _StandInModels:
+    def __init__(self, client: StandInClient):
+        self._client = client
+
+    async def generate_content(self, model: str, contents: Any, config: Any = None, **kwargs) -> SimpleNamespace:
+        payload = await self._client._request("POST", f"{_model_path(model)}:generateContent", _request_body(contents, config))
+        return _parse_response(payload)
+
+    async def generate_content_stream(self, model: str, contents: Any, config: Any = None, **kwargs) -> AsyncIterator[SimpleNamespace]:
+        client = self._client
+        response = await client._session().post(
+            f"{client.base_url}/v1beta/{_model_path(model)}:streamGenerateContent?alt=sse",
+            json=_request_body(contents, config)
+        )
+        if response.status >= 400:
+            try:
+                raise _api_error(response.status, await response.json(content_type=None))
+            finally:
+                response.release()
+
+        async def chunks():
+            try:
+                async for line in response.content:
+                    line = line.decode().strip()
+                    if line.startswith("data:"):
+                        yield _parse_response(json.loads(line[5:]))
+            finally:
+                response.release()
+
+        return chunks()
+
+
+class _StandInCaches:
+    def __init__(self, client: StandInClient):
+        self._client = client
+
+    async def create(self, model: str, config: Any) -> SimpleNamespace:
+        body = {
+            "model": _model_path(model),
+            "systemInstruction": {"parts": [{"text": str(getattr(config, "system_instruction", "") or "")}]},
+            "displayName": getattr(config, "display_name", None),
+            "ttl": getattr(config, "ttl", None)
+        }
+        payload = await self._client._request("POST", "cachedContents", body)
+        return SimpleNamespace(name=payload["name"])
+
+    async def update(self, name: str, config: Any) -> SimpleNamespace:
+        payload = await self._client._request("PATCH", name, {"ttl": getattr(config, "ttl", None)})
+        return SimpleNamespace(name=payload["name"])
+
+
+class _StandInSyncModels:
+    """Blocking generate_content for the connection test endpoint"""
+
+    def __init__(self, client: StandInClient):
+        self._client = client
+
+    def generate_content(self, model: str, contents: Any, config: Any = None, **kwargs) -> SimpleNamespace:
+        response = requests.post(
+            f"{self._client.base_url}/v1beta/{_model_path(model)}:generateContent",
+            json=_request_body(contents, config),
+            timeout=self._client.timeout
+        )
+        payload = response.json()
+        if response.status_code >= 400:
+            raise _api_error(response.status_code, payload)
+        parsed = _parse_response(payload)
+        # The connection test logs the response's JSON
+        parsed.model_dump_json = lambda **_: json.dumps(payload)
+        return parsed
@@ -0,0 +1,251 @@
+"""
+Model tiering for summarizer requests.
+
+Every request starts on the cheapest Gemini model that is expected to handle
+it, and moves up one tier when a response comes back unusable:
+
+- ``lite``: small windows (few messages and estimated tokens); ``/ask`` gets
+  a lower token limit than ``/summarize`` since answers need more reasoning
+- ``flash``: everything else, including map-reduce passes
+- ``pro``: only reached by escalation
+
+``ModelRouter.choose`` picks the starting tier from the command, message
+count and estimated prompt tokens. ``check_response`` rejects responses that
+were cut off at the output limit (``MAX_TOKENS``), are empty, or (for prompts
+that must cite messages) contain no ``[cX]`` citation; the service then sends
+the same prompt to ``ModelRouter.larger``.
+
+Per-tier latency, token and outcome counters are kept by the router, and the
+tiers a summary or answer used are collected in a ``RouteUsage`` (through a
+context variable set by ``tracks_model_route``) so the cog can write them to
+``SummaryLog``.
+"""
+
+import os
+import re
+import logging
+import functools
+import threading
+import contextvars
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+TIER_LITE = "lite"
+TIER_FLASH = "flash"
+TIER_PRO = "pro"
+
+DEFAULT_TIER_MODELS = {
+    TIER_LITE: "models/gemini-2.5-flash-lite",
+    TIER_FLASH: "models/gemini-2.5-flash-preview-04-17",
+    TIER_PRO: "models/gemini-2.5-pro",
+}
+
+# Windows at or under both limits start on the lite tier
+LITE_MAX_MESSAGES = 200
+LITE_MAX_TOKENS = 12_000
+ASK_LITE_MAX_TOKENS = 6_000
+
+# Latency samples kept per tier for the percentiles in stats()
+LATENCY_SAMPLES = 500
+
+OUTCOME_OK = "ok"
+OUTCOME_TRUNCATED = "truncated"
+OUTCOME_EMPTY = "empty"
+OUTCOME_NO_CITATIONS = "no_citations"
+
+CITATION_PATTERN = re.compile(r"\[c\d+")
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """A named Gemini model; tiers are ordered from cheapest to largest"""
+    name: str
+    model: str
+
+
+@dataclass
+class RoutingPolicy:
+    """Thresholds under which a request starts on the lite tier"""
+    lite_max_messages: int = LITE_MAX_MESSAGES
+    lite_max_tokens: int = LITE_MAX_TOKENS
+    ask_lite_max_tokens: int = ASK_LITE_MAX_TOKENS
+
+    @classmethod
+    def from_env(cls) -> "RoutingPolicy":
+        return cls(
+            lite_max_messages=int(os.environ.get("SUMMARIZER_LITE_MAX_MESSAGES", LITE_MAX_MESSAGES)),
+            lite_max_tokens=int(os.environ.get("SUMMARIZER_LITE_MAX_TOKENS", LITE_MAX_TOKENS)),
+            ask_lite_max_tokens=int(os.environ.get("SUMMARIZER_ASK_LITE_MAX_TOKENS", ASK_LITE_MAX_TOKENS))
+        )
+
+
+@dataclass
+class RouteUsage:
+    """Tiers used by the Gemini requests behind one summary or answer"""
+    tier: Optional[ModelTier] = None
+    final_tier: Optional[ModelTier] = None
+    requests: int = 0
+    escalations: int = 0
+    escalation_reasons: List[str] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def record(self, tier: ModelTier, tiers: List[ModelTier], input_tokens: int, output_tokens: int) -> None:
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        if self.final_tier is None or tiers.index(tier) > tiers.index(self.final_tier):
+            self.final_tier = tier
+
+    def stats(self) -> Dict[str, Any]:
+        final = self.final_tier or self.tier
+        return {
+            "model_tier": self.tier.name if self.tier else None,
+            "final_model_tier": final.name if final else None,
+            "model_name": final.model if final else None,
+            "model_escalations": self.escalations,
+            "escalation_reasons": list(self.escalation_reasons),
+            "output_tokens": self.output_tokens
+        }
+
+
+_current_route: contextvars.ContextVar = contextvars.ContextVar("model_route", default=None)
+
+
+def tracks_model_route(func):
+    """Collect the model tiers used by the Gemini requests an async service method makes"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _current_route.set(RouteUsage())
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _current_route.reset(token)
+    return wrapper
+
+
+def current_route() -> RouteUsage:
+    """Route of the current tracked call (a throwaway one outside of it)"""
+    return _current_route.get() or RouteUsage()
+
+
+def finish_reason(response: Any) -> Optional[str]:
+    """Name of the first candidate's finish reason, if the response has one"""
+    candidates = getattr(response, "candidates", None) or []
+    reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    if reason is None:
+        return None
+    return getattr(reason, "name", None) or str(reason).rsplit(".", 1)[-1]
+
+
+def check_response(response: Any, text: str, require_citations: bool = False) -> str:
+    """Outcome of a response: OUTCOME_OK or the reason it should go to a larger model"""
+    if finish_reason(response) == "MAX_TOKENS":
+        return OUTCOME_TRUNCATED
+    if not text or not text.strip():
+        return OUTCOME_EMPTY
+    if require_citations and not CITATION_PATTERN.search(text):
+        return OUTCOME_NO_CITATIONS
+    return OUTCOME_OK
+
+
+class _TierStats:
+    """Counters for one tier"""
+
+    def __init__(self):
+        self.requests = 0
+        self.outcomes: Counter = Counter()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))], 3) if latencies else 0.0
+
+        return {
+            "requests": self.requests,
+            "outcomes": dict(self.outcomes),
+            "rejected": self.requests - self.outcomes[OUTCOME_OK],
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "avg_input_tokens": round(self.input_tokens / self.requests) if self.requests else 0,
+            "avg_output_tokens": round(self.output_tokens / self.requests) if self.requests else 0,
+            "latency_seconds": {"p50": percentile(0.50), "p95": percentile(0.95), "max": latencies[-1] if latencies else 0.0}
+        }
+
+
+class ModelRouter:
+    """Picks the starting tier for a request and the tier to escalate to"""
+
+    def __init__(self,
+                 tiers: List[ModelTier],
+                 policy: Optional[RoutingPolicy] = None,
+                 enabled: bool = True,
+                 default_tier: str = TIER_FLASH):
+        self.tiers = tiers
+        self.policy = policy or RoutingPolicy()
+        self.enabled = enabled
+        self.default_tier = self.tier(default_tier)
+        self._lock = threading.Lock()
+        self._stats = {tier.name: _TierStats() for tier in tiers}
+
+    @classmethod
+    def from_env(cls, default_model: Optional[str] = None) -> "ModelRouter":
+        """Tiers from SUMMARIZER_MODEL_LITE/_FLASH/_PRO; SUMMARIZER_MODEL_TIERING=false sends everything to flash"""
+        models = dict(DEFAULT_TIER_MODELS)
+        if default_model:
+            models[TIER_FLASH] = default_model
+        tiers = [ModelTier(name, os.environ.get(f"SUMMARIZER_MODEL_{name.upper()}", model)) for name, model in models.items()]
+        enabled = os.environ.get("SUMMARIZER_MODEL_TIERING", "true").lower() != "false"
+        return cls(tiers, RoutingPolicy.from_env(), enabled)
+
+    def tier(self, name: str) -> ModelTier:
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        raise ValueError(f"Unknown model tier '{name}'")
+
+    def choose(self, kind: str, message_count: int, tokens: int) -> ModelTier:
+        """Cheapest tier expected to handle a "summarize" or "ask" request of this size"""
+        if not self.enabled:
+            return self.default_tier
+        token_limit = self.policy.ask_lite_max_tokens if kind == "ask" else self.policy.lite_max_tokens
+        if message_count <= self.policy.lite_max_messages and tokens <= token_limit:
+            return self.tier(TIER_LITE)
+        return self.tier(TIER_FLASH)
+
+    def larger(self, tier: ModelTier) -> Optional[ModelTier]:
+        """The next tier up, or None at the top (or with tiering off)"""
+        if not self.enabled:
+            return None
+        index = self.tiers.index(tier)
+        return self.tiers[index + 1] if index + 1 < len(self.tiers) else None
+
+    def record(self, tier: ModelTier, latency: float, input_tokens: int, output_tokens: int, outcome: str) -> None:
+        with self._lock:
+            stats = self._stats[tier.name]
+            stats.requests += 1
+            stats.outcomes[outcome] += 1
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.latencies.append(latency)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier request, outcome, token and latency metrics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "policy": {
+                    "lite_max_messages": self.policy.lite_max_messages,
+                    "lite_max_tokens": self.policy.lite_max_tokens,
+                    "ask_lite_max_tokens": self.policy.ask_lite_max_tokens
+                },
+                "tiers": {tier.name: {"model": tier.model, **self._stats[tier.name].snapshot()} for tier in self.tiers}
+            }
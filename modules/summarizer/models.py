@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, Float, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Text, Float, DateTime, Index
 from sqlalchemy.sql import func
 from modules.points.models import Base
 
@@ -46,6 +46,13 @@ class SummaryLog(Base):
     completion_time = Column(Float, nullable=True)  # Time taken to generate summary in seconds
     error = Column(Boolean, default=False)  # Whether an error occurred
     error_message = Column(Text, nullable=True)  # Error message if applicable
+    command = Column(String(20), nullable=True)  # "summarize" or "ask"
+    model_tier = Column(String(20), nullable=True)  # Model tier the request was routed to
+    final_model_tier = Column(String(20), nullable=True)  # Tier that produced the response (after escalations)
+    model_name = Column(String(100), nullable=True)  # Gemini model that produced the response
+    model_escalations = Column(Integer, default=0)  # Times a response was retried on a larger model
+    input_tokens = Column(Integer, nullable=True)  # Estimated prompt tokens of the conversation
+    output_tokens = Column(Integer, nullable=True)  # Output tokens across the request's Gemini calls
     created_at = Column(DateTime, default=func.now())
     
     def to_dict(self):
@@ -60,5 +67,150 @@ class SummaryLog(Base):
             "completion_time": self.completion_time,
             "error": self.error,
             "error_message": self.error_message,
+            "command": self.command,
+            "model_tier": self.model_tier,
+            "final_model_tier": self.final_model_tier,
+            "model_name": self.model_name,
+            "model_escalations": self.model_escalations,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+class SummarizerMessage(Base):
+    """
+    Local copy of a Discord message used by the summarizer so repeated
+    /summarize and /ask requests don't have to re-walk channel history
+    """
+    __tablename__ = 'summarizer_messages'
+
+    guild_id = Column(BigInteger, primary_key=True, autoincrement=False)  # Discord guild/server ID
+    channel_id = Column(BigInteger, primary_key=True, autoincrement=False)  # Discord channel ID
+    message_id = Column(BigInteger, primary_key=True, autoincrement=False)  # Discord message snowflake
+    author_id = Column(BigInteger, nullable=False)  # Discord user ID of the author
+    author_name = Column(String(100), nullable=False)  # Display name at the time the message was stored
+    content = Column(Text, nullable=False, default="")
+    created_at = Column(DateTime, nullable=False)  # Message creation time (UTC)
+    edited_at = Column(DateTime, nullable=True)  # Last edit seen through the gateway
+
+    __table_args__ = (
+        Index('ix_summarizer_messages_channel_message', 'channel_id', 'message_id'),
+    )
+
+    def to_dict(self):
+        """Convert model to the message dictionary format used by SummarizerService"""
+        return {
+            "id": str(self.message_id),
+            "content": self.content,
+            "author": {
+                "id": str(self.author_id),
+                "name": self.author_name
+            },
+            "timestamp": self.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "jump_url": f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.message_id}"
+        }
+
+class SummarizerChannelState(Base):
+    """
+    Checkpoint describing which part of a channel's history is stored locally.
+
+    Every summarizable message with covered_after_id < message_id < covered_before_id
+    is present in summarizer_messages, so that span can be served from disk.
+    """
+    __tablename__ = 'summarizer_channel_state'
+
+    guild_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    channel_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    covered_after_id = Column(BigInteger, nullable=False)  # Exclusive lower snowflake bound of the stored span
+    covered_before_id = Column(BigInteger, nullable=False)  # Exclusive upper snowflake bound of the stored span
+    highest_message_id = Column(BigInteger, nullable=True)  # Highest message ID seen in this channel
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "guild_id": str(self.guild_id),
+            "channel_id": str(self.channel_id),
+            "covered_after_id": str(self.covered_after_id),
+            "covered_before_id": str(self.covered_before_id),
+            "highest_message_id": str(self.highest_message_id) if self.highest_message_id else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class SummaryCacheEntry(Base):
+    """
+    On-disk tier of the summary result cache, so cached summaries survive restarts
+    """
+    __tablename__ = 'summary_cache_entries'
+
+    cache_key = Column(String(64), primary_key=True)  # SHA-256 of the channel, window, watermark and prompt version
+    payload = Column(Text, nullable=False)  # JSON-encoded summary result
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)  # Entries are ignored (and pruned) after this time
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "cache_key": self.cache_key,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None
+        }
+
+class RollingSummaryEntry(Base):
+    """
+    A generated summary together with the range of message IDs it covers, so a
+    later overlapping window only has to summarize the messages after it
+    """
+    __tablename__ = 'summarizer_rolling_summaries'
+
+    id = Column(Integer, primary_key=True)
+    channel_id = Column(String(100), nullable=False)  # Discord channel ID
+    first_message_id = Column(BigInteger, nullable=False)  # Oldest message covered by the summary
+    last_message_id = Column(BigInteger, nullable=False)  # Newest message covered by the summary
+    payload = Column(Text, nullable=False)  # JSON-encoded StoredSummary
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index('ix_summarizer_rolling_summaries_channel', 'channel_id', 'last_message_id'),
+    )
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "id": self.id,
+            "channel_id": self.channel_id,
+            "first_message_id": str(self.first_message_id),
+            "last_message_id": str(self.last_message_id),
             "created_at": self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class ChannelDigest(Base):
+    """
+    Summary precomputed by the digest job for a channel and timeframe, served
+    to /summarize requests whose window it covers
+    """
+    __tablename__ = 'summarizer_channel_digests'
+
+    channel_id = Column(String(100), primary_key=True)  # Discord channel ID
+    timeframe = Column(String(50), primary_key=True)  # Timeframe as configured, e.g. "24h" or "last week"
+    guild_id = Column(String(100), nullable=False)  # Discord guild/server ID
+    organization_id = Column(Integer, nullable=False)  # Organization that opted the channel in
+    window_start = Column(DateTime, nullable=False)  # Start of the summarized window (UTC)
+    window_end = Column(DateTime, nullable=True)  # End of the window (UTC), None for "until generated_at"
+    generated_at = Column(DateTime, nullable=False)  # When the digest was generated (UTC)
+    serve_within_seconds = Column(Integer, nullable=False)  # How far a request's window may differ from the digest's
+    input_tokens = Column(Integer, default=0)  # Estimated prompt tokens spent on the digest
+    payload = Column(Text, nullable=False)  # JSON-encoded summary result
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "channel_id": self.channel_id,
+            "timeframe": self.timeframe,
+            "guild_id": self.guild_id,
+            "organization_id": self.organization_id,
+            "window_start": self.window_start.isoformat() if self.window_start else None,
+            "window_end": self.window_end.isoformat() if self.window_end else None,
+            "generated_at": self.generated_at.isoformat() if self.generated_at else None,
+            "input_tokens": self.input_tokens
+        }
@@ -0,0 +1,287 @@
+"""
+Token-aware formatting of Discord messages for summary and question prompts.
+
+``build_conversation`` turns the message dicts the cog produces into prompt
+lines while compacting them:
+
+- Consecutive messages from one author share a single ``author:`` prefix, and
+  exact repeats within such a run are dropped. A run longer than
+  ``MAX_RUN_TOKENS`` continues on a new line, so chunking and trimming, which
+  only split between lines, still work when one author dominates a window.
+- Low-information messages (emoji-only, "lol", "ok", empty attachment posts...)
+  get no citation; a run of them collapses into one short "reactions" line.
+- Custom emoji become ``:name:`` and links become ``<domain link>``.
+- Citation IDs (``c1``, ``c2``...) are only given to messages that are kept,
+  so they stay short and dense. The citation map holds the message behind
+  each ID; jump URLs are built only for the IDs a response cites.
+
+``fit_to_budget`` then trims a conversation that is still over its token
+budget, according to a policy: keep the most recent lines, or sample evenly
+across the window. Summaries can instead keep everything and switch to
+map-reduce (``POLICY_MAP_REDUCE``), which is the service default.
+
+Token counts use ``estimate_tokens``, the same estimate the map-reduce
+chunking uses.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from modules.summarizer.utils import estimate_tokens
+from modules.summarizer.citations import CitationMap
+from modules.summarizer.message_record import MessageRecord
+
+# Over-budget policies
+POLICY_MAP_REDUCE = "map_reduce"
+POLICY_RECENT = "recent"
+POLICY_SAMPLE = "sample"
+BUDGET_POLICIES = (POLICY_MAP_REDUCE, POLICY_RECENT, POLICY_SAMPLE)
+
+# Whole messages that carry no information on their own
+LOW_INFORMATION_MESSAGES = frozenset({
+    "lol", "lmao", "lmfao", "rofl", "haha", "hahaha", "xd", "ok", "okay", "k", "kk",
+    "ya", "ye", "yea", "yeah", "yep", "yup", "ty", "thx", "tysm", "np", "same", "true",
+    "real", "fr", "bet", "nice", "cool", "wow", "oof", "rip", "gg", "+1", "^", "this"
+})
+
+# Distinct short replies listed on a collapsed reactions line
+MAX_REACTIONS_SHOWN = 5
+
+# Estimated tokens after which a same-author run starts a new line; well under
+# the map-reduce chunk budget and the smallest useful trimming budget
+MAX_RUN_TOKENS = 1_000
+
+CUSTOM_EMOJI_RE = re.compile(r"<a?:(\w+):\d+>")
+URL_RE = re.compile(r"<?https?://(?:www\.)?([^/\s>]+)[^\s>]*>?")
+WHITESPACE_RE = re.compile(r"\s+")
+WORD_CHAR_RE = re.compile(r"\w")
+
+
+@dataclass
+class PromptConversation:
+    """Prompt lines for a message window plus the numbers behind them"""
+    lines: List[str]
+    citation_map: CitationMap
+    message_count: int
+    # Estimated tokens of the uncompacted "author: content [cN]" format
+    raw_tokens: int
+    # Messages represented by each line, used when lines are dropped
+    line_message_counts: List[int] = field(default_factory=list)
+    collapsed_count: int = 0
+    duplicate_count: int = 0
+    omitted_count: int = 0
+    policy: Optional[str] = None
+    # Message ID behind each citation ID
+    citation_message_ids: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    @property
+    def tokens(self) -> int:
+        return sum(estimate_tokens(line) for line in self.lines) if self.lines else 0
+
+    @property
+    def compaction_ratio(self) -> float:
+        """Estimated prompt tokens as a fraction of the uncompacted format"""
+        return round(self.tokens / self.raw_tokens, 3) if self.raw_tokens else 1.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Numbers reported with each summary/answer"""
+        return {
+            "input_tokens": self.tokens,
+            "raw_input_tokens": self.raw_tokens,
+            "compaction_ratio": self.compaction_ratio,
+            "collapsed_messages": self.collapsed_count,
+            "duplicate_messages": self.duplicate_count,
+            "omitted_messages": self.omitted_count
+        }
+
+
+def compact_content(content: str) -> str:
+    """Shorten custom emoji and links and collapse whitespace"""
+    content = CUSTOM_EMOJI_RE.sub(r":\1:", content or "")
+    content = URL_RE.sub(r"<\1 link>", content)
+    return WHITESPACE_RE.sub(" ", content).strip()
+
+
+def is_low_information(content: str) -> bool:
+    """Whether a (compacted) message is a reaction rather than something worth citing"""
+    if not content:
+        return True
+    without_emoji = re.sub(r":\w+:", "", content)
+    if not WORD_CHAR_RE.search(without_emoji):
+        # Only emoji and punctuation
+        return True
+    return content.lower().strip(" .!?") in LOW_INFORMATION_MESSAGES
+
+
+def build_conversation(messages: List[Dict[str, Any]], citation_start: int = 1) -> PromptConversation:
+    """
+    Format messages as compact prompt lines with citation IDs.
+
+    Each line is one run of consecutive messages by the same author (split
+    after ``MAX_RUN_TOKENS``), or one collapsed reactions line. Citation IDs
+    are numbered across the whole window, so they stay unique when the lines
+    are split into chunks.
+
+    Args:
+        messages: Message dicts with author, content and jump_url, oldest first
+        citation_start: Number of the first citation ID, so the lines can extend
+            an existing summary without reusing its IDs
+
+    Returns:
+        PromptConversation with the lines, citation map and compaction counters
+    """
+    lines: List[str] = []
+    line_message_counts: List[int] = []
+    citation_map = CitationMap()
+    citation_message_ids: Dict[str, str] = {}
+    raw_tokens = 0
+    collapsed_count = 0
+    duplicate_count = 0
+
+    run_author = None
+    run_parts: List[str] = []
+    run_count = 0
+    run_tokens = 0
+    run_last_content = None
+    reactions: List[str] = []
+    reaction_authors: List[str] = []
+
+    def close_run_line():
+        nonlocal run_parts, run_count, run_tokens
+        if run_parts:
+            lines.append(f"{run_author}: " + "\n  ".join(run_parts) + "\n")
+            line_message_counts.append(run_count)
+        elif run_count:
+            # Only repeats since the author's last line; count them with it
+            line_message_counts[-1] += run_count
+        run_parts, run_count, run_tokens = [], 0, 0
+
+    def flush_run():
+        nonlocal run_author, run_last_content
+        close_run_line()
+        run_author, run_last_content = None, None
+
+    def flush_reactions():
+        if reactions:
+            shown = list(dict.fromkeys(reactions))[:MAX_REACTIONS_SHOWN]
+            authors = ", ".join(dict.fromkeys(reaction_authors))
+            lines.append(f"(short replies from {authors}: {', '.join(shown)})\n")
+            line_message_counts.append(len(reactions))
+        reactions.clear()
+        reaction_authors.clear()
+
+    for number, msg in enumerate(messages, start=1):
+        if isinstance(msg, MessageRecord):
+            # Skip building the author dict for every message of large windows
+            author, raw_content = msg.author_name, msg.content
+        else:
+            author, raw_content = msg["author"]["name"], msg.get("content")
+        raw_tokens += estimate_tokens(f"{author}: {raw_content or ''} [c{number}]\n")
+        content = compact_content(raw_content)
+
+        if is_low_information(content):
+            collapsed_count += 1
+            flush_run()
+            reactions.append(content or "(attachment)")
+            reaction_authors.append(author)
+            continue
+
+        flush_reactions()
+        if author != run_author:
+            flush_run()
+            run_author = author
+        run_count += 1
+        if content == run_last_content:
+            duplicate_count += 1
+            continue
+        run_last_content = content
+        citation_id = f"c{len(citation_map) + citation_start}"
+        citation_map.add(citation_id, msg)
+        if "id" in msg:
+            citation_message_ids[citation_id] = str(msg["id"])
+        part = f"{content} [{citation_id}]"
+        run_parts.append(part)
+        run_tokens += estimate_tokens(part)
+        if run_tokens >= MAX_RUN_TOKENS:
+            # The author's next message continues on a line of its own
+            close_run_line()
+
+    flush_run()
+    flush_reactions()
+
+    return PromptConversation(
+        lines=lines,
+        citation_map=citation_map,
+        message_count=len(messages),
+        raw_tokens=raw_tokens,
+        line_message_counts=line_message_counts,
+        collapsed_count=collapsed_count,
+        duplicate_count=duplicate_count,
+        citation_message_ids=citation_message_ids
+    )
+
+
+def fit_to_budget(conversation: PromptConversation, token_budget: int, policy: str) -> PromptConversation:
+    """
+    Trim a conversation to token_budget estimated tokens.
+
+    ``recent`` keeps the newest lines; ``sample`` keeps lines spread evenly over
+    the window. A note saying how many messages were left out is put in front.
+    Conversations within budget, and ``map_reduce``, are returned unchanged.
+
+    Raises:
+        ValueError: For an unknown policy
+    """
+    if policy not in BUDGET_POLICIES:
+        raise ValueError(f"Unknown over-budget policy '{policy}', expected one of {', '.join(BUDGET_POLICIES)}")
+    if policy == POLICY_MAP_REDUCE or conversation.tokens <= token_budget:
+        return conversation
+
+    line_tokens = [estimate_tokens(line) for line in conversation.lines]
+    # Leave room for the omission note
+    budget = max(0, token_budget - 20)
+
+    if policy == POLICY_RECENT:
+        keep = []
+        used = 0
+        for index in range(len(conversation.lines) - 1, -1, -1):
+            if used + line_tokens[index] > budget:
+                break
+            keep.append(index)
+            used += line_tokens[index]
+        keep.reverse()
+    else:
+        # Take every n-th line (by tokens), then drop the oldest picks while still over budget
+        fraction = budget / sum(line_tokens)
+        keep = []
+        credit = 0.0
+        for index, tokens in enumerate(line_tokens):
+            credit += fraction * tokens
+            if credit >= tokens:
+                keep.append(index)
+                credit -= tokens
+        while keep and sum(line_tokens[index] for index in keep) > budget:
+            keep.pop(0)
+
+    kept_messages = sum(conversation.line_message_counts[index] for index in keep)
+    omitted = conversation.message_count - kept_messages
+    how = "older messages" if policy == POLICY_RECENT else "messages spread across the period"
+    note = f"({omitted} {how} were left out to fit the prompt budget)\n"
+
+    return PromptConversation(
+        lines=[note] + [conversation.lines[index] for index in keep],
+        citation_map=conversation.citation_map,
+        message_count=conversation.message_count,
+        raw_tokens=conversation.raw_tokens,
+        line_message_counts=[0] + [conversation.line_message_counts[index] for index in keep],
+        collapsed_count=conversation.collapsed_count,
+        duplicate_count=conversation.duplicate_count,
+        omitted_count=omitted,
+        policy=policy,
+        citation_message_ids=conversation.citation_message_ids
+    )
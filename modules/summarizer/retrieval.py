@@ -0,0 +1,199 @@
+"""
+Lexical retrieval over a fetched message window for ``/ask``.
+
+``BM25Index`` scores every message against a question with Okapi BM25. The
+postings are stored as flat NumPy arrays sorted by term (CSR layout), so a
+query costs one vectorized slice-and-add per query term, however many messages
+the window has.
+
+``select_relevant`` picks the top-K messages plus a few neighbours on each
+side, so the model still sees the replies around a hit. Built indexes are kept
+in ``RetrievalIndexCache``, keyed by channel and a fingerprint of the window,
+so follow-up questions about the same period skip tokenizing it again.
+"""
+
+import re
+import threading
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import TTLCache
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# How answer_question picks the messages it sends
+MODE_FULL = "full"
+MODE_RETRIEVAL = "retrieval"
+ASK_MODES = (MODE_FULL, MODE_RETRIEVAL)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    "a", "about", "after", "all", "am", "an", "and", "any", "are", "as", "at", "be", "been",
+    "before", "but", "by", "can", "could", "did", "do", "does", "for", "from", "had", "has",
+    "have", "he", "her", "him", "his", "how", "i", "if", "in", "into", "is", "it", "its",
+    "me", "my", "of", "on", "or", "our", "she", "so", "that", "the", "their", "them", "then",
+    "there", "they", "this", "to", "up", "us", "was", "we", "were", "what", "when", "where",
+    "which", "who", "whom", "why", "will", "with", "would", "you", "your",
+    # Words that show up in questions about a channel rather than in the messages
+    "anyone", "anything", "channel", "chat", "discuss", "discussed", "happen", "happened",
+    "mention", "mentioned", "said", "say", "someone", "talk", "talked", "tell"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural/possessive endings removed"""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a list of documents, scored with NumPy"""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.document_count = len(documents)
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        frequencies: List[int] = []
+        doc_lengths = np.zeros(self.document_count, dtype=np.float32)
+        for doc_id, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            doc_lengths[doc_id] = sum(counts.values())
+            for term, frequency in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                frequencies.append(frequency)
+
+        terms = np.array(term_ids, dtype=np.int32)
+        docs = np.array(doc_ids, dtype=np.int32)
+        tf = np.array(frequencies, dtype=np.float32)
+
+        # Term frequency part of BM25, precomputed per posting
+        average_length = float(doc_lengths.mean()) if self.document_count and doc_lengths.any() else 1.0
+        norms = k1 * (1 - b + b * doc_lengths[docs] / average_length)
+        weights = tf * (k1 + 1) / (tf + norms)
+
+        # Flat postings grouped by term: term t owns [offsets[t], offsets[t + 1])
+        order = np.argsort(terms, kind="stable")
+        self._doc_ids = docs[order]
+        self._weights = weights[order]
+        document_frequency = np.bincount(terms, minlength=len(self.vocabulary))
+        self._offsets = np.concatenate(([0], np.cumsum(document_frequency)))
+        self._idf = np.log1p((self.document_count - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for query"""
+        scores = np.zeros(self.document_count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            # A term has at most one posting per document, so plain fancy-index addition is safe
+            scores[self._doc_ids[start:end]] += self._idf[term_id] * self._weights[start:end]
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the k best-scoring documents with a score above zero, best first"""
+        scores = self.scores(query)
+        k = min(k, self.document_count)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [int(index) for index in candidates if scores[index] > 0]
+
+
+def message_document(msg: Dict[str, Any]) -> str:
+    """Text indexed for a message; the author is included so questions about a person match"""
+    return f"{msg['author']['name']} {msg.get('content') or ''}"
+
+
+def select_relevant(index: BM25Index, question: str, top_k: int, context: int) -> Optional[List[int]]:
+    """
+    Pick the messages to send for a question.
+
+    Args:
+        index: Index over the window's messages
+        question: The user's question
+        top_k: Number of best-matching messages to keep
+        context: Neighbouring messages kept on each side of a match
+
+    Returns:
+        Sorted message indices, or None if nothing in the window matches the question
+    """
+    hits = index.top_k(question, top_k)
+    if not hits:
+        return None
+    selected = set()
+    for hit in hits:
+        selected.update(range(max(0, hit - context), min(index.document_count, hit + context + 1)))
+    return sorted(selected)
+
+
+def window_fingerprint(channel_id: str, messages: List[Dict[str, Any]]) -> str:
+    """Cache key for a channel window: changes whenever a message is added, removed or edited"""
+    digest = hashlib.sha256(channel_id.encode())
+    for msg in messages:
+        # Only build a jump URL when there is no ID to key on
+        message_key = msg["id"] if "id" in msg else msg.get("jump_url")
+        digest.update(f"\x00{message_key}\x00{msg.get('content') or ''}".encode())
+    return digest.hexdigest()
+
+
+class RetrievalIndexCache:
+    """Thread-safe TTL cache of BM25 indexes per channel window"""
+
+    def __init__(self, maxsize: int = 32, ttl: int = 1800):
+        self._indexes: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, channel_id: str, messages: List[Dict[str, Any]]) -> Tuple[BM25Index, bool]:
+        """
+        Return the index for a channel window, building it on a miss.
+
+        Blocking (hashing and tokenizing the window); call it from a worker thread.
+
+        Returns:
+            Tuple of (index, cached) where cached is True if the index was reused
+        """
+        key = window_fingerprint(channel_id, messages)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self.hits += 1
+                return index, True
+            self.misses += 1
+
+        index = BM25Index([message_document(msg) for msg in messages])
+        logger.info(f"Built retrieval index over {index.document_count} messages ({len(index.vocabulary)} terms)")
+        with self._lock:
+            self._indexes[key] = index
+        return index, False
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._indexes)
+            }
@@ -0,0 +1,213 @@
+"""
+In-memory buffer of recent messages, fed by gateway events.
+
+The summarizer bot receives every message, edit and delete in its guilds
+through the gateway. ``RecentMessageBuffer`` keeps the most recent of them per
+channel as ``MessageRecord`` objects, so short windows ("24h", most ``/ask``
+questions) can be answered without touching the message store or the history
+API.
+
+The buffer knows which part of each channel it holds completely: everything
+after the start of the current gateway session, minus what it has evicted.
+``read`` returns that lower bound with the messages, so the cog fetches only
+the older part of a window (if any) the usual way. A disconnect may lose
+events, so it empties the buffer; the next session starts over.
+
+Capacity is bounded three ways: messages per channel, message age, and an
+approximate memory cap over all channels (oldest messages go first).
+"""
+
+import os
+import sys
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from modules.summarizer.message_record import MessageRecord
+from modules.summarizer.utils import datetime_to_snowflake
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MESSAGES_PER_CHANNEL = 5000
+DEFAULT_MAX_AGE_HOURS = 48
+DEFAULT_MAX_TOTAL_MB = 64
+
+# Rough per-message cost of the record, its integer IDs and its entry in the channel's OrderedDict
+RECORD_OVERHEAD_BYTES = 200
+
+
+def _record_size(record: MessageRecord) -> int:
+    return RECORD_OVERHEAD_BYTES + sys.getsizeof(record.author_name) + sys.getsizeof(record.content)
+
+
+class _ChannelBuffer:
+    """Buffered messages of one channel, oldest first"""
+    __slots__ = ("messages", "covered_after_id")
+
+    def __init__(self, covered_after_id: int):
+        self.messages: "OrderedDict[int, MessageRecord]" = OrderedDict()
+        # Every message with a larger snowflake is in the buffer
+        self.covered_after_id = covered_after_id
+
+
+class RecentMessageBuffer:
+    """
+    Bounded per-channel buffer of messages seen live through the gateway.
+
+    Limits default to ``SUMMARIZER_BUFFER_MAX_MESSAGES`` per channel,
+    ``SUMMARIZER_BUFFER_MAX_AGE_HOURS`` and ``SUMMARIZER_BUFFER_MAX_MB`` in total.
+    """
+
+    def __init__(self,
+                 max_messages_per_channel: Optional[int] = None,
+                 max_age: Optional[timedelta] = None,
+                 max_total_bytes: Optional[int] = None):
+        self.max_messages_per_channel = max_messages_per_channel or int(
+            os.environ.get("SUMMARIZER_BUFFER_MAX_MESSAGES", DEFAULT_MAX_MESSAGES_PER_CHANNEL))
+        self.max_age = max_age or timedelta(hours=float(
+            os.environ.get("SUMMARIZER_BUFFER_MAX_AGE_HOURS", DEFAULT_MAX_AGE_HOURS)))
+        self.max_total_bytes = max_total_bytes or int(
+            float(os.environ.get("SUMMARIZER_BUFFER_MAX_MB", DEFAULT_MAX_TOTAL_MB)) * 1024 * 1024)
+
+        self._channels: Dict[int, _ChannelBuffer] = {}
+        # Lower bound of every channel's coverage; None while no gateway session is live
+        self._session_after_id: Optional[int] = None
+        self._total_bytes = 0
+        # Stats are read from the API thread
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def start_session(self, live_since_id: int) -> None:
+        """A gateway session started at live_since_id; from here on every message is seen"""
+        with self._lock:
+            self._clear()
+            self._session_after_id = live_since_id - 1
+
+    def stop_session(self) -> None:
+        """Events may be missed until the next session, so nothing buffered can be trusted"""
+        with self._lock:
+            self._clear()
+            self._session_after_id = None
+
+    def add(self, record: MessageRecord) -> None:
+        """Buffer a message delivered through the gateway"""
+        with self._lock:
+            if self._session_after_id is None:
+                return
+            channel = self._channels.get(record.channel_id)
+            if channel is None:
+                channel = self._channels[record.channel_id] = _ChannelBuffer(self._session_after_id)
+            previous = channel.messages.get(record.message_id)
+            if previous is not None:
+                self._total_bytes -= _record_size(previous)
+            channel.messages[record.message_id] = record
+            self._total_bytes += _record_size(record)
+
+            while len(channel.messages) > self.max_messages_per_channel:
+                self._evict_oldest(channel)
+            self._expire(channel)
+            while self._total_bytes > self.max_total_bytes:
+                nonempty = [buffer for buffer in self._channels.values() if buffer.messages]
+                if not nonempty:
+                    break
+                # Over the memory cap the oldest message of any channel goes first
+                self._evict_oldest(min(nonempty, key=lambda buffer: next(iter(buffer.messages))))
+
+    def update_content(self, channel_id: int, message_id: int, content: str) -> bool:
+        """Apply an edit; returns True if the message was buffered"""
+        with self._lock:
+            channel = self._channels.get(channel_id)
+            record = channel.messages.get(int(message_id)) if channel else None
+            if record is None:
+                return False
+            self._total_bytes -= _record_size(record)
+            record.content = content or ""
+            self._total_bytes += _record_size(record)
+            return True
+
+    def remove(self, channel_id: int, message_ids: Iterable[int]) -> int:
+        """Drop deleted messages; returns how many were buffered"""
+        removed = 0
+        with self._lock:
+            channel = self._channels.get(channel_id)
+            if channel is None:
+                return 0
+            for message_id in message_ids:
+                record = channel.messages.pop(int(message_id), None)
+                if record is not None:
+                    self._total_bytes -= _record_size(record)
+                    removed += 1
+        return removed
+
+    def read(self, channel_id: int, after_id: int, before_id: int) -> Tuple[Optional[int], List[MessageRecord]]:
+        """
+        Buffered messages between two snowflakes (both exclusive), oldest first.
+
+        Returns:
+            Tuple of (snowflake after which the buffer holds every message of the
+            channel, or None if it holds nothing reliable; the buffered messages
+            in the window). If the first value is at most after_id the window is
+            complete; otherwise only the part after it is.
+        """
+        with self._lock:
+            if self._session_after_id is None:
+                self.misses += 1
+                return None, []
+            channel = self._channels.get(channel_id)
+            if channel is None:
+                # Nothing has been posted in the channel since the session started
+                covered_after_id = self._session_after_id
+                records = []
+            else:
+                self._expire(channel)
+                covered_after_id = channel.covered_after_id
+                records = [record for message_id, record in channel.messages.items() if after_id < message_id < before_id]
+
+            if covered_after_id <= after_id:
+                self.hits += 1
+            elif covered_after_id + 1 < before_id:
+                self.partial_hits += 1
+            else:
+                self.misses += 1
+                return None, []
+
+        records.sort(key=lambda record: record.message_id)
+        return covered_after_id, records
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizes and hit counters for monitoring"""
+        with self._lock:
+            return {
+                "live": self._session_after_id is not None,
+                "channels": len(self._channels),
+                "messages": sum(len(channel.messages) for channel in self._channels.values()),
+                "approx_bytes": self._total_bytes,
+                "max_bytes": self.max_total_bytes,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "evicted": self.evicted
+            }
+
+    def _clear(self) -> None:
+        self._channels.clear()
+        self._total_bytes = 0
+
+    def _evict_oldest(self, channel: _ChannelBuffer) -> None:
+        message_id, record = channel.messages.popitem(last=False)
+        channel.covered_after_id = max(channel.covered_after_id, message_id)
+        self._total_bytes -= _record_size(record)
+        self.evicted += 1
+
+    def _expire(self, channel: _ChannelBuffer) -> None:
+        """Evict messages older than max_age"""
+        cutoff_id = datetime_to_snowflake(datetime.now(timezone.utc) - self.max_age)
+        while channel.messages and next(iter(channel.messages)) < cutoff_id:
+            self._evict_oldest(channel)
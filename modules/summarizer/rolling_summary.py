@@ -0,0 +1,350 @@
+"""
+Rolling summaries for recurring requests over overlapping windows.
+
+Every generated summary is stored with the range of message IDs it covers
+(``StoredSummary``), its raw ``[cX]`` text and the message behind each
+citation. When a later request's window overlaps a stored summary,
+``plan_incremental`` decides whether it can be reused:
+
+- Points whose citations all refer to messages that have left the window are
+  dropped from the stored text (``drop_stale_citations``).
+- Only the messages after the stored range are formatted, with citation IDs
+  continuing after the stored ones, and one merge pass folds them into the
+  stored summary.
+
+A full regeneration is done instead when reuse would save little or the
+result would drift too far from a fresh summary (see ``RollingPolicy``):
+too little of the window is covered, too much of the stored summary is about
+messages that left the window, the window starts before the stored range,
+the stored summary is old or has been merged into too many times, or the
+model or prompt version changed.
+
+``RollingSummaryStore`` keeps the latest few summaries per channel in memory
+and, like the summary cache, optionally in the SQLite database named by
+``SUMMARIZER_CACHE_DB_URL``.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import sessionmaker
+
+from modules.summarizer.models import RollingSummaryEntry
+from modules.summarizer.utils import create_store_engine
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Reuse a stored summary only if it covers at least this fraction of the new window
+MIN_OVERLAP_RATIO = 0.5
+# ...and at most this fraction of its messages have left the window
+MAX_STALE_RATIO = 0.25
+# Regenerate after this many merges in a row, so errors don't accumulate
+MAX_MERGE_DEPTH = 6
+MAX_SUMMARY_AGE_SECONDS = 48 * 3600
+SUMMARIES_PER_CHANNEL = 4
+
+# A bracketed group of [cX] citations, e.g. [c3], [c3-c7] or [c3, c9-c12]
+_CITATION_GROUP_RE = re.compile(r"\[\s*(c\d+(?:\s*-\s*c\d+)?(?:\s*,\s*c\d+(?:\s*-\s*c\d+)?)*)\s*\]")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+@dataclass
+class StoredSummary:
+    """A generated summary and the messages it covers"""
+    channel_id: str
+    first_message_id: int
+    last_message_id: int
+    message_count: int
+    # Model output with [cX] citations, before they are turned into links
+    summary_text: str
+    # URLs of the citations in summary_text; citation_message_ids covers every citation ID
+    citation_map: Dict[str, str]
+    citation_message_ids: Dict[str, str]
+    model: str
+    prompt_version: str
+    # Merge passes since the last full regeneration
+    merge_depth: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def next_citation(self) -> int:
+        """Number to start new citation IDs at"""
+        citation_ids = set(self.citation_map) | set(self.citation_message_ids)
+        numbers = [int(citation_id[1:]) for citation_id in citation_ids if citation_id[1:].isdigit()]
+        return max(numbers, default=0) + 1
+
+
+@dataclass
+class RollingPolicy:
+    """When a stored summary may be extended instead of regenerated"""
+    min_overlap_ratio: float = MIN_OVERLAP_RATIO
+    max_stale_ratio: float = MAX_STALE_RATIO
+    max_merge_depth: int = MAX_MERGE_DEPTH
+    max_age_seconds: float = MAX_SUMMARY_AGE_SECONDS
+
+
+@dataclass
+class RollingPlan:
+    """How to extend a stored summary to a new window"""
+    stored: StoredSummary
+    new_messages: List[Dict[str, Any]]
+    reused_messages: int
+    # The stored summary without points about messages that left the window
+    summary_text: str
+    citation_map: Dict[str, str]
+    citation_message_ids: Dict[str, str]
+
+    @property
+    def next_citation(self) -> int:
+        return self.stored.next_citation
+
+
+def drop_stale_citations(text: str, keep: Set[str]) -> str:
+    """
+    Remove citations that aren't in keep from a summary.
+
+    Ranges are narrowed to their kept IDs. A line whose citations are all
+    removed is dropped, since everything on it is about messages that are no
+    longer in the window; lines without citations (headers) are kept.
+    """
+    kept_lines = []
+    for line in text.splitlines():
+        found = False
+        kept_any = False
+
+        def rewrite(match):
+            nonlocal found, kept_any
+            found = True
+            parts = []
+            for item in match.group(1).split(","):
+                bounds = [int(number) for number in _NUMBER_RE.findall(item)]
+                numbers = [number for number in range(bounds[0], bounds[-1] + 1) if f"c{number}" in keep]
+                if not numbers:
+                    continue
+                parts.append(f"c{numbers[0]}" if numbers[0] == numbers[-1] else f"c{numbers[0]}-c{numbers[-1]}")
+            if not parts:
+                return ""
+            kept_any = True
+            return "[" + ", ".join(parts) + "]"
+
+        rewritten = _CITATION_GROUP_RE.sub(rewrite, line)
+        if found and not kept_any:
+            continue
+        kept_lines.append(rewritten.rstrip() if found else rewritten)
+    return "\n".join(kept_lines)
+
+
+def _check_candidate(stored: StoredSummary, window_ids: List[int], policy: RollingPolicy,
+                     model: str, prompt_version: str, now: float) -> Tuple[int, Optional[str]]:
+    """Number of window messages the stored summary covers, and why it can't be used (None if it can)"""
+    if stored.model != model or stored.prompt_version != prompt_version:
+        return 0, "model or prompt changed"
+    if not window_ids[0] <= stored.last_message_id <= window_ids[-1]:
+        return 0, "window doesn't overlap a stored summary"
+    if window_ids[0] < stored.first_message_id:
+        return 0, "window starts before the stored summary"
+
+    reused = sum(1 for message_id in window_ids if message_id <= stored.last_message_id)
+    if now - stored.created_at > policy.max_age_seconds:
+        return reused, "stored summary is too old"
+    if stored.merge_depth >= policy.max_merge_depth:
+        return reused, "too many merges since the last full summary"
+    if reused / len(window_ids) < policy.min_overlap_ratio:
+        return reused, "overlap with the stored summary is too small"
+    stale = max(0, stored.message_count - reused)
+    if stored.message_count and stale / stored.message_count > policy.max_stale_ratio:
+        return reused, "too much of the stored summary is outside the window"
+    return reused, None
+
+
+def plan_incremental(candidates: List[StoredSummary],
+                     messages: List[Dict[str, Any]],
+                     policy: RollingPolicy,
+                     model: str,
+                     prompt_version: str,
+                     now: Optional[float] = None) -> Tuple[Optional[RollingPlan], Optional[str]]:
+    """
+    Pick the stored summary to extend to the window of messages, if any.
+
+    Args:
+        candidates: Stored summaries for the channel
+        messages: The new window's messages (with ``id``), oldest first
+        policy: Limits on reuse
+        model: Model the new summary is generated with
+        prompt_version: Current prompt version
+
+    Returns:
+        Tuple of (plan, None) when a summary can be extended, otherwise
+        (None, reason for regenerating in full)
+    """
+    if not candidates:
+        return None, "no stored summary"
+    if not messages or any("id" not in msg for msg in messages):
+        return None, "messages have no IDs"
+
+    now = time.time() if now is None else now
+    window_ids = sorted(int(msg["id"]) for msg in messages)
+    best, best_reused = None, -1
+    # Reported when nothing can be reused: the reason of the candidate covering the most messages
+    rejection, rejection_reused = None, -1
+    for stored in candidates:
+        reused, reason = _check_candidate(stored, window_ids, policy, model, prompt_version, now)
+        if reason is None:
+            if reused > best_reused:
+                best, best_reused = stored, reused
+        elif reused > rejection_reused:
+            rejection, rejection_reused = reason, reused
+    if best is None:
+        return None, rejection
+
+    window_id_set = {str(message_id) for message_id in window_ids}
+    keep = {
+        citation_id for citation_id, message_id in best.citation_message_ids.items()
+        if message_id in window_id_set
+    }
+    return RollingPlan(
+        stored=best,
+        new_messages=[msg for msg in messages if int(msg["id"]) > best.last_message_id],
+        reused_messages=best_reused,
+        summary_text=drop_stale_citations(best.summary_text, keep),
+        citation_map={citation_id: url for citation_id, url in best.citation_map.items() if citation_id in keep},
+        citation_message_ids={citation_id: best.citation_message_ids[citation_id] for citation_id in keep}
+    ), None
+
+
+class RollingSummaryStore:
+    """
+    Latest summaries per channel, in memory and optionally in SQLite.
+
+    Disk access blocks, so async callers should go through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, per_channel: int = SUMMARIES_PER_CHANNEL, disk_url: Optional[str] = None):
+        self.per_channel = per_channel
+        self._memory: Dict[str, List[StoredSummary]] = {}
+        self._lock = threading.Lock()
+
+        self.incremental = 0
+        self.full = 0
+        self.reused_messages = 0
+        self.new_messages = 0
+
+        self.disk_url = disk_url or os.environ.get("SUMMARIZER_CACHE_DB_URL")
+        self.SessionLocal = None
+        if self.disk_url:
+            try:
+                self._setup_disk_tier()
+            except Exception as e:
+                logger.error(f"Failed to set up rolling summary storage on disk, using memory only: {e}")
+                self.SessionLocal = None
+
+    def _setup_disk_tier(self):
+        """Create the engine and table for the on-disk tier"""
+        self.engine = create_store_engine(self.disk_url)
+        RollingSummaryEntry.__table__.create(self.engine, checkfirst=True)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    def candidates(self, channel_id: str) -> List[StoredSummary]:
+        """Stored summaries for a channel, newest first"""
+        with self._lock:
+            stored = self._memory.get(channel_id)
+            if stored is not None:
+                return list(stored)
+
+        stored = self._load_from_disk(channel_id)
+        with self._lock:
+            self._memory.setdefault(channel_id, stored)
+            return list(self._memory[channel_id])
+
+    def save(self, summary: StoredSummary) -> None:
+        """Store a summary, replacing any with the same range and keeping the newest per channel"""
+        with self._lock:
+            stored = [
+                other for other in self._memory.get(summary.channel_id, [])
+                if (other.first_message_id, other.last_message_id) != (summary.first_message_id, summary.last_message_id)
+            ]
+            self._memory[summary.channel_id] = ([summary] + stored)[:self.per_channel]
+
+        if not self.SessionLocal:
+            return
+        try:
+            with self.SessionLocal() as db:
+                db.add(RollingSummaryEntry(
+                    channel_id=summary.channel_id,
+                    first_message_id=summary.first_message_id,
+                    last_message_id=summary.last_message_id,
+                    payload=json.dumps(asdict(summary)),
+                    created_at=datetime.utcfromtimestamp(summary.created_at)
+                ))
+                db.flush()
+                # Keep only the newest rows for the channel
+                keep_ids = select(RollingSummaryEntry.id).where(
+                    RollingSummaryEntry.channel_id == summary.channel_id
+                ).order_by(RollingSummaryEntry.id.desc()).limit(self.per_channel)
+                db.execute(delete(RollingSummaryEntry).where(
+                    RollingSummaryEntry.channel_id == summary.channel_id,
+                    RollingSummaryEntry.id.not_in(keep_ids.scalar_subquery())
+                ))
+                db.commit()
+        except Exception as e:
+            logger.error(f"Failed to write rolling summary to disk: {e}")
+
+    def record(self, plan: Optional[RollingPlan], message_count: int) -> None:
+        """Count a summary generated incrementally (plan set) or in full"""
+        with self._lock:
+            if plan is None:
+                self.full += 1
+                self.new_messages += message_count
+            else:
+                self.incremental += 1
+                self.reused_messages += plan.reused_messages
+                self.new_messages += len(plan.new_messages)
+
+    def clear(self) -> None:
+        """Drop every stored summary (counters are kept)"""
+        with self._lock:
+            self._memory.clear()
+        if self.SessionLocal:
+            with self.SessionLocal() as db:
+                db.execute(delete(RollingSummaryEntry))
+                db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            total = self.reused_messages + self.new_messages
+            return {
+                "channels": len(self._memory),
+                "incremental_summaries": self.incremental,
+                "full_summaries": self.full,
+                "reused_messages": self.reused_messages,
+                "new_messages": self.new_messages,
+                "reuse_ratio": round(self.reused_messages / total, 4) if total else 0.0,
+                "disk_enabled": self.SessionLocal is not None
+            }
+
+    def _load_from_disk(self, channel_id: str) -> List[StoredSummary]:
+        """Newest stored summaries for a channel from the disk tier"""
+        if not self.SessionLocal:
+            return []
+        try:
+            with self.SessionLocal() as db:
+                payloads = db.execute(
+                    select(RollingSummaryEntry.payload)
+                    .where(RollingSummaryEntry.channel_id == channel_id)
+                    .order_by(RollingSummaryEntry.id.desc())
+                    .limit(self.per_channel)
+                ).scalars().all()
+            return [StoredSummary(**json.loads(payload)) for payload in payloads]
+        except Exception as e:
+            logger.error(f"Failed to read rolling summaries from disk: {e}")
+            return []
@@ -0,0 +1,329 @@
+"""
+Central scheduler for Gemini requests.
+
+Every Gemini call made by SummarizerService first takes a slot from the shared
+``GeminiScheduler``:
+
+- Two token buckets enforce a global requests-per-minute and
+  (estimated input) tokens-per-minute budget, so guilds running summaries at
+  the same time queue up instead of all hitting 429s and backing off together.
+- Waiting requests are queued per priority (``/ask`` before ``/summarize``)
+  and, within a priority, per guild. Guilds take turns, so one guild's
+  map-reduce job can't starve everyone else.
+- When the estimated wait is longer than ``max_wait`` the request is rejected
+  with ``GeminiBusyError``, which carries the estimated wait so the cog can
+  tell the user when to retry.
+- A 429 from Gemini pauses dispatch for everyone instead of each caller
+  retrying on its own schedule.
+
+The guild and priority of a request are carried in a context variable set by
+``gemini_request``, so the helpers that actually call Gemini don't need them
+as parameters.
+
+The queues are mutated on the bot's event loop while ``stats()`` is read from
+the API thread, so both go through one lock.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import functools
+import inspect
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+PRIORITY_ASK = 0
+PRIORITY_SUMMARIZE = 1
+PRIORITY_NAMES = {PRIORITY_ASK: "ask", PRIORITY_SUMMARIZE: "summarize"}
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+DEFAULT_MAX_QUEUE_WAIT_SECONDS = 120.0
+# How long dispatch pauses after a 429 that doesn't say when to retry
+DEFAULT_RATE_LIMIT_PAUSE_SECONDS = 10.0
+
+# (guild_id, priority) of the Gemini request being made in the current task
+_current_request: contextvars.ContextVar = contextvars.ContextVar(
+    "gemini_request", default=("", PRIORITY_SUMMARIZE)
+)
+
+
+class GeminiBusyError(Exception):
+    """Raised when a request would have to wait longer than the scheduler allows"""
+
+    def __init__(self, estimated_wait: float):
+        self.estimated_wait = estimated_wait
+        super().__init__(f"Gemini is busy; estimated wait {estimated_wait:.0f}s")
+
+
+@contextmanager
+def request_scope(guild_id: str, priority: int):
+    """Attribute Gemini requests made inside the block to guild_id at priority"""
+    token = _current_request.set((guild_id or "", priority))
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+def current_request() -> Tuple[str, int]:
+    """(guild_id, priority) of the current request scope"""
+    return _current_request.get()
+
+
+def gemini_request(priority: int):
+    """Run an async service method in a request scope for its ``guild_id`` argument"""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            guild_id = signature.bind_partial(*args, **kwargs).arguments.get("guild_id")
+            with request_scope(str(guild_id or ""), priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether error is a 429 / RESOURCE_EXHAUSTED from the Gemini API"""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding up to one minute of budget"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> float:
+        return min(self.capacity, self.level + (now - self.updated) * self.rate)
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until amount can be consumed"""
+        deficit = min(amount, self.capacity) - self.available(now)
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+@dataclass
+class _Ticket:
+    """A request waiting for a slot"""
+    guild_id: str
+    priority: int
+    tokens: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class GeminiScheduler:
+    """Fair, rate-limited admission of Gemini requests"""
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_wait: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute or float(os.environ.get("SUMMARIZER_GEMINI_RPM", DEFAULT_REQUESTS_PER_MINUTE))
+        self.tokens_per_minute = tokens_per_minute or float(os.environ.get("SUMMARIZER_GEMINI_TPM", DEFAULT_TOKENS_PER_MINUTE))
+        self.max_wait = max_wait if max_wait is not None else float(os.environ.get("SUMMARIZER_GEMINI_MAX_QUEUE_WAIT", DEFAULT_MAX_QUEUE_WAIT_SECONDS))
+
+        self._request_bucket = TokenBucket(self.requests_per_minute)
+        self._token_bucket = TokenBucket(self.tokens_per_minute)
+        # priority -> guild_id -> waiting tickets; guild order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {
+            priority: OrderedDict() for priority in sorted(PRIORITY_NAMES)
+        }
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = threading.Lock()
+
+        self.granted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self._waits: Deque[float] = deque(maxlen=500)
+
+    async def acquire(self, guild_id: str, priority: int, tokens: int) -> float:
+        """
+        Wait until the request may be sent.
+
+        Args:
+            guild_id: Guild the request is made for (fair queuing key)
+            priority: PRIORITY_ASK or PRIORITY_SUMMARIZE
+            tokens: Estimated input tokens of the request
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            GeminiBusyError: If the estimated wait exceeds max_wait
+        """
+        with self._lock:
+            estimated_wait = self._estimate_wait(priority, tokens)
+            if estimated_wait > self.max_wait:
+                self.rejected += 1
+            else:
+                ticket = _Ticket(guild_id, priority, tokens, asyncio.get_running_loop().create_future())
+                self._queues[priority].setdefault(guild_id, deque()).append(ticket)
+        if estimated_wait > self.max_wait:
+            logger.warning(f"Rejecting Gemini request for guild {guild_id}: estimated wait {estimated_wait:.1f}s")
+            raise GeminiBusyError(estimated_wait)
+
+        self._dispatch()
+        try:
+            await ticket.future
+        finally:
+            # Cancelled tickets are skipped by the dispatcher
+            ticket.future.cancel()
+
+        waited = time.monotonic() - ticket.enqueued_at
+        with self._lock:
+            self._waits.append(waited)
+        if waited > 1:
+            logger.info(f"Gemini request for guild {guild_id} waited {waited:.1f}s for a slot")
+        return waited
+
+    def estimate_wait(self, priority: int, tokens: int = 0) -> float:
+        """Seconds a new request at priority would wait, counting everything queued ahead of it"""
+        with self._lock:
+            return self._estimate_wait(priority, tokens)
+
+    def _estimate_wait(self, priority: int, tokens: int = 0) -> float:
+        # Callers hold self._lock
+        now = time.monotonic()
+        requests_ahead = 1
+        tokens_ahead = min(tokens, self.tokens_per_minute)
+        for queued_priority, queues in self._queues.items():
+            if queued_priority > priority:
+                continue
+            for tickets in queues.values():
+                for ticket in tickets:
+                    if not ticket.future.done():
+                        requests_ahead += 1
+                        tokens_ahead += min(ticket.tokens, self.tokens_per_minute)
+
+        request_wait = max(0.0, requests_ahead - self._request_bucket.available(now)) / self._request_bucket.rate
+        token_wait = max(0.0, tokens_ahead - self._token_bucket.available(now)) / self._token_bucket.rate
+        return max(self._paused_until - now, request_wait, token_wait, 0.0)
+
+    def report_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Pause dispatch after a 429 and empty the request bucket"""
+        now = time.monotonic()
+        with self._lock:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, now + (retry_after or DEFAULT_RATE_LIMIT_PAUSE_SECONDS))
+            self._request_bucket.drain(now)
+            pause = self._paused_until - now
+        logger.warning(f"Gemini rate limit hit; pausing dispatch for {pause:.1f}s")
+
+    def _next_ticket(self) -> Optional[Tuple["OrderedDict[str, Deque[_Ticket]]", str, _Ticket]]:
+        """Head of the queue: highest priority first, guilds in round-robin order (callers hold self._lock)"""
+        for priority in sorted(self._queues):
+            queues = self._queues[priority]
+            for guild_id in list(queues):
+                tickets = queues[guild_id]
+                while tickets and tickets[0].future.done():
+                    tickets.popleft()
+                if not tickets:
+                    del queues[guild_id]
+                    continue
+                return queues, guild_id, tickets[0]
+        return None
+
+    def _dispatch(self) -> None:
+        """Grant slots to queued requests while the budgets allow it"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        with self._lock:
+            while True:
+                head = self._next_ticket()
+                if head is None:
+                    return
+                queues, guild_id, ticket = head
+
+                now = time.monotonic()
+                wait = max(
+                    self._paused_until - now,
+                    self._request_bucket.time_until(1, now),
+                    self._token_bucket.time_until(ticket.tokens, now)
+                )
+                if wait > 0:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                    return
+
+                queues[guild_id].popleft()
+                # The guild goes to the back of the line for its priority
+                if queues[guild_id]:
+                    queues.move_to_end(guild_id)
+                else:
+                    del queues[guild_id]
+                self._request_bucket.consume(1, now)
+                self._token_bucket.consume(ticket.tokens, now)
+                self.granted += 1
+                ticket.future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait time and budget metrics; safe to call from another thread"""
+        with self._lock:
+            now = time.monotonic()
+            depth_by_priority = {}
+            guilds_waiting = set()
+            for priority, queues in self._queues.items():
+                depth = 0
+                for guild_id, tickets in queues.items():
+                    pending = sum(1 for ticket in tickets if not ticket.future.done())
+                    if pending:
+                        guilds_waiting.add(guild_id)
+                    depth += pending
+                depth_by_priority[PRIORITY_NAMES[priority]] = depth
+            waits = sorted(self._waits)
+            estimated_waits = {name: round(self._estimate_wait(priority), 3) for priority, name in PRIORITY_NAMES.items()}
+            available_requests = self._request_bucket.available(now)
+            available_tokens = self._token_bucket.available(now)
+            paused_for = max(0.0, self._paused_until - now)
+
+        return {
+            "queue_depth": sum(depth_by_priority.values()),
+            "queue_depth_by_priority": depth_by_priority,
+            "guilds_waiting": len(guilds_waiting),
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "wait_seconds": {
+                "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                "max": round(waits[-1], 3) if waits else 0.0
+            },
+            "estimated_wait_seconds": estimated_waits,
+            "available_requests": round(available_requests, 2),
+            "available_tokens": int(available_tokens),
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "paused_for_seconds": round(paused_for, 3)
+        }
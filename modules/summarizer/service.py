@@ -1,17 +1,37 @@
 import os
 import time
-from google import genai
+import asyncio
+import threading
 from google.genai import types
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import List, Dict, Any, Optional, Tuple, Union, Callable, Awaitable, Mapping
 from modules.summarizer.models import SummarizerConfig, SummaryLog
 import logging
 from modules.utils.config import Config as AppConfig
 import dateparser
 import re
 from timefhuman import timefhuman
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from modules.summarizer.time_parsers import get_parser_registry, TimeParserBase
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, retry_if_not_exception_type
+from modules.summarizer.time_parsers import get_parser_registry, TimeParserBase, TimeExpressionDispatcher
+from modules.summarizer.utils import estimate_tokens
+from modules.summarizer.citations import CitationMap, rewrite_citations
+from modules.summarizer.model_backend import create_model_client
+from modules.summarizer.summary_cache import SummaryCache, make_cache_key
+from modules.summarizer.prompt_builder import (
+    PromptConversation, build_conversation, fit_to_budget, POLICY_MAP_REDUCE, POLICY_RECENT, BUDGET_POLICIES
+)
+from modules.summarizer.retrieval import (
+    RetrievalIndexCache, select_relevant, MODE_FULL, MODE_RETRIEVAL, ASK_MODES
+)
+from modules.summarizer.rolling_summary import RollingSummaryStore, RollingPolicy, RollingPlan, StoredSummary, plan_incremental
+from modules.summarizer.instruction_cache import InstructionCache, tracks_prefix_usage, current_prefix_usage
+from modules.summarizer.model_router import (
+    ModelRouter, ModelTier, tracks_model_route, current_route, check_response, OUTCOME_OK
+)
+from modules.summarizer.scheduler import (
+    GeminiScheduler, GeminiBusyError, PRIORITY_ASK, PRIORITY_SUMMARIZE,
+    gemini_request, current_request, is_rate_limit_error
+)
 
 # Common time-related phrases for extraction - module-level constant to avoid recreation on each instance
 TIME_PHRASES = [
@@ -33,6 +53,132 @@ TIME_PHRASES = [
     "past", "previous", "next", "last", "this", "coming"
 ]
 
+# Context around a time phrase, used when no parser could extract a timeframe
+TIME_PHRASE_CONTEXT_PATTERNS = [
+    (phrase, re.compile(r'(\S+\s+){0,3}' + re.escape(phrase) + r'(\s+\S+){0,3}'))
+    for phrase in TIME_PHRASES
+]
+
+_WEEKDAY_ALTERNATION = "monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_MONTH_ALTERNATION = "january|february|march|april|may|june|july|august|september|october|november|december"
+
+# "what happened [last] weekday to weekday" and the month equivalent
+WEEKDAY_RANGE_QUESTION_RE = re.compile(f"(what happened |)(last |)(({_WEEKDAY_ALTERNATION})\\s+to\\s+({_WEEKDAY_ALTERNATION}))")
+MONTH_RANGE_QUESTION_RE = re.compile(f"(what happened |)(last |)(({_MONTH_ALTERNATION})\\s+to\\s+({_MONTH_ALTERNATION}))")
+
+# Map-reduce summarization: windows estimated above the threshold are split into chunks of
+# at most CHUNK_TOKEN_BUDGET tokens, summarized in parallel and merged in a reduce pass
+MAP_REDUCE_TOKEN_THRESHOLD = 100_000
+CHUNK_TOKEN_BUDGET = 25_000
+MAP_REDUCE_MAX_CONCURRENCY = 4
+
+# Estimated conversation tokens sent with an /ask question
+ASK_TOKEN_BUDGET = 200_000
+
+# Retrieval mode for /ask: best-matching messages kept, and neighbours kept on each side
+RETRIEVAL_TOP_K = 40
+RETRIEVAL_CONTEXT_MESSAGES = 2
+# Smaller windows are always sent whole
+RETRIEVAL_MIN_MESSAGES = 150
+
+# Most new-message tokens an incremental summary folds into a stored one in its merge pass;
+# windows with more new messages than this are summarized from scratch
+ROLLING_MAX_NEW_TOKENS = CHUNK_TOKEN_BUDGET
+
+# Bump whenever the summary prompts change so cached summaries from older prompts are ignored
+PROMPT_VERSION = "4"
+
+# Window starts/ends are floored to this granularity for summary cache keys, so repeated
+# "/summarize 24h" calls a few seconds apart share an entry. New messages still change the key
+# through the highest message ID.
+CACHE_WINDOW_GRANULARITY = timedelta(minutes=5)
+
+# Output format shared by single-pass summaries and the final reduce pass
+SUMMARY_FORMAT_INSTRUCTIONS = """Format the output EXACTLY like this example, using proper Markdown header levels:
+
+# Action Items ✨
+- **[Person responsible]:** [Action item description] [c1]
+- **[Person responsible]:** [Another action item if applicable] [c2]
+
+# Conversation Summary ✨
+## Conversation Purpose
+[Brief description of meeting purpose]
+
+## Key Takeaways
+- [First key takeaway from the conversation] [c3]
+- [Second key takeaway from the conversation] [c4]
+- [Third key takeaway if applicable] [c5]
+
+## Topics
+### [Topic Name]
+- [Detail about the first topic] [c6]
+- [Another point about the first topic] [c7]
+
+### [Another Topic Name]
+- [Detail about the second topic] [c8]
+- [Another point about the second topic] [c9]
+
+IMPORTANT FORMATTING RULES:
+1. Use "# " for first-level headers ("Action Items ✨" and "Conversation Summary ✨")
+2. Use "## " for second-level headers ("Conversation Purpose", "Key Takeaways", and "Topics")
+3. Use "### " for third-level headers (each topic name under "Topics")
+4. Make sure there is a space after each # symbol
+5. Use dashes (-) for bullet points, NOT Unicode bullets or asterisks
+6. Include emoji (✨) ONLY for the two main section headers as shown
+7. ONLY use bold formatting (**text**) for assignee names in action items
+8. Maintain consistent indentation for bullet points
+9. For action items, format as a single bullet with the person's name in bold followed by a colon and the action item description
+10. ALWAYS include citation references in the format [cX] after important information to refer to the original messages
+11. Use citations [cX] to reference specific messages that support your summary points"""
+
+# Static instructions for single-pass summaries and /ask answers. They are sent as a cached
+# system instruction (see instruction_cache.py); only the time range, question and messages
+# go into each request.
+SUMMARY_SYSTEM_INSTRUCTION = f"""You are AVERY, a Discord bot that creates BRIEF summaries of chat activity. Each request gives you the time range and the Discord messages to summarize.
+
+CRITICAL INSTRUCTIONS:
+1. Create a VERY CONCISE summary (max 300 words)
+2. Focus on the key points rather than including every detail
+3. NEVER respond with phrases like "no significant activity" - ALL messages are important
+4. Be extremely brief but informative
+5. Format in bulleted lists using dashes (-) for bullets
+6. Follow EXACTLY the header structure from the example below
+7. IMPORTANT: Include citations to reference specific messages using the citation format [cX] that appears at the end of each message
+
+Focus on:
+1. Participants involved (who was talking)
+2. Key topics discussed (what they talked about)
+3. Important arguments or decisions (what conclusions were reached)
+4. Action items or follow-ups needed (what needs to be done)
+5. Key messages that should be highlighted (specific important messages)
+
+{SUMMARY_FORMAT_INSTRUCTIONS}"""
+
+ASK_SYSTEM_INSTRUCTION = """You are AVERY, a Discord bot that accurately answers specific questions about chat conversations. Each request gives you the time range, a question, and the Discord messages to answer it from.
+
+CRITICAL INSTRUCTIONS:
+1. Focus ONLY on answering the specific question that was asked
+2. Provide a clear, accurate, and direct answer based solely on the content of the messages
+3. Use citations [cX] to reference specific messages that support your answer
+4. If the question cannot be answered from these messages, clearly state that
+5. Be objective and factual - don't speculate beyond what's in the messages
+6. Format your answer in a clear, readable way using Markdown
+
+Your answer should:
+- Start with a clear, direct response to the question
+- Include relevant evidence from the messages
+- Cite specific messages to support your points
+- Be well-organized using appropriate headings and bullet points
+- Be comprehensive but concise
+
+Format the output using proper Markdown:
+- Use "# " for the main answer header
+- Use "## " for any section headers if needed
+- Use "### " for subsection headers if needed
+- Use bullet points (- ) for lists
+- Use bold (**text**) for emphasis
+- ALWAYS cite sources with the citation format [cX] that appears at the end of each message"""
+
 # Get logger
 logger = logging.getLogger(__name__)
 # Get app config
@@ -55,7 +201,12 @@ class SummarizerService:
     - Long response splitting for Discord message limits
     """
     
-    def __init__(self):
+    def __init__(self, model_client=None):
+        """
+        Args:
+            model_client: Client to send model requests to (see model_backend); by
+                default the one selected by SUMMARIZER_MODEL_BACKEND
+        """
         self.model_name = "models/gemini-2.5-flash-preview-04-17"
         self.api_key = os.environ.get("GEMINI_API_KEY") or config.GEMINI_API_KEY
         self.temperature = 0.7
@@ -65,24 +216,55 @@ class SummarizerService:
 
         # Initialize the parser registry
         self.parser_registry = get_parser_registry()
+        self.time_dispatcher = TimeExpressionDispatcher(self.parser_registry)
+
+        # Cache of generated summaries, keyed by channel, window and message watermark
+        self.summary_cache = SummaryCache()
+
+        # Summaries stored with their message range, extended for overlapping windows
+        self.rolling_enabled = os.environ.get("SUMMARIZER_ROLLING_SUMMARIES", "true").lower() != "false"
+        self.rolling_summaries = RollingSummaryStore()
+        self.rolling_policy = RollingPolicy()
+
+        # What to do with windows over the prompt token budget (see prompt_builder)
+        self.over_budget_policy = os.environ.get("SUMMARIZER_OVER_BUDGET_POLICY", POLICY_MAP_REDUCE)
+        if self.over_budget_policy not in BUDGET_POLICIES:
+            logger.warning(f"Unknown SUMMARIZER_OVER_BUDGET_POLICY '{self.over_budget_policy}', using {POLICY_MAP_REDUCE}")
+            self.over_budget_policy = POLICY_MAP_REDUCE
+        self.ask_token_budget = int(os.environ.get("SUMMARIZER_ASK_TOKEN_BUDGET", ASK_TOKEN_BUDGET))
+
+        # /ask sends only the messages relevant to the question unless set to "full"
+        self.ask_mode = os.environ.get("SUMMARIZER_ASK_MODE", MODE_RETRIEVAL)
+        if self.ask_mode not in ASK_MODES:
+            logger.warning(f"Unknown SUMMARIZER_ASK_MODE '{self.ask_mode}', using {MODE_RETRIEVAL}")
+            self.ask_mode = MODE_RETRIEVAL
+        self.retrieval_indexes = RetrievalIndexCache()
+
+        # Cached-content handles for the static instruction blocks
+        self.instruction_cache = InstructionCache()
+
+        # Shared rate limits and fair queuing for every Gemini request
+        self.scheduler = GeminiScheduler()
+
+        # Cheapest adequate model per request, with escalation to larger ones
+        self.model_router = ModelRouter.from_env(self.model_name)
 
         logger.info(f"Using hardcoded model: {self.model_name}")
         logger.info(f"Initialized {len(self.parser_registry)} time parsers")
 
-        self._setup_gemini()
+        if model_client is not None:
+            self.gemini_client = model_client
+        else:
+            self._setup_gemini()
     
     # _load_config method removed - using hardcoded values instead
     
     def _setup_gemini(self):
-        """Set up the Gemini API client"""
-        if not self.api_key:
-            logger.warning("Gemini API key not configured")
-            self.gemini_client = None
-            return
-
+        """Set up the model client (the Gemini API unless SUMMARIZER_MODEL_BACKEND says otherwise)"""
         try:
-            # Initialize the client with the API key
-            self.gemini_client = genai.Client(api_key=self.api_key)
+            self.gemini_client = create_model_client(self.api_key)
+            if self.gemini_client is None:
+                return
             logger.info("Gemini client initialized")
 
             # We're using a hardcoded model name, so no need to check if it exists
@@ -199,12 +381,7 @@ class SummarizerService:
         # Handle "what happened [last] weekday to weekday"
         if 'what happened' in text_lower or 'last' in text_lower:
             # Check for weekday range pattern
-            weekday_names = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-            weekday_pattern = '|'.join(weekday_names)
-            range_match = re.search(
-                f"(what happened |)(last |)(({weekday_pattern})\\s+to\\s+({weekday_pattern}))", 
-                text_lower
-            )
+            range_match = WEEKDAY_RANGE_QUESTION_RE.search(text_lower)
             
             if range_match:
                 is_last = bool(range_match.group(2))
@@ -215,13 +392,7 @@ class SummarizerService:
                     return extracted_range
             
             # Check for month range pattern
-            month_names = ["january", "february", "march", "april", "may", "june", "july", 
-                          "august", "september", "october", "november", "december"]
-            month_pattern = '|'.join(month_names)
-            month_range_match = re.search(
-                f"(what happened |)(last |)(({month_pattern})\\s+to\\s+({month_pattern}))",
-                text_lower
-            )
+            month_range_match = MONTH_RANGE_QUESTION_RE.search(text_lower)
             
             if month_range_match:
                 is_last = bool(month_range_match.group(2))
@@ -240,27 +411,19 @@ class SummarizerService:
                 
         # If all parsers fail, check if it contains any time-related keywords
         # This is a fallback to the previous implementation's behavior
-        contains_time_keyword = False
-        for phrase in TIME_PHRASES:
+        for phrase, context_pattern in TIME_PHRASE_CONTEXT_PATTERNS:
             if phrase in text_lower:
-                contains_time_keyword = True
-                break
-                
-        if contains_time_keyword:
-            for phrase in TIME_PHRASES:
-                if phrase in text_lower:
-                    pattern = r'(\S+\s+){0,3}' + re.escape(phrase) + r'(\s+\S+){0,3}'
-                    match = re.search(pattern, text_lower)
-                    if match:
-                        time_context = match.group(0).strip()
-                        # Try dateparser as a last resort
-                        try:
-                            parsed = dateparser.parse(time_context, settings={'RELATIVE_BASE': datetime.now()})
-                            if parsed:
-                                return parsed.strftime("%Y-%m-%d")
-                        except Exception:
-                            pass
-                        return time_context
+                match = context_pattern.search(text_lower)
+                if match:
+                    time_context = match.group(0).strip()
+                    # Try dateparser as a last resort
+                    try:
+                        parsed = dateparser.parse(time_context, settings={'RELATIVE_BASE': datetime.now()})
+                        if parsed:
+                            return parsed.strftime("%Y-%m-%d")
+                    except Exception:
+                        pass
+                    return time_context
         
         # No valid timeframe found
         return None
@@ -304,13 +467,10 @@ class SummarizerService:
         if reference_date.tzinfo is None:
             reference_date = reference_date.replace(tzinfo=timezone.utc)
         
-        # Try each parser in order until one successfully parses the input
-        for parser in self.parser_registry:
-            if parser.can_parse(cleaned_text):
-                result = parser.parse_date_range(cleaned_text, reference_date)
-                if result:
-                    logger.info(f"Parsed '{cleaned_text}' using {parser.__class__.__name__}")
-                    return result
+        # The dispatcher tries only the parsers whose keywords appear, in registry order
+        result = self.time_dispatcher.parse_date_range(cleaned_text, reference_date)
+        if result:
+            return result
         
         # Fallback to timefhuman for more complex expressions
         return self._parse_with_timefhuman(cleaned_text, reference_date)
@@ -456,12 +616,18 @@ class SummarizerService:
         logger.info(f"All parsing methods failed for: '{text}'. Using 24h default.")
         return start_time, None, "24h (default) ⚠️ Tip: For more specific results, try a clearer timeframe"
     
-    def generate_summary(self,
+    @gemini_request(PRIORITY_SUMMARIZE)
+    @tracks_prefix_usage
+    @tracks_model_route
+    async def generate_summary(self,
                      messages: List[Dict[str, Any]],
                      duration_str: str,
                      user_id: str,
                      channel_id: str,
-                     guild_id: str) -> Dict[str, Any]:
+                     guild_id: str,
+                     window_start: Optional[datetime] = None,
+                     window_end: Optional[datetime] = None,
+                     on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
         """Generate a summary of Discord messages using Gemini API
 
         Args:
@@ -470,9 +636,13 @@ class SummarizerService:
             user_id: Discord user ID who requested the summary
             channel_id: Discord channel ID where the summary was requested
             guild_id: Discord guild/server ID
+            window_start: Start of the window from parse_date_range; enables the result cache
+            window_end: End of the window from parse_date_range (None for "until now")
+            on_progress: Optional coroutine called with the formatted text so far while
+                the response streams in (single-prompt summaries only)
 
         Returns:
-            Dictionary with summary text and metrics
+            Dictionary with summary text and metrics (``cached`` is True for cache hits)
         """
         if not self.gemini_client:
             raise Exception("Gemini client not initialized")
@@ -489,108 +659,95 @@ class SummarizerService:
                 "is_split": False
             }
             
+        # Serve repeated requests for an unchanged window from the cache
+        cache_key = None
+        if window_start is not None:
+            cache_key = self._summary_cache_key(channel_id, window_start, window_end, messages)
+            cached_result = await asyncio.to_thread(self.summary_cache.get, cache_key)
+            if cached_result is not None:
+                logger.info(f"Serving summary for channel {channel_id} from cache")
+                cached_result.update({
+                    "duration": duration_str,
+                    "completion_time": time.time() - start_time,
+                    "cached": True
+                })
+                return cached_result
+            
+        # Extend a stored summary of an overlapping window when the rolling policy allows it
+        plan, full_reason = None, None
+        if window_start is not None and self.rolling_enabled:
+            plan, full_reason = await self._plan_rolling_summary(channel_id, messages)
+            
         logger.info(f"Generating summary for {len(messages)} messages over {duration_str}")
         
         # Real implementation for production use
         try:
             # Prepare message data for summary
-            conversation_text = ""
-            citation_map = {}
-            citation_counter = 1
-            
-            for msg in messages:
-                # Format the message with a citation
-                citation_id = f"c{citation_counter}"
-                citation_map[citation_id] = msg["jump_url"]
-                
-                message_text = f"{msg['author']['name']}: {msg['content']} [{citation_id}]\n"
-                conversation_text += message_text
-                
-                citation_counter += 1
-            
-            # Build the prompt for Gemini with instructions for formatting and citation requirements
-            prompt = f"""
-You are AVERY, a Discord bot that creates BRIEF summaries of chat activity. I am giving you Discord messages to summarize.
-
-Summary Time Range: {duration_str}
-
-CRITICAL INSTRUCTIONS:
-1. Create a VERY CONCISE summary (max 300 words)
-2. Focus on the key points rather than including every detail
-3. NEVER respond with phrases like "no significant activity" - ALL messages are important
-4. Be extremely brief but informative
-5. Format in bulleted lists using dashes (-) for bullets
-6. Follow EXACTLY the header structure from the example below
-7. IMPORTANT: Include citations to reference specific messages using the citation format [cX] that appears after each message author's name
-
-Focus on:
-1. Participants involved (who was talking)
-2. Key topics discussed (what they talked about)
-3. Important arguments or decisions (what conclusions were reached)
-4. Action items or follow-ups needed (what needs to be done)
-5. Key messages that should be highlighted (specific important messages)
-
-Format the output EXACTLY like this example, using proper Markdown header levels:
-
-# Action Items ✨
-- **[Person responsible]:** [Action item description] [c1]
-- **[Person responsible]:** [Another action item if applicable] [c2]
-
-# Conversation Summary ✨
-## Conversation Purpose
-[Brief description of meeting purpose]
-
-## Key Takeaways
-- [First key takeaway from the conversation] [c3]
-- [Second key takeaway from the conversation] [c4]
-- [Third key takeaway if applicable] [c5]
-
-## Topics
-### [Topic Name]
-- [Detail about the first topic] [c6]
-- [Another point about the first topic] [c7]
-
-### [Another Topic Name]
-- [Detail about the second topic] [c8]
-- [Another point about the second topic] [c9]
-
-IMPORTANT FORMATTING RULES:
-1. Use "# " for first-level headers ("Action Items ✨" and "Conversation Summary ✨")
-2. Use "## " for second-level headers ("Conversation Purpose", "Key Takeaways", and "Topics")
-3. Use "### " for third-level headers (each topic name under "Topics")
-4. Make sure there is a space after each # symbol
-5. Use dashes (-) for bullet points, NOT Unicode bullets or asterisks
-6. Include emoji (✨) ONLY for the two main section headers as shown
-7. ONLY use bold formatting (**text**) for assignee names in action items
-8. Maintain consistent indentation for bullet points
-9. For action items, format as a single bullet with the person's name in bold followed by a colon and the action item description
-10. ALWAYS include citation references in the format [cX] after important information to refer to the original messages
-11. Use citations [cX] to reference specific messages that support your summary points
-
-MESSAGES TO SUMMARIZE:
-{conversation_text}
-"""
-            
-            # Set up generation config with appropriate parameters
-            generation_config = types.GenerationConfig(
-                temperature=self.temperature,
-                max_output_tokens=self.max_tokens
-            )
+            conversation = None
+            if plan is not None:
+                conversation = self._prepare_conversation(
+                    plan.new_messages, ROLLING_MAX_NEW_TOKENS, POLICY_MAP_REDUCE, citation_start=plan.next_citation
+                )
+                if conversation.tokens > ROLLING_MAX_NEW_TOKENS:
+                    plan, full_reason = None, "too many new messages"
+            if plan is None:
+                conversation = self._prepare_conversation(messages, MAP_REDUCE_TOKEN_THRESHOLD, self.over_budget_policy)
+            conversation_text = conversation.text
+            citation_map = CitationMap(plan.citation_map, conversation.citation_map) if plan else conversation.citation_map
+            estimated_tokens = conversation.tokens
+            chunk_count = 1
+            api_failed = False
+            if plan is not None:
+                current_route().tier = self.model_router.choose(
+                    "summarize", len(plan.new_messages), estimated_tokens + estimate_tokens(plan.summary_text)
+                )
+            else:
+                current_route().tier = self.model_router.choose("summarize", len(messages), estimated_tokens)
             
-            # Call Gemini API with the constructed prompt
+            # Call Gemini API, splitting very large windows into a map-reduce run
             try:
-                response = self._generate_content_with_retry(
-                    model=self.model_name,
-                    contents=prompt,
-                    generation_config=generation_config
-                )
-                
-                # Extract the summary text from the response
-                summary_text = response.text
+                if plan is not None:
+                    logger.info(
+                        f"Extending the stored summary of {plan.reused_messages} messages with "
+                        f"{len(plan.new_messages)} new messages"
+                    )
+                    if not plan.new_messages:
+                        summary_text = plan.summary_text
+                    elif on_progress:
+                        summary_text = await self._stream_text(
+                            self._build_rolling_prompt(plan.summary_text, conversation_text, duration_str),
+                            lambda text: on_progress(self._parse_citations(text, citation_map)),
+                            require_citations=True
+                        )
+                    else:
+                        summary_text = await self._generate_text(
+                            self._build_rolling_prompt(plan.summary_text, conversation_text, duration_str),
+                            require_citations=True
+                        )
+                elif estimated_tokens > MAP_REDUCE_TOKEN_THRESHOLD:
+                    logger.info(f"Conversation is ~{estimated_tokens} tokens, using map-reduce summarization")
+                    summary_text, chunk_count = await self._map_reduce_summary(conversation.lines, duration_str)
+                elif on_progress:
+                    summary_text = await self._stream_text(
+                        self._build_summary_prompt(duration_str, conversation_text),
+                        lambda text: on_progress(self._parse_citations(text, citation_map)),
+                        system_instruction=SUMMARY_SYSTEM_INSTRUCTION,
+                        require_citations=True
+                    )
+                else:
+                    summary_text = await self._generate_text(
+                        self._build_summary_prompt(duration_str, conversation_text),
+                        system_instruction=SUMMARY_SYSTEM_INSTRUCTION,
+                        require_citations=True
+                    )
                 logger.info(f"Successfully generated summary with Gemini API")
                 
+            except GeminiBusyError:
+                # Let the cog tell the user when to try again
+                raise
             except Exception as api_error:
                 logger.error(f"Error calling Gemini API: {api_error}")
+                api_failed = True
                 # Create a fallback response in case of API failure
                 authors = list(set([msg['author']['name'] for msg in messages]))
                 summary_text = f"Unable to generate summary due to an API error. The conversation involved {', '.join(authors)}. Please try again later."
@@ -598,6 +755,13 @@ MESSAGES TO SUMMARIZE:
             # Process and format citations
             formatted_summary = self._parse_citations(summary_text, citation_map)
             
+            # Keep the raw summary so the next overlapping window can extend it
+            if window_start is not None and self.rolling_enabled:
+                self.rolling_summaries.record(plan, len(messages))
+                if not api_failed and all("id" in msg for msg in messages):
+                    stored = self._stored_summary(channel_id, messages, summary_text, conversation, plan, citation_map)
+                    await asyncio.to_thread(self.rolling_summaries.save, stored)
+            
             # Split long responses if needed
             is_split = False
             continuation_parts = []
@@ -618,25 +782,46 @@ MESSAGES TO SUMMARIZE:
                 "message_count": len(messages),
                 "duration": duration_str,
                 "completion_time": completion_time,
-                "is_split": is_split
+                "is_split": is_split,
+                "chunk_count": chunk_count,
+                "cached": False,
+                "api_error": api_failed,
+                **conversation.stats(),
+                **current_prefix_usage().stats(),
+                **current_route().stats(),
+                "summary_mode": "incremental" if plan else "full",
+                "reused_messages": plan.reused_messages if plan else 0,
+                "full_summary_reason": full_reason
             }
+            if plan is not None:
+                # The earlier summary is part of the merge prompt
+                result["input_tokens"] += estimate_tokens(plan.summary_text)
             
             if is_split:
                 result["continuation_parts"] = continuation_parts
                 
+            # Never cache the API error fallback
+            if cache_key and not api_failed:
+                await asyncio.to_thread(self.summary_cache.set, cache_key, result)
+                
             return result
             
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
             raise
             
-    def answer_question(self,
+    @gemini_request(PRIORITY_ASK)
+    @tracks_prefix_usage
+    @tracks_model_route
+    async def answer_question(self,
                     messages: List[Dict[str, Any]],
                     question: str,
                     duration_str: str,
                     user_id: str,
                     channel_id: str,
-                    guild_id: str) -> Dict[str, Any]:
+                    guild_id: str,
+                    on_progress: Optional[Callable[[str], Awaitable[None]]] = None,
+                    mode: Optional[str] = None) -> Dict[str, Any]:
         """Answer a specific question about Discord messages using Gemini API
 
         Args:
@@ -646,6 +831,10 @@ MESSAGES TO SUMMARIZE:
             user_id: Discord user ID who asked the question
             channel_id: Discord channel ID where the question was asked
             guild_id: Discord guild/server ID
+            on_progress: Optional coroutine called with the formatted text so far while
+                the answer streams in
+            mode: "full" to send the whole window, "retrieval" to send only the messages
+                most relevant to the question (defaults to SUMMARIZER_ASK_MODE)
 
         Returns:
             Dictionary with answer text and metrics
@@ -667,104 +856,45 @@ MESSAGES TO SUMMARIZE:
             
         logger.info(f"Answering question based on {len(messages)} messages over {duration_str}")
         
-        # Check if we're in testing mode
-        if 'testing' in channel_id:
-            # Testing mode - return a simplified response without calling Gemini
-            citation_map = {}
-            for i, msg in enumerate(messages):
-                citation_id = f"c{i+1}"
-                citation_map[citation_id] = msg["jump_url"]
-                
-            # Create a general purpose mock answer with citations
-            # Use first 3 message IDs for citations, or fewer if not enough messages
-            citation_ids = [f"c{i+1}" for i in range(min(3, len(messages)))]
-            citations_str = ", ".join([f"[{cid}]" for cid in citation_ids]) if citation_ids else ""
-            
-            answer_text = f"This is a testing mode answer to your question: '{question}'. Based on the conversation between {len(set([msg['author']['name'] for msg in messages]))} participants, I can reference these messages: {citations_str}. This answer is generated in testing mode without using the Gemini API."
-            
-            # Process citations
-            formatted_answer = self._parse_citations(answer_text, citation_map)
-            
-            # Calculate completion time
-            completion_time = time.time() - start_time
-            
-            # Return a simplified result
-            return {
-                "answer": formatted_answer,
-                "message_count": len(messages),
-                "duration": duration_str,
-                "completion_time": completion_time,
-                "is_split": False
-            }
-            
-        # Prepare message data for answering
-        conversation_text = ""
-        citation_map = {}
-        citation_counter = 1
-        
-        for msg in messages:
-            # Format the message with a citation
-            citation_id = f"c{citation_counter}"
-            citation_map[citation_id] = msg["jump_url"]
-            
-            message_text = f"{msg['author']['name']}: {msg['content']} [{citation_id}]\n"
-            conversation_text += message_text
-            
-            citation_counter += 1
+        # Narrow the window down to the messages that matter for the question
+        message_count = len(messages)
+        messages, retrieval_stats = await self._select_for_question(messages, question, channel_id, mode or self.ask_mode)
+        retrieval_note = ""
+        if retrieval_stats["retrieval_mode"] == MODE_RETRIEVAL:
+            retrieval_note = (f"\nNOTE: Only the {len(messages)} messages most relevant to the question (with the messages "
+                              f"around them) out of {message_count} in this period are included below.\n")
+
+        # Prepare message data for answering; map-reduce doesn't apply to questions
+        policy = POLICY_RECENT if self.over_budget_policy == POLICY_MAP_REDUCE else self.over_budget_policy
+        conversation = self._prepare_conversation(messages, self.ask_token_budget, policy)
+        conversation_text = conversation.text
+        citation_map = conversation.citation_map
+        current_route().tier = self.model_router.choose("ask", len(messages), conversation.tokens)
         
-        # Build the prompt for Gemini with instructions for answering questions with citations
+        # Only the request-specific part; the instructions go in ASK_SYSTEM_INSTRUCTION
         prompt = f"""
-You are AVERY, a Discord bot that accurately answers specific questions about chat conversations. I am giving you Discord messages and a question to answer.
-
 Time Range Analyzed: {duration_str}
-
+{retrieval_note}
 USER QUESTION: {question}
 
-CRITICAL INSTRUCTIONS:
-1. Focus ONLY on answering the specific question that was asked
-2. Provide a clear, accurate, and direct answer based solely on the content of the messages
-3. Use citations [cX] to reference specific messages that support your answer
-4. If the question cannot be answered from these messages, clearly state that
-5. Be objective and factual - don't speculate beyond what's in the messages
-6. Format your answer in a clear, readable way using Markdown
-
-Your answer should:
-- Start with a clear, direct response to the question
-- Include relevant evidence from the messages
-- Cite specific messages to support your points
-- Be well-organized using appropriate headings and bullet points
-- Be comprehensive but concise
-
-Format the output using proper Markdown:
-- Use "# " for the main answer header
-- Use "## " for any section headers if needed
-- Use "### " for subsection headers if needed
-- Use bullet points (- ) for lists
-- Use bold (**text**) for emphasis
-- ALWAYS cite sources with the citation format [cX] that appears after each message author's name
-
 MESSAGES TO ANALYZE:
 {conversation_text}
 """
         
-        # Set up generation config with appropriate parameters
-        generation_config = types.GenerationConfig(
-            temperature=self.temperature,
-            max_output_tokens=self.max_tokens
-        )
-        
         # Call Gemini API with the constructed prompt
         try:
-            response = self._generate_content_with_retry(
-                model=self.model_name,
-                contents=prompt,
-                generation_config=generation_config
-            )
-            
-            # Extract the answer text from the response
-            answer_text = response.text
+            if on_progress:
+                answer_text = await self._stream_text(
+                    prompt,
+                    lambda text: on_progress(self._parse_citations(text, citation_map)),
+                    system_instruction=ASK_SYSTEM_INSTRUCTION
+                )
+            else:
+                answer_text = await self._generate_text(prompt, system_instruction=ASK_SYSTEM_INSTRUCTION)
             logger.info(f"Successfully generated answer with Gemini API")
             
+        except GeminiBusyError:
+            raise
         except Exception as api_error:
             logger.error(f"Error calling Gemini API: {api_error}")
             # Create a fallback response in case of API failure
@@ -773,41 +903,497 @@ MESSAGES TO ANALYZE:
         # Process citations
         formatted_answer = self._parse_citations(answer_text, citation_map)
         
+        # Split long answers the same way as summaries
+        continuation_parts = []
+        if len(formatted_answer) > 4000:
+            logger.info("Answer exceeds Discord embed limit, splitting...")
+            split = self._split_long_response(formatted_answer)
+            formatted_answer = split["main_part"]
+            continuation_parts = split["continuation_parts"]
+        
         # Calculate completion time
         completion_time = time.time() - start_time
         
         # Return a simplified result
-        return {
+        result = {
             "answer": formatted_answer,
-            "message_count": len(messages),
+            "message_count": message_count,
             "duration": duration_str,
             "completion_time": completion_time,
-            "is_split": False
+            "is_split": bool(continuation_parts),
+            **conversation.stats(),
+            **retrieval_stats,
+            **current_prefix_usage().stats(),
+            **current_route().stats()
         }
+        if continuation_parts:
+            result["continuation_parts"] = continuation_parts
+        return result
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def _generate_content_with_retry(self, model, contents, generation_config=None):
-        """Generate content with Gemini API with automatic retry on failure"""
+    def _summary_cache_key(self, channel_id: str, window_start: datetime, window_end: Optional[datetime], messages: List[Dict[str, Any]]) -> str:
+        """Build the summary cache key for a window
+
+        The key combines the channel, the window bounds floored to CACHE_WINDOW_GRANULARITY,
+        the highest message ID in the window, the prompt version and the model.
+        """
+        highest_message_id = max(int(msg["id"]) for msg in messages) if messages else None
+        return make_cache_key(
+            "summary",
+            channel_id,
+            self._normalize_window_bound(window_start),
+            self._normalize_window_bound(window_end),
+            highest_message_id,
+            PROMPT_VERSION,
+            self.model_name
+        )
+
+    def request_key(self, kind: str, channel_id: str, window_start: datetime, window_end: Optional[datetime], question: Optional[str] = None) -> str:
+        """Key under which identical concurrent /summarize or /ask requests are coalesced
+
+        Uses the same window normalization as the summary cache, so "24h" requests a
+        few seconds apart share one pipeline run. Questions are compared case- and
+        whitespace-insensitively.
+        """
+        normalized_question = " ".join(question.lower().split()) if question else None
+        return make_cache_key(
+            kind,
+            channel_id,
+            self._normalize_window_bound(window_start),
+            self._normalize_window_bound(window_end),
+            normalized_question
+        )
+
+    @staticmethod
+    def _normalize_window_bound(bound: Optional[datetime]) -> Optional[str]:
+        """Floor a window bound to CACHE_WINDOW_GRANULARITY in UTC (None stays open-ended)"""
+        if bound is None:
+            return None
+        if bound.tzinfo is not None:
+            bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+        granularity = int(CACHE_WINDOW_GRANULARITY.total_seconds())
+        floored = int(bound.replace(tzinfo=timezone.utc).timestamp()) // granularity * granularity
+        return datetime.fromtimestamp(floored, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Counters of the summary result cache, rolling summaries, the /ask retrieval indexes and the instruction cache"""
+        return {
+            **self.summary_cache.stats(),
+            "retrieval_index": self.retrieval_indexes.stats(),
+            "rolling_summaries": self.rolling_summaries.stats(),
+            "instruction_cache": self.instruction_cache.stats()
+        }
+
+    async def _select_for_question(self,
+                                   messages: List[Dict[str, Any]],
+                                   question: str,
+                                   channel_id: str,
+                                   mode: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Pick the messages sent with a question
+
+        In retrieval mode the window's BM25 index (cached per channel window) selects the
+        best-matching messages and their neighbours. Small windows, and questions that
+        match nothing, fall back to the full window.
+
+        Returns:
+            Tuple of (messages to send, retrieval stats for the result)
+        """
+        if mode not in ASK_MODES:
+            raise ValueError(f"Unknown ask mode '{mode}', expected one of {', '.join(ASK_MODES)}")
+        full_window = {"retrieval_mode": MODE_FULL, "retrieved_messages": len(messages), "retrieval_index_cached": False}
+        if mode == MODE_FULL or len(messages) < RETRIEVAL_MIN_MESSAGES:
+            return messages, full_window
+
+        index, cached = await asyncio.to_thread(self.retrieval_indexes.get_or_build, channel_id, messages)
+        selected = select_relevant(index, question, RETRIEVAL_TOP_K, RETRIEVAL_CONTEXT_MESSAGES)
+        if selected is None:
+            logger.info("No messages match the question, sending the full window")
+            return messages, dict(full_window, retrieval_index_cached=cached)
+
+        logger.info(f"Retrieval selected {len(selected)} of {len(messages)} messages (index {'reused' if cached else 'built'})")
+        return [messages[i] for i in selected], {
+            "retrieval_mode": MODE_RETRIEVAL,
+            "retrieved_messages": len(selected),
+            "retrieval_index_cached": cached
+        }
+
+    def _build_conversation(self, messages: List[Dict[str, Any]]) -> Tuple[List[str], CitationMap]:
+        """Format messages as compact prompt lines tagged with citation IDs
+
+        Citation IDs are numbered across the whole window, so they stay unique when the
+        lines are later split into chunks.
+
+        Returns:
+            Tuple of (one line per author run or collapsed reactions, mapping of citation ID to jump URL)
+        """
+        conversation = build_conversation(messages)
+        return conversation.lines, conversation.citation_map
+
+    def _prepare_conversation(self, messages: List[Dict[str, Any]], token_budget: int, policy: str,
+                              citation_start: int = 1) -> PromptConversation:
+        """Build the compacted conversation and trim it to token_budget according to policy"""
+        conversation = fit_to_budget(build_conversation(messages, citation_start), token_budget, policy)
+        logger.info(
+            f"Prompt conversation: {conversation.message_count} messages, ~{conversation.tokens} tokens "
+            f"(compaction ratio {conversation.compaction_ratio}, {conversation.omitted_count} omitted)"
+        )
+        return conversation
+
+    def _build_summary_prompt(self, duration_str: str, conversation_text: str) -> str:
+        """Build the request part of a single-pass summary; the instructions are SUMMARY_SYSTEM_INSTRUCTION"""
+        return f"""
+Summary Time Range: {duration_str}
+
+MESSAGES TO SUMMARIZE:
+{conversation_text}
+"""
+
+    def _build_rolling_prompt(self, previous_summary: str, conversation_text: str, duration_str: str) -> str:
+        """Build the merge-pass prompt that extends a stored summary with the messages after it"""
+        return f"""
+You are AVERY, a Discord bot that creates BRIEF summaries of chat activity. I am giving you an earlier summary of this Discord channel and the messages posted since. Update the summary so it covers both.
+
+Summary Time Range: {duration_str}
+
+CRITICAL INSTRUCTIONS:
+1. Create a VERY CONCISE summary (max 300 words)
+2. Merge new points into the existing topics, decisions and action items, and drop points the new messages make obsolete
+3. Keep the citations [cX] from the earlier summary and the new messages EXACTLY as written; NEVER renumber them or invent new ones
+4. Format in bulleted lists using dashes (-) for bullets
+5. Follow EXACTLY the header structure from the example below
+
+{SUMMARY_FORMAT_INSTRUCTIONS}
+
+EARLIER SUMMARY:
+{previous_summary}
+
+NEW MESSAGES:
+{conversation_text}
+"""
+
+    def _stored_summary(self, channel_id: str, messages: List[Dict[str, Any]], summary_text: str,
+                        conversation: PromptConversation, plan: Optional[RollingPlan],
+                        citation_map: CitationMap) -> StoredSummary:
+        """Describe a freshly generated summary for the rolling summary store
+
+        Only the URLs of the citations resolved while formatting summary_text are kept;
+        every citation ID keeps its message ID.
+        """
+        message_ids = [int(msg["id"]) for msg in messages]
+        citation_message_ids = dict(conversation.citation_message_ids)
+        if plan is not None:
+            citation_message_ids = {**plan.citation_message_ids, **citation_message_ids}
+        return StoredSummary(
+            channel_id=channel_id,
+            first_message_id=min(message_ids),
+            last_message_id=max(message_ids),
+            message_count=len(messages),
+            summary_text=summary_text,
+            citation_map=citation_map.resolved(),
+            citation_message_ids=citation_message_ids,
+            model=self.model_name,
+            prompt_version=PROMPT_VERSION,
+            merge_depth=plan.stored.merge_depth + 1 if plan else 0
+        )
+
+    async def _plan_rolling_summary(self, channel_id: str, messages: List[Dict[str, Any]]) -> Tuple[Optional[RollingPlan], Optional[str]]:
+        """Find a stored summary that can be extended to this window
+
+        Returns:
+            Tuple of (plan, None), or (None, reason for summarizing the whole window)
+        """
+        candidates = await asyncio.to_thread(self.rolling_summaries.candidates, channel_id)
+        return plan_incremental(candidates, messages, self.rolling_policy, self.model_name, PROMPT_VERSION)
+
+    def _build_chunk_prompt(self, chunk_text: str, chunk_number: int, chunk_total: int, duration_str: str) -> str:
+        """Build the map-pass prompt for one chunk of a large conversation"""
+        return f"""
+You are AVERY, a Discord bot that summarizes chat activity. I am giving you part {chunk_number} of {chunk_total} of a long Discord conversation, in chronological order. Your notes will later be merged with the notes for the other parts.
+
+Summary Time Range: {duration_str}
+
+CRITICAL INSTRUCTIONS:
+1. Write concise notes (max 400 words) as bullet points using dashes (-)
+2. Cover participants, key topics, decisions, action items (with the person responsible) and key messages
+3. End EVERY bullet with the citation of the message(s) it is based on, e.g. [c12] or [c12, c15]
+4. Copy citation IDs EXACTLY as they appear after each message; NEVER renumber them or invent new ones
+5. Do not add headers, introductions or conclusions
+
+MESSAGES IN THIS PART:
+{chunk_text}
+"""
+
+    def _build_merge_prompt(self, notes_text: str, duration_str: str) -> str:
+        """Build the prompt that condenses several sets of chunk notes into one set"""
+        return f"""
+You are AVERY, a Discord bot that summarizes chat activity. I am giving you notes on consecutive parts of one long Discord conversation, in chronological order. Merge them into a single set of notes.
+
+Summary Time Range: {duration_str}
+
+CRITICAL INSTRUCTIONS:
+1. Write concise notes (max 400 words) as bullet points using dashes (-)
+2. Combine points about the same topic, decision or action item
+3. Keep the citations [cX] from the notes you use EXACTLY as written; NEVER renumber them or invent new ones
+4. Do not add headers, introductions or conclusions
+
+NOTES TO MERGE:
+{notes_text}
+"""
+
+    def _build_reduce_prompt(self, notes_text: str, duration_str: str) -> str:
+        """Build the final reduce-pass prompt that turns chunk notes into the summary"""
+        return f"""
+You are AVERY, a Discord bot that creates BRIEF summaries of chat activity. I am giving you notes on consecutive parts of one long Discord conversation, in chronological order. Turn them into a single summary of the whole conversation.
+
+Summary Time Range: {duration_str}
+
+CRITICAL INSTRUCTIONS:
+1. Create a VERY CONCISE summary (max 300 words)
+2. Merge points about the same topic, decision or action item across parts instead of summarizing each part separately
+3. Keep the citations [cX] from the notes EXACTLY as written; NEVER renumber them or invent new ones
+4. Format in bulleted lists using dashes (-) for bullets
+5. Follow EXACTLY the header structure from the example below
+
+{SUMMARY_FORMAT_INSTRUCTIONS}
+
+NOTES TO SUMMARIZE:
+{notes_text}
+"""
+
+    def _chunk_texts(self, texts: List[str], token_budget: int) -> List[List[str]]:
+        """Greedily group consecutive texts into chunks of at most token_budget estimated tokens
+
+        A single text larger than the budget gets a chunk of its own.
+        """
+        chunks = []
+        current = []
+        current_tokens = 0
+        
+        for text in texts:
+            text_tokens = estimate_tokens(text)
+            if current and current_tokens + text_tokens > token_budget:
+                chunks.append(current)
+                current = []
+                current_tokens = 0
+            current.append(text)
+            current_tokens += text_tokens
+            
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _map_reduce_summary(self, conversation_lines: List[str], duration_str: str) -> Tuple[str, int]:
+        """Summarize a conversation too large for one prompt
+
+        The lines are split into token-budgeted chunks that are summarized concurrently
+        (map). While the resulting notes are still over budget they are merged in groups,
+        then a final reduce pass produces the summary in the usual format. Citation IDs
+        are global to the window, so [cX] references survive every pass.
+
+        Returns:
+            Tuple of (summary text with [cX] citations, number of map chunks)
+        """
+        chunks = self._chunk_texts(conversation_lines, CHUNK_TOKEN_BUDGET)
+        logger.info(f"Map-reduce: summarizing {len(chunks)} chunks with up to {MAP_REDUCE_MAX_CONCURRENCY} requests in flight")
+        
+        notes = await self._generate_texts_concurrently([
+            self._build_chunk_prompt("".join(chunk), number, len(chunks), duration_str)
+            for number, chunk in enumerate(chunks, start=1)
+        ])
+        
+        # Condense the notes hierarchically until they fit into a single reduce prompt
+        while len(notes) > 1 and estimate_tokens("\n\n".join(notes)) > CHUNK_TOKEN_BUDGET:
+            groups = self._chunk_texts(notes, CHUNK_TOKEN_BUDGET)
+            if len(groups) == len(notes):
+                # Every note fills a chunk on its own; merge pairwise so each level still shrinks
+                groups = [notes[i:i + 2] for i in range(0, len(notes), 2)]
+            logger.info(f"Map-reduce: merging {len(notes)} notes into {len(groups)}")
+            notes = await self._generate_texts_concurrently([
+                self._build_merge_prompt("\n\n".join(group), duration_str) for group in groups
+            ])
+            
+        reduce_prompt = self._build_reduce_prompt("\n\n".join(notes), duration_str)
+        return await self._generate_text(reduce_prompt, require_citations=True), len(chunks)
+
+    async def _generate_texts_concurrently(self, prompts: List[str]) -> List[str]:
+        """Run several prompts with a bounded number of requests in flight, keeping their order
+
+        Prompts that still fail after retries are dropped so one bad chunk doesn't lose
+        the whole summary; if every prompt fails the last error is raised.
+        """
+        semaphore = asyncio.Semaphore(MAP_REDUCE_MAX_CONCURRENCY)
+        
+        async def run(prompt):
+            async with semaphore:
+                try:
+                    return await self._generate_text(prompt, require_citations=True), None
+                except GeminiBusyError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Map-reduce prompt failed: {e}")
+                    return None, e
+        
+        results = await asyncio.gather(*(run(prompt) for prompt in prompts))
+            
+        texts = [text for text, _ in results if text]
+        if not texts:
+            raise results[-1][1] or Exception("Gemini returned no text for any chunk")
+        return texts
+
+    async def _generate_text(self, prompt: str, system_instruction: Optional[str] = None,
+                             require_citations: bool = False, tier: Optional[ModelTier] = None) -> str:
+        """Send a single prompt to Gemini and return the response text
+
+        system_instruction is the static prefix of the prompt; it is served from the
+        instruction cache when possible. The prompt goes to the tier chosen for the
+        current request (or tier), and moves up a tier while the response is truncated
+        or fails check_response; the largest tier's response is returned as is.
+        """
+        generation_config = types.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=self.max_tokens
+        )
+        tier = tier or self._request_tier()
+        while True:
+            request = {"model": tier.model, "contents": prompt, "generation_config": generation_config}
+            if system_instruction:
+                request["system_instruction"] = system_instruction
+            started = time.monotonic()
+            response = await self._generate_content_with_retry(**request)
+            text = response.text or ""
+            tier = self._next_tier(tier, prompt, response, text, time.monotonic() - started, require_citations)
+            if tier is None:
+                return text
+
+    async def _stream_text(self, prompt: str, on_text: Callable[[str], Awaitable[None]],
+                           system_instruction: Optional[str] = None, require_citations: bool = False) -> str:
+        """Stream a prompt's response from Gemini, calling on_text with the text so far
+
+        Errors raised by on_text are logged and ignored. If the stream itself fails,
+        the prompt is sent again as a regular request with retries. A response that
+        fails check_response is streamed again from the next tier up.
+        """
+        tier = self._request_tier()
+        while True:
+            pieces: List[str] = []
+            await self._acquire_gemini_slot(prompt)
+            config = None
+            started = time.monotonic()
+            try:
+                request = {"model": tier.model, "contents": prompt}
+                if system_instruction:
+                    config = await self.instruction_cache.config_for(self.gemini_client, tier.model, system_instruction)
+                    request["config"] = config
+                stream = await self.gemini_client.aio.models.generate_content_stream(**request)
+                last_chunk = None
+                async for chunk in stream:
+                    last_chunk = chunk
+                    if not chunk.text:
+                        continue
+                    pieces.append(chunk.text)
+                    try:
+                        await on_text("".join(pieces))
+                    except Exception as e:
+                        logger.error(f"Progress callback failed: {e}")
+                if not pieces:
+                    raise Exception("Gemini stream returned no text")
+                if system_instruction:
+                    # Usage metadata arrives with the final chunk
+                    self.instruction_cache.record_usage(last_chunk, config)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self.scheduler.report_rate_limited()
+                if config is not None and config.cached_content:
+                    self.instruction_cache.invalidate(tier.model, system_instruction)
+                logger.error(f"Gemini stream failed after {len(pieces)} chunks, retrying without streaming: {e}")
+                return await self._generate_text(prompt, system_instruction=system_instruction,
+                                                 require_citations=require_citations, tier=tier)
+            text = "".join(pieces)
+            tier = self._next_tier(tier, prompt, last_chunk, text, time.monotonic() - started, require_citations)
+            if tier is None:
+                return text
+
+    def _request_tier(self) -> ModelTier:
+        """Tier chosen for the current summary or answer (the default tier outside of one)"""
+        return current_route().tier or self.model_router.default_tier
+
+    def _next_tier(self, tier: ModelTier, prompt: str, response: Any, text: str, latency: float,
+                   require_citations: bool) -> Optional[ModelTier]:
+        """Record a response's tier metrics and return the tier to retry on, or None to keep it"""
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+        output_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(text)
+        outcome = check_response(response, text, require_citations)
+        self.model_router.record(tier, latency, input_tokens, output_tokens, outcome)
+        route = current_route()
+        route.record(tier, self.model_router.tiers, input_tokens, output_tokens)
+        if outcome == OUTCOME_OK:
+            return None
+        larger = self.model_router.larger(tier)
+        if larger is None:
+            logger.warning(f"Response from the {tier.name} tier failed its check ({outcome}), keeping it")
+            return None
+        logger.info(f"Response from the {tier.name} tier failed its check ({outcome}), retrying on {larger.name}")
+        route.escalations += 1
+        route.escalation_reasons.append(f"{tier.name}:{outcome}")
+        return larger
+
+    def split_response(self, text: str) -> List[str]:
+        """Every part of a response, split to fit Discord embeds like final responses are"""
+        split = self._split_long_response(text)
+        return [split["main_part"]] + split["continuation_parts"]
+
+    async def _acquire_gemini_slot(self, contents) -> None:
+        """Wait for the scheduler to admit a request for the current guild and priority"""
+        guild_id, priority = current_request()
+        await self.scheduler.acquire(guild_id, priority, estimate_tokens(str(contents)))
+
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Queue depth, wait time and rate budget metrics of the Gemini scheduler"""
+        return self.scheduler.stats()
+
+    def get_model_stats(self) -> Dict[str, Any]:
+        """Per-tier request, escalation, token and latency metrics of the model router"""
+        return self.model_router.stats()
+
+    def estimate_queue_wait(self, kind: str) -> float:
+        """Seconds a new "summarize" or "ask" request would currently wait for Gemini"""
+        return self.scheduler.estimate_wait(PRIORITY_ASK if kind == "ask" else PRIORITY_SUMMARIZE)
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10),
+           retry=retry_if_not_exception_type(GeminiBusyError))
+    async def _generate_content_with_retry(self, model, contents, generation_config=None, system_instruction=None):
+        """Generate content with the async Gemini client, retrying with backoff on failure
+
+        Uses ``gemini_client.aio`` so requests (and the backoff sleeps between retries)
+        never block the Discord event loop. Every attempt waits for a slot from the
+        scheduler; GeminiBusyError is raised right away instead of being retried.
+        A system_instruction is sent through the instruction cache, and the cached
+        tokens reported by the response are recorded.
+        """
+        await self._acquire_gemini_slot(contents)
         logger.info(f"Making Gemini API request with retries enabled")
+        config = None
         try:
-            # For compatibility with tests, handle both with and without generation_config
-            if generation_config:
-                # Extract the individual parameters from the generation_config
-                # This is needed because the API doesn't accept the config directly
-                return self.gemini_client.models.generate_content(
-                    model=model,
-                    contents=contents,
-                )
-            else:
-                return self.gemini_client.models.generate_content(
-                    model=model,
-                    contents=contents
-                )
+            # generation_config is accepted for compatibility but not sent; the API
+            # doesn't take the legacy GenerationConfig directly
+            request = {"model": model, "contents": contents}
+            if system_instruction:
+                config = await self.instruction_cache.config_for(self.gemini_client, model, system_instruction)
+                request["config"] = config
+            response = await self.gemini_client.aio.models.generate_content(**request)
+            if system_instruction:
+                self.instruction_cache.record_usage(response, config)
+            return response
         except Exception as e:
+            if is_rate_limit_error(e):
+                self.scheduler.report_rate_limited()
+            if config is not None and config.cached_content:
+                # The handle may have expired server-side; the retry creates a new one
+                self.instruction_cache.invalidate(model, system_instruction)
             logger.error(f"Gemini API error (will retry): {e}")
             raise
 
-    def _parse_citations(self, text: str, citation_map: Dict[str, str]) -> str:
+    def _parse_citations(self, text: str, citation_map: Mapping[str, str]) -> str:
         """Parse and format citations in the summary text.
         
         This method transforms citation references in the text into clickable
@@ -819,167 +1405,17 @@ MESSAGES TO ANALYZE:
         4. Complex mixed formats: [c1-c3, c5, c10] → combination of ranges and individual citations
         5. Complex formats like [c723-c741, c765] or [c178, c185-c208] → combination of ranges and individual citations
         
+        The text is rewritten by ``rewrite_citations`` in two linear tokenizer scans: one
+        that expands the [cX]-style tokens, then one that links the numeric citations.
+        
         Args:
             text: The summary or answer text containing citation references
-            citation_map: Dictionary mapping citation IDs to Discord message URLs
+            citation_map: Mapping of citation IDs to Discord message URLs
             
         Returns:
             Formatted text with clickable Discord citation links
         """
-        processed_text = text
-        
-        # Create a new map with numeric keys instead of 'c' prefixed keys
-        numeric_citation_map = {}
-        for citation_id, jump_url in citation_map.items():
-            if citation_id.startswith('c') and citation_id[1:].isdigit():
-                numeric_id = citation_id[1:]  # Remove the 'c' prefix
-                numeric_citation_map[numeric_id] = jump_url
-                
-        # First, fix nested brackets that might appear like [[c1]] or [[[c1]]]
-        processed_text = re.sub(r'\[\[\s*c(\d+)\s*\]\]', r'[c\1]', processed_text)
-        processed_text = re.sub(r'\[\[\[\s*c(\d+)\s*\]\]\]', r'[c\1]', processed_text)
-        
-        # Handle complex mixed citations [c#-c#, c#, c#-c#, ...] first
-        # This pattern matches citations with ranges and commas inside brackets
-        complex_pattern = r'\[((?:c\d+(?:-c\d+)?(?:,\s*)?)+)\]'
-        for match in re.finditer(complex_pattern, processed_text):
-            citation_content = match.group(1)
-            
-            # Skip if this is a simple citation (no commas or ranges)
-            if ',' not in citation_content and '-' not in citation_content:
-                continue
-                
-            # If we have a complex citation with commas or ranges, process it
-            # Replace the entire bracket content with processed citations
-            original_citation = match.group(0)  # The full citation with brackets
-            
-            # First remove the 'c' prefix from all numbers
-            simplified_content = re.sub(r'c(\d+)', r'\1', citation_content)
-            
-            # Split by commas to get individual citations or ranges
-            citation_parts = [part.strip() for part in simplified_content.split(',')]
-            replacement_parts = []
-            
-            for part in citation_parts:
-                if '-' in part:
-                    # This is a range citation like '1-5'
-                    start_num, end_num = map(int, part.split('-'))
-                    for i in range(start_num, end_num + 1):
-                        numeric_id = str(i)
-                        c_id = f'c{numeric_id}'
-                        if c_id in citation_map:
-                            replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
-                        else:
-                            replacement_parts.append(f"[{numeric_id}]")
-                else:
-                    # This is a single citation like '1'
-                    numeric_id = part
-                    c_id = f'c{numeric_id}'
-                    if c_id in citation_map:
-                        replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
-                    else:
-                        replacement_parts.append(f"[{numeric_id}]")
-            
-            # Join all parts with commas and replace the original citation
-            replacement = ", ".join(replacement_parts)
-            processed_text = processed_text.replace(original_citation, replacement, 1)
-        
-        # Process remaining standard citations
-        # Convert [c#] citations to [#]
-        processed_text = re.sub(r'\[c(\d+)\]', r'[\1]', processed_text)
-        
-        # Convert remaining [c#-c#] range citations to [#-#]
-        range_pattern = r'\[c(\d+)-c(\d+)\]'
-        for match in re.finditer(range_pattern, processed_text):
-            start_num = int(match.group(1))
-            end_num = int(match.group(2))
-            replacement_parts = []
-            
-            for i in range(start_num, end_num + 1):
-                numeric_id = str(i)
-                c_id = f'c{numeric_id}'
-                if c_id in citation_map:
-                    replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
-                else:
-                    replacement_parts.append(f"[{numeric_id}]")
-                    
-            replacement = ", ".join(replacement_parts)
-            processed_text = processed_text.replace(match.group(0), replacement, 1)
-        
-        # Convert remaining grouped citations like [c1, c2, c3] to [1, 2, 3]
-        # First capture the content inside brackets
-        grouped_pattern = r'\[(c\d+(?:,\s*c\d+)+)\]'
-        for match in re.finditer(grouped_pattern, processed_text):
-            citation_group = match.group(1)
-            # Remove 'c' prefix from each number
-            citation_ids = re.findall(r'c(\d+)', citation_group)
-            replacement_parts = []
-            
-            for numeric_id in citation_ids:
-                c_id = f'c{numeric_id}'
-                if c_id in citation_map:
-                    replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
-                else:
-                    replacement_parts.append(f"[{numeric_id}]")
-                    
-            replacement = ", ".join(replacement_parts)
-            processed_text = processed_text.replace(match.group(0), replacement, 1)
-        
-        # Identify already processed citations to protect them
-        protected_citations = {}
-        protected_counter = 0
-        
-        # Find and protect already processed citations with format [#](url)
-        already_processed_pattern = r'\[\d+\]\([^)]+\)'
-        for match in re.finditer(already_processed_pattern, processed_text):
-            placeholder = f"__PROTECTED_CITATION_{protected_counter}__"
-            protected_citations[placeholder] = match.group(0)
-            processed_text = processed_text.replace(match.group(0), placeholder, 1)
-            protected_counter += 1
-        
-        # Handle standard citation format [1], [2], etc.
-        for numeric_id, jump_url in numeric_citation_map.items():
-            # Replace citations with links
-            processed_text = processed_text.replace(f"[{numeric_id}]", f"[{numeric_id}]({jump_url})")
-        
-        # Handle citation ranges like [1-5]
-        range_pattern = r'\[(\d+)-(\d+)\]'
-        for match in re.finditer(range_pattern, processed_text):
-            start_num = int(match.group(1))
-            end_num = int(match.group(2))
-            
-            replacement = ""
-            for i in range(start_num, end_num + 1):
-                numeric_id = str(i)
-                if numeric_id in numeric_citation_map:
-                    if replacement:
-                        replacement += ", "
-                    replacement += f"[{numeric_id}]({numeric_citation_map[numeric_id]})"
-                    
-            if replacement:
-                processed_text = processed_text.replace(match.group(0), replacement, 1)
-        
-        # Handle grouped citations like [1, 2, 3]
-        grouped_pattern = r'\[(\d+(?:,\s*\d+)+)\]'
-        for match in re.finditer(grouped_pattern, processed_text):
-            citation_group = match.group(1)
-            citation_ids = [c.strip() for c in citation_group.split(',')]
-            
-            replacement = ""
-            for numeric_id in citation_ids:
-                if numeric_id in numeric_citation_map:
-                    if replacement:
-                        replacement += ", "
-                    replacement += f"[{numeric_id}]({numeric_citation_map[numeric_id]})"
-                    
-            if replacement:
-                processed_text = processed_text.replace(match.group(0), replacement, 1)
-        
-        # Restore protected citations
-        for placeholder, original in protected_citations.items():
-            processed_text = processed_text.replace(placeholder, original)
-        
-        return processed_text
+        return rewrite_citations(text, citation_map)
 
     def _split_long_response(self, text: str) -> Dict[str, Any]:
         """Split a long response text into multiple parts for Discord embeds
@@ -1040,3 +1476,20 @@ MESSAGES TO ANALYZE:
             "main_part": parts[0],
             "continuation_parts": parts[1:]
         }
+
+
+_shared_service: Optional[SummarizerService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_summarizer_service() -> SummarizerService:
+    """Return the process-wide SummarizerService
+
+    The Discord cog and the Flask API share one instance so they share the summary
+    cache and its counters.
+    """
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = SummarizerService()
+        return _shared_service
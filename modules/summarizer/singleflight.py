@@ -0,0 +1,100 @@
+"""
+Single-flight coalescing for concurrent summarizer requests.
+
+When several members run ``/summarize`` on the same channel at nearly the same
+moment, only the first request walks the history and calls Gemini. Requests
+with the same key that arrive while it is still running await the same task
+and share its result (or its exception). Nothing is cached once the task
+finishes; that is the summary cache's job.
+
+Each caller can pass a progress listener. The shared task reports progress
+(status lines, streamed text) through ``publish``, which forwards it to the
+listeners of every caller currently waiting on the key, so a request that
+joins late still sees the rest of the progress.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs at most one in-flight task per key and lets concurrent callers share it"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._listeners: Dict[Hashable, List[Callable[..., Awaitable[None]]]] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a task for key is currently running"""
+        return key in self._in_flight
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]],
+                 listener: Optional[Callable[..., Awaitable[None]]] = None) -> Tuple[Any, bool]:
+        """
+        Run func for key, or join the task already running for it.
+
+        The shared task is shielded, so a caller that is cancelled (for example
+        because its interaction expired) doesn't cancel it for the others.
+
+        Args:
+            key: Identifies identical requests
+            func: Coroutine function that does the work
+            listener: Receives what the task publishes for key while this caller waits
+
+        Returns:
+            Tuple of (result, shared) where shared is True if the result came from
+            another caller's task
+        """
+        if listener is not None:
+            self._listeners.setdefault(key, []).append(listener)
+        try:
+            task = self._in_flight.get(key)
+            if task is not None:
+                self.coalesced += 1
+                logger.info(f"Joining in-flight request {key}")
+                return await asyncio.shield(task), True
+
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+            return await asyncio.shield(task), False
+        finally:
+            if listener is not None:
+                self._remove_listener(key, listener)
+
+    async def publish(self, key: Hashable, *args: Any) -> None:
+        """Send progress to every caller waiting on key; a failing listener doesn't stop the others"""
+        for listener in list(self._listeners.get(key, ())):
+            try:
+                await listener(*args)
+            except Exception as e:
+                logger.warning(f"Progress listener for request {key} failed: {e}")
+
+    def _remove_listener(self, key: Hashable, listener: Callable[..., Awaitable[None]]) -> None:
+        listeners = self._listeners.get(key)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+            if not listeners:
+                del self._listeners[key]
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Forget a finished task and mark its exception as retrieved"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"In-flight request {key} failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,155 @@
+"""
+Result cache for generated summaries.
+
+Entries live in an in-memory LRU cache with a TTL and, optionally, in a SQLite
+table so they survive restarts. Keys are built by SummarizerService from the
+channel, the normalized time window, the highest message ID in the window and
+the prompt version, so a new message or a prompt change never serves a stale
+summary.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import select, delete
+from sqlalchemy.orm import sessionmaker
+
+from modules.summarizer.models import SummaryCacheEntry
+from modules.summarizer.utils import create_store_engine
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAXSIZE = 256
+DEFAULT_CACHE_TTL_SECONDS = 3600
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash the key components into a fixed-length string usable as a primary key"""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Two-tier (memory, optional SQLite) cache for summary results with hit/miss counters.
+
+    The disk tier is enabled by passing ``disk_url`` or setting
+    ``SUMMARIZER_CACHE_DB_URL``. Disk lookups block, so async callers should go
+    through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_MAXSIZE, ttl: int = DEFAULT_CACHE_TTL_SECONDS, disk_url: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.disk_url = disk_url or os.environ.get("SUMMARIZER_CACHE_DB_URL")
+        self.SessionLocal = None
+        if self.disk_url:
+            try:
+                self._setup_disk_tier()
+            except Exception as e:
+                logger.error(f"Failed to set up summary cache disk tier, using memory only: {e}")
+                self.SessionLocal = None
+
+    def _setup_disk_tier(self):
+        """Create the engine and table for the on-disk tier"""
+        self.engine = create_store_engine(self.disk_url)
+        SummaryCacheEntry.__table__.create(self.engine, checkfirst=True)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        logger.info(f"Summary cache disk tier ready at {self.disk_url}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result for key, or None on a miss"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self.memory_hits += 1
+                return dict(value)
+
+        value = self._get_from_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            # Promote to memory so the next lookup skips the database
+            self._memory[key] = value
+        return dict(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result in both tiers"""
+        with self._lock:
+            self._memory[key] = dict(value)
+
+        if not self.SessionLocal:
+            return
+        try:
+            now = datetime.utcnow()
+            with self.SessionLocal() as db:
+                # Prune expired rows while we're writing anyway
+                db.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.expires_at <= now))
+                db.merge(SummaryCacheEntry(
+                    cache_key=key,
+                    payload=json.dumps(value),
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl)
+                ))
+                db.commit()
+        except Exception as e:
+            logger.error(f"Failed to write summary cache entry to disk: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers (counters are kept)"""
+        with self._lock:
+            self._memory.clear()
+        if self.SessionLocal:
+            with self.SessionLocal() as db:
+                db.execute(delete(SummaryCacheEntry))
+                db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizes for monitoring"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._memory),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "disk_enabled": self.SessionLocal is not None
+            }
+
+    def _get_from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an unexpired entry in the disk tier"""
+        if not self.SessionLocal:
+            return None
+        try:
+            with self.SessionLocal() as db:
+                payload = db.execute(
+                    select(SummaryCacheEntry.payload).where(
+                        SummaryCacheEntry.cache_key == key,
+                        SummaryCacheEntry.expires_at > datetime.utcnow()
+                    )
+                ).scalar()
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.error(f"Failed to read summary cache entry from disk: {e}")
+            return None
@@ -7,14 +7,31 @@ Each parser is responsible for recognizing and parsing a specific type of time e
 
 import re
 import logging
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Tuple, Optional, Union, Any
+from typing import Dict, List, Tuple, Optional, Union, Any, FrozenSet
+
+from cachetools import LRUCache
 
 # Get logger
 logger = logging.getLogger(__name__)
 
+WEEKDAY_KEYWORDS = frozenset({"monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"})
+MONTH_KEYWORDS = frozenset({
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december"
+})
+
 class TimeParserBase:
     """Base class for all time parsers."""
+
+    # Tokens (see TimeExpressionDispatcher) of which at least one must appear in the
+    # text for can_parse to succeed. None means the parser is tried for any text.
+    dispatch_keywords: Optional[FrozenSet[str]] = None
+
+    # True when parse_date_range only depends on the day of the reference date,
+    # so its results can be memoized per (text, day)
+    day_aligned = False
     
     def can_parse(self, text: str) -> bool:
         """
@@ -60,6 +77,9 @@ class TimeParserBase:
 
 class CalendarExpressionParser(TimeParserBase):
     """Parser for common calendar expressions like 'today', 'yesterday', 'this week', etc."""
+
+    dispatch_keywords = frozenset({"today", "yesterday", "week", "month", "year"})
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with predefined expressions."""
@@ -111,6 +131,8 @@ class CalendarExpressionParser(TimeParserBase):
 
 class DurationFormatParser(TimeParserBase):
     """Parser for duration formats like '24h', '3d', '1w'."""
+
+    dispatch_keywords = frozenset({"<duration>"})
     
     def __init__(self):
         """Initialize parser."""
@@ -158,6 +180,9 @@ class DurationFormatParser(TimeParserBase):
 
 class MonthNameParser(TimeParserBase):
     """Parser for expressions like 'January', 'February', etc. (without 'last' prefix)"""
+
+    dispatch_keywords = MONTH_KEYWORDS
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with month names."""
@@ -166,6 +191,13 @@ class MonthNameParser(TimeParserBase):
             "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12
         }
         self.pattern = re.compile(r'^(' + '|'.join(self.month_names.keys()) + ')$')
+        # (month, bare month pattern, 'last month' pattern) for extraction from longer text
+        self.extract_patterns = [
+            (month_name,
+             re.compile(r'\b' + re.escape(month_name) + r'\b'),
+             re.compile(r'\blast\s+' + re.escape(month_name) + r'\b'))
+            for month_name in self.month_names
+        ]
     
     def can_parse(self, text: str) -> bool:
         """Check if text matches a month name without 'last'."""
@@ -209,15 +241,18 @@ class MonthNameParser(TimeParserBase):
     def extract_timeframe(self, text: str) -> Optional[str]:
         """Extract month name expressions from text."""
         text_lower = text.lower()
-        for month_name in self.month_names.keys():
+        for month_name, month_pattern, last_month_pattern in self.extract_patterns:
             # Make sure it's not preceded by 'last' (that would be handled by LastMonthNameParser)
-            if re.search(r'\b' + re.escape(month_name) + r'\b', text_lower) and not re.search(r'\blast\s+' + re.escape(month_name) + r'\b', text_lower):
+            if month_pattern.search(text_lower) and not last_month_pattern.search(text_lower):
                 return month_name
         return None
 
 
 class LastMonthNameParser(TimeParserBase):
     """Parser for expressions like 'last January', 'last February', etc."""
+
+    dispatch_keywords = MONTH_KEYWORDS
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with month names."""
@@ -277,6 +312,9 @@ class LastMonthNameParser(TimeParserBase):
 
 class WeekdayNameParser(TimeParserBase):
     """Parser for bare weekday names like 'Monday', 'Friday', etc. (without prefixes)"""
+
+    dispatch_keywords = WEEKDAY_KEYWORDS
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with weekday names."""
@@ -285,6 +323,13 @@ class WeekdayNameParser(TimeParserBase):
             "friday": 4, "saturday": 5, "sunday": 6
         }
         self.pattern = re.compile(r'^(' + '|'.join(self.weekday_names.keys()) + ')$')
+        # (weekday, bare weekday pattern, prefixed weekday pattern) for extraction from longer text
+        self.extract_patterns = [
+            (weekday,
+             re.compile(r'\b' + re.escape(weekday) + r'\b'),
+             re.compile(r'\b(last|previous|this)\s+' + re.escape(weekday) + r'\b'))
+            for weekday in self.weekday_names
+        ]
     
     def can_parse(self, text: str) -> bool:
         """Check if text matches a bare weekday name."""
@@ -331,16 +376,19 @@ class WeekdayNameParser(TimeParserBase):
     def extract_timeframe(self, text: str) -> Optional[str]:
         """Extract bare weekday expressions from text."""
         text_lower = text.lower()
-        for weekday in self.weekday_names.keys():
+        for weekday, weekday_pattern, prefixed_pattern in self.extract_patterns:
             # Make sure it's not preceded by 'last', 'previous', or 'this'
             # This ensures we don't conflict with RelativeWeekdayParser
-            if re.search(r'\b' + re.escape(weekday) + r'\b', text_lower) and not re.search(r'\b(last|previous|this)\s+' + re.escape(weekday) + r'\b', text_lower):
+            if weekday_pattern.search(text_lower) and not prefixed_pattern.search(text_lower):
                 return weekday
         return None
 
 
 class RelativeWeekdayParser(TimeParserBase):
     """Parser for expressions like 'last Monday', 'previous Friday', 'this Tuesday', etc."""
+
+    dispatch_keywords = WEEKDAY_KEYWORDS
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with weekday names."""
@@ -415,6 +463,8 @@ class RelativeWeekdayParser(TimeParserBase):
 
 class AgoExpressionParser(TimeParserBase):
     """Parser for expressions like '3 days ago', 'a week ago', 'two months ago', etc."""
+
+    dispatch_keywords = frozenset({"ago"})
     
     def __init__(self):
         """Initialize parser with number words and ago patterns."""
@@ -542,6 +592,8 @@ class AgoExpressionParser(TimeParserBase):
 
 class PastExpressionParser(TimeParserBase):
     """Parser for expressions like 'past week', 'past month', etc."""
+
+    dispatch_keywords = frozenset({"past"})
     
     def __init__(self):
         """Initialize parser with past expressions mapping."""
@@ -626,6 +678,9 @@ class DefaultParser(TimeParserBase):
 
 class WeekdayRangeParser(TimeParserBase):
     """Parser for expressions like 'Monday to Friday', 'from Wednesday to Friday', etc."""
+
+    # Not day-aligned: same-day ranges depend on whether the reference time is before noon
+    dispatch_keywords = WEEKDAY_KEYWORDS
     
     def __init__(self):
         """Initialize parser with weekday names."""
@@ -637,6 +692,11 @@ class WeekdayRangeParser(TimeParserBase):
             r'^(?:from\s+)?(?:last\s+)?(' + '|'.join(self.weekday_names.keys()) + 
             r')\s+(?:to|through|until|and|-)\s+(?:last\s+)?(' + '|'.join(self.weekday_names.keys()) + r')$'
         )
+        # Same pattern with possible extra context, for extraction
+        self.extract_pattern = re.compile(
+            r'(?:from\s+)?(?:last\s+)?(' + '|'.join(self.weekday_names.keys()) +
+            r')\s+(?:to|through|until|and|-)\s+(?:last\s+)?(' + '|'.join(self.weekday_names.keys()) + r')'
+        )
     
     def can_parse(self, text: str) -> bool:
         """Check if text matches weekday range pattern."""
@@ -725,8 +785,7 @@ class WeekdayRangeParser(TimeParserBase):
         text_lower = text.lower()
         
         # Match pattern with possible extra context
-        weekday_range_pattern = r'(?:from\s+)?(?:last\s+)?(' + '|'.join(self.weekday_names.keys()) + r')\s+(?:to|through|until|and|-)\s+(?:last\s+)?(' + '|'.join(self.weekday_names.keys()) + r')'
-        match = re.search(weekday_range_pattern, text_lower)
+        match = self.extract_pattern.search(text_lower)
         
         if match:
             start_weekday, end_weekday = match.groups()
@@ -743,6 +802,9 @@ class WeekdayRangeParser(TimeParserBase):
 
 class MonthRangeParser(TimeParserBase):
     """Parser for expressions like 'January to March', 'from last December to February', etc."""
+
+    dispatch_keywords = MONTH_KEYWORDS
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with month names."""
@@ -755,6 +817,11 @@ class MonthRangeParser(TimeParserBase):
             r'^(?:from\s+)?(?:last\s+)?(' + '|'.join(self.month_names.keys()) + 
             r')\s+(?:to|through|until|and|-)\s+(?:last\s+)?(' + '|'.join(self.month_names.keys()) + r')$'
         )
+        # Same pattern with possible extra context, for extraction
+        self.extract_pattern = re.compile(
+            r'(?:from\s+)?(?:last\s+)?(' + '|'.join(self.month_names.keys()) +
+            r')\s+(?:to|through|until|and|-)\s+(?:last\s+)?(' + '|'.join(self.month_names.keys()) + r')'
+        )
         # Store the current timeframe for reference
         self._current_timeframe = None
     
@@ -879,8 +946,7 @@ class MonthRangeParser(TimeParserBase):
         text_lower = text.lower()
         
         # Match pattern with possible extra context
-        month_range_pattern = r'(?:from\s+)?(?:last\s+)?(' + '|'.join(self.month_names.keys()) + r')\s+(?:to|through|until|and|-)\s+(?:last\s+)?(' + '|'.join(self.month_names.keys()) + r')'
-        match = re.search(month_range_pattern, text_lower)
+        match = self.extract_pattern.search(text_lower)
         
         if match:
             start_month, end_month = match.groups()
@@ -897,10 +963,15 @@ class MonthRangeParser(TimeParserBase):
 
 class ExplicitDateParser(TimeParserBase):
     """Parser for explicit date formats like 'from 2023-01-01 to 2023-01-31'."""
+
+    dispatch_keywords = frozenset({"<date>"})
+    day_aligned = True
     
     def __init__(self):
         """Initialize parser with date patterns."""
         self.date_pattern = re.compile(r'^(?:from\s+)?(\d{4}-\d{2}-\d{2})\s+(?:to|through|until|and|-)\s+(\d{4}-\d{2}-\d{2})$')
+        # Same pattern with possible extra context, for extraction
+        self.extract_pattern = re.compile(r'(?:from\s+)?(\d{4}-\d{2}-\d{2})\s+(?:to|through|until|and|-)\s+(\d{4}-\d{2}-\d{2})')
     
     def can_parse(self, text: str) -> bool:
         """Check if text matches explicit date range pattern."""
@@ -937,8 +1008,7 @@ class ExplicitDateParser(TimeParserBase):
         text_lower = text.lower()
         
         # Match pattern with possible extra context
-        date_range_pattern = r'(?:from\s+)?(\d{4}-\d{2}-\d{2})\s+(?:to|through|until|and|-)\s+(\d{4}-\d{2}-\d{2})'
-        match = re.search(date_range_pattern, text_lower)
+        match = self.extract_pattern.search(text_lower)
         
         if match:
             start_date, end_date = match.groups()
@@ -969,4 +1039,92 @@ def get_parser_registry() -> List[TimeParserBase]:
         PastExpressionParser(),  # Add this before the default parser
         # The default parser should always be last
         DefaultParser()
-    ]
\ No newline at end of file
+    ]
+
+# Tokens the dispatcher routes on: dates, duration formats and numbers are
+# reported as <date>, <duration> and <number>, words as themselves
+_DISPATCH_TOKEN_RE = re.compile(
+    r'(?P<date>\d{4}-\d{2}-\d{2})'
+    r'|(?P<duration>\d+[hdw])(?![a-z])'
+    r'|(?P<number>\d+)'
+    r'|(?P<word>[a-z]+)'
+)
+
+DEFAULT_DISPATCH_CACHE_SIZE = 1024
+
+
+class TimeExpressionDispatcher:
+    """
+    Routes time expressions straight to the parsers that can handle them.
+
+    The keyword index is built once from each parser's ``dispatch_keywords``:
+    the text is tokenized with a single compiled regex and only parsers whose
+    keywords appear are tried, still in registry order. Results from
+    ``day_aligned`` parsers are memoized in an LRU cache keyed by the text and
+    the day of the reference date.
+    """
+
+    def __init__(self, parsers: List[TimeParserBase], cache_size: int = DEFAULT_DISPATCH_CACHE_SIZE):
+        self.parsers = list(parsers)
+        self._always_tried: List[int] = []
+        self._keyword_index: Dict[str, List[int]] = {}
+        for position, parser in enumerate(self.parsers):
+            if parser.dispatch_keywords is None:
+                self._always_tried.append(position)
+                continue
+            for keyword in parser.dispatch_keywords:
+                self._keyword_index.setdefault(keyword, []).append(position)
+
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def candidates(self, text: str) -> List[TimeParserBase]:
+        """Return the parsers that may be able to parse text, in registry order"""
+        positions = set(self._always_tried)
+        for match in _DISPATCH_TOKEN_RE.finditer(text.lower()):
+            kind = match.lastgroup
+            token = match.group(0) if kind == 'word' else f"<{kind}>"
+            positions.update(self._keyword_index.get(token, ()))
+        return [self.parsers[position] for position in sorted(positions)]
+
+    def parse_date_range(self, text: str, reference_date: datetime) -> Optional[Tuple[datetime, Optional[datetime], str]]:
+        """
+        Parse text with the first candidate parser that succeeds.
+
+        Args:
+            text: Cleaned time expression
+            reference_date: Timezone-aware reference date
+
+        Returns:
+            The parser's (start_time, end_time, display_range), or None if no parser matched
+        """
+        cache_key = (text, reference_date.date())
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        for parser in self.candidates(text):
+            if parser.can_parse(text):
+                result = parser.parse_date_range(text, reference_date)
+                if result:
+                    logger.info(f"Parsed '{text}' using {parser.__class__.__name__}")
+                    if parser.day_aligned:
+                        with self._lock:
+                            self._cache[cache_key] = result
+                    return result
+        return None
+
+    def clear_cache(self) -> None:
+        """Drop all memoized results (counters are kept)"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Memo hit/miss counters"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "maxsize": self._cache.maxsize}
@@ -0,0 +1,100 @@
+"""
+Helper functions shared by the summarizer service and its Discord cog.
+
+Discord message IDs are snowflakes: the upper 42 bits hold the number of
+milliseconds since the Discord epoch, so a snowflake can be derived from a
+datetime (and vice versa) without touching the API.
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+# First second of 2015, the epoch Discord snowflakes are measured from (in ms)
+DISCORD_EPOCH = 1420070400000
+
+
+def datetime_to_snowflake(dt: datetime, high: bool = False) -> int:
+    """Convert a datetime into the smallest (or largest) snowflake for that millisecond.
+
+    Mirrors ``discord.utils.time_snowflake`` so window bounds computed here line up
+    with the ones py-cord uses when ``channel.history`` is given datetimes.
+
+    Args:
+        dt: The datetime to convert. Naive datetimes are treated as UTC.
+        high: If True, set the lower 22 bits so the snowflake sorts after every
+              message created in that millisecond.
+
+    Returns:
+        Integer snowflake
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    discord_millis = int(dt.timestamp() * 1000 - DISCORD_EPOCH)
+    return (discord_millis << 22) + (2 ** 22 - 1 if high else 0)
+
+
+def snowflake_to_datetime(snowflake: int) -> datetime:
+    """Return the (timezone-aware, UTC) creation time encoded in a snowflake"""
+    timestamp = ((int(snowflake) >> 22) + DISCORD_EPOCH) / 1000
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def split_snowflake_range(after_id: int, before_id: int, parts: int, min_span_ms: int = 0) -> List[Tuple[int, int]]:
+    """Split an exclusive snowflake range into consecutive exclusive sub-ranges of equal duration.
+
+    Every snowflake in (after_id, before_id) falls in exactly one sub-range, and the
+    sub-ranges are returned oldest first, so fetching them separately and concatenating
+    the results keeps messages in order.
+
+    Args:
+        after_id: Exclusive lower bound
+        before_id: Exclusive upper bound
+        parts: Maximum number of sub-ranges
+        min_span_ms: Sub-ranges are never shorter than this many milliseconds
+
+    Returns:
+        List of (after_id, before_id) pairs
+    """
+    start_ms = after_id >> 22
+    span_ms = (before_id >> 22) - start_ms
+    if min_span_ms > 0:
+        parts = min(parts, span_ms // min_span_ms)
+    if parts <= 1 or span_ms < parts * 2:
+        return [(after_id, before_id)]
+
+    ranges = []
+    lower = after_id
+    for i in range(1, parts):
+        boundary = (start_ms + span_ms * i // parts) << 22
+        ranges.append((lower, boundary))
+        # The next sub-range starts with the boundary snowflake itself
+        lower = boundary - 1
+    ranges.append((lower, before_id))
+    return ranges
+
+
+def build_jump_url(guild_id, channel_id, message_id) -> str:
+    """Build the Discord jump URL for a message without needing the message object"""
+    return f"https://discord.com/channels/{guild_id}/{channel_id}/{message_id}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budgeting prompts (~4 characters per token for English chat)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def create_store_engine(db_url: str) -> Engine:
+    """Engine for one of the summarizer's stores.
+
+    Creates the directory of a file-based SQLite database first, and lets
+    connections be used from the threads ``asyncio.to_thread`` runs store calls on.
+    """
+    if db_url.startswith("sqlite:///"):
+        db_dir = os.path.dirname(os.path.normpath(db_url[10:]))
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+    return create_engine(db_url, connect_args={"check_same_thread": False})
@@ -58,7 +58,7 @@ class DBConnect:
                 # Import all models to register them with Base
                 from modules.points.models import User, Points
                 from modules.ocp.models import Officer, OfficerPoints
-                from modules.calendar.models import CalendarEventLink
+                from modules.calendar.models import CalendarEventLink, CalendarSyncState, NotionEventSnapshot, GoogleCalendarSyncState, GoogleEventMirror
                 from modules.bot.models import JeopardyGame, ActiveGame
                 from modules.merch.models import Product, Order, OrderItem
                 from modules.organizations.models import Organization, OrganizationConfig, Officer as OrgOfficer
@@ -53,6 +53,8 @@ class UnifiedSyncService:
                 "total_events_processed": 0,
                 "calendar_events_created": 0,
                 "calendar_events_updated": 0,
+                "calendar_events_unchanged": 0,
+                "calendar_events_deleted": 0,
                 "ocp_points_added": 0,
                 "ocp_officers_added": 0
             }
@@ -84,18 +86,17 @@ class UnifiedSyncService:
                     
                     # Count events from organization results
                     total_events = 0
-                    created_events = 0
-                    updated_events = 0
                     
                     for org_result in calendar_result.get("organization_results", []):
                         events_processed = org_result.get("events_processed", 0)
                         total_events += events_processed
-                        # Note: We can't easily distinguish created vs updated events per org
-                        # This is a limitation of the current implementation
                     
+                    event_counts = calendar_result.get("event_counts", {})
                     result["summary"]["total_events_processed"] = total_events
-                    result["summary"]["calendar_events_created"] = created_events
-                    result["summary"]["calendar_events_updated"] = updated_events
+                    result["summary"]["calendar_events_created"] = event_counts.get("created", 0)
+                    result["summary"]["calendar_events_updated"] = event_counts.get("updated", 0)
+                    result["summary"]["calendar_events_unchanged"] = event_counts.get("unchanged", 0)
+                    result["summary"]["calendar_events_deleted"] = event_counts.get("deleted", 0)
                     
                     calendar_span.set_data("calendar_sync_success", True)
                     calendar_span.set_data("organizations_processed", organizations_processed)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the summarizer's citation rewriter.
+
+Compares the single-pass tokenizer (modules/summarizer/citations.py) against
+the multi-pass regex pipeline it replaced, on synthetic model output for
+windows of increasing size, and checks that both produce identical output.
+
+Usage:
+    python scripts/benchmark_citations.py
+    python scripts/benchmark_citations.py --messages 500 3000 10000 --repeat 5
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+import timeit
+from typing import Dict
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.summarizer.citations import rewrite_citations
+
+
+# Multi-pass implementation that rewrite_citations replaced, kept as the baseline
+# (and as the reference for output equivalence)
+def parse_citations_multipass(text: str, citation_map: Dict[str, str]) -> str:
+    """Parse and format citations in the summary text.
+    
+    This method transforms citation references in the text into clickable
+    Discord message links. It handles several citation formats:
+    
+    1. Standard citations: [c1], [c2], etc. → converted to [1], [2], etc.
+    2. Range citations: [c1-c5] → converted to [1-5]
+    3. Grouped citations: [c1, c2, c3] → converted to [1, 2, 3]
+    4. Complex mixed formats: [c1-c3, c5, c10] → combination of ranges and individual citations
+    5. Complex formats like [c723-c741, c765] or [c178, c185-c208] → combination of ranges and individual citations
+    
+    Args:
+        text: The summary or answer text containing citation references
+        citation_map: Dictionary mapping citation IDs to Discord message URLs
+        
+    Returns:
+        Formatted text with clickable Discord citation links
+    """
+    processed_text = text
+    
+    # Create a new map with numeric keys instead of 'c' prefixed keys
+    numeric_citation_map = {}
+    for citation_id, jump_url in citation_map.items():
+        if citation_id.startswith('c') and citation_id[1:].isdigit():
+            numeric_id = citation_id[1:]  # Remove the 'c' prefix
+            numeric_citation_map[numeric_id] = jump_url
+            
+    # First, fix nested brackets that might appear like [[c1]] or [[[c1]]]
+    processed_text = re.sub(r'\[\[\s*c(\d+)\s*\]\]', r'[c\1]', processed_text)
+    processed_text = re.sub(r'\[\[\[\s*c(\d+)\s*\]\]\]', r'[c\1]', processed_text)
+    
+    # Handle complex mixed citations [c#-c#, c#, c#-c#, ...] first
+    # This pattern matches citations with ranges and commas inside brackets
+    complex_pattern = r'\[((?:c\d+(?:-c\d+)?(?:,\s*)?)+)\]'
+    for match in re.finditer(complex_pattern, processed_text):
+        citation_content = match.group(1)
+        
+        # Skip if this is a simple citation (no commas or ranges)
+        if ',' not in citation_content and '-' not in citation_content:
+            continue
+            
+        # If we have a complex citation with commas or ranges, process it
+        # Replace the entire bracket content with processed citations
+        original_citation = match.group(0)  # The full citation with brackets
+        
+        # First remove the 'c' prefix from all numbers
+        simplified_content = re.sub(r'c(\d+)', r'\1', citation_content)
+        
+        # Split by commas to get individual citations or ranges
+        citation_parts = [part.strip() for part in simplified_content.split(',')]
+        replacement_parts = []
+        
+        for part in citation_parts:
+            if '-' in part:
+                # This is a range citation like '1-5'
+                start_num, end_num = map(int, part.split('-'))
+                for i in range(start_num, end_num + 1):
+                    numeric_id = str(i)
+                    c_id = f'c{numeric_id}'
+                    if c_id in citation_map:
+                        replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
+                    else:
+                        replacement_parts.append(f"[{numeric_id}]")
+            else:
+                # This is a single citation like '1'
+                numeric_id = part
+                c_id = f'c{numeric_id}'
+                if c_id in citation_map:
+                    replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
+                else:
+                    replacement_parts.append(f"[{numeric_id}]")
+        
+        # Join all parts with commas and replace the original citation
+        replacement = ", ".join(replacement_parts)
+        processed_text = processed_text.replace(original_citation, replacement, 1)
+    
+    # Process remaining standard citations
+    # Convert [c#] citations to [#]
+    processed_text = re.sub(r'\[c(\d+)\]', r'[\1]', processed_text)
+    
+    # Convert remaining [c#-c#] range citations to [#-#]
+    range_pattern = r'\[c(\d+)-c(\d+)\]'
+    for match in re.finditer(range_pattern, processed_text):
+        start_num = int(match.group(1))
+        end_num = int(match.group(2))
+        replacement_parts = []
+        
+        for i in range(start_num, end_num + 1):
+            numeric_id = str(i)
+            c_id = f'c{numeric_id}'
+            if c_id in citation_map:
+                replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
+            else:
+                replacement_parts.append(f"[{numeric_id}]")
+                
+        replacement = ", ".join(replacement_parts)
+        processed_text = processed_text.replace(match.group(0), replacement, 1)
+    
+    # Convert remaining grouped citations like [c1, c2, c3] to [1, 2, 3]
+    # First capture the content inside brackets
+    grouped_pattern = r'\[(c\d+(?:,\s*c\d+)+)\]'
+    for match in re.finditer(grouped_pattern, processed_text):
+        citation_group = match.group(1)
+        # Remove 'c' prefix from each number
+        citation_ids = re.findall(r'c(\d+)', citation_group)
+        replacement_parts = []
+        
+        for numeric_id in citation_ids:
+            c_id = f'c{numeric_id}'
+            if c_id in citation_map:
+                replacement_parts.append(f"[{numeric_id}]({citation_map[c_id]})")
+            else:
+                replacement_parts.append(f"[{numeric_id}]")
+                
+        replacement = ", ".join(replacement_parts)
+        processed_text = processed_text.replace(match.group(0), replacement, 1)
+    
+    # Identify already processed citations to protect them
+    protected_citations = {}
+    protected_counter = 0
+    
+    # Find and protect already processed citations with format [#](url)
+    already_processed_pattern = r'\[\d+\]\([^)]+\)'
+    for match in re.finditer(already_processed_pattern, processed_text):
+        placeholder = f"__PROTECTED_CITATION_{protected_counter}__"
+        protected_citations[placeholder] = match.group(0)
+        processed_text = processed_text.replace(match.group(0), placeholder, 1)
+        protected_counter += 1
+    
+    # Handle standard citation format [1], [2], etc.
+    for numeric_id, jump_url in numeric_citation_map.items():
+        # Replace citations with links
+        processed_text = processed_text.replace(f"[{numeric_id}]", f"[{numeric_id}]({jump_url})")
+    
+    # Handle citation ranges like [1-5]
+    range_pattern = r'\[(\d+)-(\d+)\]'
+    for match in re.finditer(range_pattern, processed_text):
+        start_num = int(match.group(1))
+        end_num = int(match.group(2))
+        
+        replacement = ""
+        for i in range(start_num, end_num + 1):
+            numeric_id = str(i)
+            if numeric_id in numeric_citation_map:
+                if replacement:
+                    replacement += ", "
+                replacement += f"[{numeric_id}]({numeric_citation_map[numeric_id]})"
+                
+        if replacement:
+            processed_text = processed_text.replace(match.group(0), replacement, 1)
+    
+    # Handle grouped citations like [1, 2, 3]
+    grouped_pattern = r'\[(\d+(?:,\s*\d+)+)\]'
+    for match in re.finditer(grouped_pattern, processed_text):
+        citation_group = match.group(1)
+        citation_ids = [c.strip() for c in citation_group.split(',')]
+        
+        replacement = ""
+        for numeric_id in citation_ids:
+            if numeric_id in numeric_citation_map:
+                if replacement:
+                    replacement += ", "
+                replacement += f"[{numeric_id}]({numeric_citation_map[numeric_id]})"
+                
+        if replacement:
+            processed_text = processed_text.replace(match.group(0), replacement, 1)
+    
+    # Restore protected citations
+    for placeholder, original in protected_citations.items():
+        processed_text = processed_text.replace(placeholder, original)
+    
+    return processed_text
+
+
+def build_citation_map(message_count: int) -> Dict[str, str]:
+    """Citation map for a window of message_count messages"""
+    return {
+        f"c{i}": f"https://discord.com/channels/123456789012345678/234567890123456789/{345678901234567890 + i}"
+        for i in range(1, message_count + 1)
+    }
+
+
+def build_model_output(message_count: int, seed: int = 0) -> str:
+    """Synthetic summary text citing messages in every supported format.
+
+    Roughly one cited bullet per 10 messages, mixing single, nested, ranged,
+    grouped and numeric citations the way real model output does.
+    """
+    rng = random.Random(seed)
+    bullets = ["# Conversation Summary ✨", "## Key Takeaways"]
+
+    def cid():
+        return rng.randint(1, message_count)
+
+    for _ in range(max(1, message_count // 10)):
+        a, b = sorted((cid(), cid()))
+        b = min(b, a + 8)
+        citation = rng.choice([
+            f"[c{a}]",
+            f"[[c{a}]]",
+            f"[c{a}-c{b}]",
+            f"[c{a}, c{b}]",
+            f"[c{a}-c{b}, c{cid()}]",
+            f"[{a}]",
+            f"[{a}-{b}]",
+            f"[c{a}], [c{b}]",
+        ])
+        bullets.append(f"- **Someone:** discussed topic {rng.randint(1, 50)} in some detail {citation}")
+
+    return "\n".join(bullets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark citation rewriting")
+    parser.add_argument("--messages", type=int, nargs="+", default=[100, 1000, 3000],
+                        help="Window sizes (message counts) to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per size")
+    args = parser.parse_args()
+
+    print(f"{'messages':>9} {'text KB':>8} {'multi-pass ms':>14} {'single-pass ms':>15} {'speedup':>8}")
+    for message_count in args.messages:
+        citation_map = build_citation_map(message_count)
+        text = build_model_output(message_count)
+
+        expected = parse_citations_multipass(text, citation_map)
+        actual = rewrite_citations(text, citation_map)
+        if actual != expected:
+            print(f"❌ Output mismatch for {message_count} messages")
+            sys.exit(1)
+
+        legacy_time = min(timeit.repeat(lambda text=text, citation_map=citation_map: parse_citations_multipass(text, citation_map), number=1, repeat=args.repeat))
+        new_time = min(timeit.repeat(lambda text=text, citation_map=citation_map: rewrite_citations(text, citation_map), number=1, repeat=args.repeat))
+        print(f"{message_count:>9} {len(text) / 1024:>8.1f} {legacy_time * 1000:>14.2f} {new_time * 1000:>15.2f} {legacy_time / new_time:>7.1f}x")
+
+    print("✅ Outputs identical for all sizes")
+
+
+if __name__ == "__main__":
+    main()
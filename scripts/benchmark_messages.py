@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for summarization windows.
+
+Builds synthetic windows of Discord messages twice: as the nested message
+dictionaries the summarizer used to pass around (string IDs, author dict,
+formatted timestamp, full jump URL) and as slotted ``MessageRecord`` objects
+(modules/summarizer/message_record.py). For each it reports the memory the
+window holds (tracemalloc), sorting time, and the time to build the prompt
+conversation and link the citations of a typical summary, and checks that
+both produce the same prompt and links. Records build jump URLs only for the
+cited messages; the URL count shows how many were built.
+
+Usage:
+    python scripts/benchmark_messages.py
+    python scripts/benchmark_messages.py --messages 10000 100000 --repeat 3
+"""
+
+import os
+import sys
+import gc
+import random
+import argparse
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.summarizer.message_record import MessageRecord, TIMESTAMP_FORMAT
+from modules.summarizer.prompt_builder import build_conversation
+from modules.summarizer.citations import rewrite_citations
+from modules.summarizer.utils import datetime_to_snowflake, snowflake_to_datetime
+
+GUILD_ID = 762811961238618122
+CHANNEL_ID = 1087529391238615040
+AUTHORS = [(100000000000000000 + i, f"member{i}") for i in range(40)]
+WORDS = "the meeting notes deadline event budget sponsor room slides demo merge review".split()
+
+
+def synthetic_window(message_count: int, seed: int = 0) -> List[tuple]:
+    """(message_id, author_id, author_name, content) tuples, as a history walk would see them"""
+    rng = random.Random(seed)
+    start = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(message_count):
+        created = start + timedelta(seconds=i * 20 + rng.randint(0, 19))
+        author_id, author_name = rng.choice(AUTHORS)
+        content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 14)))
+        rows.append((datetime_to_snowflake(created) + i % 4096, author_id, author_name, content))
+    return rows
+
+
+def synthetic_summary(citation_count: int, seed: int = 0) -> str:
+    """Summary text citing about 40 citation IDs, single and as ranges, like model output"""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(20):
+        start = rng.randint(1, max(1, citation_count - 3))
+        points.append(f"- point [c{start}]" if rng.random() < 0.5 else f"- point [c{start}-c{start + 2}]")
+    return "# Conversation Summary ✨\n" + "\n".join(points)
+
+
+def summarize_window(messages: list, summary: str) -> tuple:
+    """Build the prompt conversation and link the summary's citations, as generate_summary does"""
+    conversation = build_conversation(messages)
+    return conversation, rewrite_citations(summary, conversation.citation_map)
+
+
+def as_dicts(rows: List[tuple]) -> List[Dict[str, Any]]:
+    """The message dictionary format"""
+    return [{
+        "id": str(message_id),
+        "content": content,
+        "author": {
+            "id": str(author_id),
+            "name": author_name
+        },
+        "timestamp": snowflake_to_datetime(message_id).strftime(TIMESTAMP_FORMAT),
+        "jump_url": f"https://discord.com/channels/{GUILD_ID}/{CHANNEL_ID}/{message_id}"
+    } for message_id, author_id, author_name, content in rows]
+
+
+def as_records(rows: List[tuple]) -> List[MessageRecord]:
+    return [MessageRecord(message_id, GUILD_ID, CHANNEL_ID, author_id, author_name, content)
+            for message_id, author_id, author_name, content in rows]
+
+
+def measure_memory(build: Callable[[List[tuple]], list], rows: List[tuple]) -> int:
+    """Bytes still allocated by a built window (the source tuples' strings are shared, as with py-cord objects)"""
+    gc.collect()
+    tracemalloc.start()
+    window = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del window
+    return current
+
+
+def run_benchmark(message_count: int, repeat: int = 3) -> Dict[str, Any]:
+    rows = synthetic_window(message_count)
+    dicts, records = as_dicts(rows), as_records(rows)
+
+    summary = synthetic_summary(message_count)
+    dict_conversation, dict_summary = summarize_window(dicts, summary)
+    record_conversation, record_summary = summarize_window(records, summary)
+    # Counted before the comparison below, which resolves every citation
+    record_urls_built = len(record_conversation.citation_map.resolved())
+    shuffled = list(range(message_count))
+    random.Random(1).shuffle(shuffled)
+
+    def timed(fn: Callable[[], Any]) -> float:
+        return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+    return {
+        "messages": message_count,
+        "identical": (dict_conversation.lines == record_conversation.lines
+                      and dict_summary == record_summary
+                      and dict_conversation.citation_map == record_conversation.citation_map),
+        "record_urls_built": record_urls_built,
+        "dict_bytes": measure_memory(as_dicts, rows),
+        "record_bytes": measure_memory(as_records, rows),
+        "dict_sort_ms": timed(lambda: sorted((dicts[i] for i in shuffled), key=lambda msg: msg["timestamp"])) * 1000,
+        "record_sort_ms": timed(lambda: sorted((records[i] for i in shuffled), key=lambda msg: msg.message_id)) * 1000,
+        "dict_prompt_ms": timed(lambda: summarize_window(dicts, summary)) * 1000,
+        "record_prompt_ms": timed(lambda: summarize_window(records, summary)) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark message window memory")
+    parser.add_argument("--messages", type=int, nargs="+", default=[10000, 100000],
+                        help="Window sizes (message counts) to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per size")
+    args = parser.parse_args()
+
+    print(f"{'messages':>9} {'dict MB':>8} {'record MB':>10} {'B/msg':>13} {'sort ms':>15} {'prompt+cite ms':>15} {'URLs built':>10}")
+    for message_count in args.messages:
+        result = run_benchmark(message_count, args.repeat)
+        if not result["identical"]:
+            print(f"❌ Prompt mismatch for {message_count} messages")
+            sys.exit(1)
+        print(f"{message_count:>9} "
+              f"{result['dict_bytes'] / 2 ** 20:>8.1f} {result['record_bytes'] / 2 ** 20:>10.1f} "
+              f"{result['dict_bytes'] // message_count:>6} → {result['record_bytes'] // message_count:<4} "
+              f"{result['dict_sort_ms']:>6.1f} → {result['record_sort_ms']:<6.1f} "
+              f"{result['dict_prompt_ms']:>6.0f} → {result['record_prompt_ms']:<6.0f} "
+              f"{result['record_urls_built']:>10}")
+
+    print("✅ Prompts identical for all sizes")
+
+
+if __name__ == "__main__":
+    main()
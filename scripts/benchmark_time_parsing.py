@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression gate for the summarizer's natural-language time parsing.
+
+Runs a corpus of real and generated phrases through
+SummarizerService.extract_timeframe_from_text and parse_date_range with a
+fixed reference date, and reports:
+
+- which parser (or fallback) handled each phrase, as hit rates
+- p50/p99 latency per call
+- how often the slow dateparser/timefhuman fallbacks are reached
+
+Results can be saved as a JSON baseline and compared against a later run, so a
+commit that slows parsing down or changes which parser handles a phrase shows
+up before it ships.
+
+Usage:
+    python scripts/benchmark_time_parsing.py
+    python scripts/benchmark_time_parsing.py --save benchmarks/time_parsing.json
+    python scripts/benchmark_time_parsing.py --compare benchmarks/time_parsing.json --tolerance 0.25
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import hashlib
+import argparse
+import platform
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Callable
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modules.summarizer.service as service_module
+from modules.summarizer.service import SummarizerService
+
+# Every run parses relative to the same moment so results are comparable
+REFERENCE_DATE = datetime(2025, 5, 15, 10, 30, tzinfo=timezone.utc)
+
+# Phrases taken from /summarize and /ask usage
+REAL_PHRASES = [
+    "24h", "3d", "1w", "7d", "48h", "today", "yesterday", "this week", "last week",
+    "this month", "last month", "past week", "past month", "the past week",
+    "last monday", "previous friday", "this tuesday", "monday", "friday",
+    "january", "last march", "last december", "may",
+    "monday to friday", "from last wednesday to friday", "friday to monday",
+    "january to march", "last december to february", "from may through july",
+    "from 2025-01-01 to 2025-01-31", "2024-12-01 until 2025-02-15",
+    "3 days ago", "a week ago", "two months ago", "1 year ago",
+    "What happened last week?",
+    "What did we decide about the hackathon on monday?",
+    "Summarize the discussion from the past 24 hours",
+    "what happened monday to wednesday",
+    "what happened last january to march",
+    "Who volunteered for the booth last friday?",
+    "Any updates on sponsorships since yesterday?",
+    "What was discussed this morning?",
+    "What did people say about the workshop two weeks ago?",
+    "recap of the officer meeting on tuesday",
+    "what happened in the last few days",
+    "catch me up on everything since the weekend",
+    "what did I miss",
+    "how does this system work?",
+    "Can you summarize the general channel?",
+    "what were the action items from the meeting",
+    "next tuesday",
+    "the week before last",
+]
+
+GENERATED_TEMPLATES = [
+    "{}",
+    "what happened {}?",
+    "summarize {}",
+    "what did we talk about {}",
+    "any news from {}",
+]
+
+GENERATED_EXPRESSIONS = [
+    "{n}h", "{n}d", "{n}w", "{n} days ago", "{n} weeks ago", "{word} months ago",
+    "last {weekday}", "previous {weekday}", "this {weekday}", "{weekday}",
+    "{weekday} to {weekday2}", "last {weekday} to {weekday2}",
+    "{month}", "last {month}", "{month} to {month2}", "last {month} to {month2}",
+    "past week", "past month", "past year", "past 7 days",
+    "this week", "last week", "this month", "last month", "yesterday", "today",
+    "the {month} meeting", "around {weekday} evening", "the morning of the {n}th",
+]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+NUMBER_WORDS = ["a", "two", "three", "six"]
+
+
+class FixedDatetime(datetime):
+    """datetime whose now() is the benchmark reference date"""
+
+    @classmethod
+    def now(cls, tz=None):
+        if tz is not None:
+            return REFERENCE_DATE.astimezone(tz)
+        return REFERENCE_DATE.replace(tzinfo=None)
+
+
+def build_corpus(generated_count: int, seed: int = 0) -> List[str]:
+    """Real phrases followed by generated_count phrases from the templates"""
+    rng = random.Random(seed)
+    corpus = list(REAL_PHRASES)
+    for _ in range(generated_count):
+        expression = rng.choice(GENERATED_EXPRESSIONS).format(
+            n=rng.randint(1, 30),
+            word=rng.choice(NUMBER_WORDS),
+            weekday=rng.choice(WEEKDAYS),
+            weekday2=rng.choice(WEEKDAYS),
+            month=rng.choice(MONTHS),
+            month2=rng.choice(MONTHS),
+        )
+        corpus.append(rng.choice(GENERATED_TEMPLATES).format(expression))
+    return corpus
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """p50/p99/mean/max of samples (seconds) in milliseconds"""
+    return {
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "max_ms": round(max(samples) * 1000, 4),
+    }
+
+
+def hit_rates(counter: Counter, total: int) -> Dict[str, Dict[str, float]]:
+    """Counts and rates per handler, most common first"""
+    return {
+        name: {"count": count, "rate": round(count / total, 4)}
+        for name, count in counter.most_common()
+    }
+
+
+def attribute_extraction(service: SummarizerService, corpus: List[str]) -> Dict[str, Any]:
+    """Record which parser or fallback extracts each phrase, and how often dateparser runs"""
+    handlers = Counter()
+    last_handler = {}
+
+    for parser in service.parser_registry:
+        def wrapped(text, _parser=parser, _original=parser.extract_timeframe):
+            result = _original(text)
+            if result and "name" not in last_handler:
+                last_handler["name"] = type(_parser).__name__
+            return result
+        parser.extract_timeframe = wrapped
+
+    dateparser_calls = 0
+    original_dateparser = service_module.dateparser
+
+    class CountingDateparser:
+        @staticmethod
+        def parse(*args, **kwargs):
+            nonlocal dateparser_calls
+            dateparser_calls += 1
+            return original_dateparser.parse(*args, **kwargs)
+
+    service_module.dateparser = CountingDateparser
+    outputs = []
+    try:
+        for text in corpus:
+            last_handler.clear()
+            calls_before = dateparser_calls
+            result = service.extract_timeframe_from_text(text)
+            outputs.append(result)
+            if result is None:
+                handlers["none"] += 1
+            elif "name" in last_handler:
+                handlers[last_handler["name"]] += 1
+            elif dateparser_calls > calls_before:
+                handlers["time_phrase_fallback"] += 1
+            else:
+                handlers["range_question"] += 1
+    finally:
+        service_module.dateparser = original_dateparser
+        for parser in service.parser_registry:
+            del parser.extract_timeframe
+
+    return {
+        "hits": hit_rates(handlers, len(corpus)),
+        "dateparser_calls": dateparser_calls,
+        "dateparser_rate": round(dateparser_calls / len(corpus), 4),
+        "output_digest": digest(outputs),
+    }
+
+
+def attribute_parsing(service: SummarizerService, phrases: List[str]) -> Dict[str, Any]:
+    """Record which parser handles each phrase, and how often timefhuman is reached"""
+    handlers = Counter()
+    last_handler = {}
+
+    for parser in service.parser_registry:
+        def wrapped(text, reference_date, _parser=parser, _original=parser.parse_date_range):
+            result = _original(text, reference_date)
+            if result:
+                last_handler["name"] = type(_parser).__name__
+            return result
+        parser.parse_date_range = wrapped
+
+    original_fallback = service._parse_with_timefhuman
+
+    def counting_fallback(text, reference_date=None):
+        last_handler["name"] = "timefhuman_fallback"
+        return original_fallback(text, reference_date)
+
+    service._parse_with_timefhuman = counting_fallback
+    outputs = []
+    try:
+        for text in phrases:
+            service.time_dispatcher.clear_cache()
+            last_handler.clear()
+            outputs.append(service.parse_date_range(text, REFERENCE_DATE))
+            handlers[last_handler.get("name", "none")] += 1
+    finally:
+        del service._parse_with_timefhuman
+        for parser in service.parser_registry:
+            del parser.parse_date_range
+
+    fallback_count = handlers.get("timefhuman_fallback", 0)
+    return {
+        "hits": hit_rates(handlers, len(phrases)),
+        "timefhuman_calls": fallback_count,
+        "timefhuman_rate": round(fallback_count / len(phrases), 4),
+        "output_digest": digest(outputs),
+    }
+
+
+def time_calls(call: Callable[[str], Any], phrases: List[str], repeat: int, before_each: Callable[[], None] = None) -> List[float]:
+    """Per-call wall time for every phrase, repeat times"""
+    samples = []
+    for _ in range(repeat):
+        for text in phrases:
+            if before_each:
+                before_each()
+            start = time.perf_counter()
+            call(text)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def digest(outputs: List[Any]) -> str:
+    """Short hash of the outputs, to spot behavior changes between runs"""
+    return hashlib.sha256(repr(outputs).encode("utf-8")).hexdigest()[:16]
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, if this is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_benchmark(generated_count: int, repeat: int, warm: bool) -> Dict[str, Any]:
+    """Attribute and time every phrase in the corpus"""
+    corpus = build_corpus(generated_count)
+    service = SummarizerService()
+
+    extraction = attribute_extraction(service, corpus)
+    # parse_date_range sees what extraction produced, like /summarize and /ask do
+    timeframes = [service.extract_timeframe_from_text(text) or text for text in corpus]
+    parsing = attribute_parsing(service, timeframes)
+
+    clear_memo = None if warm else service.time_dispatcher.clear_cache
+    extraction["latency"] = latency_summary(time_calls(service.extract_timeframe_from_text, corpus, repeat))
+    parsing["latency"] = latency_summary(time_calls(
+        lambda text: service.parse_date_range(text, REFERENCE_DATE), timeframes, repeat, clear_memo
+    ))
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "reference_date": REFERENCE_DATE.isoformat(),
+        "corpus_size": len(corpus),
+        "repeat": repeat,
+        "warm_memo": warm,
+        "extract_timeframe_from_text": extraction,
+        "parse_date_range": parsing,
+    }
+
+
+def print_report(results: Dict[str, Any]):
+    """Human-readable summary of one run"""
+    print(f"Commit {results['commit']} | {results['corpus_size']} phrases x {results['repeat']} | "
+          f"reference {results['reference_date']}")
+    for section, fallback_key in (("extract_timeframe_from_text", "dateparser"), ("parse_date_range", "timefhuman")):
+        data = results[section]
+        latency = data["latency"]
+        print(f"\n{section}")
+        print(f"  latency   p50 {latency['p50_ms']:.3f} ms | p99 {latency['p99_ms']:.3f} ms | "
+              f"mean {latency['mean_ms']:.3f} ms | max {latency['max_ms']:.3f} ms")
+        print(f"  {fallback_key} fallback: {data[fallback_key + '_calls']} calls "
+              f"({data[fallback_key + '_rate']:.1%} of phrases)")
+        for name, hit in data["hits"].items():
+            print(f"  {name:<28} {hit['count']:>6} {hit['rate']:>8.1%}")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of results against baseline; hit-rate changes are printed but don't fail"""
+    regressions = []
+    for section, fallback_rate in (("extract_timeframe_from_text", "dateparser_rate"), ("parse_date_range", "timefhuman_rate")):
+        current, previous = results[section], baseline[section]
+        for metric in ("p50_ms", "p99_ms"):
+            new, old = current["latency"][metric], previous["latency"][metric]
+            change = (new - old) / old if old else 0.0
+            print(f"  {section} {metric}: {old:.3f} -> {new:.3f} ms ({change:+.1%})")
+            if change > tolerance:
+                regressions.append(f"{section} {metric} regressed by {change:.1%}")
+        if current[fallback_rate] > previous[fallback_rate]:
+            regressions.append(f"{section} {fallback_rate} rose from {previous[fallback_rate]:.1%} to {current[fallback_rate]:.1%}")
+
+        if results["corpus_size"] == baseline["corpus_size"] and current["output_digest"] != previous["output_digest"]:
+            print(f"  ⚠️ {section} output changed for the same corpus")
+        for name in sorted(set(current["hits"]) | set(previous["hits"])):
+            new = current["hits"].get(name, {}).get("rate", 0.0)
+            old = previous["hits"].get(name, {}).get("rate", 0.0)
+            if new != old:
+                print(f"  {section} {name} hit rate: {old:.1%} -> {new:.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark natural-language time parsing")
+    parser.add_argument("--generated", type=int, default=500, help="Number of generated phrases added to the real ones")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions over the corpus")
+    parser.add_argument("--warm", action="store_true", help="Keep the parse memo between calls instead of timing cold parses")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative p50/p99 slowdown before --compare fails (default 0.25)")
+    args = parser.parse_args()
+
+    # Pin "now" inside the service so fallbacks parse relative to the reference date too
+    service_module.datetime = FixedDatetime
+    results = run_benchmark(args.generated, args.repeat, args.warm)
+    print_report(results)
+
+    if args.save:
+        save_dir = os.path.dirname(os.path.abspath(args.save))
+        os.makedirs(save_dir, exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nComparing against {args.compare} (commit {baseline.get('commit', 'unknown')})")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            for regression in regressions:
+                print(f"❌ {regression}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the summarizer.
+
+Replays synthetic Discord windows through ``SummarizerService.generate_summary``
+and ``answer_question``, with the model served by the local stand-in
+(scripts/standin_model_server.py). Every request goes through the full
+pipeline: prompt building and budgeting, retrieval, the instruction cache,
+the Gemini scheduler, retries, streaming and citation rewriting. The test
+reports throughput, p50/p95/p99 latency per request type, and how many
+requests were rate limited, rejected or failed.
+
+The stand-in runs in-process unless ``--url`` points at a running one.
+``--time-scale`` shrinks every model delay, for quick runs.
+
+Usage:
+    python scripts/load_test_summarizer.py
+    python scripts/load_test_summarizer.py --requests 500 --concurrency 50 --ask-ratio 0.3 --stream
+    python scripts/load_test_summarizer.py --rpm 120 --error-rate 0.05 --scheduler-rpm 100 --json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Add the project root and this folder to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# No credentials are needed; the stand-in replaces Gemini
+os.environ.setdefault("TESTING", "true")
+
+from modules.summarizer.model_backend import StandInClient
+from modules.summarizer.scheduler import GeminiScheduler, GeminiBusyError
+from modules.summarizer.service import SummarizerService
+from benchmark_messages import synthetic_window, as_records
+from benchmark_time_parsing import percentile
+from standin_model_server import StandInSettings, start_server, add_settings_arguments, settings_from_args
+
+QUESTIONS = [
+    "what did we decide about the budget?",
+    "who is handling sponsor outreach?",
+    "when is the next workshop?",
+    "what are the open action items?",
+]
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max (seconds) in milliseconds"""
+    if not samples:
+        return {}
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+async def run_load_test(requests: int = 200,
+                        concurrency: int = 20,
+                        ask_ratio: float = 0.3,
+                        min_messages: int = 50,
+                        max_messages: int = 1500,
+                        guilds: int = 5,
+                        stream: bool = False,
+                        url: Optional[str] = None,
+                        settings: Optional[StandInSettings] = None,
+                        scheduler_rpm: float = 6000,
+                        scheduler_tpm: float = 50_000_000,
+                        seed: int = 0) -> Dict[str, Any]:
+    """Run the load test on the running event loop and return its report"""
+    standin, runner = None, None
+    if url is None:
+        standin, runner, url = await start_server(settings or StandInSettings())
+
+    client = StandInClient(url)
+    service = SummarizerService(model_client=client)
+    service.scheduler = GeminiScheduler(requests_per_minute=scheduler_rpm, tokens_per_minute=scheduler_tpm)
+
+    rng = random.Random(seed)
+    # Each request gets its own channel and window, so caches don't hide the model
+    jobs = [{
+        "kind": "ask" if rng.random() < ask_ratio else "summarize",
+        "channel_id": f"load-{index}",
+        "guild_id": f"guild-{index % guilds}",
+        "messages": as_records(synthetic_window(rng.randint(min_messages, max_messages), seed=seed + index)),
+        "question": rng.choice(QUESTIONS),
+    } for index in range(requests)]
+
+    latencies: Dict[str, List[float]] = {"summarize": [], "ask": []}
+    outcomes: Counter = Counter()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def on_progress(_text: str) -> None:
+        return None
+
+    async def run(job: Dict[str, Any]) -> None:
+        async with slots:
+            started = time.perf_counter()
+            progress = on_progress if stream else None
+            try:
+                if job["kind"] == "ask":
+                    result = await service.answer_question(job["messages"], job["question"], "24h", "load-test",
+                                                           job["channel_id"], job["guild_id"], on_progress=progress)
+                    text = result.get("answer", "")
+                else:
+                    result = await service.generate_summary(job["messages"], "24h", "load-test",
+                                                            job["channel_id"], job["guild_id"], on_progress=progress)
+                    text = result.get("summary", "")
+            except GeminiBusyError:
+                outcomes["rejected"] += 1
+                return
+            except Exception as e:
+                outcomes[f"failed: {type(e).__name__}"] += 1
+                return
+            latencies[job["kind"]].append(time.perf_counter() - started)
+            if result.get("api_error"):
+                outcomes["api_error"] += 1
+            else:
+                outcomes["ok"] += 1
+            text += "".join(result.get("continuation_parts", []))
+            if "](https://discord.com/channels/" in text:
+                outcomes["with_citation_links"] += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run(job) for job in jobs))
+    finally:
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+        if runner is not None:
+            await runner.cleanup()
+
+    completed = latencies["summarize"] + latencies["ask"]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(completed) / elapsed, 2) if elapsed else 0.0,
+        "latency": {
+            "all": latency_stats(completed),
+            "summarize": latency_stats(latencies["summarize"]),
+            "ask": latency_stats(latencies["ask"]),
+        },
+        "outcomes": dict(outcomes),
+        "scheduler": service.get_scheduler_stats(),
+        "models": service.get_model_stats(),
+        "standin": dict(standin.stats) if standin else None,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}: "
+          f"{report['elapsed_s']}s, {report['throughput_rps']} req/s")
+    print(f"{'':>10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, stats in report["latency"].items():
+        if stats:
+            print(f"{kind:>10} {stats['count']:>6} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}")
+    print("Outcomes:", ", ".join(f"{name}={count}" for name, count in sorted(report["outcomes"].items())))
+    for name, tier in report["models"]["tiers"].items():
+        if tier["requests"]:
+            print(f"Tier {name}: requests={tier['requests']}, rejected={tier['rejected']}, "
+                  f"p50={tier['latency_seconds']['p50']}s, avg output tokens={tier['avg_output_tokens']}")
+    if report["standin"]:
+        print("Stand-in:", ", ".join(f"{name}={count}" for name, count in report["standin"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the summarizer against the stand-in model")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ask-ratio", type=float, default=0.3, help="Fraction of requests that are /ask")
+    parser.add_argument("--min-messages", type=int, default=50)
+    parser.add_argument("--max-messages", type=int, default=1500)
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--stream", action="store_true", help="Stream responses like the Discord commands do")
+    parser.add_argument("--url", help="Use a running stand-in server instead of starting one")
+    parser.add_argument("--scheduler-rpm", type=float, default=6000, help="Requests per minute the summarizer's scheduler allows")
+    parser.add_argument("--scheduler-tpm", type=float, default=50_000_000, help="Tokens per minute the summarizer's scheduler allows")
+    parser.add_argument("--json", help="Also write the report to this file")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    report = asyncio.run(run_load_test(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        ask_ratio=args.ask_ratio,
+        min_messages=args.min_messages,
+        max_messages=args.max_messages,
+        guilds=args.guilds,
+        stream=args.stream,
+        url=args.url,
+        settings=settings_from_args(args),
+        scheduler_rpm=args.scheduler_rpm,
+        scheduler_tpm=args.scheduler_tpm,
+        seed=args.seed
+    ))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
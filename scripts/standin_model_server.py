@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generate-content API.
+
+Serves the Gemini REST endpoints the summarizer uses, so the whole pipeline
+(prompt building, caching, scheduling, retries, streaming and citation
+handling) can run without an API key:
+
+- ``POST /v1beta/models/<model>:generateContent``
+- ``POST /v1beta/models/<model>:streamGenerateContent?alt=sse``
+- ``POST /v1beta/cachedContents`` and ``PATCH /v1beta/cachedContents/<id>``
+
+Responses take as long as a model would: a base latency with jitter, plus
+time for the input tokens, plus time for the output tokens. Streamed
+responses are split into chunks spread over that output time. Requests over
+``--rpm``, and a random ``--error-rate`` of the others, get a 429
+RESOURCE_EXHAUSTED. Replies are Markdown summaries, answers or notes that
+cite the ``[cX]`` IDs found in the prompt, so citation rewriting has real
+work to do.
+
+Point the summarizer at it with:
+
+    SUMMARIZER_MODEL_BACKEND=standin SUMMARIZER_STANDIN_URL=http://127.0.0.1:8765
+
+Usage:
+    python scripts/standin_model_server.py
+    python scripts/standin_model_server.py --port 8765 --latency-ms 400 --rpm 120 --error-rate 0.02
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List
+
+from aiohttp import web
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.summarizer.utils import estimate_tokens
+
+CITATION_GROUP_PATTERN = re.compile(r"\[(c\d+(?:\s*[-,]\s*c\d+)*)\]")
+CITATION_ID_PATTERN = re.compile(r"c(\d+)")
+TOPICS = ["event planning", "the budget", "room bookings", "sponsor outreach", "the workshop slides",
+          "the hackathon schedule", "merch orders", "officer elections", "the website", "meeting notes"]
+
+
+@dataclass
+class StandInSettings:
+    """How the stand-in behaves; delays are multiplied by time_scale"""
+    latency_ms: float = 400.0
+    jitter: float = 0.3
+    input_tokens_per_second: float = 20_000.0
+    output_tokens_per_second: float = 150.0
+    chunk_chars: int = 160
+    requests_per_minute: int = 0
+    error_rate: float = 0.0
+    time_scale: float = 1.0
+    seed: int = 0
+
+
+def cited_ids(prompt: str) -> List[int]:
+    """Citation numbers that appear in the prompt, in order of first appearance"""
+    seen: Dict[int, None] = {}
+    for group in CITATION_GROUP_PATTERN.findall(prompt):
+        for number in CITATION_ID_PATTERN.findall(group):
+            seen.setdefault(int(number), None)
+    return list(seen)
+
+
+def fake_reply(prompt: str, rng: random.Random) -> str:
+    """A reply in the shape the prompt asks for, citing the prompt's messages in the formats models use"""
+    ids = cited_ids(prompt) or [1]
+
+    def citation() -> str:
+        first = rng.choice(ids)
+        style = rng.random()
+        if style < 0.5 or len(ids) < 3:
+            return f"[c{first}]"
+        if style < 0.8:
+            second = rng.choice(ids)
+            return f"[c{min(first, second)}, c{max(first, second)}]"
+        # Ranges cover a few consecutive messages
+        return f"[c{first}-c{first + rng.randint(1, 4)}]"
+
+    def point() -> str:
+        return f"**{rng.choice(TOPICS).capitalize()}:** discussed next steps and who owns them {citation()}"
+
+    if "USER QUESTION:" in prompt:
+        return (f"Based on the conversation, the group settled on {rng.choice(TOPICS)} {citation()}. "
+                f"There was also some back and forth about {rng.choice(TOPICS)} {citation()}.\n\n"
+                f"- {point()}\n- {point()}")
+    if "NOTES TO MERGE:" in prompt or "Your notes will" in prompt:
+        return "\n".join(f"- {point()}" for _ in range(rng.randint(3, 6)))
+    bullets = max(3, min(12, len(ids) // 20))
+    return "\n".join(
+        ["# Conversation Summary ✨", "", "## Key Topics"]
+        + [f"- {point()}" for _ in range(bullets)]
+        + ["", "## Action Items", f"- {point()}"]
+    )
+
+
+def api_error(status: int, code_name: str, message: str) -> web.Response:
+    return web.json_response({"error": {"code": status, "message": message, "status": code_name}}, status=status)
+
+
+class StandInModel:
+    """aiohttp application state: settings, cached instructions and counters"""
+
+    def __init__(self, settings: StandInSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self._request_times: Deque[float] = deque()
+        self.stats = {"requests": 0, "streamed": 0, "rate_limited": 0, "cache_creates": 0, "cached_requests": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1beta/models/{call}", self.generate)
+        app.router.add_post("/v1beta/cachedContents", self.create_cache)
+        app.router.add_patch("/v1beta/cachedContents/{cache_id}", self.update_cache)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+    def _delay(self, seconds: float) -> float:
+        return max(0.0, seconds * self.settings.time_scale)
+
+    def _rate_limited(self) -> bool:
+        """Sliding one-minute window over admitted requests, plus random 429s"""
+        now = time.monotonic()
+        while self._request_times and now - self._request_times[0] > 60:
+            self._request_times.popleft()
+        if self.settings.requests_per_minute and len(self._request_times) >= self.settings.requests_per_minute:
+            return True
+        if self.rng.random() < self.settings.error_rate:
+            return True
+        self._request_times.append(now)
+        return False
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        model, _, method = request.match_info["call"].partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return api_error(404, "NOT_FOUND", f"Unknown method {method}")
+        self.stats["requests"] += 1
+        if self._rate_limited():
+            self.stats["rate_limited"] += 1
+            return api_error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+
+        body = await request.json()
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        cached_tokens = 0
+        if body.get("cachedContent"):
+            cache = self.caches.get(body["cachedContent"])
+            if cache is None or cache["expires_at"] < time.time():
+                return api_error(403, "PERMISSION_DENIED", f"CachedContent not found (or permission denied): {body['cachedContent']}")
+            cached_tokens = cache["tokens"]
+            self.stats["cached_requests"] += 1
+        system_tokens = estimate_tokens("".join(part.get("text", "") for part in (body.get("systemInstruction") or {}).get("parts", [])))
+
+        reply = fake_reply(prompt, self.rng)
+        input_tokens = estimate_tokens(prompt) + system_tokens + cached_tokens
+        output_tokens = estimate_tokens(reply)
+        usage = {"promptTokenCount": input_tokens, "candidatesTokenCount": output_tokens, "cachedContentTokenCount": cached_tokens}
+
+        settings = self.settings
+        first_token = (settings.latency_ms / 1000 * self.rng.lognormvariate(0, settings.jitter)
+                       + (input_tokens - cached_tokens) / settings.input_tokens_per_second)
+        output_time = output_tokens / settings.output_tokens_per_second
+        await asyncio.sleep(self._delay(first_token))
+
+        if method == "generateContent":
+            await asyncio.sleep(self._delay(output_time))
+            return web.json_response(self._payload(reply, usage))
+
+        self.stats["streamed"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunks = [reply[i:i + settings.chunk_chars] for i in range(0, len(reply), settings.chunk_chars)]
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(self._delay(output_time / len(chunks)))
+            payload = self._payload(chunk, usage if index == len(chunks) - 1 else None)
+            await response.write(f"data: {json.dumps(payload)}\r\n\r\n".encode())
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _payload(text: str, usage: Any) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+        if usage:
+            payload["candidates"][0]["finishReason"] = "STOP"
+            payload["usageMetadata"] = usage
+        return payload
+
+    @staticmethod
+    def _ttl_seconds(ttl: Any) -> float:
+        return float(str(ttl or "3600s").rstrip("s"))
+
+    async def create_cache(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        instruction = "".join(part.get("text", "") for part in (body.get("systemInstruction") or {}).get("parts", []))
+        name = f"cachedContents/standin-{len(self.caches) + 1}"
+        self.caches[name] = {"tokens": estimate_tokens(instruction), "expires_at": time.time() + self._ttl_seconds(body.get("ttl"))}
+        self.stats["cache_creates"] += 1
+        return web.json_response({"name": name, "model": body.get("model"), "displayName": body.get("displayName")})
+
+    async def update_cache(self, request: web.Request) -> web.Response:
+        name = f"cachedContents/{request.match_info['cache_id']}"
+        if name not in self.caches:
+            return api_error(404, "NOT_FOUND", f"{name} not found")
+        body = await request.json()
+        self.caches[name]["expires_at"] = time.time() + self._ttl_seconds(body.get("ttl"))
+        return web.json_response({"name": name})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+
+async def start_server(settings: StandInSettings, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the stand-in on the running event loop.
+
+    Returns:
+        Tuple of (StandInModel, aiohttp AppRunner, base URL); call runner.cleanup() to stop
+    """
+    model = StandInModel(settings)
+    runner = web.AppRunner(model.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return model, runner, f"http://{host}:{bound_port}"
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = StandInSettings()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Median time to first token")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="Log-normal sigma of the latency")
+    parser.add_argument("--input-tps", type=float, default=defaults.input_tokens_per_second, help="Prompt tokens processed per second")
+    parser.add_argument("--output-tps", type=float, default=defaults.output_tokens_per_second, help="Output tokens generated per second")
+    parser.add_argument("--rpm", type=int, default=defaults.requests_per_minute, help="Requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of other requests answered with 429")
+    parser.add_argument("--time-scale", type=float, default=defaults.time_scale, help="Multiplier for every delay (0 = no delays)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def settings_from_args(args: argparse.Namespace) -> StandInSettings:
+    return StandInSettings(
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        input_tokens_per_second=args.input_tps,
+        output_tokens_per_second=args.output_tps,
+        requests_per_minute=args.rpm,
+        error_rate=args.error_rate,
+        time_scale=args.time_scale,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    model = StandInModel(settings_from_args(args))
+    print(f"Stand-in model server on http://{args.host}:{args.port} (SUMMARIZER_MODEL_BACKEND=standin)")
+    web.run_app(model.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
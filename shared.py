@@ -89,9 +89,17 @@ def run_cleanup_scheduler():
 cleanup_thread = threading.Thread(target=run_cleanup_scheduler, daemon=True)
 cleanup_thread.start()
 
+# The calendar models import shared themselves, so they are registered here rather than at the top
+import modules.calendar.models  # noqa: E402,F401
+
 # Ensure all tables are created after all models are imported
 Base.metadata.create_all(bind=db_connect.engine)
 
+# SummaryLog gained model tier and token columns after the table was first created
+from migrations.summarizer import add_missing_columns
+from modules.summarizer.models import SummaryLog
+add_missing_columns(db_connect.engine, SummaryLog.__table__)
+
 def create_summarizer_bot(loop: asyncio.AbstractEventLoop) -> discord.Bot:
     """Create and configure the summarizer bot instance with a specific event loop."""
     logger.info("Creating summarizer bot instance (standard discord.Bot)...")
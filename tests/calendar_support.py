@@ -0,0 +1,80 @@
+"""
+Test support for modules.calendar.
+
+The calendar modules import config, logger, notion and db_connect from
+shared.py, which starts the Flask app, the Discord bot and the production
+database when imported. Importing this module first puts a stand-in
+``shared`` in its place whose db_connect is an in-memory SQLite database.
+"""
+import sys
+import types
+import logging
+
+from googleapiclient.errors import HttpError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+class InMemoryDBConnect:
+    """Stands in for DBConnect: one in-memory SQLite database shared by every session and thread"""
+
+    def __init__(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        self.SessionLocal = sessionmaker(bind=self.engine)
+
+    def get_db(self):
+        db = self.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+if "shared" not in sys.modules:
+    shared = types.ModuleType("shared")
+    shared.logger = logging.getLogger("tests.calendar")
+    shared.config = types.SimpleNamespace(TIMEZONE="America/Phoenix")
+    shared.db_connect = InMemoryDBConnect()
+    shared.notion = None
+    sys.modules["shared"] = shared
+
+db_connect = sys.modules["shared"].db_connect
+
+from modules.utils.base import Base  # noqa: E402
+from modules.organizations.models import Organization  # noqa: E402
+import modules.calendar.models  # noqa: E402,F401  (registers the calendar tables)
+
+
+def reset_database() -> None:
+    """Empty every table and add organization 1 with Notion database "db" and calendar "cal" """
+    Base.metadata.drop_all(bind=db_connect.engine)
+    Base.metadata.create_all(bind=db_connect.engine)
+    db = next(db_connect.get_db())
+    try:
+        db.add(Organization(id=1, name="SoDA", prefix="soda", guild_id="1", notion_database_id="db",
+                            google_calendar_id="cal", calendar_sync_enabled=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+def http_error(status: int, content: bytes = b"{}") -> HttpError:
+    """HttpError as raised by a Google API request that answered with status"""
+    return HttpError(types.SimpleNamespace(status=status, reason="error"), content)
+
+
+def notion_page(page_id: str, edited: str = "2024-05-01T10:00:00.000Z", published: bool = True,
+                title: str = "Event", start: str = "2024-05-10T18:00:00.000Z", **extra) -> dict:
+    """Notion page object as returned by databases.query"""
+    return {
+        "id": page_id,
+        "last_edited_time": edited,
+        "archived": False,
+        "properties": {
+            "Published": {"type": "checkbox", "checkbox": published},
+            "Name": {"type": "title", "title": [{"plain_text": title}]},
+            "Date": {"type": "date", "date": {"start": start}},
+        },
+        **extra
+    }
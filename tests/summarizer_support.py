@@ -0,0 +1,127 @@
+"""
+Test support for modules.summarizer.
+
+Builds message windows the way the Discord fetchers return them and stands
+in for the google-genai client, so SummarizerService can be exercised
+without calling Gemini.
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Sequence, Union
+
+from modules.summarizer.service import SummarizerService
+
+SUMMARY_REPLY = "# Conversation Summary ✨\n- something happened [c1]"
+
+
+def make_messages(contents: Union[int, Sequence[str]], first_id: int = 1000, authors: int = 3,
+                  timestamp: str = "2024-05-01 12:00:00") -> List[dict]:
+    """Message dicts with IDs counting up from first_id, one per item of contents.
+
+    contents is the text of each message, or a count of messages reading "message 0",
+    "message 1"... Authors take turns between user0..user{authors - 1}.
+    """
+    if isinstance(contents, int):
+        contents = [f"message {i}" for i in range(contents)]
+    return [{
+        "id": str(first_id + i),
+        "content": content,
+        "author": {"id": str(i % authors), "name": f"user{i % authors}"},
+        "timestamp": timestamp,
+        "jump_url": f"https://discord.com/channels/1/2/{first_id + i}"
+    } for i, content in enumerate(contents)]
+
+
+class FakeModels:
+    """Stand-in for gemini_client.aio.models.
+
+    reply is the response text, or a function of (model, contents) returning the text or a
+    whole response. Every request is recorded in requests; fail makes requests raise, and
+    fail_after interrupts streams after that many chunks. Streams send the text a line at a
+    time, then an empty chunk carrying the candidates and usage metadata, like Gemini does.
+    """
+
+    def __init__(self, reply: Union[str, Callable] = SUMMARY_REPLY, fail: bool = False,
+                 fail_after: Optional[int] = None, delay: float = 0):
+        self.reply = reply
+        self.fail = fail
+        self.fail_after = fail_after
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def prompts(self) -> List[str]:
+        return [request.contents for request in self.requests]
+
+    @property
+    def model_names(self) -> List[str]:
+        return [request.model for request in self.requests]
+
+    async def _respond(self, model, contents, config, streamed):
+        self.requests.append(SimpleNamespace(model=model, contents=contents, config=config, streamed=streamed))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("quota exceeded")
+            reply = self.reply(model, contents) if callable(self.reply) else self.reply
+        finally:
+            self.in_flight -= 1
+        if not isinstance(reply, str):
+            return reply
+        cached = 900 if config is not None and getattr(config, "cached_content", None) else 0
+        return SimpleNamespace(text=reply, candidates=[], usage_metadata=SimpleNamespace(cached_content_token_count=cached))
+
+    async def generate_content(self, model, contents, config=None, **kwargs):
+        return await self._respond(model, contents, config, streamed=False)
+
+    async def generate_content_stream(self, model, contents, config=None, **kwargs):
+        response = await self._respond(model, contents, config, streamed=True)
+
+        async def stream():
+            for index, line in enumerate(response.text.splitlines(keepends=True)):
+                if self.fail_after is not None and index == self.fail_after:
+                    raise RuntimeError("stream interrupted")
+                await asyncio.sleep(0)
+                yield SimpleNamespace(text=line, candidates=[])
+            yield SimpleNamespace(text="", candidates=getattr(response, "candidates", []),
+                                  usage_metadata=getattr(response, "usage_metadata", None))
+
+        return stream()
+
+
+class FakeCaches:
+    """Stand-in for gemini_client.aio.caches"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.created = []
+        self.updated = []
+
+    async def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("400 INVALID_ARGUMENT: Cached content is too small")
+        self.created.append(config.system_instruction)
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    async def update(self, name, config):
+        self.updated.append((name, config.ttl))
+        return SimpleNamespace(name=name)
+
+
+def gemini_client(models: FakeModels, caches: Optional[FakeCaches] = None) -> SimpleNamespace:
+    """Stand-in for genai.Client; without caches, cached instructions are unavailable"""
+    aio = SimpleNamespace(models=models)
+    if caches is not None:
+        aio.caches = caches
+    return SimpleNamespace(aio=aio)
+
+
+def summarizer_service(models: Optional[FakeModels] = None, caches: Optional[FakeCaches] = None) -> SummarizerService:
+    """SummarizerService that sends its requests to models (a default FakeModels if not given)"""
+    service = SummarizerService()
+    service.gemini_client = gemini_client(models or FakeModels(), caches)
+    return service
@@ -0,0 +1,192 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calendar_support import db_connect, http_error, reset_database
+from modules.calendar.models import CalendarEventLink
+from modules.calendar.utils import BatchRequest, execute_batch
+from modules.calendar.service import EVENT_COUNT_KEYS, MultiOrgCalendarService
+
+RATE_LIMITED = b'{"error": {"errors": [{"reason": "rateLimitExceeded"}]}}'
+FORBIDDEN = b'{"error": {"errors": [{"reason": "forbidden"}]}}'
+
+
+class FakeBatchService:
+    """Stands in for a Google API service's batch endpoint.
+
+    outcomes[request_id] lists the exception (or None for success) each attempt of that
+    sub-request answers with; attempts past the end of the list succeed.
+    batch_errors lists the exception each batch.execute() raises (None for a normal batch).
+    """
+
+    def __init__(self, outcomes=None, batch_errors=None):
+        self.outcomes = outcomes or {}
+        self.batch_errors = list(batch_errors or [])
+        self.batches = []
+
+    def new_batch_http_request(self, callback):
+        service = self
+        added = []
+
+        def execute():
+            service.batches.append([request_id for request_id, _ in added])
+            if service.batch_errors:
+                error = service.batch_errors.pop(0)
+                if error is not None:
+                    raise error
+            for request_id, request in added:
+                planned = service.outcomes.get(request_id, [])
+                exception = planned.pop(0) if planned else None
+                callback(request_id, None if exception else {"id": request_id, "request": request}, exception)
+
+        return SimpleNamespace(add=lambda request, request_id: added.append((request_id, request)), execute=execute)
+
+
+class TestExecuteBatch(unittest.TestCase):
+    """Test cases for the retrying batch executor"""
+
+    def setUp(self):
+        self.sleeps = []
+        self.calls = {}
+
+    def requests(self, *request_ids):
+        def callback(request_id, response, exception):
+            self.calls.setdefault(request_id, []).append((response, exception))
+        return [BatchRequest(request_id, lambda s, request_id=request_id: f"insert {request_id}", callback) for request_id in request_ids]
+
+    def run_batch(self, service, requests, **kwargs):
+        return execute_batch(service, requests, base_delay=0.5, sleep=self.sleeps.append, **kwargs)
+
+    def test_requests_go_out_in_chunks_of_at_most_50(self):
+        service = FakeBatchService()
+        request_ids = [f"r{i}" for i in range(120)]
+        self.assertEqual(self.run_batch(service, self.requests(*request_ids)), (120, 0))
+        self.assertEqual([len(batch) for batch in service.batches], [50, 50, 20])
+        self.assertEqual([request_id for batch in service.batches for request_id in batch], request_ids)
+        self.assertEqual(self.sleeps, [])
+
+    def test_retryable_errors_are_retried(self):
+        """429, 5xx and 403 rateLimitExceeded are sent again in a later batch"""
+        service = FakeBatchService(outcomes={
+            "too-many": [http_error(429)],
+            "server": [http_error(500)],
+            "unavailable": [http_error(503), http_error(503)],
+            "rate-limit": [http_error(403, RATE_LIMITED)],
+        })
+        requests = self.requests("too-many", "server", "unavailable", "rate-limit", "ok")
+        self.assertEqual(self.run_batch(service, requests), (5, 0))
+        self.assertEqual(service.batches, [
+            ["too-many", "server", "unavailable", "rate-limit", "ok"],
+            ["too-many", "server", "unavailable", "rate-limit"],
+            ["unavailable"],
+        ])
+        self.assertEqual(len(self.sleeps), 2)
+        # Exponential backoff with up to 100% jitter
+        self.assertTrue(0.5 <= self.sleeps[0] <= 1.0 and 1.0 <= self.sleeps[1] <= 2.0)
+
+    def test_other_errors_are_not_retried(self):
+        """Client errors, including a 403 that isn't a rate limit, fail on the first attempt"""
+        service = FakeBatchService(outcomes={
+            "bad": [http_error(400)],
+            "forbidden": [http_error(403, FORBIDDEN)],
+            "missing": [http_error(404)],
+        })
+        self.assertEqual(self.run_batch(service, self.requests("bad", "forbidden", "missing", "ok")), (1, 3))
+        self.assertEqual(len(service.batches), 1)
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual(self.calls["forbidden"][0][1].resp.status, 403)
+
+    def test_gives_up_after_max_attempts(self):
+        service = FakeBatchService(outcomes={"flaky": [http_error(503)] * 5})
+        self.assertEqual(self.run_batch(service, self.requests("flaky"), max_attempts=3), (0, 1))
+        self.assertEqual(service.batches, [["flaky"]] * 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertEqual(self.calls["flaky"][0][1].resp.status, 503)
+
+    def test_failed_batch_fails_every_request_in_it(self):
+        """A batch that fails as a whole is retried when its error is retryable"""
+        service = FakeBatchService(batch_errors=[None, ConnectionResetError("reset")])
+        self.assertEqual(self.run_batch(service, self.requests(*[f"r{i}" for i in range(60)])), (60, 0))
+        self.assertEqual([len(batch) for batch in service.batches], [50, 10, 10])
+
+        service = FakeBatchService(batch_errors=[ValueError("bad batch")])
+        self.calls = {}
+        self.assertEqual(self.run_batch(service, self.requests("a", "b")), (0, 2))
+        self.assertEqual(len(service.batches), 1)
+        self.assertEqual({request_id: str(calls[0][1]) for request_id, calls in self.calls.items()}, {"a": "bad batch", "b": "bad batch"})
+
+    def test_each_callback_gets_only_its_final_outcome(self):
+        service = FakeBatchService(outcomes={"retried": [http_error(429)], "failed": [http_error(400)]})
+        self.run_batch(service, self.requests("retried", "failed", "ok"))
+
+        self.assertEqual({request_id: len(calls) for request_id, calls in self.calls.items()}, {"retried": 1, "failed": 1, "ok": 1})
+        response, exception = self.calls["retried"][0]
+        self.assertIsNone(exception)
+        self.assertEqual(response["request"], "insert retried")
+        self.assertIsNone(self.calls["failed"][0][0])
+        self.assertEqual(self.calls["failed"][0][1].resp.status, 400)
+
+    def test_duplicate_request_ids_are_rejected(self):
+        service = FakeBatchService()
+        with self.assertRaises(ValueError):
+            self.run_batch(service, self.requests("a", "b", "a"))
+        self.assertEqual(service.batches, [])
+
+    def test_no_requests(self):
+        service = FakeBatchService()
+        self.assertEqual(self.run_batch(service, []), (0, 0))
+        self.assertEqual(service.batches, [])
+
+
+class TestDeleteCallback(unittest.TestCase):
+    """Test cases for counting batched deletes"""
+
+    def setUp(self):
+        self.deleted = []
+        self.counts = dict.fromkeys(EVENT_COUNT_KEYS, 0)
+
+    def delete(self, gcal_id, exception):
+        MultiOrgCalendarService._delete_callback(gcal_id, self.deleted, self.counts)(f"delete:{gcal_id}", None, exception)
+
+    def test_gone_events_count_as_deleted(self):
+        """An event that is already gone (404/410) counts as deleted"""
+        self.delete("g1", None)
+        self.delete("g2", http_error(404))
+        self.delete("g3", http_error(410))
+        self.delete("g4", http_error(500))
+        self.assertEqual(self.deleted, ["g1", "g2", "g3"])
+        self.assertEqual((self.counts["deleted"], self.counts["delete_failed"]), (3, 1))
+
+
+class TestRecordEventLinks(unittest.TestCase):
+    """Test cases for keeping CalendarEventLink in step with batched writes"""
+
+    def setUp(self):
+        reset_database()
+        self.service = MultiOrgCalendarService()
+
+    def links(self):
+        db = next(db_connect.get_db())
+        try:
+            return {link.notion_page_id: link.google_calendar_event_id for link in db.query(CalendarEventLink)}
+        finally:
+            db.close()
+
+    def test_written_events_linked_and_deleted_events_unlinked(self):
+        self.service._record_event_links(1, "db", "cal", [
+            {"notion_page_id": "p1", "gcal_event_id": "g1", "status": "created"},
+            {"notion_page_id": "p2", "gcal_event_id": "g2", "status": "created"},
+        ], [])
+        self.service._record_event_links(1, "db", "cal", [
+            {"notion_page_id": "p1", "gcal_event_id": "g1", "status": "updated"},
+            {"notion_page_id": "p3", "gcal_event_id": "g3", "status": "failed"},
+        ], ["g2"])
+        self.assertEqual(self.links(), {"p1": "g1"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calendar_support import notion_page, reset_database
+from modules.calendar.clients import GoogleCalendarClient
+from modules.calendar.models import CalendarEventDTO
+from modules.calendar.service import CONTENT_HASH_PROPERTY, MultiOrgCalendarService
+
+
+def managed_event(gcal_id, notion_page_id, content_hash):
+    return {
+        "id": gcal_id,
+        "status": "confirmed",
+        "extendedProperties": {"private": {"notionPageId": notion_page_id, CONTENT_HASH_PROPERTY: content_hash}}
+    }
+
+
+class TestContentHash(unittest.TestCase):
+    """Test cases for CalendarEventDTO.content_hash"""
+
+    def test_hash_ignores_key_order(self):
+        """The same payload hashes the same whatever order its keys were built in"""
+        event = CalendarEventDTO.from_notion(notion_page("p1", title="Meeting"))
+        reordered = CalendarEventDTO.from_notion(notion_page("p1", title="Meeting"))
+        reordered.start = dict(reversed(list(event.start.items())))
+        reordered.end = dict(reversed(list(event.end.items())))
+        self.assertNotEqual(list(event.start), list(reordered.start))
+        self.assertEqual(event.content_hash(), reordered.content_hash())
+
+    def test_hash_follows_content(self):
+        """Anything Google Calendar shows changes the hash"""
+        event = CalendarEventDTO.from_notion(notion_page("p1", title="Meeting"))
+        self.assertNotEqual(event.content_hash(), CalendarEventDTO.from_notion(notion_page("p1", title="Renamed")).content_hash())
+        self.assertNotEqual(event.content_hash(), CalendarEventDTO.from_notion(notion_page("p1", title="Meeting", start="2024-05-11")).content_hash())
+
+
+class TestHashSkip(unittest.TestCase):
+    """Test cases for skipping writes whose content hash is unchanged"""
+
+    def setUp(self):
+        reset_database()
+        self.service = MultiOrgCalendarService()
+        self.service.gcal_client = MagicMock()
+        self.sent = []
+
+        def execute_batch(requests, description, parent_transaction=None):
+            self.sent.extend(requests)
+            for request in requests:
+                request.callback(request.request_id, {"id": f"new-{request.request_id}", "htmlLink": "https://calendar"}, None)
+            return len(requests), 0
+        self.service.gcal_client.execute_batch.side_effect = execute_batch
+
+    def sync(self, events, gcal_events):
+        self.service.gcal_client.sync_events.return_value = (gcal_events, "token", True)
+        return self.service.update_organization_google_calendar(events, "cal", "db", MagicMock())
+
+    def test_matching_hash_is_unchanged(self):
+        """An event whose stored hash matches is counted as unchanged and sends no request"""
+        event = CalendarEventDTO.from_notion(notion_page("p1"))
+        results, counts = self.sync([event], [managed_event("g1", "p1", event.content_hash())])
+
+        self.assertEqual(counts["unchanged"], 1)
+        self.assertEqual(counts["updated"], 0)
+        self.assertEqual([result["status"] for result in results], ["unchanged"])
+        self.service.gcal_client.execute_batch.assert_not_called()
+
+    def test_different_hash_is_updated(self):
+        """A stale or missing hash sends an update"""
+        event = CalendarEventDTO.from_notion(notion_page("p1"))
+        self.service.gcal_client.update_event_request.side_effect = GoogleCalendarClient().update_event_request
+        results, counts = self.sync([event], [managed_event("g1", "p1", "stale")])
+
+        self.assertEqual(counts["updated"], 1)
+        self.assertEqual([request.request_id for request in self.sent], ["update:p1"])
+        self.assertEqual([result["status"] for result in results], ["updated"])
+
+
+class TestWriteRequests(unittest.TestCase):
+    """Test cases for the Notion page ID kept next to the content hash"""
+
+    def setUp(self):
+        self.client = GoogleCalendarClient()
+        self.service = MagicMock()
+
+    def private_properties(self, method):
+        return getattr(self.service.events.return_value, method).call_args.kwargs["body"]["extendedProperties"]["private"]
+
+    def test_insert_keeps_notion_page_id_and_hash(self):
+        request = self.client.insert_event_request("create:p1", "cal", {"summary": "Event", "extendedProperties": {"private": {CONTENT_HASH_PROPERTY: "abc"}}}, "p1")
+        request.build(self.service)
+        self.assertEqual(self.private_properties("insert"), {"notionPageId": "p1", CONTENT_HASH_PROPERTY: "abc"})
+
+    def test_update_keeps_notion_page_id_and_hash(self):
+        request = self.client.update_event_request("update:p1", "cal", "g1", {"summary": "Event", "extendedProperties": {"private": {CONTENT_HASH_PROPERTY: "abc"}}}, "p1")
+        request.build(self.service)
+        self.assertEqual(self.private_properties("update"), {"notionPageId": "p1", CONTENT_HASH_PROPERTY: "abc"})
+
+
+if __name__ == '__main__':
+    unittest.main()
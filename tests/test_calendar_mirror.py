@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calendar_support import db_connect, http_error, reset_database
+from modules.calendar.mirror import GoogleEventMirrorStore
+from modules.calendar.clients import GoogleCalendarClient
+
+
+def gcal_event(gcal_id, notion_page_id=None, status="confirmed", summary="Event"):
+    event = {"id": gcal_id, "status": status, "summary": summary}
+    if notion_page_id:
+        event["extendedProperties"] = {"private": {"notionPageId": notion_page_id}}
+    return event
+
+
+class TestGoogleEventMirrorStore(unittest.TestCase):
+    """Test cases for the local mirror of managed Google Calendar events"""
+
+    def setUp(self):
+        reset_database()
+        self.mirror = GoogleEventMirrorStore(db_connect)
+
+    def mirrored(self, events):
+        return {event["id"]: event for event in events}
+
+    def test_full_listing_keeps_only_managed_events(self):
+        """Events created outside the sync are not mirrored"""
+        events = self.mirror.apply("cal", [gcal_event("g1", "p1"), gcal_event("g2")], "token-1", full=True)
+        self.assertEqual(set(self.mirrored(events)), {"g1"})
+        self.assertEqual(self.mirror.sync_token("cal"), "token-1")
+
+    def test_incremental_listing_updates_mirror(self):
+        """Changed events replace their copy; cancelled and unmanaged events leave the mirror"""
+        self.mirror.apply("cal", [gcal_event("g1", "p1"), gcal_event("g2", "p2"), gcal_event("g3", "p3")], "token-1", full=True)
+        events = self.mirror.apply("cal", [
+            gcal_event("g1", "p1", summary="Renamed"),
+            gcal_event("g2", status="cancelled"),
+            gcal_event("g3"),
+            gcal_event("g4", "p4"),
+        ], "token-2", full=False)
+
+        events = self.mirrored(events)
+        self.assertEqual(set(events), {"g1", "g4"})
+        self.assertEqual(events["g1"]["summary"], "Renamed")
+        self.assertEqual(self.mirror.sync_token("cal"), "token-2")
+
+    def test_event_created_and_cancelled_in_one_listing(self):
+        """A listing holding an event's creation and its deletion leaves no copy"""
+        events = self.mirror.apply("cal", [gcal_event("g1", "p1"), gcal_event("g1", "p1", status="cancelled")], "token-1", full=False)
+        self.assertEqual(events, [])
+
+    def test_full_listing_replaces_mirror(self):
+        """Mirrored events missing from a full listing are removed"""
+        self.mirror.apply("cal", [gcal_event("g1", "p1"), gcal_event("g2", "p2")], "token-1", full=True)
+        events = self.mirror.apply("cal", [gcal_event("g2", "p2"), gcal_event("g3", "p3")], "token-2", full=True)
+        self.assertEqual(set(self.mirrored(events)), {"g2", "g3"})
+
+    def test_calendars_are_mirrored_separately(self):
+        """A full listing of one calendar doesn't touch another's mirror"""
+        self.mirror.apply("cal", [gcal_event("g1", "p1")], "token-1", full=True)
+        self.mirror.apply("other", [gcal_event("g2", "p2")], "token-2", full=True)
+        self.assertEqual(set(self.mirrored(self.mirror.apply("cal", [], "token-3", full=False))), {"g1"})
+
+    def test_reset_forces_full_listing(self):
+        """Without a sync token the next sync lists every event"""
+        self.mirror.apply("cal", [], "token-1", full=True)
+        self.mirror.reset("cal")
+        self.assertIsNone(self.mirror.sync_token("cal"))
+
+
+class TestSyncEvents(unittest.TestCase):
+    """Test cases for GoogleCalendarClient.sync_events"""
+
+    def setUp(self):
+        self.client = GoogleCalendarClient()
+        self.client._service = MagicMock()
+        self.calls = []
+
+    def respond(self, pages):
+        """Answer events().list with pages[(syncToken, pageToken)], a response dict or an exception"""
+        def list_events(**params):
+            self.calls.append(params)
+            answer = pages[(params.get("syncToken"), params.get("pageToken"))]
+
+            def execute():
+                if isinstance(answer, Exception):
+                    raise answer
+                return answer
+            return SimpleNamespace(execute=execute)
+        self.client._service.events.return_value.list.side_effect = list_events
+
+    def test_incremental_listing(self):
+        """A sync token lists only changed events, page by page"""
+        self.respond({
+            ("token-1", None): {"items": [gcal_event("g1", "p1")], "nextPageToken": "page-2"},
+            ("token-1", "page-2"): {"items": [gcal_event("g2", status="cancelled")], "nextSyncToken": "token-2"},
+        })
+        events, next_token, full = self.client.sync_events("cal", "token-1")
+        self.assertEqual([event["id"] for event in events], ["g1", "g2"])
+        self.assertEqual(next_token, "token-2")
+        self.assertFalse(full)
+
+    def test_expired_sync_token_falls_back_to_full_listing(self):
+        """410 Gone drops the partial listing and lists every event from the first page"""
+        self.respond({
+            ("expired", None): {"items": [gcal_event("g1", "p1")], "nextPageToken": "page-2"},
+            ("expired", "page-2"): http_error(410),
+            (None, None): {"items": [gcal_event("g1", "p1"), gcal_event("g2", "p2")], "nextPageToken": "page-2"},
+            (None, "page-2"): {"items": [gcal_event("g3", "p3")], "nextSyncToken": "fresh"},
+        })
+        events, next_token, full = self.client.sync_events("cal", "expired")
+
+        self.assertEqual([event["id"] for event in events], ["g1", "g2", "g3"])
+        self.assertEqual(next_token, "fresh")
+        self.assertTrue(full)
+        self.assertEqual([(call.get("syncToken"), call["pageToken"]) for call in self.calls],
+                         [("expired", None), ("expired", "page-2"), (None, None), (None, "page-2")])
+
+    def test_gone_without_sync_token_is_an_error(self):
+        """A 410 on a full listing is not retried"""
+        self.respond({(None, None): http_error(410)})
+        self.assertIsNone(self.client.sync_events("cal"))
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
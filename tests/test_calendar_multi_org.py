@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calendar_support import db_connect, reset_database
+from modules.organizations.models import Organization
+from modules.calendar.service import EVENT_COUNT_KEYS, MultiOrgCalendarService
+from modules.calendar.utils import ApiLimiter
+
+
+def add_organizations(*organizations):
+    db = next(db_connect.get_db())
+    try:
+        for org_id, notion_database_id in organizations:
+            db.add(Organization(id=org_id, name=f"Org {org_id}", prefix=f"org{org_id}", guild_id=str(org_id),
+                                notion_database_id=notion_database_id, google_calendar_id=f"cal-{org_id}",
+                                calendar_sync_enabled=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+class TestSyncAllOrganizations(unittest.TestCase):
+    """Test cases for syncing organizations on a thread pool"""
+
+    def setUp(self):
+        reset_database()
+        add_organizations((2, "db-2"), (3, None), (4, "db-4"))
+        self.service = MultiOrgCalendarService()
+        self.threads = {}
+
+        # Workers are copies of the service, so they share this stand-in for the per-organization sync
+        def sync_organization(organization_id, parent_transaction=None):
+            self.threads[organization_id] = threading.current_thread().name
+            if organization_id == 2:
+                raise RuntimeError("Notion is down")
+            # The first organization finishes last
+            time.sleep(0.2 if organization_id == 1 else 0.01)
+            counts = dict.fromkeys(EVENT_COUNT_KEYS, 0)
+            counts.update(created=organization_id, unchanged=10)
+            return {"status": "success", "events_processed": [{}] * organization_id, "event_counts": counts}
+        self.service.sync_organization_notion_to_google = sync_organization
+
+    def test_failures_are_isolated_and_results_ordered(self):
+        results = self.service.sync_all_organizations()
+
+        self.assertEqual(results["status"], "partial_success")
+        self.assertEqual([org["organization_id"] for org in results["organization_results"]], [1, 2, 3, 4])
+        self.assertEqual([org["status"] for org in results["organization_results"]], ["success", "error", "skipped", "success"])
+        self.assertEqual(results["organization_results"][1]["message"], "Notion is down")
+        self.assertEqual((results["organizations_processed"], results["organizations_failed"], results["organizations_skipped"]), (2, 1, 1))
+        self.assertTrue(all(thread.startswith("calendar-sync") for thread in self.threads.values()))
+
+    def test_event_counts_and_durations(self):
+        results = self.service.sync_all_organizations()
+
+        self.assertEqual(results["event_counts"], {**dict.fromkeys(EVENT_COUNT_KEYS, 0), "created": 5, "unchanged": 20})
+        self.assertEqual(results["organization_results"][3]["events_processed"], 4)
+        self.assertTrue(all("duration_seconds" in org for org in results["organization_results"]))
+        self.assertGreaterEqual(results["organization_results"][0]["duration_seconds"], 0.2)
+        self.assertIn("duration_seconds", results)
+        self.assertEqual(set(results["api_limits"]), {"google", "notion"})
+
+
+class TestApiLimiter(unittest.TestCase):
+    """Test cases for the shared per-API concurrency and rate limits"""
+
+    def test_max_concurrent(self):
+        limiter = ApiLimiter("test", max_concurrent=2)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def call():
+            with limiter.limit():
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.05)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(limiter.stats()["calls"], 6)
+
+    def test_per_second(self):
+        """An idle limiter lets a short burst through, then spaces calls 1/per_second apart"""
+        now = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = ApiLimiter("test", per_second=2, clock=lambda: now[0], sleep=sleep)
+        started = []
+        for _ in range(6):
+            with limiter.limit():
+                started.append(now[0] - 100)
+        self.assertEqual(started, [0.0, 0.0, 0.0, 0.5, 1.0, 1.5])
+        self.assertEqual(sleeps, [0.5, 0.5, 0.5])
+
+        # A batch of 4 sub-requests takes two seconds' worth of the rate
+        with limiter.limit(weight=4):
+            started.append(now[0] - 100)
+        with limiter.limit():
+            started.append(now[0] - 100)
+        self.assertEqual(started[-2:], [2.0, 4.0])
+        self.assertEqual(limiter.stats()["calls"], 11)
+        self.assertEqual(limiter.stats()["waited_seconds"], 4.0)
+
+    def test_unlimited_by_default(self):
+        limiter = ApiLimiter("test", sleep=lambda seconds: self.fail("unlimited calls never wait"))
+        for _ in range(100):
+            with limiter.limit():
+                pass
+        self.assertEqual(limiter.stats()["calls"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calendar_support import db_connect, notion_page, reset_database
+from modules.calendar.snapshot import NotionSnapshotStore
+
+
+class TestNotionSnapshotStore(unittest.TestCase):
+    """Test cases for the incremental Notion snapshot"""
+
+    def setUp(self):
+        reset_database()
+        self.store = NotionSnapshotStore(db_connect, full_sync_interval=timedelta(hours=24))
+        self.now = datetime(2024, 5, 2, 12, 0)
+
+    def full_sync(self, pages):
+        return self.store.apply(1, "db", pages, full=True, now=self.now)
+
+    def test_plan_full_fetch_without_state(self):
+        """The first sync of an organization fetches everything"""
+        self.assertEqual(self.store.plan(1, "db", now=self.now), (None, "no snapshot yet"))
+
+    def test_plan_incremental_after_full_fetch(self):
+        """After a full fetch, only pages edited since the watermark are fetched"""
+        self.full_sync([notion_page("a", "2024-05-01T10:00:00.000Z"), notion_page("b", "2024-05-01T11:30:00.000Z")])
+        self.assertEqual(self.store.plan(1, "db", now=self.now + timedelta(hours=1)), (datetime(2024, 5, 1, 11, 30), None))
+
+    def test_plan_full_fetch_reasons(self):
+        """Changed database, the periodic reconciliation and force_full all fetch everything"""
+        self.full_sync([notion_page("a")])
+        self.assertEqual(self.store.plan(1, "other-db", now=self.now), (None, "Notion database changed"))
+        self.assertEqual(self.store.plan(1, "db", now=self.now + timedelta(hours=24)), (None, "periodic reconciliation"))
+        self.assertEqual(self.store.plan(1, "db", force_full=True, now=self.now), (None, "forced"))
+
+        self.store.require_full_sync(1)
+        self.assertEqual(self.store.plan(1, "db", now=self.now), (None, "periodic reconciliation"))
+
+    def test_incremental_fetch_merges_into_snapshot(self):
+        """Changed pages replace their stored copy, new ones are added and the rest are kept"""
+        self.full_sync([notion_page("a", title="Old"), notion_page("b")])
+        update = self.store.apply(1, "db", [
+            notion_page("a", "2024-05-02T09:00:00.000Z", title="New"),
+            notion_page("c", "2024-05-02T09:30:00.000Z"),
+        ], full=False, now=self.now)
+
+        self.assertFalse(update.full)
+        self.assertEqual(update.changed_page_ids, {"a", "c"})
+        self.assertEqual(update.removed_page_ids, set())
+        pages = {page["id"]: page for page in update.pages}
+        self.assertEqual(set(pages), {"a", "b", "c"})
+        self.assertEqual(pages["a"]["properties"]["Name"]["title"][0]["plain_text"], "New")
+        self.assertEqual({page["id"] for page in self.store.pages(1)}, {"a", "b", "c"})
+
+    def test_refetched_unchanged_page_is_not_reported(self):
+        """A page fetched again with the same edit time and content is not a change"""
+        self.full_sync([notion_page("a")])
+        update = self.store.apply(1, "db", [notion_page("a")], full=False, now=self.now)
+        self.assertFalse(update.has_changes)
+
+    def test_unpublished_and_archived_pages_are_dropped(self):
+        """A page that is no longer published leaves the snapshot"""
+        self.full_sync([notion_page("a"), notion_page("b"), notion_page("c")])
+        update = self.store.apply(1, "db", [
+            notion_page("a", "2024-05-02T09:00:00.000Z", published=False),
+            notion_page("b", "2024-05-02T09:00:00.000Z", archived=True),
+            notion_page("d", "2024-05-02T09:00:00.000Z", published=False),
+        ], full=False, now=self.now)
+
+        self.assertEqual(update.removed_page_ids, {"a", "b"})
+        self.assertEqual([page["id"] for page in update.pages], ["c"])
+
+    def test_page_published_then_unpublished_within_one_fetch(self):
+        """A page listed twice in a paginated fetch ends up in its last state"""
+        update = self.store.apply(1, "db", [
+            notion_page("a", "2024-05-02T09:00:00.000Z"),
+            notion_page("a", "2024-05-02T09:05:00.000Z", published=False),
+        ], full=False, now=self.now)
+
+        self.assertEqual(update.pages, [])
+        self.assertEqual(self.store.pages(1), [])
+
+    def test_full_fetch_replaces_snapshot(self):
+        """Stored pages missing from a full fetch were deleted in Notion and are removed"""
+        self.full_sync([notion_page("a"), notion_page("b")])
+        update = self.store.apply(1, "db", [notion_page("b"), notion_page("c")], full=True, now=self.now)
+
+        self.assertTrue(update.full)
+        self.assertEqual(update.removed_page_ids, {"a"})
+        self.assertEqual(update.changed_page_ids, {"c"})
+        self.assertEqual({page["id"] for page in self.store.pages(1)}, {"b", "c"})
+
+    def test_watermark_advances_to_latest_edit(self):
+        """The watermark is the latest edit time seen and never moves back"""
+        update = self.full_sync([notion_page("a", "2024-05-01T10:00:00.000Z")])
+        self.assertEqual(update.watermark, datetime(2024, 5, 1, 10, 0))
+
+        update = self.store.apply(1, "db", [notion_page("b", "2024-05-01T12:00:00.000Z")], full=False, now=self.now)
+        self.assertEqual(update.watermark, datetime(2024, 5, 1, 12, 0))
+
+        # Notion's filter is inclusive, so an older page can come back with the newer ones
+        update = self.store.apply(1, "db", [notion_page("a", "2024-05-01T10:00:00.000Z")], full=False, now=self.now)
+        self.assertEqual(update.watermark, datetime(2024, 5, 1, 12, 0))
+
+        update = self.store.apply(1, "db", [], full=False, now=self.now)
+        self.assertEqual(update.watermark, datetime(2024, 5, 1, 12, 0))
+
+    def test_empty_full_fetch_sets_watermark_to_now(self):
+        """A full fetch of an empty database still records when it ran"""
+        update = self.full_sync([])
+        self.assertEqual(update.watermark, self.now)
+        self.assertEqual(self.store.plan(1, "db", now=self.now), (self.now, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
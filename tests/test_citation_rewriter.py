@@ -0,0 +1,75 @@
+import unittest
+import random
+import re
+import sys
+import os
+
+# Add the project root (and scripts, for the baseline implementation) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from modules.summarizer.citations import rewrite_citations
+from benchmark_citations import parse_citations_multipass, build_citation_map, build_model_output
+
+
+class TestCitationRewriter(unittest.TestCase):
+    """Check the single-scan citation rewriter against the multi-pass implementation it replaced"""
+
+    def setUp(self):
+        self.citation_map = {f"c{i}": f"https://discord.com/channels/123/456/{789 + i}" for i in range(1, 12)}
+
+    def assertSameAsBaseline(self, text, citation_map=None):
+        citation_map = citation_map or self.citation_map
+        self.assertEqual(
+            rewrite_citations(text, citation_map),
+            parse_citations_multipass(text, citation_map),
+            f"Output differs for {text!r}"
+        )
+
+    def test_realistic_model_output(self):
+        """Synthetic summaries of growing windows match the baseline exactly"""
+        for message_count in (10, 100, 1000):
+            self.assertSameAsBaseline(build_model_output(message_count, seed=message_count), build_citation_map(message_count))
+
+    def test_nested_brackets(self):
+        """Every nesting depth collapses the same way as before"""
+        for depth in range(1, 7):
+            for closing in range(1, 7):
+                self.assertSameAsBaseline("x " + "[" * depth + "c1" + "]" * closing + " y")
+                self.assertSameAsBaseline("[" * depth + " c2 " + "]" * closing)
+
+    def test_existing_links_untouched(self):
+        """Citations that already have a link target keep it, including citations inside it"""
+        self.assertSameAsBaseline("See [c1](https://example.com) and [2](see [c3, c4]) then [5]")
+        self.assertSameAsBaseline("Unclosed [1]( target [c2]")
+
+    def test_malformed_groups(self):
+        """Odd groups and ranges are handled exactly like before"""
+        for text in ["[c1,]", "[c1, c2,]", "[c1c2]", "[c1-c3c4]", "[1,2,]", "[ 1-2]", "[3-1]", "[c01]", "[c1 , c2]"]:
+            self.assertSameAsBaseline(text)
+
+    def test_randomized_equivalence(self):
+        """Random mixes of citation fragments match the baseline"""
+        pieces = ["[", "]", "[[", "]]", "c", "c1", "c2", "c12", "c05", "1", "2", "-", ",", ", ", " ", "\n",
+                  "(", ")", "(x)", "[c1]", "[c2-c4]", "[1]", "[2-3]", "[1, 2]", "x", "[c3, c5]", "c10", "99"]
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 14)))
+            if any(int(a) > int(b) for a, b in re.findall(r'c(\d+)-c(\d+)', text)):
+                # Reversed ranges are the documented exception
+                continue
+            try:
+                expected = parse_citations_multipass(text, self.citation_map)
+            except ValueError:
+                with self.assertRaises(ValueError):
+                    rewrite_citations(text, self.citation_map)
+                continue
+            self.assertEqual(rewrite_citations(text, self.citation_map), expected, f"Output differs for {text!r}")
+
+    def test_reversed_range_is_dropped(self):
+        """A reversed range expands to nothing, like before"""
+        self.assertEqual(rewrite_citations("a [c5-c3] b", self.citation_map), "a  b")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.message_store import MessageStore
+from modules.summarizer.digests import DigestSettings, DigestStore, DigestBudget, digest_is_due
+
+NOW = datetime(2025, 5, 15, 12, 0, tzinfo=timezone.utc)
+
+
+class TestDigestSettings(unittest.TestCase):
+    """Test cases for per-organization digest settings"""
+
+    def test_defaults_when_not_configured(self):
+        settings = DigestSettings.from_config({})
+        self.assertFalse(settings.enabled)
+        self.assertEqual(settings.timeframes, ["24h", "last week"])
+        self.assertTrue(settings.is_off_peak(NOW))
+
+    def test_reads_organization_config(self):
+        settings = DigestSettings.from_config({"summarizer_digests": {
+            "enabled": True,
+            "channel_ids": [123, "456"],
+            "timeframes": ["3 days"],
+            "refresh_minutes": "30",
+            "daily_token_budget": -5,
+            "off_peak_hours_utc": [8, 9, 30]
+        }})
+        self.assertEqual(settings.channel_ids, ["123", "456"])
+        self.assertEqual(settings.timeframes, ["3 days"])
+        self.assertEqual(settings.refresh_minutes, 30)
+        # Invalid values fall back to the defaults
+        self.assertEqual(settings.daily_token_budget, DigestSettings().daily_token_budget)
+        self.assertEqual(settings.off_peak_hours_utc, [8, 9])
+        self.assertFalse(settings.is_off_peak(NOW))
+
+    def test_malformed_off_peak_hours_are_skipped(self):
+        settings = DigestSettings.from_config({"summarizer_digests": {"off_peak_hours_utc": ["x", None, "10", 12.0, -1]}})
+        self.assertEqual(settings.off_peak_hours_utc, [10, 12])
+        settings = DigestSettings.from_config({"summarizer_digests": {"off_peak_hours_utc": "8-12"}})
+        self.assertEqual(settings.off_peak_hours_utc, [])
+        self.assertTrue(settings.is_off_peak(NOW.replace(hour=9)))
+
+
+class TestDigestStore(unittest.TestCase):
+    """Test cases for storing and serving digests"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = DigestStore(db_url=f"sqlite:///{os.path.join(self.tmp_dir, 'digests.db')}")
+
+    def tearDown(self):
+        self.store.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def save(self, timeframe, start, end, generated_at=NOW, serve_within_minutes=60):
+        self.store.save(1, "10", "20", timeframe, start, end, {"summary": timeframe, "message_count": 3, "input_tokens": 50},
+                        serve_within_minutes, generated_at=generated_at)
+
+    def test_open_window_served_while_fresh(self):
+        """A "24h" digest answers "24h" requests until it is older than serve_within_minutes"""
+        self.save("24h", NOW - timedelta(hours=24), None)
+        later = NOW + timedelta(minutes=30)
+        result = self.store.find("20", later - timedelta(hours=24), None, now=later)
+        self.assertEqual(result["summary"], "24h")
+        self.assertEqual(result["digest_generated_at"], NOW.isoformat())
+
+        much_later = NOW + timedelta(minutes=90)
+        self.assertIsNone(self.store.find("20", much_later - timedelta(hours=24), None, now=much_later))
+        self.assertEqual(self.store.stats(), {"hits": 1, "misses": 1, "generated": 1})
+
+    def test_closed_window_served_while_unchanged(self):
+        """A "last week" digest keeps answering requests for the same week"""
+        start = datetime(2025, 5, 5, tzinfo=timezone.utc)
+        end = datetime(2025, 5, 11, 23, 59, 59, tzinfo=timezone.utc)
+        self.save("last week", start, end)
+        self.assertIsNotNone(self.store.find("20", start, end, now=NOW + timedelta(days=2)))
+        # A different window, or a different channel, isn't covered
+        self.assertIsNone(self.store.find("20", start - timedelta(days=7), end - timedelta(days=7), now=NOW))
+        self.assertIsNone(self.store.find("21", start, end, now=NOW))
+
+    def test_refresh_replaces_digest(self):
+        self.save("24h", NOW - timedelta(hours=24), None)
+        self.save("24h", NOW - timedelta(hours=23), None, generated_at=NOW + timedelta(hours=1))
+        self.assertEqual(self.store.get("20", "24h").generated_at, (NOW + timedelta(hours=1)).replace(tzinfo=None))
+
+    def test_digest_is_due(self):
+        settings = DigestSettings(refresh_minutes=120)
+        self.assertTrue(digest_is_due(None, settings, NOW, None, NOW))
+
+        self.save("24h", NOW - timedelta(hours=24), None)
+        digest = self.store.get("20", "24h")
+        self.assertFalse(digest_is_due(digest, settings, NOW - timedelta(hours=23), None, NOW + timedelta(hours=1)))
+        self.assertTrue(digest_is_due(digest, settings, NOW - timedelta(hours=22), None, NOW + timedelta(hours=2)))
+
+        start = datetime(2025, 5, 5, tzinfo=timezone.utc)
+        self.save("last week", start, start + timedelta(days=7))
+        digest = self.store.get("20", "last week")
+        self.assertFalse(digest_is_due(digest, settings, start, start + timedelta(days=7), NOW))
+        self.assertTrue(digest_is_due(digest, settings, start + timedelta(days=7), start + timedelta(days=14), NOW))
+
+    def test_shares_the_message_store_engine(self):
+        """Given the message store's engine, digests live in its database without a second engine"""
+        message_store = MessageStore(f"sqlite:///{os.path.join(self.tmp_dir, 'messages.db')}")
+        store = DigestStore(engine=message_store.engine)
+        self.assertIs(store.engine, message_store.engine)
+        store.save(1, "10", "20", "24h", NOW - timedelta(hours=24), None, {"summary": "shared", "message_count": 3},
+                   60, generated_at=NOW)
+        self.assertIn("shared", DigestStore(engine=message_store.engine).get("20", "24h").payload)
+        message_store.engine.dispose()
+
+
+class TestDigestBudget(unittest.TestCase):
+    """Test cases for the daily digest token budget"""
+
+    def test_budget_resets_daily(self):
+        budget = DigestBudget()
+        budget.spend(1, 400, NOW)
+        budget.spend(2, 100, NOW)
+        self.assertEqual(budget.remaining(1, 1000, NOW), 600)
+        self.assertEqual(budget.remaining(2, 1000, NOW), 900)
+        self.assertEqual(budget.remaining(1, 1000, NOW + timedelta(days=1)), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
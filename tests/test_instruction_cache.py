@@ -0,0 +1,77 @@
+import unittest
+import asyncio
+import time
+import sys
+import os
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from summarizer_support import FakeCaches, FakeModels, make_messages, summarizer_service
+from modules.summarizer.instruction_cache import InstructionCache
+from modules.summarizer.service import SUMMARY_SYSTEM_INSTRUCTION, ASK_SYSTEM_INSTRUCTION
+
+
+class TestInstructionCache(unittest.TestCase):
+    """Test cases for cached instruction prefixes"""
+
+    def setUp(self):
+        self.caches = FakeCaches()
+        self.models = FakeModels()
+        self.service = summarizer_service(self.models, self.caches)
+
+    def summarize(self):
+        return asyncio.run(self.service.generate_summary(make_messages(5), "24h", "u", "c", "g"))
+
+    def test_summary_uses_cached_instructions(self):
+        """Only the time range and messages are sent; the instructions come from the handle"""
+        result = self.summarize()
+        request = self.models.requests[0]
+        self.assertNotIn("CRITICAL INSTRUCTIONS", request.contents)
+        self.assertIn("Summary Time Range: 24h", request.contents)
+        self.assertEqual(request.config.cached_content, "cachedContents/1")
+        self.assertEqual(self.caches.created, [SUMMARY_SYSTEM_INSTRUCTION])
+        self.assertTrue(result["cached_prefix"])
+        self.assertEqual(result["cached_prefix_tokens"], 900)
+
+    def test_handle_is_reused_per_instruction_block(self):
+        """One handle per instruction block, shared by later requests"""
+        self.summarize()
+        asyncio.run(self.service.answer_question(make_messages(5), "budget?", "24h", "u", "c", "g"))
+        asyncio.run(self.service.answer_question(make_messages(6), "budget?", "24h", "u", "c", "g"))
+        self.assertEqual(self.caches.created, [SUMMARY_SYSTEM_INSTRUCTION, ASK_SYSTEM_INSTRUCTION])
+        self.assertEqual(self.service.get_cache_stats()["instruction_cache"]["cached_prefix_tokens"], 2700)
+
+    def test_handle_refreshed_before_expiry(self):
+        """A handle close to expiry gets its TTL extended instead of being recreated"""
+        self.summarize()
+        entry = next(iter(self.service.instruction_cache._entries.values()))
+        entry.expires_at = time.monotonic() + 60
+        self.summarize()
+        self.assertEqual(self.caches.updated, [("cachedContents/1", "3600s")])
+        self.assertEqual(len(self.caches.created), 1)
+
+    def test_falls_back_to_system_instruction(self):
+        """Without caching the block is sent as a system instruction and creation isn't retried right away"""
+        self.caches.fail = True
+        result = self.summarize()
+        self.summarize()
+        config = self.models.requests[-1].config
+        self.assertIsNone(config.cached_content)
+        self.assertEqual(config.system_instruction, SUMMARY_SYSTEM_INSTRUCTION)
+        self.assertFalse(result["cached_prefix"])
+        self.assertEqual(self.service.instruction_cache.stats()["failures"], 1)
+
+    def test_concurrent_requests_create_one_handle(self):
+        cache = InstructionCache()
+
+        async def run():
+            return await asyncio.gather(*(cache.config_for(self.service.gemini_client, "model", "rules") for _ in range(5)))
+
+        configs = asyncio.run(run())
+        self.assertEqual({config.cached_content for config in configs}, {"cachedContents/1"})
+        self.assertEqual(len(self.caches.created), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import asyncio
+import re
+import sys
+import os
+from unittest.mock import patch
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from summarizer_support import FakeModels, make_messages, summarizer_service
+import modules.summarizer.service as service_module
+from modules.summarizer.service import SummarizerService
+
+
+def echo_citations(model, contents):
+    """Reply for FakeModels that echoes the citations it is given"""
+    # Only look at the messages/notes section, not the format example
+    citations = re.findall(r'\[(c\d+)\]', contents.rsplit(":\n", 1)[-1])
+    if "MESSAGES IN THIS PART" in contents or "NOTES TO MERGE" in contents:
+        return "\n".join(f"- point [{cid}]" for cid in citations[:2])
+    return "# Conversation Summary ✨\n" + "\n".join(f"- merged [{cid}]" for cid in citations)
+
+
+def long_messages(count):
+    return make_messages([f"message {i} " + "x" * 40 for i in range(count)])
+
+
+class TestMapReduceSummarization(unittest.TestCase):
+    """Test cases for the map-reduce path of SummarizerService.generate_summary"""
+
+    def setUp(self):
+        self.fake_models = FakeModels(echo_citations, delay=0.01)
+        self.service = summarizer_service(self.fake_models)
+
+    def test_chunks_respect_token_budget(self):
+        """Chunks stay within budget and keep every line in order"""
+        lines, _ = self.service._build_conversation(long_messages(50))
+        chunks = self.service._chunk_texts(lines, 100)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([line for chunk in chunks for line in chunk], lines)
+        for chunk in chunks:
+            self.assertTrue(len(chunk) == 1 or sum(service_module.estimate_tokens(line) for line in chunk) <= 100)
+
+    def test_citation_ids_are_global_across_chunks(self):
+        """Citation IDs keep counting across chunk boundaries"""
+        lines, citation_map = self.service._build_conversation(long_messages(30))
+        chunks = self.service._chunk_texts(lines, 60)
+        second_chunk_ids = re.findall(r'\[(c\d+)\]', "".join(chunks[1]))
+        self.assertEqual(second_chunk_ids[0], f"c{len(chunks[0]) + 1}")
+        self.assertEqual(len(citation_map), 30)
+
+    def test_small_window_uses_single_prompt(self):
+        """Windows under the threshold are summarized with one request"""
+        result = asyncio.run(self.service.generate_summary(long_messages(5), "24h", "u", "c", "g"))
+        self.assertEqual(len(self.fake_models.prompts), 1)
+        self.assertEqual(result["chunk_count"], 1)
+
+    def test_large_window_uses_map_reduce(self):
+        """Large windows are summarized per chunk, then reduced, with citations resolved"""
+        messages = long_messages(40)
+        with patch.object(service_module, "MAP_REDUCE_TOKEN_THRESHOLD", 200), \
+                patch.object(service_module, "CHUNK_TOKEN_BUDGET", 150):
+            result = asyncio.run(self.service.generate_summary(messages, "24h", "u", "c", "g"))
+
+        self.assertGreater(result["chunk_count"], 1)
+        # Chunks are summarized concurrently, but never more than the configured limit at once
+        self.assertGreater(self.fake_models.max_in_flight, 1)
+        self.assertLessEqual(self.fake_models.max_in_flight, service_module.MAP_REDUCE_MAX_CONCURRENCY)
+        map_prompts = [p for p in self.fake_models.prompts if "MESSAGES IN THIS PART" in p]
+        self.assertEqual(len(map_prompts), result["chunk_count"])
+        self.assertTrue(any("NOTES TO SUMMARIZE" in p for p in self.fake_models.prompts))
+        # The first message is cited in the first chunk's notes and must reach the final summary
+        self.assertIn(f"[1]({messages[0]['jump_url']})", result["summary"])
+        self.assertEqual(result["message_count"], 40)
+
+    def test_failed_chunk_does_not_lose_summary(self):
+        """A chunk that keeps failing is dropped instead of failing the whole summary"""
+        def flaky(model, contents):
+            if "part 1 of" in contents:
+                raise RuntimeError("boom")
+            return echo_citations(model, contents)
+
+        self.fake_models.reply = flaky
+        with patch.object(service_module, "MAP_REDUCE_TOKEN_THRESHOLD", 200), \
+                patch.object(service_module, "CHUNK_TOKEN_BUDGET", 150), \
+                patch.object(SummarizerService, "_generate_content_with_retry",
+                             lambda self, model, contents, generation_config=None: self.gemini_client.aio.models.generate_content(model=model, contents=contents)):
+            result = asyncio.run(self.service.generate_summary(long_messages(40), "24h", "u", "c", "g"))
+
+        self.assertIn("Conversation Summary", result["summary"])
+        self.assertNotIn("API error", result["summary"])
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestAsyncServiceCalls(unittest.TestCase):
+    """Test cases for the non-blocking Gemini request path"""
+
+    def setUp(self):
+        self.fake_models = FakeModels(echo_citations, delay=0.01)
+        self.service = summarizer_service(self.fake_models)
+
+    def test_concurrent_requests_overlap(self):
+        """Requests from different channels run concurrently instead of queueing"""
+        async def run_both():
+            return await asyncio.gather(
+                self.service.generate_summary(long_messages(5), "24h", "u", "c1", "g1"),
+                self.service.answer_question(long_messages(5), "who?", "24h", "u", "c2", "g2")
+            )
+
+        summary, answer = asyncio.run(run_both())
+        self.assertEqual(self.fake_models.max_in_flight, 2)
+        self.assertEqual(summary["message_count"], 5)
+        self.assertEqual(answer["message_count"], 5)
+
+    def test_retry_is_async(self):
+        """Failed requests are retried without blocking the event loop"""
+        attempts = []
+        original = self.fake_models.generate_content
+
+        async def fail_once(model, contents, **kwargs):
+            attempts.append(contents)
+            if len(attempts) == 1:
+                raise RuntimeError("temporary failure")
+            return await original(model, contents, **kwargs)
+
+        self.fake_models.generate_content = fail_once
+
+        async def run_with_ticker():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks += 1
+
+            ticker_task = asyncio.ensure_future(ticker())
+            result = await self.service.generate_summary(long_messages(3), "24h", "u", "c", "g")
+            ticker_task.cancel()
+            return result, ticks
+
+        result, ticks = asyncio.run(run_with_ticker())
+        self.assertEqual(len(attempts), 2)
+        self.assertNotIn("API error", result["summary"])
+        # The loop kept running during the backoff sleep between attempts
+        self.assertGreater(ticks, 0)
@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import json
+from unittest.mock import patch
+
+# Add the project root (and scripts, for the benchmark harness) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from modules.summarizer.message_record import MessageRecord
+from modules.summarizer.prompt_builder import build_conversation
+from modules.summarizer.citations import rewrite_citations
+import modules.summarizer.message_record as message_record
+from modules.summarizer.utils import snowflake_to_datetime
+from benchmark_messages import synthetic_window, as_dicts, as_records, run_benchmark
+
+MESSAGE_ID = 1372540092063121408
+
+
+class TestMessageRecord(unittest.TestCase):
+    """Test cases for the slotted message record"""
+
+    def setUp(self):
+        self.record = MessageRecord(MESSAGE_ID, 111, 222, 333, "alice", "hello")
+
+    def test_reads_as_message_dictionary(self):
+        """A record compares equal to the dictionary the cog used to build"""
+        expected = {
+            "id": str(MESSAGE_ID),
+            "content": "hello",
+            "author": {"id": "333", "name": "alice"},
+            "timestamp": snowflake_to_datetime(MESSAGE_ID).strftime("%Y-%m-%d %H:%M:%S"),
+            "jump_url": f"https://discord.com/channels/111/222/{MESSAGE_ID}"
+        }
+        self.assertEqual(self.record, expected)
+        self.assertEqual(json.loads(json.dumps(self.record.to_dict())), expected)
+        self.assertIn("id", self.record)
+        self.assertIsNone(self.record.get("reactions"))
+        with self.assertRaises(KeyError):
+            self.record["reactions"]
+
+    def test_compact(self):
+        self.assertFalse(hasattr(self.record, "__dict__"))
+
+    def test_dm_jump_url(self):
+        record = MessageRecord(MESSAGE_ID, None, 222, 333, "alice", "hello")
+        self.assertEqual(record.jump_url, f"https://discord.com/channels/@me/222/{MESSAGE_ID}")
+
+    def test_only_cited_messages_build_jump_urls(self):
+        """Building the prompt builds no URLs; resolving citations builds one per cited message"""
+        records = as_records(synthetic_window(1000))
+        with patch.object(message_record, "build_jump_url", wraps=message_record.build_jump_url) as build_jump_url:
+            conversation = build_conversation(records)
+            self.assertEqual(build_jump_url.call_count, 0)
+            text = rewrite_citations("- point [c3]\n- range [c5-c7]\n- again [3]", conversation.citation_map)
+            self.assertEqual(build_jump_url.call_count, 4)
+        self.assertEqual(set(conversation.citation_map.resolved()), {"c3", "c5", "c6", "c7"})
+        self.assertIn(f"[3]({conversation.citation_map['c3']})", text)
+
+
+class TestMessageBenchmark(unittest.TestCase):
+    """Test cases for the message window benchmark harness"""
+
+    def test_records_build_the_same_prompt(self):
+        rows = synthetic_window(300)
+        dict_conversation = build_conversation(as_dicts(rows))
+        record_conversation = build_conversation(as_records(rows))
+        self.assertEqual(dict_conversation.lines, record_conversation.lines)
+        self.assertEqual(dict_conversation.citation_map, record_conversation.citation_map)
+        self.assertEqual(dict_conversation.citation_message_ids, record_conversation.citation_message_ids)
+
+    def test_records_use_less_memory(self):
+        result = run_benchmark(2000, repeat=1)
+        self.assertTrue(result["identical"])
+        self.assertLess(result["record_bytes"] * 4, result["dict_bytes"])
+
+
+if __name__ == '__main__':
+    unittest.main()
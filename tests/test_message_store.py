@@ -0,0 +1,192 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.message_store import MessageStore
+from modules.summarizer.utils import datetime_to_snowflake, snowflake_to_datetime, split_snowflake_range
+
+GUILD_ID = 111
+CHANNEL_ID = 222
+
+
+def make_message(message_id, content="hello", author_id=1, author_name="alice"):
+    """Build a message dictionary in the format the cog hands to the service"""
+    created = snowflake_to_datetime(message_id)
+    return {
+        "id": str(message_id),
+        "content": content,
+        "author": {"id": str(author_id), "name": author_name},
+        "timestamp": created.strftime("%Y-%m-%d %H:%M:%S"),
+        "jump_url": f"https://discord.com/channels/{GUILD_ID}/{CHANNEL_ID}/{message_id}"
+    }
+
+
+class TestSnowflakeHelpers(unittest.TestCase):
+    """Test cases for the snowflake conversion helpers"""
+
+    def test_round_trip(self):
+        """A datetime survives conversion to a snowflake and back (to the millisecond)"""
+        dt = datetime(2024, 5, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+        self.assertEqual(snowflake_to_datetime(datetime_to_snowflake(dt)), dt)
+
+    def test_high_bound_sorts_after_low_bound(self):
+        """The high snowflake for a millisecond is greater than every low snowflake of it"""
+        dt = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.assertEqual(datetime_to_snowflake(dt, high=True) - datetime_to_snowflake(dt), 2 ** 22 - 1)
+
+    def test_naive_datetime_is_utc(self):
+        """Naive datetimes are interpreted as UTC"""
+        aware = datetime(2024, 5, 1, 8, tzinfo=timezone.utc)
+        self.assertEqual(datetime_to_snowflake(aware.replace(tzinfo=None)), datetime_to_snowflake(aware))
+
+    def test_split_range_covers_every_snowflake_once(self):
+        """Sub-ranges are consecutive, don't overlap and together cover the original range"""
+        start = datetime(2025, 5, 1, tzinfo=timezone.utc)
+        after_id = datetime_to_snowflake(start, high=True)
+        before_id = datetime_to_snowflake(start + timedelta(days=30))
+        ranges = split_snowflake_range(after_id, before_id, 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (after_id, before_id))
+        for (_, upper), (lower, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(lower, upper - 1)
+        # A message created exactly on a boundary belongs to the later sub-range only
+        boundary = ranges[1][1]
+        self.assertEqual([lower < boundary < upper for lower, upper in ranges], [False, False, True, False])
+
+    def test_split_range_respects_minimum_span(self):
+        start = datetime(2025, 5, 1, tzinfo=timezone.utc)
+        after_id = datetime_to_snowflake(start, high=True)
+        before_id = datetime_to_snowflake(start + timedelta(hours=10))
+        self.assertEqual(len(split_snowflake_range(after_id, before_id, 8, min_span_ms=4 * 3600 * 1000)), 2)
+        self.assertEqual(split_snowflake_range(after_id, before_id, 8, min_span_ms=24 * 3600 * 1000), [(after_id, before_id)])
+
+
+class TestMessageStore(unittest.TestCase):
+    """Test cases for the persistent summarizer message store"""
+
+    def setUp(self):
+        """Create a store backed by a temporary SQLite file"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = MessageStore(f"sqlite:///{os.path.join(self.tmp_dir, 'messages.db')}")
+        base = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.ids = [datetime_to_snowflake(base + timedelta(minutes=i)) for i in range(10)]
+
+    def tearDown(self):
+        self.store.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_empty_store_needs_whole_window(self):
+        """Without a checkpoint the whole window has to be fetched"""
+        self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, 10, 20), [(10, 20)])
+
+    def test_covered_window_needs_nothing(self):
+        """A window inside the checkpoint is served from disk"""
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 100, 200)
+        self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, 120, 180), [])
+
+    def test_only_gaps_are_fetched(self):
+        """Only the parts of a window outside the checkpoint are reported missing"""
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 100, 200)
+        self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, 150, 300), [(199, 300)])
+        self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, 50, 150), [(50, 101)])
+        self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, 50, 300), [(50, 101), (199, 300)])
+
+    def test_mark_covered_merges_touching_spans(self):
+        """Overlapping spans extend the existing checkpoint"""
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 100, 200)
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 150, 300)
+        self.assertEqual(self.store.get_covered_span(GUILD_ID, CHANNEL_ID), (100, 300))
+
+    def test_disjoint_newer_span_replaces_checkpoint(self):
+        """A newer span that doesn't touch the checkpoint replaces it; an older one is ignored"""
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 100, 200)
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 10, 50)
+        self.assertEqual(self.store.get_covered_span(GUILD_ID, CHANNEL_ID), (100, 200))
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 500, 600)
+        self.assertEqual(self.store.get_covered_span(GUILD_ID, CHANNEL_ID), (500, 600))
+
+    def test_save_and_read_window(self):
+        """Stored messages come back in snowflake order with the service dict format"""
+        messages = [make_message(message_id, content=f"msg {i}") for i, message_id in enumerate(self.ids)]
+        self.assertEqual(self.store.save_messages(GUILD_ID, CHANNEL_ID, reversed(messages)), 10)
+
+        window = self.store.read_window(GUILD_ID, CHANNEL_ID, self.ids[2], self.ids[6])
+        self.assertEqual(window, messages[3:6])
+
+    def test_save_is_idempotent(self):
+        """Saving the same message twice refreshes it instead of duplicating it"""
+        self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(self.ids[0], content="old")])
+        self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(self.ids[0], content="new")])
+        window = self.store.read_window(GUILD_ID, CHANNEL_ID, 0, self.ids[-1])
+        self.assertEqual([msg["content"] for msg in window], ["new"])
+
+    def test_highest_message_id_tracked(self):
+        """The checkpoint records the highest message ID stored for the channel"""
+        self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(message_id) for message_id in self.ids[:5]])
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 0, self.ids[5])
+        self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(self.ids[7])])
+        with self.store.SessionLocal() as db:
+            from modules.summarizer.models import SummarizerChannelState
+            state = db.get(SummarizerChannelState, (GUILD_ID, CHANNEL_ID))
+            self.assertEqual(state.highest_message_id, self.ids[7])
+
+    def test_live_messages_extend_current_span(self):
+        """Gateway messages extend a span that reaches into the live session"""
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 0, self.ids[5])
+        self.store.record_live_message(GUILD_ID, CHANNEL_ID, make_message(self.ids[6]), live_since_id=self.ids[4])
+        self.assertEqual(self.store.get_covered_span(GUILD_ID, CHANNEL_ID), (0, self.ids[6] + 1))
+        self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, self.ids[1], self.ids[6] + 1), [])
+
+    def test_live_messages_do_not_bridge_gaps(self):
+        """A span that ended before the live session started is not extended"""
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 0, self.ids[2])
+        self.store.record_live_message(GUILD_ID, CHANNEL_ID, make_message(self.ids[6]), live_since_id=self.ids[5])
+        self.assertEqual(self.store.get_covered_span(GUILD_ID, CHANNEL_ID), (0, self.ids[2]))
+
+    def test_live_messages_ignored_for_untracked_channels(self):
+        """Channels that were never summarized don't accumulate messages"""
+        self.store.record_live_message(GUILD_ID, CHANNEL_ID, make_message(self.ids[0]), live_since_id=0)
+        self.assertEqual(self.store.read_window(GUILD_ID, CHANNEL_ID, 0, self.ids[-1] + 1), [])
+
+    def test_live_messages_during_first_fetch_are_kept(self):
+        """Messages posted while a channel's first fetch runs are stored before the checkpoint extends over them"""
+        with self.store.fetching(GUILD_ID, CHANNEL_ID):
+            self.assertEqual(self.store.missing_spans(GUILD_ID, CHANNEL_ID, 0, self.ids[5]), [(0, self.ids[5])])
+            self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(message_id) for message_id in self.ids[:5]])
+            self.store.record_live_message(GUILD_ID, CHANNEL_ID, make_message(self.ids[6]), live_since_id=self.ids[4])
+            self.store.mark_covered(GUILD_ID, CHANNEL_ID, 0, self.ids[5])
+        self.store.record_live_message(GUILD_ID, CHANNEL_ID, make_message(self.ids[7]), live_since_id=self.ids[4])
+
+        self.assertEqual(self.store.get_covered_span(GUILD_ID, CHANNEL_ID), (0, self.ids[7] + 1))
+        window = self.store.read_window(GUILD_ID, CHANNEL_ID, 0, self.ids[7] + 1)
+        self.assertEqual([int(msg["id"]) for msg in window], self.ids[:5] + self.ids[6:8])
+
+        # Once the fetch is over, untracked channels are ignored again
+        self.store.record_live_message(GUILD_ID, 999, make_message(self.ids[8]), live_since_id=0)
+        self.assertEqual(self.store.read_window(GUILD_ID, 999, 0, self.ids[-1] + 1), [])
+
+    def test_edit_and_delete(self):
+        """Edits rewrite stored content and deletes remove rows"""
+        self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(message_id) for message_id in self.ids[:3]])
+        self.assertTrue(self.store.update_message_content(GUILD_ID, CHANNEL_ID, self.ids[1], "edited"))
+        self.assertEqual(self.store.delete_messages(GUILD_ID, CHANNEL_ID, [self.ids[0], self.ids[2]]), 2)
+
+        window = self.store.read_window(GUILD_ID, CHANNEL_ID, 0, self.ids[-1])
+        self.assertEqual([(msg["id"], msg["content"]) for msg in window], [(str(self.ids[1]), "edited")])
+
+    def test_channels_are_isolated(self):
+        """Messages and checkpoints are kept per channel"""
+        self.store.save_messages(GUILD_ID, CHANNEL_ID, [make_message(self.ids[0])])
+        self.store.mark_covered(GUILD_ID, CHANNEL_ID, 0, self.ids[1])
+        self.assertEqual(self.store.read_window(GUILD_ID, 999, 0, self.ids[1]), [])
+        self.assertIsNone(self.store.get_covered_span(GUILD_ID, 999))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import os
+import sys
+import random
+import asyncio
+
+# Add the project root (and scripts, for the stand-in and load test) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from google.genai import types
+
+from modules.summarizer.model_backend import StandInClient, StandInAPIError, create_model_client
+from modules.summarizer.service import SummarizerService
+from modules.summarizer.scheduler import is_rate_limit_error
+from benchmark_messages import synthetic_window, as_records
+from standin_model_server import StandInSettings, start_server, fake_reply, cited_ids
+from load_test_summarizer import run_load_test
+
+
+class StandInTestCase(unittest.TestCase):
+    """Runs each test against an in-process stand-in with no delays"""
+
+    settings = StandInSettings(time_scale=0)
+
+    def run_with_standin(self, test):
+        async def runner():
+            model, server, url = await start_server(self.settings)
+            client = StandInClient(url)
+            try:
+                return await test(model, client)
+            finally:
+                await client.aclose()
+                await server.cleanup()
+        return asyncio.run(runner())
+
+
+class TestStandInClient(StandInTestCase):
+    """Test cases for the stand-in model client"""
+
+    def test_generate_content(self):
+        async def test(model, client):
+            response = await client.aio.models.generate_content(
+                model="gemini-2.5-flash", contents="[c1] alice: hi\n[c2] bob: hello",
+                config=types.GenerateContentConfig(system_instruction="Summarize"))
+            self.assertIn("[c", response.text)
+            self.assertGreater(response.usage_metadata.prompt_token_count, 0)
+            self.assertEqual(model.stats["requests"], 1)
+        self.run_with_standin(test)
+
+    def test_stream_ends_with_usage(self):
+        async def test(model, client):
+            stream = await client.aio.models.generate_content_stream(
+                model="gemini-2.5-flash", contents="[c1] alice: " + "words " * 500)
+            chunks = [chunk async for chunk in stream]
+            self.assertGreater(len(chunks), 1)
+            self.assertIsNotNone(chunks[-1].usage_metadata.candidates_token_count)
+            self.assertIsNone(chunks[0].usage_metadata.candidates_token_count)
+        self.run_with_standin(test)
+
+    def test_cached_instructions(self):
+        async def test(model, client):
+            cache = await client.aio.caches.create(
+                model="gemini-2.5-flash",
+                config=types.CreateCachedContentConfig(system_instruction="Summarize", ttl="60s"))
+            await client.aio.caches.update(name=cache.name, config=types.UpdateCachedContentConfig(ttl="120s"))
+            response = await client.aio.models.generate_content(
+                model="gemini-2.5-flash", contents="[c1] hi",
+                config=types.GenerateContentConfig(cached_content=cache.name))
+            self.assertGreater(response.usage_metadata.cached_content_token_count, 0)
+            with self.assertRaises(StandInAPIError) as raised:
+                await client.aio.models.generate_content(
+                    model="gemini-2.5-flash", contents="[c1] hi",
+                    config=types.GenerateContentConfig(cached_content="cachedContents/missing"))
+            self.assertEqual(raised.exception.code, 403)
+        self.run_with_standin(test)
+
+    def test_rate_limit_is_recognized(self):
+        self.settings = StandInSettings(time_scale=0, requests_per_minute=1)
+
+        async def test(model, client):
+            await client.aio.models.generate_content(model="gemini-2.5-flash", contents="hi")
+            with self.assertRaises(StandInAPIError) as raised:
+                await client.aio.models.generate_content(model="gemini-2.5-flash", contents="hi")
+            self.assertTrue(is_rate_limit_error(raised.exception))
+            self.assertEqual(model.stats["rate_limited"], 1)
+        self.run_with_standin(test)
+
+    def test_backend_selection(self):
+        self.assertIsInstance(create_model_client(None, backend="standin"), StandInClient)
+        self.assertIsNone(create_model_client(None, backend="gemini"))
+
+
+class TestStandInReplies(unittest.TestCase):
+    """Test cases for the stand-in's reply generation"""
+
+    def test_cites_prompt_messages(self):
+        prompt = "[c3] alice: budget\n[c7] bob: room\n[c9] carol: slides"
+        self.assertEqual(cited_ids(prompt), [3, 7, 9])
+        reply = fake_reply(prompt, random.Random(0))
+        self.assertTrue(cited_ids(reply))
+        self.assertIn("# Conversation Summary", reply)
+        self.assertNotIn("# Conversation Summary", fake_reply("USER QUESTION: why?\n" + prompt, random.Random(0)))
+
+
+class TestServiceWithStandIn(StandInTestCase):
+    """End-to-end summarizer runs against the stand-in"""
+
+    def test_summary_and_answer_link_citations(self):
+        async def test(model, client):
+            service = SummarizerService(model_client=client)
+            messages = as_records(synthetic_window(120, seed=3))
+            summary = await service.generate_summary(messages, "24h", "test", "standin-summary", "guild")
+            answer = await service.answer_question(messages, "what about the budget?", "24h", "test",
+                                                   "standin-ask", "guild")
+            return summary, answer
+        summary, answer = self.run_with_standin(test)
+        summary_text = summary["summary"] + "".join(summary.get("continuation_parts", []))
+        self.assertFalse(summary.get("api_error"))
+        self.assertIn("](https://discord.com/channels/", summary_text)
+        self.assertIn("](https://discord.com/channels/", answer["answer"])
+
+    def test_load_test_report(self):
+        report = asyncio.run(run_load_test(requests=8, concurrency=4, min_messages=20, max_messages=200,
+                                           settings=StandInSettings(time_scale=0)))
+        self.assertEqual(report["outcomes"].get("ok"), 8)
+        self.assertEqual(report["latency"]["all"]["count"], 8)
+        self.assertEqual(report["standin"]["rate_limited"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
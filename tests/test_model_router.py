@@ -0,0 +1,139 @@
+import unittest
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.genai import types
+
+from summarizer_support import FakeModels, gemini_client, make_messages, summarizer_service
+from modules.summarizer.model_router import (
+    ModelRouter, check_response, TIER_LITE, TIER_FLASH, TIER_PRO,
+    OUTCOME_OK, OUTCOME_TRUNCATED, OUTCOME_EMPTY, OUTCOME_NO_CITATIONS
+)
+
+
+def response(text, finish_reason=None):
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(finish_reason=finish_reason)])
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test cases for tier selection and response checks"""
+
+    def setUp(self):
+        self.router = ModelRouter.from_env()
+
+    def test_small_windows_start_on_lite(self):
+        self.assertEqual(self.router.choose("summarize", 50, 3000).name, TIER_LITE)
+        self.assertEqual(self.router.choose("summarize", 5000, 3000).name, TIER_FLASH)
+        self.assertEqual(self.router.choose("summarize", 50, 50_000).name, TIER_FLASH)
+
+    def test_ask_has_a_lower_lite_limit(self):
+        self.assertEqual(self.router.choose("ask", 50, 3000).name, TIER_LITE)
+        self.assertEqual(self.router.choose("ask", 50, 9000).name, TIER_FLASH)
+        self.assertEqual(self.router.choose("summarize", 50, 9000).name, TIER_LITE)
+
+    def test_escalation_order(self):
+        lite = self.router.tier(TIER_LITE)
+        self.assertEqual(self.router.larger(lite).name, TIER_FLASH)
+        self.assertEqual(self.router.larger(self.router.larger(lite)).name, TIER_PRO)
+        self.assertIsNone(self.router.larger(self.router.tier(TIER_PRO)))
+
+    def test_tiering_can_be_disabled(self):
+        with patch.dict(os.environ, {"SUMMARIZER_MODEL_TIERING": "false", "SUMMARIZER_MODEL_FLASH": "models/custom"}):
+            router = ModelRouter.from_env()
+        tier = router.choose("summarize", 5, 100)
+        self.assertEqual(tier.model, "models/custom")
+        self.assertIsNone(router.larger(tier))
+
+    def test_check_response(self):
+        self.assertEqual(check_response(response("- point [c1]"), "- point [c1]", require_citations=True), OUTCOME_OK)
+        self.assertEqual(check_response(response("- point"), "- point", require_citations=True), OUTCOME_NO_CITATIONS)
+        self.assertEqual(check_response(response("- point"), "- point"), OUTCOME_OK)
+        self.assertEqual(check_response(response("  "), "  "), OUTCOME_EMPTY)
+        truncated = response("- point [c1]", types.FinishReason.MAX_TOKENS)
+        self.assertEqual(check_response(truncated, "- point [c1]"), OUTCOME_TRUNCATED)
+        self.assertEqual(check_response(response("x", "MAX_TOKENS"), "x"), OUTCOME_TRUNCATED)
+
+
+class TestTieredGeneration(unittest.TestCase):
+    """Test cases for routing and escalation in SummarizerService"""
+
+    def setUp(self):
+        self.service = summarizer_service()
+        self.lite = self.service.model_router.tier(TIER_LITE).model
+        self.flash = self.service.model_router.tier(TIER_FLASH).model
+        self.pro = self.service.model_router.tier(TIER_PRO).model
+
+    def use_models(self, replies):
+        models = FakeModels(lambda model, contents: replies[model])
+        self.service.gemini_client = gemini_client(models)
+        return models
+
+    def test_small_summary_stays_on_lite(self):
+        models = self.use_models({self.lite: response("# Conversation Summary ✨\n- point [c1]")})
+        result = asyncio.run(self.service.generate_summary(make_messages(10), "24h", "u", "c", "g"))
+        self.assertEqual(models.model_names, [self.lite])
+        self.assertEqual(result["model_tier"], TIER_LITE)
+        self.assertEqual(result["model_name"], self.lite)
+        self.assertEqual(result["model_escalations"], 0)
+
+    def test_truncated_response_escalates(self):
+        models = self.use_models({
+            self.lite: response("# Conversation Summary ✨\n- point [c1", types.FinishReason.MAX_TOKENS),
+            self.flash: response("# Conversation Summary ✨\n- point [c1]", types.FinishReason.STOP)
+        })
+        result = asyncio.run(self.service.generate_summary(make_messages(10), "24h", "u", "c", "g"))
+        self.assertEqual(models.model_names, [self.lite, self.flash])
+        self.assertEqual(result["model_tier"], TIER_LITE)
+        self.assertEqual(result["final_model_tier"], TIER_FLASH)
+        self.assertEqual(result["escalation_reasons"], ["lite:truncated"])
+        self.assertIn("[1](https://discord.com/channels/1/2/1000)", result["summary"])
+
+        stats = self.service.get_model_stats()["tiers"]
+        self.assertEqual(stats[TIER_LITE]["outcomes"], {"truncated": 1})
+        self.assertEqual(stats[TIER_LITE]["rejected"], 1)
+        self.assertEqual(stats[TIER_FLASH]["outcomes"], {"ok": 1})
+
+    def test_streamed_summary_without_citations_escalates(self):
+        models = self.use_models({
+            self.lite: response("# Conversation Summary ✨\n- vague point\n"),
+            self.flash: response("# Conversation Summary ✨\n- vague point\n"),
+            self.pro: response("# Conversation Summary ✨\n- point [c2]\n")
+        })
+        progress = []
+
+        async def on_progress(text):
+            progress.append(text)
+
+        result = asyncio.run(self.service.generate_summary(make_messages(10), "24h", "u", "c", "g", on_progress=on_progress))
+        self.assertEqual(models.model_names, [self.lite, self.flash, self.pro])
+        self.assertEqual(result["model_escalations"], 2)
+        self.assertEqual(progress[-1], result["summary"])
+
+    def test_largest_tier_response_is_kept(self):
+        models = self.use_models({model: response("- nothing to cite") for model in (self.lite, self.flash, self.pro)})
+        result = asyncio.run(self.service.generate_summary(make_messages(10), "24h", "u", "c", "g"))
+        self.assertEqual(len(models.model_names), 3)
+        self.assertIn("nothing to cite", result["summary"])
+        self.assertEqual(result["final_model_tier"], TIER_PRO)
+
+    def test_answers_need_no_citations(self):
+        models = self.use_models({self.lite: response("Nobody mentioned it.")})
+        result = asyncio.run(self.service.answer_question(make_messages(10), "who?", "24h", "u", "c", "g"))
+        self.assertEqual(models.model_names, [self.lite])
+        self.assertEqual(result["model_tier"], TIER_LITE)
+
+    def test_large_window_starts_on_flash(self):
+        models = self.use_models({self.flash: response("# Conversation Summary ✨\n- point [c1]")})
+        result = asyncio.run(self.service.generate_summary(make_messages(400), "24h", "u", "c", "g"))
+        self.assertEqual(models.model_names, [self.flash])
+        self.assertEqual(result["model_tier"], TIER_FLASH)
+
+
+if __name__ == '__main__':
+    unittest.main()
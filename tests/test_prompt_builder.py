@@ -0,0 +1,156 @@
+import unittest
+import asyncio
+import re
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.prompt_builder import (
+    build_conversation, fit_to_budget, compact_content, is_low_information,
+    POLICY_MAP_REDUCE, POLICY_RECENT, POLICY_SAMPLE, MAX_RUN_TOKENS
+)
+from modules.summarizer.service import SummarizerService, CHUNK_TOKEN_BUDGET
+from modules.summarizer.utils import estimate_tokens
+
+
+def make_message(number, author, content):
+    return {
+        "id": str(number),
+        "content": content,
+        "author": {"id": author, "name": author},
+        "timestamp": "2025-05-15 10:00:00",
+        "jump_url": f"https://discord.com/channels/1/2/{number}"
+    }
+
+
+def make_messages(*pairs):
+    return [make_message(number, author, content) for number, (author, content) in enumerate(pairs, start=1)]
+
+
+class TestPromptBuilder(unittest.TestCase):
+    """Test cases for conversation compaction and budgeting"""
+
+    def test_same_author_run_shares_prefix(self):
+        """Consecutive messages by one author get one author prefix and their own citations"""
+        conversation = build_conversation(make_messages(
+            ("alice", "the meeting moved"), ("alice", "to thursday"), ("bob", "works for me")
+        ))
+        self.assertEqual(conversation.lines, [
+            "alice: the meeting moved [c1]\n  to thursday [c2]\n",
+            "bob: works for me [c3]\n"
+        ])
+        self.assertEqual(conversation.citation_map["c2"], "https://discord.com/channels/1/2/2")
+
+    def test_low_information_messages_collapse(self):
+        """Reactions collapse into one uncited line and citation IDs stay dense"""
+        conversation = build_conversation(make_messages(
+            ("alice", "pizza friday?"), ("bob", "lol"), ("carol", "👍"), ("bob", "<:pog:123456>"),
+            ("dave", "I'll order it")
+        ))
+        self.assertEqual(conversation.lines[1], "(short replies from bob, carol: lol, 👍, :pog:)\n")
+        self.assertEqual(conversation.lines[2], "dave: I'll order it [c2]\n")
+        self.assertEqual(list(conversation.citation_map), ["c1", "c2"])
+        self.assertEqual(conversation.collapsed_count, 3)
+        self.assertEqual(conversation.line_message_counts, [1, 3, 1])
+
+    def test_repeated_message_dropped(self):
+        """An author repeating themselves is cited once"""
+        conversation = build_conversation(make_messages(("alice", "anyone there?"), ("alice", "anyone  there?")))
+        self.assertEqual(conversation.lines, ["alice: anyone there? [c1]\n"])
+        self.assertEqual(conversation.duplicate_count, 1)
+
+    def test_compact_content(self):
+        self.assertEqual(compact_content("see https://docs.google.com/document/d/abc123/edit?usp=sharing now"),
+                         "see <docs.google.com link> now")
+        self.assertEqual(compact_content("hi <a:wave:98765>\n\nthere"), "hi :wave: there")
+        self.assertTrue(is_low_information("OK!"))
+        self.assertTrue(is_low_information(""))
+        self.assertFalse(is_low_information("<github.com link>"))
+
+    def test_compaction_reported(self):
+        """Compaction ratio compares against the uncompacted format"""
+        conversation = build_conversation(make_messages(*[("alice", f"point number {i}") for i in range(20)]))
+        stats = conversation.stats()
+        self.assertLess(stats["input_tokens"], stats["raw_input_tokens"])
+        self.assertLess(stats["compaction_ratio"], 1)
+
+    def test_recent_policy_keeps_newest(self):
+        """The recent policy drops the oldest lines and says how many messages are missing"""
+        conversation = build_conversation(make_messages(*[(f"user{i % 2}", f"message {i} " + "x" * 40) for i in range(40)]))
+        trimmed = fit_to_budget(conversation, 200, POLICY_RECENT)
+        self.assertLessEqual(trimmed.tokens, 200)
+        self.assertIn("[c40]", trimmed.lines[-1])
+        self.assertEqual(trimmed.omitted_count, 40 - (len(trimmed.lines) - 1))
+        self.assertTrue(trimmed.lines[0].startswith(f"({trimmed.omitted_count} older messages"))
+
+    def test_sample_policy_spreads_over_window(self):
+        """The sample policy keeps lines from across the whole window"""
+        conversation = build_conversation(make_messages(*[(f"user{i % 2}", f"message {i} " + "x" * 40) for i in range(40)]))
+        trimmed = fit_to_budget(conversation, 300, POLICY_SAMPLE)
+        self.assertLessEqual(trimmed.tokens, 300)
+        kept = [int(number) for number in re.findall(r'\[c(\d+)\]', trimmed.text)]
+        self.assertLess(kept[0], 10)
+        self.assertGreater(kept[-1], 30)
+
+    def test_long_run_split_into_lines(self):
+        """A single-author window larger than a map-reduce chunk still splits into several chunks"""
+        messages = make_messages(*[("alice", f"update {i} " + "x" * 120) for i in range(2000)])
+        conversation = build_conversation(messages)
+        self.assertGreater(conversation.tokens, CHUNK_TOKEN_BUDGET)
+        self.assertTrue(all(line.startswith("alice: ") for line in conversation.lines))
+        self.assertTrue(all(estimate_tokens(line) < MAX_RUN_TOKENS + 50 for line in conversation.lines))
+        self.assertEqual(sum(conversation.line_message_counts), 2000)
+        self.assertEqual(len(re.findall(r'\[c\d+\]', conversation.text)), 2000)
+
+        chunks = SummarizerService()._chunk_texts(conversation.lines, CHUNK_TOKEN_BUDGET)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(sum(estimate_tokens(line) for line in chunk) <= CHUNK_TOKEN_BUDGET for chunk in chunks))
+
+    def test_repeats_after_split_counted(self):
+        """Repeats that end a split run are counted with the author's last line"""
+        pairs = [("alice", f"update {i} " + "x" * 120) for i in range(200)]
+        first_line_count = build_conversation(make_messages(*pairs)).line_message_counts[0]
+        # The repeat follows the message that closed the first line
+        conversation = build_conversation(make_messages(*pairs[:first_line_count], pairs[first_line_count - 1]))
+        self.assertEqual(conversation.duplicate_count, 1)
+        self.assertEqual(conversation.line_message_counts, [first_line_count + 1])
+
+    def test_recent_policy_with_long_newest_run(self):
+        """The recent policy keeps the newest messages when the last author's run alone is over budget"""
+        messages = make_messages(("bob", "older question"), *[("alice", f"update {i} " + "x" * 120) for i in range(500)])
+        trimmed = fit_to_budget(build_conversation(messages), 5_000, POLICY_RECENT)
+        self.assertLessEqual(trimmed.tokens, 5_000)
+        self.assertIn("[c501]", trimmed.lines[-1])
+        self.assertGreater(len(trimmed.lines), 2)
+        self.assertEqual(trimmed.omitted_count, 501 - sum(trimmed.line_message_counts))
+
+    def test_within_budget_or_map_reduce_unchanged(self):
+        conversation = build_conversation(make_messages(*[("alice", "x" * 400)] * 2, ("bob", "y" * 400)))
+        self.assertIs(fit_to_budget(conversation, 10_000, POLICY_RECENT), conversation)
+        self.assertIs(fit_to_budget(conversation, 10, POLICY_MAP_REDUCE), conversation)
+        with self.assertRaises(ValueError):
+            fit_to_budget(conversation, 10, "newest")
+
+    def test_service_reports_token_counts(self):
+        """answer_question reports input tokens and trims to the /ask budget"""
+        service = SummarizerService()
+        prompts = []
+
+        async def generate_content(model, contents, **kwargs):
+            prompts.append(contents)
+            return SimpleNamespace(text="Answer [c1]")
+
+        service.gemini_client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+        service.ask_token_budget = 150
+        messages = make_messages(*[(f"user{i % 2}", f"message {i} " + "x" * 40) for i in range(40)])
+        result = asyncio.run(service.answer_question(messages, "what?", "24h", "u", "c", "g"))
+        self.assertLessEqual(result["input_tokens"], 150)
+        self.assertGreater(result["omitted_messages"], 0)
+        self.assertIn("older messages were left out", prompts[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
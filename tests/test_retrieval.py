@@ -0,0 +1,119 @@
+import unittest
+import asyncio
+import math
+import sys
+import os
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from summarizer_support import FakeModels, make_messages, summarizer_service
+from modules.summarizer.retrieval import BM25Index, RetrievalIndexCache, select_relevant, tokenize, MODE_FULL
+
+
+def busy_channel(count=300):
+    """Mostly chatter, with a short thread about the hackathon venue in the middle"""
+    contents = [f"random chatter number {i} about homework and lunch" for i in range(count)]
+    middle = count // 2
+    contents[middle] = "the hackathon venue is moving to the engineering building"
+    contents[middle + 1] = "wait which room?"
+    contents[middle + 2] = "room 210, the venue booking is confirmed"
+    return make_messages(contents)
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for the BM25 retrieval index"""
+
+    def test_matches_reference_bm25(self):
+        """Vectorized scores match a straightforward BM25 implementation"""
+        documents = ["the cat sat on the mat", "dogs and cats", "a dog barked at the mailman", "cat cat cat"]
+        index = BM25Index(documents)
+        query = "cat dog mailman"
+
+        tokenized = [tokenize(doc) for doc in documents]
+        average = sum(len(doc) for doc in tokenized) / len(tokenized)
+        expected = []
+        for doc in tokenized:
+            score = 0.0
+            for term in set(tokenize(query)):
+                df = sum(1 for other in tokenized if term in other)
+                tf = doc.count(term)
+                idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+                score += idf * tf * 2.5 / (tf + 1.5 * (0.25 + 0.75 * len(doc) / average))
+            expected.append(score)
+
+        for actual, reference in zip(index.scores(query), expected):
+            self.assertAlmostEqual(float(actual), reference, places=5)
+
+    def test_top_k_skips_non_matches(self):
+        index = BM25Index(["budget meeting notes", "pizza", "the budget is approved"])
+        self.assertEqual(sorted(index.top_k("what about the budget?", 5)), [0, 2])
+        self.assertEqual(index.top_k("zebra", 5), [])
+
+    def test_empty_window(self):
+        index = BM25Index([])
+        self.assertEqual(index.top_k("anything", 3), [])
+
+    def test_select_relevant_adds_neighbours(self):
+        """Matches come with their neighbouring messages, in chronological order"""
+        index = BM25Index([f"filler {i}" for i in range(10)] + ["election results"] + [f"filler {i}" for i in range(10)])
+        self.assertEqual(select_relevant(index, "election", top_k=5, context=2), [8, 9, 10, 11, 12])
+        self.assertIsNone(select_relevant(index, "zebra", top_k=5, context=2))
+
+    def test_index_cache_reuses_window(self):
+        """The same window is indexed once; an edited message invalidates it"""
+        cache = RetrievalIndexCache()
+        messages = busy_channel(20)
+        first, cached_first = cache.get_or_build("chan", messages)
+        second, cached_second = cache.get_or_build("chan", list(messages))
+        self.assertIs(first, second)
+        self.assertEqual((cached_first, cached_second), (False, True))
+
+        edited = [dict(msg) for msg in messages]
+        edited[3]["content"] = "edited"
+        self.assertFalse(cache.get_or_build("chan", edited)[1])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+class TestRetrievalAnswering(unittest.TestCase):
+    """Test answer_question in full window and retrieval modes"""
+
+    def setUp(self):
+        self.models = FakeModels("Room 210 [c1]")
+        self.service = summarizer_service(self.models)
+
+    def ask(self, messages, question, mode=None):
+        return asyncio.run(self.service.answer_question(messages, question, "24h", "u", "c", "g", mode=mode))
+
+    def test_retrieval_sends_relevant_messages(self):
+        """Only the matching thread and its neighbours are sent"""
+        result = self.ask(busy_channel(), "Where is the hackathon venue?")
+        self.assertEqual(result["retrieval_mode"], "retrieval")
+        self.assertEqual(result["message_count"], 300)
+        self.assertLess(result["retrieved_messages"], 20)
+        self.assertIn("room 210", self.models.prompts[0])
+        self.assertNotIn("random chatter number 20 ", self.models.prompts[0])
+        self.assertIn("most relevant to the question", self.models.prompts[0])
+
+    def test_follow_up_reuses_index(self):
+        messages = busy_channel()
+        self.assertFalse(self.ask(messages, "Where is the hackathon venue?")["retrieval_index_cached"])
+        self.assertTrue(self.ask(messages, "Which room is the hackathon in?")["retrieval_index_cached"])
+
+    def test_full_mode_sends_everything(self):
+        result = self.ask(busy_channel(), "Where is the hackathon venue?", mode=MODE_FULL)
+        self.assertEqual(result["retrieval_mode"], "full")
+        self.assertIn("random chatter number 20 ", self.models.prompts[0])
+
+    def test_fallbacks_to_full_window(self):
+        """Small windows and questions that match nothing are sent whole"""
+        self.assertEqual(self.ask(busy_channel(20), "Where is the hackathon venue?")["retrieval_mode"], "full")
+        self.assertEqual(self.ask(busy_channel(), "Any zebras?")["retrieval_mode"], "full")
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.ask(busy_channel(), "venue?", mode="semantic")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.ring_buffer import RecentMessageBuffer
+from modules.summarizer.message_record import MessageRecord
+from modules.summarizer.utils import datetime_to_snowflake
+from modules.summarizer.discord_modules.cog import SummarizerCog
+
+GUILD_ID = 1
+CHANNEL_ID = 2
+
+
+def record(message_id, content="hello", channel_id=CHANNEL_ID):
+    return MessageRecord(message_id, GUILD_ID, channel_id, 42, "user", content)
+
+
+def snowflake(minutes_ago):
+    return datetime_to_snowflake(datetime.now(timezone.utc) - timedelta(minutes=minutes_ago))
+
+
+class TestRecentMessageBuffer(unittest.TestCase):
+    """Test cases for the gateway-fed recent message buffer"""
+
+    def setUp(self):
+        self.session_id = snowflake(60)
+        self.buffer = RecentMessageBuffer(max_messages_per_channel=100, max_age=timedelta(hours=2), max_total_bytes=10 ** 6)
+        self.buffer.start_session(self.session_id)
+
+    def add(self, message_id, content="hello", channel_id=CHANNEL_ID):
+        self.buffer.add(record(message_id, content, channel_id))
+
+    def test_window_inside_session_is_served(self):
+        ids = [snowflake(minutes) for minutes in (50, 40, 30)]
+        for message_id in ids:
+            self.add(message_id)
+
+        covered_after_id, messages = self.buffer.read(CHANNEL_ID, snowflake(45), snowflake(0))
+        self.assertLessEqual(covered_after_id, snowflake(45))
+        self.assertEqual([msg["id"] for msg in messages], [str(message_id) for message_id in ids[1:]])
+        self.assertEqual(messages[0]["author"], {"id": "42", "name": "user"})
+        self.assertEqual(messages[0]["jump_url"], f"https://discord.com/channels/{GUILD_ID}/{CHANNEL_ID}/{ids[1]}")
+
+    def test_quiet_channel_is_covered_since_session_start(self):
+        covered_after_id, messages = self.buffer.read(99, snowflake(30), snowflake(0))
+        self.assertEqual((covered_after_id, messages), (self.session_id - 1, []))
+        self.assertEqual(self.buffer.stats()["hits"], 1)
+
+    def test_window_before_session_is_partial(self):
+        """Only the part of the window after the session start is buffered"""
+        self.add(snowflake(30))
+        covered_after_id, messages = self.buffer.read(CHANNEL_ID, snowflake(24 * 60), snowflake(0))
+        self.assertEqual(covered_after_id, self.session_id - 1)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(self.buffer.stats()["partial_hits"], 1)
+
+        # A window entirely before the session isn't served at all
+        self.assertEqual(self.buffer.read(CHANNEL_ID, snowflake(300), snowflake(200)), (None, []))
+
+    def test_disconnect_clears_buffer(self):
+        self.add(snowflake(30))
+        self.buffer.stop_session()
+        self.add(snowflake(20))
+        self.assertEqual(self.buffer.read(CHANNEL_ID, snowflake(45), snowflake(0)), (None, []))
+        self.assertEqual(self.buffer.stats()["messages"], 0)
+
+    def test_edits_and_deletes(self):
+        first, second = snowflake(30), snowflake(20)
+        self.add(first)
+        self.add(second)
+        self.assertTrue(self.buffer.update_content(CHANNEL_ID, first, "edited"))
+        self.assertFalse(self.buffer.update_content(CHANNEL_ID, snowflake(10), "unknown"))
+        self.assertEqual(self.buffer.remove(CHANNEL_ID, [second]), 1)
+
+        _, messages = self.buffer.read(CHANNEL_ID, snowflake(45), snowflake(0))
+        self.assertEqual([msg["content"] for msg in messages], ["edited"])
+
+    def test_count_limit_moves_coverage(self):
+        """Evicted messages narrow the part of the channel the buffer covers"""
+        ids = [self.session_id + i for i in range(1, 151)]
+        for message_id in ids:
+            self.add(message_id)
+
+        covered_after_id, messages = self.buffer.read(CHANNEL_ID, self.session_id, snowflake(0))
+        self.assertEqual(covered_after_id, ids[49])
+        self.assertEqual(len(messages), 100)
+        self.assertEqual(self.buffer.stats()["evicted"], 50)
+
+    def test_old_messages_expire(self):
+        buffer = RecentMessageBuffer(max_age=timedelta(minutes=30))
+        buffer.start_session(self.session_id)
+        old_id = snowflake(45)
+        buffer.add(record(old_id, "old"))
+        buffer.add(record(snowflake(10), "new"))
+
+        covered_after_id, messages = buffer.read(CHANNEL_ID, snowflake(20), snowflake(0))
+        self.assertEqual(covered_after_id, old_id)
+        self.assertEqual([msg["content"] for msg in messages], ["new"])
+
+    def test_memory_cap_evicts_oldest_across_channels(self):
+        buffer = RecentMessageBuffer(max_total_bytes=4000)
+        buffer.start_session(self.session_id)
+        for i in range(1, 21):
+            buffer.add(record(self.session_id + i, "x" * 100, CHANNEL_ID + i % 2))
+
+        stats = buffer.stats()
+        self.assertLessEqual(stats["approx_bytes"], 4000)
+        self.assertGreater(stats["evicted"], 0)
+        # The newest message of each channel is still there
+        for channel_id, newest in ((CHANNEL_ID, self.session_id + 20), (CHANNEL_ID + 1, self.session_id + 19)):
+            _, messages = buffer.read(channel_id, self.session_id, snowflake(0))
+            self.assertEqual(messages[-1]["id"], str(newest))
+
+
+class TestGatewaySession(unittest.TestCase):
+    """Test cases for the cog's gateway session listeners"""
+
+    def setUp(self):
+        # Only the state the listeners touch; the full cog needs a bot and the database
+        self.cog = SummarizerCog.__new__(SummarizerCog)
+        self.cog.recent_messages = RecentMessageBuffer()
+        self.cog._live_since_id = None
+
+    def test_resume_restarts_live_capture(self):
+        """A disconnect followed by a RESUME (no on_ready) turns live capture back on"""
+        asyncio.run(self.cog.on_ready())
+        asyncio.run(self.cog.on_disconnect())
+        self.assertIsNone(self.cog._live_since_id)
+
+        before_resume = snowflake(0)
+        asyncio.run(self.cog.on_resumed())
+        self.assertGreaterEqual(self.cog._live_since_id, before_resume)
+
+        message_id = snowflake(0) + 1
+        self.cog.recent_messages.add(record(message_id))
+        covered_after_id, messages = self.cog.recent_messages.read(CHANNEL_ID, snowflake(10), snowflake(-1))
+        self.assertEqual(covered_after_id, self.cog._live_since_id - 1)
+        self.assertEqual([message.message_id for message in messages], [message_id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+import asyncio
+import os
+import sys
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from summarizer_support import FakeModels, make_messages, summarizer_service
+from modules.summarizer.rolling_summary import (
+    StoredSummary, RollingPolicy, RollingSummaryStore, drop_stale_citations, plan_incremental
+)
+
+
+def topic_messages(first, last):
+    """Messages with IDs first..last, each about its own topic"""
+    return make_messages([f"update on topic {number}" for number in range(first, last + 1)], first_id=first)
+
+
+def stored_summary(first, last, **overrides):
+    """A stored summary citing every message in first..last as c1, c2..."""
+    citation_message_ids = {f"c{i}": str(number) for i, number in enumerate(range(first, last + 1), start=1)}
+    values = dict(
+        channel_id="chan",
+        first_message_id=first,
+        last_message_id=last,
+        message_count=last - first + 1,
+        summary_text="# Conversation Summary ✨\n- early point [c1]\n- late point [c3, c15]",
+        citation_map={citation_id: f"https://discord.com/channels/1/2/{message_id}" for citation_id, message_id in citation_message_ids.items()},
+        citation_message_ids=citation_message_ids,
+        model="model",
+        prompt_version="1"
+    )
+    values.update(overrides)
+    return StoredSummary(**values)
+
+
+class TestRollingPolicy(unittest.TestCase):
+    """Test cases for reusing stored summaries"""
+
+    def test_drop_stale_citations(self):
+        """Stale citations are removed, ranges narrowed and points left without citations dropped"""
+        text = "## Key Topics\n- old point [c1, c2]\n- mixed point [c2-c6, c9]\n- new point [c8]"
+        self.assertEqual(
+            drop_stale_citations(text, {"c4", "c5", "c6", "c8"}),
+            "## Key Topics\n- mixed point [c4-c6]\n- new point [c8]"
+        )
+
+    def test_sliding_window_is_extended(self):
+        """A window that moved forward reuses the stored summary for the overlap"""
+        plan, reason = plan_incremental([stored_summary(100, 199)], topic_messages(110, 219), RollingPolicy(), "model", "1")
+        self.assertIsNone(reason)
+        self.assertEqual(plan.reused_messages, 90)
+        self.assertEqual([msg["id"] for msg in plan.new_messages], [str(n) for n in range(200, 220)])
+        # c1 and c3 (messages 100 and 102) left the window, c15 didn't
+        self.assertNotIn("early point", plan.summary_text)
+        self.assertIn("late point [c15]", plan.summary_text)
+        self.assertNotIn("c1", plan.citation_map)
+        self.assertEqual(plan.next_citation, 101)
+
+    def test_full_regeneration_policy(self):
+        """Each limit of the policy forces a full summary"""
+        window = topic_messages(110, 219)
+        cases = [
+            ([], "no stored summary"),
+            ([stored_summary(100, 199, model="other")], "model or prompt changed"),
+            ([stored_summary(120, 199)], "window starts before the stored summary"),
+            ([stored_summary(100, 140)], "overlap with the stored summary is too small"),
+            ([stored_summary(10, 199)], "too much of the stored summary is outside the window"),
+            ([stored_summary(100, 199, merge_depth=6)], "too many merges since the last full summary"),
+            ([stored_summary(100, 199, created_at=time.time() - 3 * 86400)], "stored summary is too old"),
+        ]
+        for candidates, expected in cases:
+            with self.subTest(expected=expected):
+                self.assertEqual(plan_incremental(candidates, window, RollingPolicy(), "model", "1"), (None, expected))
+
+    def test_best_candidate_is_used(self):
+        """Of several usable summaries the one covering the most messages is extended"""
+        plan, _ = plan_incremental(
+            [stored_summary(100, 150, model="other"), stored_summary(100, 180), stored_summary(100, 199)],
+            topic_messages(100, 210), RollingPolicy(), "model", "1"
+        )
+        self.assertEqual(plan.stored.last_message_id, 199)
+
+
+class TestRollingSummaryStore(unittest.TestCase):
+    """Test cases for rolling summary storage"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_keeps_newest_per_channel(self):
+        store = RollingSummaryStore(per_channel=2)
+        for last in (150, 160, 170):
+            store.save(stored_summary(100, last))
+        self.assertEqual([summary.last_message_id for summary in store.candidates("chan")], [170, 160])
+
+    def test_disk_tier_survives_restart(self):
+        url = f"sqlite:///{os.path.join(self.tmp_dir, 'rolling.db')}"
+        store = RollingSummaryStore(per_channel=2, disk_url=url)
+        for last in (150, 160, 170):
+            store.save(stored_summary(100, last))
+
+        restarted = RollingSummaryStore(per_channel=2, disk_url=url).candidates("chan")
+        self.assertEqual([summary.last_message_id for summary in restarted], [170, 160])
+        self.assertEqual(restarted[0].citation_message_ids["c1"], "100")
+
+
+class TestIncrementalSummaries(unittest.TestCase):
+    """Test rolling summaries in SummarizerService.generate_summary"""
+
+    def setUp(self):
+        def reply(model, contents):
+            if len(self.models.requests) == 1:
+                return "# Conversation Summary ✨\n- opening topic [c1]\n- later topic [c50]"
+            return "# Conversation Summary ✨\n- later topic [c50]\n- newest topic [c101]"
+
+        self.models = FakeModels(reply)
+        self.service = summarizer_service(self.models)
+        self.window_start = datetime.now(timezone.utc) - timedelta(days=1)
+
+    def summarize(self, messages):
+        self.window_start += timedelta(hours=1)
+        return asyncio.run(self.service.generate_summary(messages, "24h", "u", "chan", "g", window_start=self.window_start))
+
+    def test_overlapping_window_summarizes_new_messages_only(self):
+        first = self.summarize(topic_messages(1, 100))
+        second = self.summarize(topic_messages(11, 120))
+
+        self.assertEqual(first["summary_mode"], "full")
+        self.assertEqual(first["full_summary_reason"], "no stored summary")
+        self.assertEqual(second["summary_mode"], "incremental")
+        self.assertEqual(second["reused_messages"], 90)
+        self.assertEqual(second["message_count"], 110)
+
+        prompt = self.models.prompts[1]
+        self.assertIn("EARLIER SUMMARY:", prompt)
+        self.assertIn("later topic [c50]", prompt)
+        # Message 1 left the window, so its point is gone
+        self.assertNotIn("opening topic", prompt)
+        self.assertNotIn("topic 100 ", prompt)
+        self.assertIn("update on topic 101 [c101]", prompt)
+        # Citations from both the stored summary and the new messages are linked
+        self.assertIn("https://discord.com/channels/1/2/50", second["summary"])
+        self.assertIn("https://discord.com/channels/1/2/101", second["summary"])
+        self.assertLess(second["input_tokens"], first["input_tokens"])
+
+        stats = self.service.get_cache_stats()["rolling_summaries"]
+        self.assertEqual((stats["incremental_summaries"], stats["full_summaries"]), (1, 1))
+
+        # Stored summaries keep URLs for their own citations only, but every citation's message ID
+        stored = self.service.rolling_summaries.candidates("chan")[0]
+        self.assertEqual(set(stored.citation_map), {"c50", "c101"})
+        self.assertEqual(len(stored.citation_message_ids), 110)
+        self.assertEqual(stored.next_citation, 121)
+
+    def test_merged_summary_is_extended_again(self):
+        """The merged summary is stored and becomes the base for the next window"""
+        self.summarize(topic_messages(1, 100))
+        self.summarize(topic_messages(11, 120))
+        third = self.summarize(topic_messages(21, 125))
+        self.assertEqual(third["summary_mode"], "incremental")
+        self.assertEqual(self.service.rolling_summaries.candidates("chan")[0].merge_depth, 2)
+        self.assertIn("update on topic 121 [c121]", self.models.prompts[2])
+
+    def test_small_overlap_regenerates(self):
+        self.summarize(topic_messages(1, 100))
+        result = self.summarize(topic_messages(41, 140))
+        self.assertEqual(result["summary_mode"], "full")
+        self.assertEqual(result["full_summary_reason"], "too much of the stored summary is outside the window")
+        self.assertNotIn("EARLIER SUMMARY:", self.models.prompts[1])
+
+    def test_disabled(self):
+        self.service.rolling_enabled = False
+        self.summarize(topic_messages(1, 100))
+        self.assertEqual(self.summarize(topic_messages(11, 120))["summary_mode"], "full")
+
+
+if __name__ == '__main__':
+    unittest.main()
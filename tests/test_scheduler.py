@@ -0,0 +1,190 @@
+import unittest
+import asyncio
+import threading
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.scheduler import (
+    GeminiScheduler, GeminiBusyError, PRIORITY_ASK, PRIORITY_SUMMARIZE,
+    request_scope, current_request, is_rate_limit_error
+)
+from modules.summarizer.service import SummarizerService
+
+
+def run_in_order(scheduler, requests):
+    """Queue requests (guild_id, priority) behind an empty bucket and return the order they are granted in"""
+    granted = []
+
+    async def request(guild_id, priority, label):
+        await scheduler.acquire(guild_id, priority, tokens=10)
+        granted.append(label)
+
+    async def run():
+        scheduler._request_bucket.level = 0
+        await asyncio.gather(*(request(guild_id, priority, f"{guild_id}{index}")
+                               for index, (guild_id, priority) in enumerate(requests)))
+
+    asyncio.run(run())
+    return granted
+
+
+class TestGeminiScheduler(unittest.TestCase):
+    """Test cases for the Gemini request scheduler"""
+
+    def test_ask_goes_before_queued_summaries(self):
+        """/ask requests skip ahead of summaries that are already waiting"""
+        scheduler = GeminiScheduler(requests_per_minute=1200, max_wait=60)
+        order = run_in_order(scheduler, [("a", PRIORITY_SUMMARIZE), ("a", PRIORITY_SUMMARIZE), ("b", PRIORITY_ASK)])
+        self.assertEqual(order, ["b2", "a0", "a1"])
+
+    def test_guilds_take_turns(self):
+        """A guild with many queued requests doesn't hold up another guild"""
+        scheduler = GeminiScheduler(requests_per_minute=1200, max_wait=60)
+        order = run_in_order(scheduler, [("a", PRIORITY_SUMMARIZE)] * 3 + [("b", PRIORITY_SUMMARIZE)])
+        self.assertEqual(order, ["a0", "b3", "a1", "a2"])
+
+    def test_requests_within_budget_are_not_delayed(self):
+        """Requests go out immediately while the buckets have room"""
+        scheduler = GeminiScheduler(requests_per_minute=60, tokens_per_minute=1000, max_wait=60)
+
+        async def run():
+            return await asyncio.gather(*(scheduler.acquire("a", PRIORITY_SUMMARIZE, 100) for _ in range(5)))
+
+        waits = asyncio.run(run())
+        self.assertLess(max(waits), 0.05)
+        self.assertEqual(scheduler.stats()["granted"], 5)
+
+    def test_token_budget_limits_dispatch(self):
+        """A request that doesn't fit in the token bucket waits for it to refill"""
+        scheduler = GeminiScheduler(requests_per_minute=600, tokens_per_minute=6000, max_wait=60)
+
+        async def run():
+            await scheduler.acquire("a", PRIORITY_SUMMARIZE, 6000)
+            return await scheduler.acquire("a", PRIORITY_SUMMARIZE, 20)
+
+        self.assertGreater(asyncio.run(run()), 0.15)
+
+    def test_busy_error_reports_estimated_wait(self):
+        """Requests that would wait longer than max_wait are rejected with the estimated wait"""
+        scheduler = GeminiScheduler(requests_per_minute=6, max_wait=5)
+        scheduler._request_bucket.level = 0
+
+        async def run():
+            await scheduler.acquire("a", PRIORITY_ASK, 10)
+
+        with self.assertRaises(GeminiBusyError) as raised:
+            asyncio.run(run())
+        self.assertAlmostEqual(raised.exception.estimated_wait, 10, delta=0.5)
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    def test_rate_limit_pauses_dispatch(self):
+        """After a 429 every request waits out the pause"""
+        scheduler = GeminiScheduler(requests_per_minute=6000, max_wait=60)
+
+        async def run():
+            scheduler.report_rate_limited(retry_after=0.2)
+            return await scheduler.acquire("a", PRIORITY_ASK, 10)
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.19)
+        self.assertEqual(scheduler.stats()["rate_limited"], 1)
+
+    def test_cancelled_request_leaves_queue(self):
+        """A waiter that is cancelled doesn't count towards queue depth or block others"""
+        scheduler = GeminiScheduler(requests_per_minute=1200, max_wait=60)
+
+        async def run():
+            scheduler._request_bucket.level = 0
+            waiting = asyncio.ensure_future(scheduler.acquire("a", PRIORITY_SUMMARIZE, 10))
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.stats()["queue_depth_by_priority"], {"ask": 0, "summarize": 1})
+            waiting.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.stats()["queue_depth"], 0)
+            await scheduler.acquire("b", PRIORITY_SUMMARIZE, 10)
+
+        asyncio.run(run())
+        self.assertEqual(scheduler.stats()["granted"], 1)
+
+    def test_stats_can_be_read_from_another_thread(self):
+        """stats() from the API thread doesn't race the loop mutating the queues"""
+        scheduler = GeminiScheduler(requests_per_minute=6000, max_wait=60)
+        errors = []
+        done = threading.Event()
+
+        def read_stats():
+            while not done.is_set():
+                try:
+                    scheduler.stats()
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        async def run():
+            scheduler._request_bucket.level = 0
+            await asyncio.gather(*(scheduler.acquire(f"g{index % 7}", index % 2, 10) for index in range(200)))
+
+        reader = threading.Thread(target=read_stats)
+        reader.start()
+        try:
+            asyncio.run(run())
+        finally:
+            done.set()
+            reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(scheduler.stats()["granted"], 200)
+
+    def test_request_scope(self):
+        """The request scope is restored after the block"""
+        with request_scope("guild", PRIORITY_ASK):
+            self.assertEqual(current_request(), ("guild", PRIORITY_ASK))
+        self.assertEqual(current_request(), ("", PRIORITY_SUMMARIZE))
+
+    def test_is_rate_limit_error(self):
+        self.assertTrue(is_rate_limit_error(SimpleNamespace(code=429)))
+        self.assertTrue(is_rate_limit_error(Exception("429 RESOURCE_EXHAUSTED")))
+        self.assertFalse(is_rate_limit_error(Exception("500 INTERNAL")))
+
+
+class TestServiceScheduling(unittest.TestCase):
+    """Test that the service sends its Gemini requests through the scheduler"""
+
+    def setUp(self):
+        self.service = SummarizerService()
+        self.service.scheduler = GeminiScheduler(requests_per_minute=60, max_wait=5)
+        self.requests = []
+
+        async def generate_content(model, contents, **kwargs):
+            self.requests.append(current_request())
+            return SimpleNamespace(text="Answer [c1]")
+
+        self.service.gemini_client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+        self.messages = [{
+            "author": {"name": "alice"},
+            "content": "hello",
+            "timestamp": "2025-05-15T10:00:00+00:00",
+            "jump_url": "https://discord.com/channels/1/2/3"
+        }]
+
+    def test_requests_carry_guild_and_priority(self):
+        """answer_question and generate_summary are scheduled for their guild at their priority"""
+        asyncio.run(self.service.answer_question(self.messages, "what?", "24h", "u", "c", "guild-1"))
+        asyncio.run(self.service.generate_summary(self.messages, "24h", "u", "c", guild_id="guild-2"))
+        self.assertEqual(self.requests, [("guild-1", PRIORITY_ASK), ("guild-2", PRIORITY_SUMMARIZE)])
+        self.assertEqual(self.service.get_scheduler_stats()["granted"], 2)
+
+    def test_busy_error_reaches_caller(self):
+        """A rejected request is raised instead of being turned into a fallback answer"""
+        self.service.scheduler._request_bucket.level = -600
+
+        with self.assertRaises(GeminiBusyError):
+            asyncio.run(self.service.answer_question(self.messages, "what?", "24h", "u", "c", "guild-1"))
+        self.assertEqual(self.requests, [])
+        self.assertGreater(self.service.estimate_queue_wait("ask"), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
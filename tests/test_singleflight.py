@@ -0,0 +1,157 @@
+import unittest
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.singleflight import SingleFlight
+from modules.summarizer.service import SummarizerService
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for single-flight request coalescing"""
+
+    def test_concurrent_calls_share_one_run(self):
+        """Callers with the same key await one task and share its result"""
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return {"summary": "x"}
+
+        async def run():
+            return await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(runs), 1)
+        self.assertEqual([shared for _, shared in results], [False, True, True, True, True])
+        self.assertTrue(all(result is results[0][0] for result, _ in results))
+        self.assertEqual(flights.stats(), {"executed": 1, "coalesced": 4, "in_flight": 0})
+
+    def test_different_keys_run_separately(self):
+        """Only identical requests are coalesced"""
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(flights.do("a", work), flights.do("b", work))
+
+        asyncio.run(run())
+        self.assertEqual(len(runs), 2)
+
+    def test_finished_requests_are_not_reused(self):
+        """A request that arrives after the first one finished runs again"""
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            return len(runs)
+
+        async def run():
+            first = await flights.do("key", work)
+            second = await flights.do("key", work)
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), ((1, False), (2, False)))
+
+    def test_errors_reach_every_caller(self):
+        """A failing run raises for every caller that joined it"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota exceeded")
+
+        async def run():
+            return await asyncio.gather(flights.do("key", work), flights.do("key", work), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertFalse(flights.in_flight("key"))
+
+    def test_cancelled_caller_does_not_cancel_shared_run(self):
+        """Other callers still get the result when the first caller is cancelled"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flights.do("key", work))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(flights.do("key", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), ("done", True))
+
+    def test_progress_reaches_every_waiting_caller(self):
+        """Callers that join late get the progress published after they joined"""
+        flights = SingleFlight()
+        seen = {"first": [], "second": []}
+
+        def listener(name):
+            async def receive(kind, text):
+                seen[name].append((kind, text))
+            return receive
+
+        async def failing_listener(kind, text):
+            raise RuntimeError("interaction expired")
+
+        async def work():
+            await flights.publish("key", "status", "searching")
+            await asyncio.sleep(0.02)
+            await flights.publish("key", "text", "partial")
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flights.do("key", work, listener("first")))
+            await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(flights.do("key", work, listener("second")))
+            third = asyncio.ensure_future(flights.do("key", work, failing_listener))
+            return await asyncio.gather(first, second, third)
+
+        results = asyncio.run(run())
+        self.assertEqual([result for result, _ in results], ["done", "done", "done"])
+        self.assertEqual(seen["first"], [("status", "searching"), ("text", "partial")])
+        self.assertEqual(seen["second"], [("text", "partial")])
+        self.assertEqual(flights._listeners, {})
+
+
+class TestRequestKey(unittest.TestCase):
+    """Test cases for SummarizerService.request_key"""
+
+    def setUp(self):
+        self.service = SummarizerService()
+        self.start = datetime(2024, 5, 1, 12, 0, 10, tzinfo=timezone.utc)
+
+    def test_nearby_windows_share_a_key(self):
+        """Requests seconds apart resolve to the same key"""
+        self.assertEqual(
+            self.service.request_key("summarize", "1", self.start, None),
+            self.service.request_key("summarize", "1", self.start + timedelta(seconds=20), None)
+        )
+
+    def test_key_components(self):
+        """Channel, command type and question all distinguish requests"""
+        base = self.service.request_key("ask", "1", self.start, None, "What happened?")
+        self.assertEqual(base, self.service.request_key("ask", "1", self.start, None, "what  happened?"))
+        self.assertNotEqual(base, self.service.request_key("ask", "1", self.start, None, "Who won?"))
+        self.assertNotEqual(base, self.service.request_key("ask", "2", self.start, None, "What happened?"))
+        self.assertNotEqual(base, self.service.request_key("summarize", "1", self.start, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import discord
+from summarizer_support import FakeModels, gemini_client, make_messages, summarizer_service
+from modules.summarizer.discord_modules.streaming import StreamingEmbedWriter, STREAM_CURSOR
+
+
+class FakeMessage:
+    """Stand-in for an ephemeral WebhookMessage"""
+
+    def __init__(self):
+        self.embeds = []
+        self.deleted = False
+
+    async def edit(self, content=None, embed=None, view=None):
+        self.embeds.append(embed)
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed=None, ephemeral=False, view=None):
+        message = FakeMessage()
+        message.embeds.append(embed)
+        self.sent.append(message)
+        return message
+
+
+class TestStreamingGeneration(unittest.TestCase):
+    """Test cases for streamed Gemini responses in SummarizerService"""
+
+    def setUp(self):
+        self.service = summarizer_service()
+
+    def use_models(self, models):
+        self.service.gemini_client = gemini_client(models)
+
+    def test_progress_receives_formatted_text(self):
+        """Each chunk reports the text so far, with citations already linked"""
+        models = FakeModels("# Conversation Summary ✨\n- first point [c1]\n- second point [c2]")
+        self.use_models(models)
+        progress = []
+
+        async def on_progress(text):
+            progress.append(text)
+
+        result = asyncio.run(self.service.generate_summary(make_messages(3), "24h", "u", "c", "g", on_progress=on_progress))
+
+        self.assertEqual(len(progress), 3)
+        self.assertTrue(progress[1].endswith("[1](https://discord.com/channels/1/2/1000)\n"))
+        self.assertEqual(progress[-1], result["summary"])
+        self.assertEqual([request.streamed for request in models.requests], [True])
+
+    def test_failed_stream_falls_back_to_regular_request(self):
+        """An interrupted stream is retried as a regular request"""
+        models = FakeModels("# Answer\n- yes [c1]", fail_after=1)
+        self.use_models(models)
+
+        async def on_progress(text):
+            pass
+
+        result = asyncio.run(self.service.answer_question(make_messages(2), "who?", "24h", "u", "c", "g", on_progress=on_progress))
+        self.assertEqual([request.streamed for request in models.requests], [True, False])
+        self.assertIn("[1](https://discord.com/channels/1/2/1000)", result["answer"])
+
+    def test_progress_errors_do_not_stop_generation(self):
+        """A failing progress callback (e.g. a Discord error) doesn't lose the response"""
+        self.use_models(FakeModels("# Conversation Summary ✨\n- point [c1]"))
+
+        async def on_progress(text):
+            raise RuntimeError("rate limited")
+
+        result = asyncio.run(self.service.generate_summary(make_messages(2), "24h", "u", "c", "g", on_progress=on_progress))
+        self.assertIn("point", result["summary"])
+
+    def test_long_answers_are_split(self):
+        """Answers over the embed limit are split like summaries"""
+        self.use_models(FakeModels("# Answer\n\n" + ("word " * 300 + "\n\n") * 4))
+        result = asyncio.run(self.service.answer_question(make_messages(2), "who?", "24h", "u", "c", "g"))
+        self.assertTrue(result["is_split"])
+        self.assertLessEqual(len(result["answer"]), 4000)
+
+
+class TestStreamingEmbedWriter(unittest.TestCase):
+    """Test cases for progressive embed edits"""
+
+    def setUp(self):
+        self.service = summarizer_service()
+        self.followup = FakeFollowup()
+        self.first_message = FakeMessage()
+        self.writer = StreamingEmbedWriter(
+            SimpleNamespace(followup=self.followup),
+            self.first_message,
+            title_for_part=lambda index: f"Part {index + 1}",
+            color=discord.Color.blue(),
+            split_text=self.service.split_response,
+            min_interval=60
+        )
+
+    def test_edits_are_throttled(self):
+        """Updates inside the interval are held back until the next flush"""
+        async def run():
+            await self.writer.update("one")
+            await self.writer.update("one two")
+            await self.writer.update("one two three")
+        asyncio.run(run())
+
+        self.assertEqual(len(self.first_message.embeds), 1)
+        self.assertEqual(self.first_message.embeds[0].description, "one" + STREAM_CURSOR)
+
+        asyncio.run(self.writer.flush())
+        self.assertEqual(self.first_message.embeds[-1].description, "one two three" + STREAM_CURSOR)
+
+    def test_continuation_opened_past_embed_limit(self):
+        """Text past the embed limit opens a continuation message; the full part loses the cursor"""
+        text = ("a" * 3000 + "\n\n") * 2
+        asyncio.run(self.writer.update(text))
+
+        self.assertEqual(len(self.followup.sent), 1)
+        self.assertFalse(self.first_message.embeds[-1].description.endswith(STREAM_CURSOR))
+        self.assertEqual(self.followup.sent[0].embeds[-1].title, "Part 2")
+
+    def test_final_continuations_reuse_and_prune_messages(self):
+        """Final continuation embeds edit streamed messages and delete the ones no longer needed"""
+        self.writer.min_interval = 0
+        asyncio.run(self.writer.update(("a" * 3000 + "\n\n") * 3))
+        self.assertEqual(len(self.followup.sent), 2)
+
+        final = [discord.Embed(title="Final part 2", description="rest")]
+        asyncio.run(self.writer.send_continuations(final))
+
+        self.assertEqual(self.followup.sent[0].embeds[-1].title, "Final part 2")
+        self.assertTrue(self.followup.sent[1].deleted)
+        self.assertEqual(len(self.writer.continuation_messages), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import asyncio
+import sys
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from summarizer_support import FakeModels, make_messages, summarizer_service
+from modules.summarizer.summary_cache import SummaryCache, make_cache_key
+
+
+class TestSummaryCache(unittest.TestCase):
+    """Test cases for the two-tier summary cache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_hit_and_miss_counters(self):
+        """Lookups are counted as hits or misses"""
+        cache = SummaryCache()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", {"summary": "x"})
+        self.assertEqual(cache.get("a"), {"summary": "x"})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_returned_entries_are_copies(self):
+        """Callers can modify returned results without corrupting the cache"""
+        cache = SummaryCache()
+        cache.set("a", {"summary": "x"})
+        cache.get("a")["summary"] = "changed"
+        self.assertEqual(cache.get("a")["summary"], "x")
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when the cache is full"""
+        cache = SummaryCache(maxsize=2)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_ttl_expiry(self):
+        """Entries expire after the TTL"""
+        cache = SummaryCache(ttl=1)
+        cache.set("a", {"v": 1})
+        time.sleep(1.1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_survives_restart(self):
+        """Entries written to the disk tier are found by a new cache instance"""
+        url = f"sqlite:///{os.path.join(self.tmp_dir, 'cache.db')}"
+        SummaryCache(disk_url=url).set("a", {"summary": "x"})
+
+        restarted = SummaryCache(disk_url=url)
+        self.assertEqual(restarted.get("a"), {"summary": "x"})
+        self.assertEqual(restarted.stats()["disk_hits"], 1)
+        # The entry was promoted to memory
+        restarted.get("a")
+        self.assertEqual(restarted.stats()["memory_hits"], 1)
+
+    def test_cache_key_is_stable(self):
+        """Identical components give identical keys; any change gives a new key"""
+        self.assertEqual(make_cache_key("c", 1, None), make_cache_key("c", 1, None))
+        self.assertNotEqual(make_cache_key("c", 1, None), make_cache_key("c", 2, None))
+
+
+class TestSummaryCaching(unittest.TestCase):
+    """Test cases for summary caching in SummarizerService.generate_summary"""
+
+    def setUp(self):
+        self.models = FakeModels()
+        self.service = summarizer_service(self.models)
+        self.window_start = datetime.now(timezone.utc) - timedelta(days=7)
+
+    def summarize(self, messages, window_start=None, duration="last week"):
+        return asyncio.run(self.service.generate_summary(
+            messages, duration, "u", "chan", "g",
+            window_start=window_start or self.window_start
+        ))
+
+    def test_repeat_request_is_served_from_cache(self):
+        """A second identical request skips Gemini but still reports stats"""
+        first = self.summarize(make_messages(5))
+        second = self.summarize(make_messages(5), duration="the past week")
+
+        self.assertEqual(len(self.models.requests), 1)
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["summary"], first["summary"])
+        self.assertEqual(second["message_count"], 5)
+        self.assertIn("completion_time", second)
+        self.assertEqual(second["duration"], "the past week")
+        self.assertEqual(self.service.get_cache_stats()["hits"], 1)
+
+    def test_window_start_is_normalized(self):
+        """Requests a few seconds apart hit the same entry"""
+        start = datetime(2024, 5, 1, 12, 0, 10, tzinfo=timezone.utc)
+        self.summarize(make_messages(5), window_start=start)
+        self.summarize(make_messages(5), window_start=start + timedelta(seconds=30))
+        self.assertEqual(len(self.models.requests), 1)
+
+    def test_new_message_invalidates(self):
+        """A new highest message ID produces a fresh summary"""
+        self.summarize(make_messages(5))
+        self.summarize(make_messages(6))
+        self.assertEqual(len(self.models.requests), 2)
+
+    def test_api_errors_are_not_cached(self):
+        """The API error fallback is never cached"""
+        self.models.fail = True
+        self.summarize(make_messages(3))
+        self.models.fail = False
+        result = self.summarize(make_messages(3))
+        self.assertFalse(result["cached"])
+        self.assertNotIn("API error", result["summary"])
+
+    def test_no_window_no_cache(self):
+        """Callers that don't pass a window bypass the cache"""
+        asyncio.run(self.service.generate_summary(make_messages(3), "24h", "u", "chan", "g"))
+        asyncio.run(self.service.generate_summary(make_messages(3), "24h", "u", "chan", "g"))
+        self.assertEqual(len(self.models.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path to import modules properly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.summarizer.time_parsers import (
+    get_parser_registry, TimeExpressionDispatcher, DurationFormatParser,
+    WeekdayRangeParser, MonthNameParser, DefaultParser
+)
+
+PHRASES = [
+    "today", "yesterday", "this week", "last week", "this month", "last month", "this year",
+    "24h", "3d", "1w", "12H", "january", "May", "last march", "last december",
+    "monday", "Sunday", "last friday", "previous tuesday", "this wednesday",
+    "monday to friday", "from last wednesday to friday", "friday to monday",
+    "january to march", "last december to february", "from may through july",
+    "2024-01-01 to 2024-01-31", "from 2023-12-01 until 2024-02-15",
+    "3 days ago", "a week ago", "two months ago", "1 year ago",
+    "past week", "what happened in the past month", "past 24 hours",
+    "whenever", "", "next tuesday", "mayday", "last mayhem to june", "24hours"
+]
+
+
+def brute_force(parsers, text, reference_date):
+    """The registry loop the dispatcher replaced"""
+    for parser in parsers:
+        if parser.can_parse(text):
+            result = parser.parse_date_range(text, reference_date)
+            if result:
+                return result
+    return None
+
+
+class TestTimeExpressionDispatcher(unittest.TestCase):
+    """Test cases for the compiled time-expression dispatcher"""
+
+    def test_matches_registry_order(self):
+        """The dispatcher picks the same result as trying every parser in order"""
+        references = [
+            datetime(2025, 5, 15, 9, 30, tzinfo=timezone.utc),
+            datetime(2025, 5, 15, 18, 0, tzinfo=timezone.utc),
+            datetime(2024, 1, 1, 0, 5, tzinfo=timezone.utc),
+            datetime(2024, 2, 29, 23, 59, tzinfo=timezone.utc),
+        ]
+        for reference_date in references:
+            dispatcher = TimeExpressionDispatcher(get_parser_registry())
+            parsers = get_parser_registry()
+            for text in PHRASES:
+                self.assertEqual(
+                    dispatcher.parse_date_range(text, reference_date),
+                    brute_force(parsers, text, reference_date),
+                    f"Result differs for {text!r} at {reference_date}"
+                )
+
+    def test_routes_by_keyword(self):
+        """Only parsers whose keywords appear are tried, in registry order"""
+        dispatcher = TimeExpressionDispatcher(get_parser_registry())
+        self.assertEqual([type(p) for p in dispatcher.candidates("24h")], [DurationFormatParser, DefaultParser])
+        names = [type(p).__name__ for p in dispatcher.candidates("monday to friday")]
+        self.assertEqual(names, ["WeekdayNameParser", "RelativeWeekdayParser", "WeekdayRangeParser", "DefaultParser"])
+        self.assertEqual([type(p) for p in dispatcher.candidates("whenever")], [DefaultParser])
+
+    def test_day_aligned_results_are_memoized(self):
+        """Day-aligned results are reused for any time on the same day"""
+        dispatcher = TimeExpressionDispatcher(get_parser_registry())
+        morning = datetime(2025, 5, 15, 8, 0, tzinfo=timezone.utc)
+        first = dispatcher.parse_date_range("last march", morning)
+        second = dispatcher.parse_date_range("last march", morning + timedelta(hours=10))
+        self.assertIs(first, second)
+        self.assertEqual(dispatcher.stats()["hits"], 1)
+
+        # A new day is a new key
+        dispatcher.parse_date_range("last march", morning + timedelta(days=1))
+        self.assertEqual(dispatcher.stats()["hits"], 1)
+
+    def test_time_dependent_results_are_not_memoized(self):
+        """Durations and weekday ranges depend on the time of day and are always recomputed"""
+        dispatcher = TimeExpressionDispatcher(get_parser_registry())
+        morning = datetime(2025, 5, 15, 8, 0, tzinfo=timezone.utc)  # a Thursday
+        evening = morning + timedelta(hours=10)
+
+        self.assertNotEqual(dispatcher.parse_date_range("24h", morning), dispatcher.parse_date_range("24h", evening))
+        self.assertNotEqual(
+            dispatcher.parse_date_range("thursday to thursday", morning),
+            dispatcher.parse_date_range("thursday to thursday", evening)
+        )
+        self.assertEqual(dispatcher.stats()["hits"], 0)
+
+    def test_parsers_declare_dispatch_metadata(self):
+        """Only the default parser is tried for every text; time-dependent parsers are not cached"""
+        for parser in get_parser_registry():
+            if isinstance(parser, DefaultParser):
+                self.assertIsNone(parser.dispatch_keywords)
+            else:
+                self.assertTrue(parser.dispatch_keywords)
+        self.assertFalse(WeekdayRangeParser.day_aligned)
+        self.assertTrue(MonthNameParser.day_aligned)
+
+
+if __name__ == '__main__':
+    unittest.main()
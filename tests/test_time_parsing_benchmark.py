@@ -0,0 +1,45 @@
+import unittest
+import copy
+import sys
+import os
+
+# Add the project root (and scripts, for the benchmark harness) to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+
+from benchmark_time_parsing import build_corpus, run_benchmark, compare, percentile
+
+
+class TestTimeParsingBenchmark(unittest.TestCase):
+    """Test cases for the time parsing benchmark harness"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = run_benchmark(generated_count=20, repeat=1, warm=False)
+
+    def test_corpus_is_deterministic(self):
+        """The same seed always generates the same corpus"""
+        self.assertEqual(build_corpus(50), build_corpus(50))
+
+    def test_percentile(self):
+        """Nearest-rank percentiles"""
+        samples = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 0.5), 50.0)
+        self.assertEqual(percentile(samples, 0.99), 99.0)
+
+    def test_every_phrase_is_attributed(self):
+        """Hit counts add up to the corpus size for both entry points"""
+        for section in ("extract_timeframe_from_text", "parse_date_range"):
+            total = sum(hit["count"] for hit in self.results[section]["hits"].values())
+            self.assertEqual(total, self.results["corpus_size"])
+
+    def test_compare_flags_latency_regressions(self):
+        """A slower run fails the gate; an identical run passes"""
+        self.assertEqual(compare(self.results, self.results, tolerance=0.25), [])
+        slower = copy.deepcopy(self.results)
+        slower["parse_date_range"]["latency"]["p99_ms"] = self.results["parse_date_range"]["latency"]["p99_ms"] * 2 + 1
+        self.assertEqual(len(compare(slower, self.results, tolerance=0.25)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()